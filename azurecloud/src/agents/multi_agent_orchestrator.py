@@ -11,20 +11,25 @@ Implements a sophisticated multi-agent system with:
 
 import asyncio
 import hashlib
+import itertools
 import json
 import logging
+import re
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import Any, Callable, Optional
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 
 from azure.cosmos.aio import CosmosClient
 from azure.identity.aio import DefaultAzureCredential
 from openai import AsyncAzureOpenAI
 from pydantic import BaseModel
 
+from src.safety.ai_safety import PIIDetector
+from src.shared.usage_accounting import UsageMeter, tracked_chat, usage_scope
+
 logger = logging.getLogger(__name__)
 
 
@@ -75,6 +80,7 @@ class AgentMessage:
     correlation_id: str
     requires_response: bool = False
     priority: int = 5  # 1-10, higher is more urgent
+    in_reply_to: Optional[str] = None
 
     def to_dict(self) -> dict:
         return {
@@ -86,9 +92,25 @@ class AgentMessage:
             "timestamp": self.timestamp.isoformat(),
             "correlation_id": self.correlation_id,
             "requires_response": self.requires_response,
-            "priority": self.priority
+            "priority": self.priority,
+            "in_reply_to": self.in_reply_to
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "AgentMessage":
+        return cls(
+            id=data["id"],
+            sender=data["sender"],
+            recipient=data["recipient"],
+            message_type=MessageType(data["message_type"]),
+            content=data["content"],
+            timestamp=datetime.fromisoformat(data["timestamp"]),
+            correlation_id=data["correlation_id"],
+            requires_response=data.get("requires_response", False),
+            priority=data.get("priority", 5),
+            in_reply_to=data.get("in_reply_to")
+        )
+
 
 @dataclass
 class AgentTask:
@@ -106,6 +128,7 @@ class AgentTask:
     retries: int = 0
     max_retries: int = 3
     error: Optional[str] = None
+    usage: dict = field(default_factory=dict)
 
     def to_dict(self) -> dict:
         return {
@@ -121,7 +144,8 @@ class AgentTask:
             "timeout_seconds": self.timeout_seconds,
             "retries": self.retries,
             "max_retries": self.max_retries,
-            "error": self.error
+            "error": self.error,
+            "usage": self.usage
         }
 
 
@@ -155,6 +179,9 @@ class WorkflowPlan:
 class BaseAgent(ABC):
     """Base class for all agents in the system."""
 
+    # Inbox bound; senders block (up to the bus send timeout) when it is full
+    MAX_INBOX_SIZE = 1000
+
     def __init__(
         self,
         agent_id: str,
@@ -167,7 +194,7 @@ class BaseAgent(ABC):
         self.openai_client = openai_client
         self.model = model
         self.capabilities: list[str] = []
-        self._message_queue: asyncio.Queue = asyncio.Queue()
+        self._message_queue: asyncio.Queue = asyncio.Queue(maxsize=self.MAX_INBOX_SIZE)
 
     @abstractmethod
     async def process_task(self, task: AgentTask) -> dict:
@@ -183,6 +210,13 @@ class BaseAgent(ABC):
         """Receive a message from another agent."""
         await self._message_queue.put(message)
 
+    async def next_message(self, timeout: Optional[float] = None) -> Optional[AgentMessage]:
+        """Take the next message from the inbox, or None on timeout."""
+        try:
+            return await asyncio.wait_for(self._message_queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
     async def send_message(
         self,
         recipient: str,
@@ -205,8 +239,16 @@ class BaseAgent(ABC):
 
     def _generate_message_id(self) -> str:
         """Generate unique message ID."""
-        data = f"{self.agent_id}:{datetime.utcnow().isoformat()}"
-        return hashlib.sha256(data.encode()).hexdigest()[:16]
+        return _generate_message_id(self.agent_id)
+
+
+_message_sequence = itertools.count()
+
+
+def _generate_message_id(prefix: str) -> str:
+    """Generate a message ID that is unique even within one timestamp tick."""
+    data = f"{prefix}:{datetime.utcnow().isoformat()}:{next(_message_sequence)}"
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
 
 
 class CoordinatorAgent(BaseAgent):
@@ -326,7 +368,8 @@ Rules:
 4. Add compliance check for sensitive queries
 5. Mark high-risk tasks as checkpoints"""
 
-        response = await self.openai_client.chat.completions.create(
+        response = await tracked_chat(
+            self.openai_client,
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
@@ -416,7 +459,8 @@ Return JSON:
     "limitations": ["areas of uncertainty or missing info"]
 }}"""
 
-        response = await self.openai_client.chat.completions.create(
+        response = await tracked_chat(
+            self.openai_client,
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
@@ -535,7 +579,8 @@ Return JSON:
     "reasoning": "how you arrived at the answer"
 }}"""
 
-        response = await self.openai_client.chat.completions.create(
+        response = await tracked_chat(
+            self.openai_client,
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
@@ -603,7 +648,8 @@ class VisionAgent(BaseAgent):
         ]
 
         try:
-            response = await self.openai_client.chat.completions.create(
+            response = await tracked_chat(
+                self.openai_client,
                 model=self.model,
                 messages=messages,
                 temperature=0,
@@ -627,9 +673,32 @@ class VisionAgent(BaseAgent):
 
 
 class ComplianceAgent(BaseAgent):
-    """Agent specialized in compliance and policy checking."""
+    """
+    Agent specialized in compliance and policy checking.
+
+    In batch mode (the default) content items are screened locally for PII
+    and sensitivity markers first. Items the pre-pass clears skip the LLM;
+    the rest are packed into one structured prompt per batch. Verdicts are
+    cached by content hash.
+    """
+
+    # Terms that make the local pre-pass hand an item to the LLM
+    SENSITIVITY_MARKERS = re.compile(
+        r"\b(confidential|restricted|internal use only|secret|privileged|"
+        r"do not (?:distribute|share)|salary|password|api[ _-]?key|"
+        r"diagnosis|medical record|attorney[- ]client)\b",
+        re.IGNORECASE
+    )
 
-    def __init__(self, openai_client: AsyncAzureOpenAI, policy_engine):
+    def __init__(
+        self,
+        openai_client: AsyncAzureOpenAI,
+        policy_engine,
+        batch_mode: bool = True,
+        batch_size: int = 8,
+        max_chars_per_item: int = 1000,
+        cache_size: int = 4096
+    ):
         super().__init__(
             agent_id="compliance",
             agent_type=AgentType.COMPLIANCE,
@@ -638,16 +707,39 @@ class ComplianceAgent(BaseAgent):
         )
         self.policy_engine = policy_engine
         self.capabilities = ["pii_detection", "policy_check", "access_validation", "audit"]
+        self.batch_mode = batch_mode
+        self.batch_size = batch_size
+        self.max_chars_per_item = max_chars_per_item
+        self.cache_size = cache_size
+        self._pii_detector = PIIDetector()
+        self._verdict_cache: OrderedDict[str, dict] = OrderedDict()
 
     async def process_task(self, task: AgentTask) -> dict:
         """Check compliance of content or action."""
         content = task.input_data.get("content", "")
+        contents = task.input_data.get("contents")
         action = task.input_data.get("action", "read")
         context = task.input_data.get("context", {})
 
-        # Run compliance checks
-        checks = await self._run_compliance_checks(content, action, context)
+        if not self.batch_mode:
+            checks = await self._run_compliance_checks(content, action, context)
+            return self._item_result(checks)
+
+        items = contents if contents is not None else [content]
+        checks_per_item = await self._run_batched_compliance_checks(items, action, context)
+        results = [self._item_result(checks) for checks in checks_per_item]
 
+        if contents is None:
+            return results[0]
+
+        return {
+            "status": "success",
+            "compliant": all(r["compliant"] for r in results),
+            "items": results
+        }
+
+    @staticmethod
+    def _item_result(checks: list[dict]) -> dict:
         return {
             "status": "success",
             "compliant": all(c["passed"] for c in checks),
@@ -655,6 +747,215 @@ class ComplianceAgent(BaseAgent):
             "recommendations": [c["recommendation"] for c in checks if not c["passed"]]
         }
 
+    async def _run_batched_compliance_checks(
+        self,
+        contents: list[str],
+        action: str,
+        context: dict
+    ) -> list[list[dict]]:
+        """Run compliance checks for many content items with shared LLM calls."""
+        # Policy checks depend on the action, not the content: run once
+        policy_check = None
+        if self.policy_engine:
+            policy_result = await self._check_policies(action, context)
+            policy_check = {
+                "name": "policy_check",
+                "passed": policy_result["allowed"],
+                "details": policy_result,
+                "recommendation": policy_result.get("recommendation")
+            }
+
+        verdicts: list[Optional[dict]] = [None] * len(contents)
+        escalate: dict[str, tuple[str, dict]] = {}  # content hash -> (content, pre-pass)
+        positions: dict[str, list[int]] = defaultdict(list)
+
+        for i, content in enumerate(contents):
+            content_hash = hashlib.sha256(content.encode()).hexdigest()
+            cached = self._cache_get(content_hash)
+            if cached is not None:
+                verdicts[i] = cached
+                continue
+
+            positions[content_hash].append(i)
+            if content_hash in escalate:
+                continue
+
+            prepass = self._prepass(content)
+            if prepass["pii_types"] or prepass["markers"]:
+                escalate[content_hash] = (content, prepass)
+            else:
+                verdicts[i] = self._cleared_verdict()
+
+        if escalate:
+            hashes = list(escalate)
+            batches = [
+                hashes[i:i + self.batch_size]
+                for i in range(0, len(hashes), self.batch_size)
+            ]
+            batch_results = await asyncio.gather(*[
+                self._assess_batch([(h, *escalate[h]) for h in batch])
+                for batch in batches
+            ])
+            for results in batch_results:
+                for content_hash, verdict in results.items():
+                    # Only LLM-confirmed verdicts are cached; fallbacks retry
+                    if verdict["sensitivity"]["source"] == "llm":
+                        self._cache_put(content_hash, verdict)
+                    for i in positions[content_hash]:
+                        verdicts[i] = verdict
+
+        return [
+            self._verdict_to_checks(verdict, policy_check)
+            for verdict in verdicts
+        ]
+
+    def _prepass(self, content: str) -> dict:
+        """Local pattern screen over the full content."""
+        detected = self._pii_detector.detect(content)
+        markers = sorted({m.lower() for m in self.SENSITIVITY_MARKERS.findall(content)})
+        return {
+            "pii_types": sorted(detected),
+            "risk_level": self._pii_detector.get_severity(detected).value if detected else "none",
+            "markers": markers
+        }
+
+    @staticmethod
+    def _cleared_verdict() -> dict:
+        return {
+            "pii": {
+                "contains_pii": False,
+                "pii_types": [],
+                "locations": [],
+                "risk_level": "none",
+                "source": "prepass"
+            },
+            "sensitivity": {
+                "level": "internal",
+                "factors": ["no sensitive patterns detected"],
+                "recommendation": None,
+                "source": "prepass"
+            }
+        }
+
+    async def _assess_batch(self, items: list[tuple[str, str, dict]]) -> dict[str, dict]:
+        """Assess PII and sensitivity for several items in one LLM call."""
+        payload = [
+            {
+                "id": str(i),
+                "content": content[:self.max_chars_per_item],
+                "detected_patterns": prepass["pii_types"] + prepass["markers"]
+            }
+            for i, (_, content, prepass) in enumerate(items)
+        ]
+
+        prompt = f"""Assess each content item for PII (Personally Identifiable Information) and sensitivity.
+A local scan flagged the listed patterns; confirm or dismiss them and look for anything it missed.
+
+Items:
+{json.dumps(payload, indent=2)}
+
+Return JSON with one entry per item id:
+{{
+    "items": [
+        {{
+            "id": "item id",
+            "contains_pii": true/false,
+            "pii_types": ["list of PII types found"],
+            "risk_level": "none|low|medium|high",
+            "level": "public|internal|confidential|restricted",
+            "factors": ["factors affecting sensitivity"],
+            "recommendation": "handling recommendation if sensitive"
+        }}
+    ]
+}}"""
+
+        assessed: dict[str, dict] = {}
+        try:
+            response = await tracked_chat(
+                self.openai_client,
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+                response_format={"type": "json_object"}
+            )
+            for entry in json.loads(response.choices[0].message.content).get("items", []):
+                assessed[str(entry.get("id"))] = entry
+        except Exception as e:
+            logger.error(f"Batched compliance assessment failed: {e}")
+
+        results = {}
+        for i, (content_hash, _, prepass) in enumerate(items):
+            entry = assessed.get(str(i))
+            if entry is None:
+                # Fail closed: hold flagged content for manual review
+                results[content_hash] = {
+                    "pii": {
+                        "contains_pii": bool(prepass["pii_types"]),
+                        "pii_types": prepass["pii_types"],
+                        "locations": [],
+                        "risk_level": prepass["risk_level"],
+                        "source": "prepass"
+                    },
+                    "sensitivity": {
+                        "level": "restricted",
+                        "factors": prepass["markers"] or prepass["pii_types"],
+                        "recommendation": "Manual review required: automated assessment unavailable",
+                        "manual_review": True,
+                        "source": "prepass"
+                    }
+                }
+                continue
+
+            pii_types = sorted(set(entry.get("pii_types", [])) | set(prepass["pii_types"]))
+            results[content_hash] = {
+                "pii": {
+                    "contains_pii": bool(entry.get("contains_pii")) or bool(prepass["pii_types"]),
+                    "pii_types": pii_types,
+                    "locations": [],
+                    "risk_level": entry.get("risk_level", prepass["risk_level"]),
+                    "source": "llm"
+                },
+                "sensitivity": {
+                    "level": entry.get("level", "internal"),
+                    "factors": entry.get("factors", []),
+                    "recommendation": entry.get("recommendation"),
+                    "source": "llm"
+                }
+            }
+        return results
+
+    @staticmethod
+    def _verdict_to_checks(verdict: dict, policy_check: Optional[dict]) -> list[dict]:
+        pii_result = verdict["pii"]
+        sensitivity = verdict["sensitivity"]
+        checks = [{
+            "name": "pii_check",
+            "passed": not pii_result["contains_pii"],
+            "details": pii_result,
+            "recommendation": "Redact PII before sharing" if pii_result["contains_pii"] else None
+        }]
+        if policy_check:
+            checks.append(policy_check)
+        checks.append({
+            "name": "sensitivity_check",
+            "passed": sensitivity["level"] != "restricted",
+            "details": sensitivity,
+            "recommendation": sensitivity.get("recommendation")
+        })
+        return checks
+
+    def _cache_get(self, content_hash: str) -> Optional[dict]:
+        verdict = self._verdict_cache.get(content_hash)
+        if verdict is not None:
+            self._verdict_cache.move_to_end(content_hash)
+        return verdict
+
+    def _cache_put(self, content_hash: str, verdict: dict) -> None:
+        self._verdict_cache[content_hash] = verdict
+        self._verdict_cache.move_to_end(content_hash)
+        while len(self._verdict_cache) > self.cache_size:
+            self._verdict_cache.popitem(last=False)
+
     async def _run_compliance_checks(
         self,
         content: str,
@@ -709,7 +1010,8 @@ Return JSON:
     "risk_level": "none|low|medium|high"
 }}"""
 
-        response = await self.openai_client.chat.completions.create(
+        response = await tracked_chat(
+            self.openai_client,
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
@@ -737,7 +1039,8 @@ Return JSON:
     "recommendation": "handling recommendation if sensitive"
 }}"""
 
-        response = await self.openai_client.chat.completions.create(
+        response = await tracked_chat(
+            self.openai_client,
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
@@ -814,7 +1117,8 @@ Return JSON:
     "limitations": ["gaps or uncertainties"]
 }}"""
 
-        response = await self.openai_client.chat.completions.create(
+        response = await tracked_chat(
+            self.openai_client,
             model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
@@ -827,29 +1131,189 @@ Return JSON:
         return task_type in ["synthesis", "summarization", "response_generation"]
 
 
-class MessageBus:
-    """Message bus for inter-agent communication."""
+class MessageDeliveryError(Exception):
+    """Raised when a message cannot be delivered to its recipient."""
+
+    def __init__(self, message: str, message_id: str, recipient: str):
+        self.message = message
+        self.message_id = message_id
+        self.recipient = recipient
+        super().__init__(message)
+
+
+class MessageTransport(ABC):
+    """
+    Carries messages between MessageBus instances in different processes.
+
+    A bus hands a transport every message whose recipient is not registered
+    locally; the transport delivers inbound messages through
+    MessageBus.deliver.
+    """
+
+    @abstractmethod
+    async def attach(self, bus: "MessageBus") -> None:
+        """Start routing messages to and from a bus."""
+        pass
+
+    @abstractmethod
+    async def publish(self, origin: "MessageBus", message: AgentMessage) -> bool:
+        """Route a message to a remote bus. Returns False if no route exists."""
+        pass
+
+    @abstractmethod
+    def remote_agents(self, origin: "MessageBus") -> list[str]:
+        """Agent IDs reachable through this transport from a bus."""
+        pass
+
+    async def close(self) -> None:
+        """Release transport resources."""
+        pass
+
+
+class LocalTransport(MessageTransport):
+    """
+    In-process stand-in for a broker such as Service Bus.
+
+    Messages are serialized with to_dict/from_dict on the way through so that
+    anything which works here also survives a real wire format.
+    """
 
     def __init__(self):
+        self._buses: list["MessageBus"] = []
+
+    async def attach(self, bus: "MessageBus") -> None:
+        if bus not in self._buses:
+            self._buses.append(bus)
+
+    async def publish(self, origin: "MessageBus", message: AgentMessage) -> bool:
+        for bus in self._buses:
+            if bus is not origin and bus.has_agent(message.recipient):
+                await bus.deliver(AgentMessage.from_dict(message.to_dict()))
+                return True
+        return False
+
+    def remote_agents(self, origin: "MessageBus") -> list[str]:
+        return [
+            agent_id
+            for bus in self._buses if bus is not origin
+            for agent_id in bus.agent_ids()
+        ]
+
+
+class MessageBus:
+    """
+    Message bus for inter-agent communication.
+
+    - Each agent has a bounded inbox; senders wait up to send_timeout for
+      space before the send fails (backpressure).
+    - request() sends a message and awaits the matching reply() with a timeout.
+    - The message log is a ring buffer indexed by correlation ID.
+    - An optional transport routes messages to agents hosted by other buses.
+    """
+
+    def __init__(
+        self,
+        log_capacity: int = 10000,
+        send_timeout: float = 5.0,
+        transport: Optional[MessageTransport] = None
+    ):
         self._agents: dict[str, BaseAgent] = {}
-        self._message_log: list[AgentMessage] = []
+        self._message_log: deque[AgentMessage] = deque(maxlen=log_capacity)
+        self._log_index: dict[str, deque[AgentMessage]] = defaultdict(deque)
         self._pending_responses: dict[str, asyncio.Future] = {}
+        self.send_timeout = send_timeout
+        self.transport = transport
+        self._stats = defaultdict(int)
 
     def register(self, agent: BaseAgent) -> None:
         """Register an agent with the message bus."""
         self._agents[agent.agent_id] = agent
 
+    async def connect(self) -> None:
+        """Attach the bus to its transport, if one is configured."""
+        if self.transport:
+            await self.transport.attach(self)
+
+    def has_agent(self, agent_id: str) -> bool:
+        return agent_id in self._agents
+
+    def agent_ids(self) -> list[str]:
+        return list(self._agents)
+
     async def send(self, message: AgentMessage) -> None:
         """Send a message to an agent."""
-        self._message_log.append(message)
+        self._append_log(message)
+
+        if message.recipient in self._agents or message.in_reply_to in self._pending_responses:
+            await self.deliver(message)
+            return
+
+        if self.transport and await self.transport.publish(self, message):
+            self._stats["remote"] += 1
+            return
+
+        self._stats["undeliverable"] += 1
+        raise MessageDeliveryError(
+            f"No route to agent: {message.recipient}", message.id, message.recipient
+        )
+
+    async def deliver(self, message: AgentMessage) -> None:
+        """Deliver a message to a local agent or resolve a pending request."""
+        future = self._pending_responses.pop(message.in_reply_to, None) if message.in_reply_to else None
+        if future is not None:
+            if not future.done():
+                future.set_result(message)
+            self._stats["replies"] += 1
+            return
 
         recipient = self._agents.get(message.recipient)
-        if recipient:
-            await recipient.receive_message(message)
+        if recipient is None:
+            self._stats["undeliverable"] += 1
+            raise MessageDeliveryError(
+                f"No route to agent: {message.recipient}", message.id, message.recipient
+            )
+
+        try:
+            await asyncio.wait_for(recipient.receive_message(message), timeout=self.send_timeout)
+        except asyncio.TimeoutError:
+            self._stats["dropped"] += 1
+            raise MessageDeliveryError(
+                f"Inbox full for agent: {message.recipient}", message.id, message.recipient
+            )
+        self._stats["delivered"] += 1
 
-        if message.requires_response:
-            future = asyncio.Future()
-            self._pending_responses[message.id] = future
+    async def request(self, message: AgentMessage, timeout: float = 30.0) -> AgentMessage:
+        """Send a message and wait for the recipient's reply."""
+        message.requires_response = True
+        future = asyncio.get_running_loop().create_future()
+        self._pending_responses[message.id] = future
+
+        try:
+            await self.send(message)
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._stats["request_timeouts"] += 1
+            raise
+        finally:
+            self._pending_responses.pop(message.id, None)
+
+    async def reply(
+        self,
+        request: AgentMessage,
+        content: dict,
+        message_type: MessageType = MessageType.RESPONSE
+    ) -> None:
+        """Reply to a message sent with request()."""
+        await self.send(AgentMessage(
+            id=_generate_message_id(request.recipient),
+            sender=request.recipient,
+            recipient=request.sender,
+            message_type=message_type,
+            content=content,
+            timestamp=datetime.utcnow(),
+            correlation_id=request.correlation_id,
+            in_reply_to=request.id
+        ))
 
     async def broadcast(
         self,
@@ -859,24 +1323,59 @@ class MessageBus:
         correlation_id: str
     ) -> None:
         """Broadcast message to all agents."""
-        for agent_id in self._agents:
-            if agent_id != sender:
-                message = AgentMessage(
-                    id=hashlib.sha256(f"{sender}:{agent_id}:{datetime.utcnow().isoformat()}".encode()).hexdigest()[:16],
-                    sender=sender,
-                    recipient=agent_id,
-                    message_type=message_type,
-                    content=content,
-                    timestamp=datetime.utcnow(),
-                    correlation_id=correlation_id
-                )
-                await self.send(message)
+        recipients = list(self._agents)
+        if self.transport:
+            recipients += self.transport.remote_agents(self)
+
+        messages = [
+            AgentMessage(
+                id=_generate_message_id(f"{sender}:{agent_id}"),
+                sender=sender,
+                recipient=agent_id,
+                message_type=message_type,
+                content=content,
+                timestamp=datetime.utcnow(),
+                correlation_id=correlation_id
+            )
+            for agent_id in recipients if agent_id != sender
+        ]
+
+        results = await asyncio.gather(
+            *[self.send(m) for m in messages], return_exceptions=True
+        )
+        for message, result in zip(messages, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Broadcast to {message.recipient} failed: {result}")
 
     def get_message_log(self, correlation_id: str = None) -> list[AgentMessage]:
         """Get message log, optionally filtered by correlation ID."""
         if correlation_id:
-            return [m for m in self._message_log if m.correlation_id == correlation_id]
-        return self._message_log
+            return list(self._log_index.get(correlation_id, ()))
+        return list(self._message_log)
+
+    def get_stats(self) -> dict:
+        """Delivery counters and inbox depths."""
+        return {
+            **self._stats,
+            "pending_requests": len(self._pending_responses),
+            "logged_messages": len(self._message_log),
+            "inbox_depths": {
+                agent_id: agent._message_queue.qsize()
+                for agent_id, agent in self._agents.items()
+            }
+        }
+
+    def _append_log(self, message: AgentMessage) -> None:
+        """Append to the ring buffer, keeping the correlation index in step."""
+        if len(self._message_log) == self._message_log.maxlen:
+            evicted = self._message_log[0]
+            bucket = self._log_index.get(evicted.correlation_id)
+            if bucket:
+                bucket.popleft()
+                if not bucket:
+                    del self._log_index[evicted.correlation_id]
+        self._message_log.append(message)
+        self._log_index[message.correlation_id].append(message)
 
 
 class MultiAgentOrchestrator:
@@ -891,13 +1390,15 @@ class MultiAgentOrchestrator:
         openai_endpoint: str,
         openai_api_key: str,
         search_endpoint: str,
-        openai_api_version: str = "2024-02-15-preview"
+        openai_api_version: str = "2024-02-15-preview",
+        transport: Optional[MessageTransport] = None
     ):
         self.cosmos_endpoint = cosmos_endpoint
         self.openai_endpoint = openai_endpoint
         self.openai_api_key = openai_api_key
         self.search_endpoint = search_endpoint
         self.openai_api_version = openai_api_version
+        self.transport = transport
 
         self._cosmos_client: Optional[CosmosClient] = None
         self._openai_client: Optional[AsyncAzureOpenAI] = None
@@ -922,7 +1423,8 @@ class MultiAgentOrchestrator:
         )
 
         # Initialize message bus
-        self.message_bus = MessageBus()
+        self.message_bus = MessageBus(transport=self.transport)
+        await self.message_bus.connect()
 
         # Initialize coordinator
         self.coordinator = CoordinatorAgent(self._openai_client)
@@ -956,18 +1458,23 @@ class MultiAgentOrchestrator:
         if not self._initialized:
             await self.initialize()
 
-        # Create execution plan
-        plan = await self.coordinator.create_plan(query, tenant_id, user_id, context)
+        meter = UsageMeter(tenant_id=tenant_id, user_id=user_id)
+        with meter.activate():
+            # Create execution plan
+            with usage_scope("planning"):
+                plan = await self.coordinator.create_plan(query, tenant_id, user_id, context)
+            meter.request_id = plan.id
 
-        # Execute plan
-        result = await self._execute_plan(plan, require_approval)
+            # Execute plan
+            result = await self._execute_plan(plan, require_approval)
 
         return {
             "plan_id": plan.id,
             "query": query,
             "result": result,
             "tasks_executed": len(plan.tasks),
-            "execution_order": plan.execution_order
+            "execution_order": plan.execution_order,
+            "usage": meter.summary()
         }
 
     async def _execute_plan(
@@ -1052,16 +1559,21 @@ class MultiAgentOrchestrator:
         task.status = TaskStatus.RUNNING
 
         try:
-            result = await asyncio.wait_for(
-                agent.process_task(task),
-                timeout=task.timeout_seconds
-            )
+            with usage_scope(f"task:{task.id}"):
+                result = await asyncio.wait_for(
+                    agent.process_task(task),
+                    timeout=task.timeout_seconds
+                )
             return result
         except asyncio.TimeoutError:
             return {"error": "Task timed out", "timeout_seconds": task.timeout_seconds}
         except Exception as e:
             logger.error(f"Task {task.id} failed: {e}")
             return {"error": str(e)}
+        finally:
+            meter = UsageMeter.current()
+            if meter:
+                task.usage = meter.totals(f"task:{task.id}").to_dict()
 
     def _get_task_agent(self, plan: WorkflowPlan, task_id: str) -> str:
         """Get the agent ID for a task."""
@@ -1076,6 +1588,8 @@ class MultiAgentOrchestrator:
             await self._cosmos_client.close()
         if self._openai_client:
             await self._openai_client.close()
+        if self.transport:
+            await self.transport.close()
 
 
 # Example usage
@@ -20,6 +20,8 @@ from abc import ABC, abstractmethod
 
 from openai import AsyncAzureOpenAI
 
+from src.shared.usage_accounting import UsageMeter, tracked_chat, usage_scope
+
 
 class ToolCategory(Enum):
     """Risk category for tools."""
@@ -90,6 +92,7 @@ class PlanStep:
     status: ActionStatus = ActionStatus.PENDING
     result: Any = None
     error: str | None = None
+    usage: dict[str, Any] = field(default_factory=dict)
 
 
 @dataclass
@@ -114,6 +117,7 @@ class ExecutionResult:
     execution_time_ms: float
     cost_estimate_usd: float
     audit_log: list[dict[str, Any]]
+    usage: dict[str, Any] = field(default_factory=dict)
 
 
 class ToolRegistry:
@@ -493,12 +497,14 @@ and include a single "respond" step."""
             context=context_str if context else "No context available.",
         )
 
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.0,
-            response_format={"type": "json_object"},
-        )
+        with usage_scope("planning"):
+            response = await tracked_chat(
+                self.client,
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.0,
+                response_format={"type": "json_object"},
+            )
 
         plan_data = json.loads(response.choices[0].message.content)
 
@@ -561,6 +567,7 @@ class Executor:
             ExecutionResult with answer and audit trail
         """
         start_time = datetime.utcnow()
+        meter = UsageMeter.current() or UsageMeter(request_id=plan.plan_id)
         self.audit_log = []
         actions_taken = []
         citations = []
@@ -596,50 +603,21 @@ class Executor:
         # Execute steps in order
         step_results = {}
 
-        for step in plan.steps:
-            # Check dependencies
-            for dep_id in step.depends_on:
-                if dep_id not in step_results:
-                    step.status = ActionStatus.FAILED
-                    step.error = f"Dependency {dep_id} not completed"
-                    continue
-
-            try:
-                step.status = ActionStatus.EXECUTING
-                self._log_action("step_start", step)
-
-                if step.action == "retrieve":
-                    result = await self._execute_retrieve(step, user_context)
-
-                elif step.action == "call_tool":
-                    result = await self._execute_tool(step, user_context)
-                    actions_taken.append({
-                        "tool": step.tool_name,
-                        "inputs": step.inputs,
-                        "result": result,
-                    })
-
-                elif step.action == "analyze":
-                    result = await self._execute_analyze(step, step_results)
-
-                elif step.action == "respond":
-                    result = await self._execute_respond(step, step_results, user_context)
-                    final_answer = result.get("answer")
-                    citations = result.get("citations", [])
-
-                else:
-                    result = {"error": f"Unknown action: {step.action}"}
-
-                step.result = result
-                step.status = ActionStatus.COMPLETED
-                step_results[step.step_id] = result
-
-                self._log_action("step_complete", step, result)
+        with meter.activate():
+            for step in plan.steps:
+                with usage_scope(f"step:{step.step_id}"):
+                    await self._execute_step(
+                        step, user_context, step_results, actions_taken
+                    )
+                step.usage = meter.totals(f"step:{step.step_id}").to_dict()
 
-            except Exception as e:
-                step.status = ActionStatus.FAILED
-                step.error = str(e)
-                self._log_action("step_failed", step, error=str(e))
+        respond_results = [
+            step.result for step in plan.steps
+            if step.action == "respond" and step.status == ActionStatus.COMPLETED
+        ]
+        if respond_results:
+            final_answer = respond_results[-1].get("answer")
+            citations = respond_results[-1].get("citations", [])
 
         # Calculate timing
         end_time = datetime.utcnow()
@@ -652,10 +630,61 @@ class Executor:
             citations=citations,
             actions_taken=actions_taken,
             execution_time_ms=execution_time_ms,
-            cost_estimate_usd=self._estimate_cost(),
+            cost_estimate_usd=meter.totals().cost_usd,
             audit_log=self.audit_log,
+            usage=meter.summary(),
         )
 
+    async def _execute_step(
+        self,
+        step: PlanStep,
+        user_context: UserContext,
+        step_results: dict[str, Any],
+        actions_taken: list[dict[str, Any]],
+    ) -> None:
+        """Execute a single plan step, recording its result on the step."""
+        # Check dependencies
+        for dep_id in step.depends_on:
+            if dep_id not in step_results:
+                step.status = ActionStatus.FAILED
+                step.error = f"Dependency {dep_id} not completed"
+                continue
+
+        try:
+            step.status = ActionStatus.EXECUTING
+            self._log_action("step_start", step)
+
+            if step.action == "retrieve":
+                result = await self._execute_retrieve(step, user_context)
+
+            elif step.action == "call_tool":
+                result = await self._execute_tool(step, user_context)
+                actions_taken.append({
+                    "tool": step.tool_name,
+                    "inputs": step.inputs,
+                    "result": result,
+                })
+
+            elif step.action == "analyze":
+                result = await self._execute_analyze(step, step_results)
+
+            elif step.action == "respond":
+                result = await self._execute_respond(step, step_results, user_context)
+
+            else:
+                result = {"error": f"Unknown action: {step.action}"}
+
+            step.result = result
+            step.status = ActionStatus.COMPLETED
+            step_results[step.step_id] = result
+
+            self._log_action("step_complete", step, result)
+
+        except Exception as e:
+            step.status = ActionStatus.FAILED
+            step.error = str(e)
+            self._log_action("step_failed", step, error=str(e))
+
     async def _request_approval(
         self,
         plan: ExecutionPlan,
@@ -750,7 +779,8 @@ Analysis task: {step.inputs.get('task', 'Summarize the key findings')}
 
 Provide a concise analysis."""
 
-        response = await self.client.chat.completions.create(
+        response = await tracked_chat(
+            self.client,
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.0,
@@ -795,7 +825,8 @@ Rules:
 
 Provide your answer:"""
 
-        response = await self.client.chat.completions.create(
+        response = await tracked_chat(
+            self.client,
             model="gpt-4o",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.1,
@@ -825,11 +856,6 @@ Provide your answer:"""
             "error": error,
         })
 
-    def _estimate_cost(self) -> float:
-        """Estimate cost of execution."""
-        # Placeholder - would calculate based on token usage and tool calls
-        return 0.01 * len(self.audit_log)
-
 
 class AgentOrchestrator:
     """
@@ -869,8 +895,20 @@ class AgentOrchestrator:
         Returns:
             ExecutionResult with answer and audit trail
         """
+        meter = UsageMeter(request_id=hashlib.sha256(request.encode()).hexdigest()[:16])
+        with meter.activate():
+            return await self._process_request(request, user_context, approval_callback)
+
+    async def _process_request(
+        self,
+        request: str,
+        user_context: UserContext,
+        approval_callback: Callable[[PlanStep], Awaitable[bool]] | None,
+    ) -> ExecutionResult:
+        """Run retrieval, planning and execution under the active usage meter."""
         # Step 1: Retrieve relevant context
-        retrieval_result = await self.retriever.retrieve(request, user_context)
+        with usage_scope("retrieval"):
+            retrieval_result = await self.retriever.retrieve(request, user_context)
 
         context = [
             {
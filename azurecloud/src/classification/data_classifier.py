@@ -14,6 +14,7 @@ import hashlib
 import json
 import logging
 import re
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -21,6 +22,8 @@ from typing import Any, Optional
 
 from openai import AsyncAzureOpenAI
 
+from src.safety.pattern_scanner import PatternScanner, PatternSpec
+
 logger = logging.getLogger(__name__)
 
 
@@ -119,6 +122,7 @@ class ClassificationRulesEngine:
 
     def __init__(self):
         self.rules: list[ClassificationRule] = []
+        self._matcher: Optional[tuple[list[tuple[str, int]], Optional[PatternScanner]]] = None
         self._initialize_default_rules()
 
     def _initialize_default_rules(self):
@@ -250,17 +254,40 @@ class ClassificationRulesEngine:
         self.rules.append(rule)
         # Sort by priority descending
         self.rules.sort(key=lambda r: r.priority, reverse=True)
+        self._matcher = None
+
+    def compile(self):
+        """
+        Compile all rules into one matcher.
+
+        Keywords are checked against a single lowercased copy of the text
+        and all rule patterns go through one PatternScanner, instead of
+        lowercasing and searching once per rule.
+        """
+        keywords = [
+            (keyword, i) for i, rule in enumerate(self.rules) for keyword in rule.keywords
+        ]
+        specs = [
+            PatternSpec(name=str(i), pattern=pattern.pattern)
+            for i, rule in enumerate(self.rules)
+            for pattern in rule.patterns
+        ]
+        scanner = PatternScanner(specs) if specs else None
+        self._matcher = (keywords, scanner)
 
     def evaluate(self, text: str) -> tuple[list[ClassificationRule], int]:
         """Evaluate text against all rules."""
-        matched_rules = []
-        total_sensitivity_boost = 0
+        if self._matcher is None:
+            self.compile()
+        keywords, scanner = self._matcher
 
-        for rule in self.rules:
-            matches, match_details = rule.matches(text)
-            if matches:
-                matched_rules.append(rule)
-                total_sensitivity_boost += rule.sensitivity_boost
+        text_lower = text.lower()
+        matched = {i for keyword, i in keywords if keyword in text_lower}
+        if scanner is not None:
+            matched.update(int(name) for name in scanner.matching_names(text))
+
+        matched_rules = [rule for i, rule in enumerate(self.rules) if i in matched]
+        total_sensitivity_boost = sum(rule.sensitivity_boost for rule in matched_rules)
 
         return matched_rules, total_sensitivity_boost
 
@@ -290,33 +317,135 @@ class PIIClassifier:
     }
 
     def __init__(self):
-        self.compiled_patterns = {
-            pii_type: [re.compile(p, re.IGNORECASE) for p in patterns]
+        self.scanner = PatternScanner(
+            PatternSpec(name=pii_type.value, pattern=p)
             for pii_type, patterns in self.PATTERNS.items()
-        }
+            for p in patterns
+        )
 
     def classify(self, text: str) -> list[PIIType]:
         """Classify PII types present in text."""
-        found_types = []
-
-        for pii_type, patterns in self.compiled_patterns.items():
-            for pattern in patterns:
-                if pattern.search(text):
-                    found_types.append(pii_type)
-                    break
-
+        found = set(self.scanner.matching_names(text))
+        found_types = [pii_type for pii_type in self.PATTERNS if pii_type.value in found]
         return found_types if found_types else [PIIType.NONE]
 
 
 class LLMClassifier:
     """Uses LLM for advanced content classification."""
 
-    def __init__(self, openai_client: AsyncAzureOpenAI, model: str = "gpt-4o-mini"):
+    # Characters of each item sent in a multi-item prompt
+    BATCH_ITEM_CHARS = 1500
+
+    def __init__(
+        self,
+        openai_client: AsyncAzureOpenAI,
+        model: str = "gpt-4o-mini",
+        cache_size: int = 10000,
+    ):
         self.client = openai_client
         self.model = model
+        self.cache_size = cache_size
+        # content hash -> LLM result; failed ({}) results are not cached
+        self._cache: OrderedDict[str, dict] = OrderedDict()
+
+    def cache_key(self, text: str, context: dict = None) -> str:
+        """Content hash of the text and the context it was classified in."""
+        context_info = json.dumps(context, sort_keys=True, default=str) if context else ""
+        return hashlib.sha256(f"{context_info}\x1f{text}".encode()).hexdigest()
+
+    def get_cached(self, key: str) -> Optional[dict]:
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+        return result
+
+    def _store(self, key: str, result: dict):
+        if not result:
+            return
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
 
     async def classify(self, text: str, context: dict = None) -> dict:
         """Use LLM to classify content."""
+        key = self.cache_key(text, context)
+        cached = self.get_cached(key)
+        if cached is not None:
+            return cached
+
+        result = await self._classify(text, context)
+        self._store(key, result)
+        return result
+
+    async def classify_batch(self, texts: list[str], context: dict = None) -> list[dict]:
+        """
+        Classify several texts in one multi-item prompt.
+
+        Returns one result per text, in order; items the model leaves out
+        come back as {} like a failed single classification.
+        """
+        if not texts:
+            return []
+
+        context_info = json.dumps(context) if context else "None"
+        items = "\n\n".join(
+            f"[{i}]\n{text[:self.BATCH_ITEM_CHARS]}" for i, text in enumerate(texts)
+        )
+        prompt = f"""Classify each numbered content item for enterprise data governance.
+
+Items:
+{items}
+
+Document context:
+{context_info}
+
+Return JSON with one entry per item:
+{{
+    "items": [
+        {{
+            "index": 0,
+            "classification": "public|internal|confidential|restricted",
+            "category": "general|financial|hr|legal|technical|customer|health|security",
+            "sensitivity_score": 0-100,
+            "contains_pii": true/false,
+            "pii_types": ["basic", "sensitive", "financial", "health"],
+            "key_topics": ["list of main topics"],
+            "risk_factors": ["specific risks identified"],
+            "confidence": 0.0-1.0
+        }}
+    ]
+}}
+
+Guidelines:
+- public: Safe for anyone
+- internal: Company employees only
+- confidential: Need-to-know basis
+- restricted: Highly sensitive, limited access"""
+
+        results: list[dict] = [{} for _ in texts]
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+                response_format={"type": "json_object"}
+            )
+            payload = json.loads(response.choices[0].message.content)
+        except Exception as e:
+            logger.error(f"LLM batch classification failed: {e}")
+            return results
+
+        for item in payload.get("items", []):
+            index = item.get("index")
+            if isinstance(index, int) and 0 <= index < len(texts):
+                results[index] = {k: v for k, v in item.items() if k != "index"}
+
+        for text, result in zip(texts, results):
+            self._store(self.cache_key(text, context), result)
+        return results
+
+    async def _classify(self, text: str, context: dict = None) -> dict:
         context_info = json.dumps(context) if context else "None"
 
         prompt = f"""Classify this document content for enterprise data governance.
@@ -369,12 +498,16 @@ class DataClassificationPipeline:
         self,
         openai_client: AsyncAzureOpenAI,
         use_llm: bool = True,
-        confidence_threshold: float = 0.7
+        confidence_threshold: float = 0.7,
+        llm_batch_size: int = 20,
+        max_concurrent_llm_calls: int = 4
     ):
         self.rules_engine = ClassificationRulesEngine()
         self.pii_classifier = PIIClassifier()
         self.llm_classifier = LLMClassifier(openai_client) if use_llm else None
         self.confidence_threshold = confidence_threshold
+        self.llm_batch_size = llm_batch_size
+        self.max_concurrent_llm_calls = max_concurrent_llm_calls
 
     async def classify_document(
         self,
@@ -447,14 +580,7 @@ class DataClassificationPipeline:
         total_sensitivity = max(0, min(100, total_sensitivity))
 
         # Determine final classification
-        if total_sensitivity >= 80:
-            final_classification = ClassificationLevel.RESTRICTED
-        elif total_sensitivity >= 60:
-            final_classification = ClassificationLevel.CONFIDENTIAL
-        elif total_sensitivity >= 30:
-            final_classification = ClassificationLevel.INTERNAL
-        else:
-            final_classification = ClassificationLevel.PUBLIC
+        final_classification = self._level_for_score(total_sensitivity)
 
         # Use LLM classification if confident
         if llm_result and llm_result.get("confidence", 0) > self.confidence_threshold:
@@ -499,6 +625,74 @@ class DataClassificationPipeline:
         document_classification: ClassificationResult = None
     ) -> ClassificationResult:
         """Classify a single chunk, optionally inheriting from document."""
+        return self._classify_chunk_local(chunk_content, document_classification)
+
+    async def classify_chunks(
+        self,
+        chunks: list[str],
+        document_classification: ClassificationResult = None,
+        metadata: dict = None
+    ) -> list[ClassificationResult]:
+        """
+        Classify many chunks per call for ingestion.
+
+        Every chunk gets the rule + PII classification. Only chunks whose
+        local confidence is below the threshold (and whose document, if
+        given, was not confidently classified) are escalated to the LLM,
+        deduplicated by content, served from the content-hash cache where
+        possible, and sent in multi-item prompts of llm_batch_size.
+        """
+        results = [self._classify_chunk_local(c, document_classification) for c in chunks]
+        if not self.llm_classifier:
+            return results
+
+        # Escalated chunks, deduplicated: cache key -> (content, chunk indexes)
+        pending: dict[str, tuple[str, list[int]]] = {}
+        llm_results: dict[str, dict] = {}
+        for i, (content, result) in enumerate(zip(chunks, results)):
+            if not self._needs_llm(result, document_classification):
+                continue
+            key = self.llm_classifier.cache_key(content, metadata)
+            cached = self.llm_classifier.get_cached(key)
+            if cached is not None:
+                llm_results[key] = cached
+            elif key in pending:
+                pending[key][1].append(i)
+            else:
+                pending[key] = (content, [i])
+
+        keys = list(pending)
+        batches = [
+            keys[start:start + self.llm_batch_size]
+            for start in range(0, len(keys), self.llm_batch_size)
+        ]
+        semaphore = asyncio.Semaphore(self.max_concurrent_llm_calls)
+
+        async def run_batch(batch_keys: list[str]):
+            async with semaphore:
+                batch_results = await self.llm_classifier.classify_batch(
+                    [pending[key][0] for key in batch_keys], metadata
+                )
+            llm_results.update(zip(batch_keys, batch_results))
+
+        await asyncio.gather(*[run_batch(batch) for batch in batches])
+
+        for i, content in enumerate(chunks):
+            if not self._needs_llm(results[i], document_classification):
+                continue
+            llm_result = llm_results.get(self.llm_classifier.cache_key(content, metadata))
+            if llm_result:
+                results[i] = self._apply_llm_result(
+                    results[i], llm_result, document_classification
+                )
+        return results
+
+    def _classify_chunk_local(
+        self,
+        chunk_content: str,
+        document_classification: ClassificationResult = None
+    ) -> ClassificationResult:
+        """Rule + PII classification of a chunk, without the LLM."""
         # Quick rule-based classification for chunks
         matched_rules, sensitivity_boost = self.rules_engine.evaluate(chunk_content)
         pii_types = self.pii_classifier.classify(chunk_content)
@@ -506,11 +700,9 @@ class DataClassificationPipeline:
         # Start with document classification if available
         if document_classification:
             base_score = document_classification.sensitivity_score
-            base_classification = document_classification.classification
             base_category = document_classification.category
         else:
             base_score = 20
-            base_classification = ClassificationLevel.INTERNAL
             base_category = DataCategory.GENERAL
 
         # Adjust based on chunk content
@@ -523,34 +715,111 @@ class DataClassificationPipeline:
         chunk_sensitivity = max(0, min(100, chunk_sensitivity))
 
         # Determine chunk classification
-        if chunk_sensitivity >= 80:
-            chunk_classification = ClassificationLevel.RESTRICTED
-        elif chunk_sensitivity >= 60:
-            chunk_classification = ClassificationLevel.CONFIDENTIAL
-        elif chunk_sensitivity >= 30:
-            chunk_classification = ClassificationLevel.INTERNAL
-        else:
-            chunk_classification = ClassificationLevel.PUBLIC
-
-        # Chunk can't be less restricted than document
-        classification_order = list(ClassificationLevel)
-        if document_classification:
-            doc_level = classification_order.index(document_classification.classification)
-            chunk_level = classification_order.index(chunk_classification)
-            if chunk_level < doc_level:
-                chunk_classification = document_classification.classification
+        chunk_classification = self._no_lower_than_document(
+            self._level_for_score(chunk_sensitivity), document_classification
+        )
 
         return ClassificationResult(
             classification=chunk_classification,
             sensitivity_score=chunk_sensitivity,
             category=matched_rules[0].category if matched_rules else base_category,
             pii_types=pii_types,
-            confidence=0.8 if matched_rules else 0.6,
+            confidence=self._local_confidence(matched_rules, pii_types),
             reasons=[r.name for r in matched_rules[:3]],
             labels=[],
             requires_review=False
         )
 
+    def _apply_llm_result(
+        self,
+        result: ClassificationResult,
+        llm_result: dict,
+        document_classification: ClassificationResult = None
+    ) -> ClassificationResult:
+        """Combine a local chunk classification with an LLM result."""
+        llm_score = llm_result.get("sensitivity_score", 50)
+        llm_confidence = llm_result.get("confidence", 0.5)
+
+        # Weighted average with LLM, as for documents
+        sensitivity = int(
+            result.sensitivity_score * (1 - llm_confidence * 0.5) +
+            llm_score * (llm_confidence * 0.5)
+        )
+        sensitivity = max(0, min(100, sensitivity))
+
+        classification = self._level_for_score(sensitivity)
+        if llm_confidence > self.confidence_threshold:
+            llm_class = llm_result.get("classification", "").lower()
+            if llm_class in [c.value for c in ClassificationLevel]:
+                classification = ClassificationLevel(llm_class)
+        classification = self._no_lower_than_document(classification, document_classification)
+
+        category = result.category
+        llm_cat = (llm_result.get("category") or "").lower()
+        if llm_cat in [c.value for c in DataCategory]:
+            category = DataCategory(llm_cat)
+
+        confidence = max(result.confidence, llm_confidence)
+        return ClassificationResult(
+            classification=classification,
+            sensitivity_score=sensitivity,
+            category=category,
+            pii_types=result.pii_types,
+            confidence=confidence,
+            reasons=(result.reasons + [f"Risk: {r}" for r in llm_result.get("risk_factors", [])[:3]])[:10],
+            labels=list(llm_result.get("key_topics", [])[:3]),
+            requires_review=(
+                confidence < 0.7 or
+                classification in [ClassificationLevel.RESTRICTED, ClassificationLevel.TOP_SECRET]
+            )
+        )
+
+    @staticmethod
+    def _local_confidence(matched_rules: list[ClassificationRule], pii_types: list[PIIType]) -> float:
+        """Confidence of the rule + PII classification alone."""
+        confidence = 0.6
+        if matched_rules:
+            confidence += 0.2
+        if PIIType.NONE not in pii_types:
+            confidence += 0.1
+        return round(confidence, 2)
+
+    def _needs_llm(
+        self,
+        result: ClassificationResult,
+        document_classification: ClassificationResult = None
+    ) -> bool:
+        """Escalate only when neither the chunk nor its document is confidently classified."""
+        if result.confidence >= self.confidence_threshold:
+            return False
+        if document_classification and document_classification.confidence >= self.confidence_threshold:
+            return False
+        return True
+
+    @staticmethod
+    def _level_for_score(sensitivity: int) -> ClassificationLevel:
+        if sensitivity >= 80:
+            return ClassificationLevel.RESTRICTED
+        if sensitivity >= 60:
+            return ClassificationLevel.CONFIDENTIAL
+        if sensitivity >= 30:
+            return ClassificationLevel.INTERNAL
+        return ClassificationLevel.PUBLIC
+
+    @staticmethod
+    def _no_lower_than_document(
+        classification: ClassificationLevel,
+        document_classification: ClassificationResult = None
+    ) -> ClassificationLevel:
+        """Chunk can't be less restricted than document."""
+        if not document_classification:
+            return classification
+        classification_order = list(ClassificationLevel)
+        doc_level = classification_order.index(document_classification.classification)
+        if classification_order.index(classification) < doc_level:
+            return document_classification.classification
+        return classification
+
 
 # Example usage
 async def main():
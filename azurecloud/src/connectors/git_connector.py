@@ -1,14 +1,20 @@
 """
 Git Repository Connector
 Extracts documentation from Git repositories (Azure DevOps, GitHub, GitLab).
+
+GitHubConnector.crawl is the incremental path for large repositories:
+blobs are downloaded with bounded concurrency, last-commit metadata is
+resolved for a batch of paths per GraphQL query, and files whose blob SHA
+matches the previous crawl (GitCrawlState) are not fetched at all.
 """
 
 import asyncio
 import base64
+import json
 import logging
 import os
 import tempfile
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import AsyncIterator
@@ -36,6 +42,33 @@ class GitDocument:
     last_commit_message: str
 
 
+@dataclass
+class GitCrawlState:
+    """Blob SHAs from the previous crawl of a repository branch."""
+    repository: str
+    branch: str
+    tree_sha: str = ""
+    files: dict[str, str] = field(default_factory=dict)  # path -> blob SHA
+    deleted: list[str] = field(default_factory=list)  # paths gone since the previous crawl
+
+    def to_dict(self) -> dict:
+        return {
+            "repository": self.repository,
+            "branch": self.branch,
+            "tree_sha": self.tree_sha,
+            "files": self.files,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "GitCrawlState":
+        return cls(
+            repository=d["repository"],
+            branch=d["branch"],
+            tree_sha=d.get("tree_sha", ""),
+            files=dict(d.get("files", {})),
+        )
+
+
 class GitHubConnector:
     """Connector for GitHub repositories."""
 
@@ -48,11 +81,16 @@ class GitHubConnector:
         token: str,
         include_code_files: bool = False,
         max_file_size_kb: int = 500,
+        max_concurrency: int = 16,
+        commit_batch_size: int = 50,
     ):
         self.token = token
         self.include_code_files = include_code_files
         self.max_file_size = max_file_size_kb * 1024
+        self.max_concurrency = max_concurrency
+        self.commit_batch_size = commit_batch_size
         self.session = None
+        self.stats = {"requests": 0, "blobs": 0, "commit_batches": 0, "unchanged": 0, "failed": 0}
 
     async def __aenter__(self):
         await self.connect()
@@ -78,6 +116,7 @@ class GitHubConnector:
 
     async def _make_request(self, url: str) -> dict | list:
         """Make authenticated request to GitHub API."""
+        self.stats["requests"] += 1
         async with self.session.get(url) as response:
             if response.status == 403:
                 # Rate limited
@@ -132,18 +171,10 @@ class GitHubConnector:
             if item["type"] != "blob":
                 continue
 
-            file_path = item["path"]
-            filename = os.path.basename(file_path)
-            ext = os.path.splitext(filename)[1].lower()
-
-            # Filter by documentation files
-            is_doc = ext in self.DOC_EXTENSIONS or filename in self.CODE_DOC_FILES
-            if not is_doc and not self.include_code_files:
+            if not self._should_index(item):
                 continue
 
-            # Check file size
-            if item.get("size", 0) > self.max_file_size:
-                continue
+            file_path = item["path"]
 
             # Get file content
             content = await self._get_file_content(owner, repo, file_path, branch)
@@ -153,22 +184,222 @@ class GitHubConnector:
             # Get last commit info
             commit_info = await self._get_last_commit(owner, repo, file_path, branch)
 
-            yield GitDocument(
-                id=f"{owner}/{repo}/{file_path}@{branch}",
-                path=file_path,
-                filename=filename,
-                repository=f"{owner}/{repo}",
-                branch=branch,
-                web_url=f"https://github.com/{owner}/{repo}/blob/{branch}/{file_path}",
-                content=content,
-                content_type=self._get_content_type(ext),
-                size=item.get("size", 0),
-                sha=item["sha"],
-                last_commit_date=commit_info.get("date", datetime.now()),
-                last_commit_author=commit_info.get("author", ""),
-                last_commit_message=commit_info.get("message", ""),
+            yield self._to_document(owner, repo, branch, item, content, commit_info)
+
+    async def crawl(
+        self,
+        owner: str,
+        repo: str,
+        branch: str = "main",
+        state: GitCrawlState | None = None,
+    ) -> AsyncIterator[GitDocument]:
+        """
+        Incrementally crawl documentation files from a repository.
+
+        Yields documents for files that are new or whose blob SHA changed
+        since `state`. The state is updated as documents are yielded (and
+        state.deleted lists removed paths), so persisting it after the
+        crawl, or after an interrupted one, makes the next crawl skip
+        everything already seen. A truncated tree listing reports no
+        deletions, since files missing from it may still exist.
+        """
+        if state is None:
+            state = GitCrawlState(repository=f"{owner}/{repo}", branch=branch)
+
+        try:
+            data = await self._make_request(
+                f"{self.API_BASE}/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
+            )
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404 and branch == "main":
+                state.branch = "master"
+                async for doc in self.crawl(owner, repo, "master", state):
+                    yield doc
+                return
+            raise
+
+        if data.get("sha") and data["sha"] == state.tree_sha:
+            state.deleted = []
+            self.stats["unchanged"] += len(state.files)
+            return
+        truncated = bool(data.get("truncated"))
+        if truncated:
+            # Paths missing from a truncated listing may still exist
+            logger.warning(
+                f"Tree listing for {owner}/{repo}@{branch} was truncated; "
+                "skipping deletion detection"
             )
 
+        items = [item for item in data.get("tree", []) if item["type"] == "blob" and self._should_index(item)]
+        current = {item["path"] for item in items}
+        state.deleted = [] if truncated else [path for path in state.files if path not in current]
+        for path in state.deleted:
+            del state.files[path]
+
+        changed = [item for item in items if state.files.get(item["path"]) != item["sha"]]
+        self.stats["unchanged"] += len(items) - len(changed)
+        logger.info(
+            f"Crawling {owner}/{repo}@{branch}: {len(changed)} changed, "
+            f"{len(items) - len(changed)} unchanged, {len(state.deleted)} deleted"
+        )
+
+        slots = asyncio.Semaphore(self.max_concurrency)
+        batches = [
+            changed[i:i + self.commit_batch_size]
+            for i in range(0, len(changed), self.commit_batch_size)
+        ]
+        # Fetch the next batch while the caller consumes the current one
+        pending = asyncio.ensure_future(self._crawl_batch(owner, repo, branch, batches[0], slots)) if batches else None
+        try:
+            for i in range(len(batches)):
+                documents = await pending
+                pending = (
+                    asyncio.ensure_future(self._crawl_batch(owner, repo, branch, batches[i + 1], slots))
+                    if i + 1 < len(batches) else None
+                )
+                for doc in documents:
+                    yield doc
+                    state.files[doc.path] = doc.sha
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+        # Only a complete listing, fully crawled, lets the next crawl stop early
+        if not truncated and all(state.files.get(item["path"]) == item["sha"] for item in items):
+            state.tree_sha = data.get("sha", "")
+
+    async def _crawl_batch(
+        self,
+        owner: str,
+        repo: str,
+        branch: str,
+        items: list[dict],
+        slots: asyncio.Semaphore,
+    ) -> list[GitDocument]:
+        """Blobs and last commits for one batch of tree items."""
+        async def blob(item: dict) -> str | None:
+            async with slots:
+                return await self._get_blob(owner, repo, item["sha"], item["path"])
+
+        async def commits() -> dict[str, dict]:
+            async with slots:
+                return await self._get_last_commits(owner, repo, branch, [item["path"] for item in items])
+
+        *contents, commit_infos = await asyncio.gather(*(blob(item) for item in items), commits())
+
+        documents = []
+        for item, content in zip(items, contents):
+            if content is None:
+                self.stats["failed"] += 1
+                continue
+            documents.append(self._to_document(
+                owner, repo, branch, item, content, commit_infos.get(item["path"], {})
+            ))
+        return documents
+
+    async def _get_blob(self, owner: str, repo: str, sha: str, path: str) -> str | None:
+        """Get file content by blob SHA."""
+        url = f"{self.API_BASE}/repos/{owner}/{repo}/git/blobs/{sha}"
+
+        try:
+            data = await self._make_request(url)
+            self.stats["blobs"] += 1
+            if data.get("encoding") == "base64":
+                return base64.b64decode(data["content"]).decode("utf-8", errors="ignore")
+            return data.get("content", "")
+        except Exception as e:
+            logger.warning(f"Failed to get blob for {path}: {e}")
+            return None
+
+    async def _get_last_commits(self, owner: str, repo: str, branch: str, paths: list[str]) -> dict[str, dict]:
+        """
+        Last commit info for many paths in one GraphQL query.
+
+        Each path gets an aliased history(first: 1) connection on the
+        branch head, which replaces one REST commits call per file.
+        """
+        fields = " ".join(
+            f"f{i}: history(first: 1, path: {json.dumps(path)}) "
+            "{ nodes { committedDate message author { email } } }"
+            for i, path in enumerate(paths)
+        )
+        query = (
+            "query($owner: String!, $name: String!, $ref: String!) { "
+            "repository(owner: $owner, name: $name) { object(expression: $ref) { "
+            f"... on Commit {{ {fields} }} }} }} }}"
+        )
+
+        try:
+            data = await self._post_graphql(query, {"owner": owner, "name": repo, "ref": branch})
+            self.stats["commit_batches"] += 1
+            if data.get("errors"):
+                logger.warning(f"Commit lookup errors for {owner}/{repo}: {data['errors'][:1]}")
+            history = ((data.get("data") or {}).get("repository") or {}).get("object") or {}
+        except Exception as e:
+            logger.warning(f"Failed to get commit info for {len(paths)} paths: {e}")
+            return {}
+
+        infos = {}
+        for i, path in enumerate(paths):
+            nodes = (history.get(f"f{i}") or {}).get("nodes") or []
+            if nodes:
+                commit = nodes[0]
+                infos[path] = {
+                    "date": datetime.fromisoformat(commit["committedDate"].replace("Z", "+00:00")),
+                    "author": (commit.get("author") or {}).get("email", ""),
+                    "message": commit.get("message", "")[:200],
+                }
+        return infos
+
+    async def _post_graphql(self, query: str, variables: dict) -> dict:
+        """Make authenticated request to the GitHub GraphQL API."""
+        self.stats["requests"] += 1
+        async with self.session.post(
+            f"{self.API_BASE}/graphql", json={"query": query, "variables": variables}
+        ) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    def _should_index(self, item: dict) -> bool:
+        """Whether a tree entry is a documentation file within the size limit."""
+        filename = os.path.basename(item["path"])
+        ext = os.path.splitext(filename)[1].lower()
+
+        # Filter by documentation files
+        is_doc = ext in self.DOC_EXTENSIONS or filename in self.CODE_DOC_FILES
+        if not is_doc and not self.include_code_files:
+            return False
+
+        # Check file size
+        return item.get("size", 0) <= self.max_file_size
+
+    def _to_document(
+        self,
+        owner: str,
+        repo: str,
+        branch: str,
+        item: dict,
+        content: str,
+        commit_info: dict,
+    ) -> GitDocument:
+        file_path = item["path"]
+        filename = os.path.basename(file_path)
+        return GitDocument(
+            id=f"{owner}/{repo}/{file_path}@{branch}",
+            path=file_path,
+            filename=filename,
+            repository=f"{owner}/{repo}",
+            branch=branch,
+            web_url=f"https://github.com/{owner}/{repo}/blob/{branch}/{file_path}",
+            content=content,
+            content_type=self._get_content_type(os.path.splitext(filename)[1].lower()),
+            size=item.get("size", 0),
+            sha=item["sha"],
+            last_commit_date=commit_info.get("date", datetime.now()),
+            last_commit_author=commit_info.get("author", ""),
+            last_commit_message=commit_info.get("message", ""),
+        )
+
     async def _get_file_content(self, owner: str, repo: str, path: str, branch: str) -> str | None:
         """Get file content."""
         url = f"{self.API_BASE}/repos/{owner}/{repo}/contents/{path}?ref={branch}"
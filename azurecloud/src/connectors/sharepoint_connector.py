@@ -1,12 +1,23 @@
 """
 SharePoint/OneDrive Connector
 Uses Microsoft Graph API for document extraction from SharePoint sites and OneDrive.
+
+sync_site is delta-driven: each drive's delta token is persisted in a
+DeltaTokenStore, so a steady-state sync only reads the changes since the
+previous one. Changed files are streamed to disk by a bounded pool of
+downloads, and permissions are fetched 20 items per Graph $batch request.
+When a drive's token has expired, the drive is re-enumerated in full and
+a DeltaResync listing every live item id is yielded so callers can
+reconcile deletions they missed.
 """
 
 import asyncio
 import hashlib
+import json
 import logging
-from dataclasses import dataclass
+import os
+import tempfile
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import AsyncIterator
 
@@ -34,6 +45,48 @@ class SharePointDocument:
     parent_path: str
     content: bytes | None = None
     metadata: dict | None = None
+    local_path: str | None = None  # Set when content was streamed to disk
+
+
+@dataclass
+class DeltaResync:
+    """
+    Marker yielded by sync_site after a drive was re-enumerated in full.
+
+    A full enumeration reports no deletions, so anything indexed for the
+    drive whose id is not in item_ids was deleted while the delta token
+    was expired.
+    """
+    site_id: str
+    drive_id: str
+    item_ids: set[str] = field(default_factory=set)
+
+
+class DeltaTokenStore:
+    """
+    Graph delta tokens per (site, drive).
+
+    Kept in a JSON file when a path is given (written atomically), in
+    memory otherwise.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._tokens: dict[str, str] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._tokens = json.load(f)
+
+    def get(self, site_id: str, drive_id: str) -> str | None:
+        return self._tokens.get(f"{site_id}/{drive_id}")
+
+    def put(self, site_id: str, drive_id: str, token: str):
+        self._tokens[f"{site_id}/{drive_id}"] = token
+        if self.path:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._tokens, f)
+            os.replace(tmp_path, self.path)
 
 
 class SharePointConnector:
@@ -44,6 +97,8 @@ class SharePointConnector:
 
     GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
     SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".doc", ".pptx", ".ppt", ".xlsx", ".txt", ".md", ".html"}
+    GRAPH_BATCH_LIMIT = 20  # Requests per $batch
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 
     def __init__(
         self,
@@ -51,14 +106,18 @@ class SharePointConnector:
         client_id: str | None = None,
         batch_size: int = 100,
         max_file_size_mb: int = 50,
+        download_concurrency: int = 8,
     ):
         self.tenant_id = tenant_id
         self.client_id = client_id
         self.batch_size = batch_size
         self.max_file_size = max_file_size_mb * 1024 * 1024
+        self.download_concurrency = download_concurrency
         self.credential = None
         self.session = None
         self._token = None
+        self.stats = {"requests": 0, "downloads": 0, "bytes_downloaded": 0,
+                      "permission_batches": 0, "resyncs": 0}
 
     async def __aenter__(self):
         await self.connect()
@@ -86,15 +145,16 @@ class SharePointConnector:
         if self.credential:
             await self.credential.close()
 
-    async def _make_request(self, url: str, method: str = "GET") -> dict:
+    async def _make_request(self, url: str, method: str = "GET", json_body: dict | None = None) -> dict:
         """Make authenticated request to Graph API."""
-        async with self.session.request(method, url) as response:
+        self.stats["requests"] += 1
+        async with self.session.request(method, url, json=json_body) as response:
             if response.status == 429:
                 # Rate limited - wait and retry
                 retry_after = int(response.headers.get("Retry-After", 60))
                 logger.warning(f"Rate limited, waiting {retry_after}s")
                 await asyncio.sleep(retry_after)
-                return await self._make_request(url, method)
+                return await self._make_request(url, method, json_body)
 
             response.raise_for_status()
             return await response.json()
@@ -153,34 +213,8 @@ class SharePointConnector:
                         yield doc
 
                 # Process files
-                elif "file" in item:
-                    # Check file extension
-                    name = item.get("name", "")
-                    ext = "." + name.split(".")[-1].lower() if "." in name else ""
-
-                    if ext not in self.SUPPORTED_EXTENSIONS:
-                        continue
-
-                    # Check file size
-                    if item.get("size", 0) > self.max_file_size:
-                        logger.warning(f"Skipping large file: {name} ({item['size']} bytes)")
-                        continue
-
-                    yield SharePointDocument(
-                        id=item["id"],
-                        name=name,
-                        web_url=item.get("webUrl", ""),
-                        drive_id=drive_id,
-                        site_id=site_id,
-                        content_type=item.get("file", {}).get("mimeType", ""),
-                        size=item.get("size", 0),
-                        created_at=datetime.fromisoformat(item["createdDateTime"].replace("Z", "+00:00")),
-                        modified_at=datetime.fromisoformat(item["lastModifiedDateTime"].replace("Z", "+00:00")),
-                        created_by=item.get("createdBy", {}).get("user", {}).get("email", ""),
-                        modified_by=item.get("lastModifiedBy", {}).get("user", {}).get("email", ""),
-                        etag=item.get("eTag", ""),
-                        parent_path=item.get("parentReference", {}).get("path", ""),
-                    )
+                elif "file" in item and self._should_sync(item):
+                    yield self._to_document(item, site_id, drive_id)
 
             url = data.get("@odata.nextLink")
 
@@ -200,114 +234,304 @@ class SharePointConnector:
 
         try:
             data = await self._make_request(url)
-            permissions = []
-
-            for perm in data.get("value", []):
-                if "grantedToV2" in perm:
-                    granted = perm["grantedToV2"]
-                    if "group" in granted:
-                        permissions.append(granted["group"].get("id", ""))
-                    if "user" in granted:
-                        permissions.append(granted["user"].get("id", ""))
-
-            return permissions
+            return self._parse_permissions(data.get("value", []))
         except Exception as e:
             logger.warning(f"Could not get permissions for {doc.name}: {e}")
             return []
 
+    @staticmethod
+    def _parse_permissions(values: list[dict]) -> list[str]:
+        permissions = []
+        for perm in values:
+            if "grantedToV2" in perm:
+                granted = perm["grantedToV2"]
+                if "group" in granted:
+                    permissions.append(granted["group"].get("id", ""))
+                if "user" in granted:
+                    permissions.append(granted["user"].get("id", ""))
+        return permissions
+
+    async def attach_permissions(self, docs: list[SharePointDocument], max_retries: int = 3) -> None:
+        """
+        Fetch permissions for many documents through Graph $batch.
+
+        Stores the principal ids in doc.metadata["permissions"]. Requests
+        throttled inside a batch are retried after their Retry-After.
+        """
+        async def run_batch(chunk: list[SharePointDocument]):
+            pending = {str(i): doc for i, doc in enumerate(chunk)}
+            for attempt in range(max_retries + 1):
+                self.stats["permission_batches"] += 1
+                data = await self._make_request(f"{self.GRAPH_BASE_URL}/$batch", "POST", {"requests": [
+                    {
+                        "id": request_id,
+                        "method": "GET",
+                        "url": f"/sites/{doc.site_id}/drives/{doc.drive_id}/items/{doc.id}/permissions",
+                    }
+                    for request_id, doc in pending.items()
+                ]})
+                retry_after = 0
+                for response in data.get("responses", []):
+                    doc = pending.get(response.get("id"))
+                    if doc is None:
+                        continue
+                    status = response.get("status", 500)
+                    if status == 429 and attempt < max_retries:
+                        headers = {k.lower(): v for k, v in (response.get("headers") or {}).items()}
+                        retry_after = max(retry_after, int(headers.get("retry-after", 1)))
+                        continue
+                    del pending[response["id"]]
+                    if status == 200:
+                        values = (response.get("body") or {}).get("value", [])
+                        doc.metadata = {**(doc.metadata or {}), "permissions": self._parse_permissions(values)}
+                    else:
+                        logger.warning(f"Could not get permissions for {doc.name}: HTTP {status}")
+                        doc.metadata = {**(doc.metadata or {}), "permissions": []}
+                if not pending:
+                    return
+                await asyncio.sleep(retry_after)
+            for doc in pending.values():
+                logger.warning(f"Could not get permissions for {doc.name}: still throttled")
+                doc.metadata = {**(doc.metadata or {}), "permissions": []}
+
+        await asyncio.gather(*(
+            run_batch(docs[i:i + self.GRAPH_BATCH_LIMIT])
+            for i in range(0, len(docs), self.GRAPH_BATCH_LIMIT)
+        ))
+
+    async def download_to_file(self, doc: SharePointDocument, directory: str) -> SharePointDocument:
+        """Stream document content to a file in directory and set doc.local_path."""
+        url = f"{self.GRAPH_BASE_URL}/sites/{doc.site_id}/drives/{doc.drive_id}/items/{doc.id}/content"
+        ext = os.path.splitext(doc.name)[1].lower()
+        path = os.path.join(directory, f"{doc.drive_id}_{doc.id}".replace(os.sep, "_") + ext)
+
+        self.stats["requests"] += 1
+        async with self.session.get(url, allow_redirects=True) as response:
+            if response.status == 429:
+                retry_after = int(response.headers.get("Retry-After", 60))
+                logger.warning(f"Rate limited downloading {doc.name}, waiting {retry_after}s")
+                await asyncio.sleep(retry_after)
+                return await self.download_to_file(doc, directory)
+            response.raise_for_status()
+            # Chunks go straight to the page cache; a file is never held in memory
+            try:
+                with open(path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(self.DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        self.stats["bytes_downloaded"] += len(chunk)
+            except BaseException:
+                # Do not leave a truncated file behind
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+
+        self.stats["downloads"] += 1
+        doc.local_path = path
+        return doc
+
     async def get_delta(self, site_id: str, drive_id: str, delta_token: str | None = None) -> tuple[list[dict], str]:
         """
         Get changes since last sync using delta query.
         Returns (changes, new_delta_token).
         """
-        if delta_token:
-            url = f"{self.GRAPH_BASE_URL}/sites/{site_id}/drives/{drive_id}/root/delta?token={delta_token}"
-        else:
-            url = f"{self.GRAPH_BASE_URL}/sites/{site_id}/drives/{drive_id}/root/delta"
-
         changes = []
         new_token = None
 
+        async for items, token, _ in self._iter_delta(site_id, drive_id, delta_token):
+            changes.extend(items)
+            new_token = token or new_token
+
+        return changes, new_token
+
+    async def _iter_delta(
+        self,
+        site_id: str,
+        drive_id: str,
+        delta_token: str | None = None,
+    ) -> AsyncIterator[tuple[list[dict], str | None, bool]]:
+        """
+        Delta query pages as (items, new_delta_token, resynced).
+
+        The token is only set on the last page. An expired token (410 Gone)
+        restarts from a full enumeration; resynced is True on the pages of
+        that enumeration.
+        """
+        base_url = f"{self.GRAPH_BASE_URL}/sites/{site_id}/drives/{drive_id}/root/delta"
+        url = f"{base_url}?token={delta_token}" if delta_token else base_url
+        resynced = False
+
         while url:
-            data = await self._make_request(url)
-            changes.extend(data.get("value", []))
+            try:
+                data = await self._make_request(url)
+            except aiohttp.ClientResponseError as e:
+                if e.status == 410 and delta_token:
+                    logger.warning(f"Delta token for drive {drive_id} expired, resyncing")
+                    self.stats["resyncs"] += 1
+                    delta_token = None
+                    resynced = True
+                    url = base_url
+                    continue
+                raise
 
             # Get next page or delta link
             url = data.get("@odata.nextLink")
+            new_token = None
             if "@odata.deltaLink" in data:
                 # Extract token from delta link
                 delta_link = data["@odata.deltaLink"]
                 new_token = delta_link.split("token=")[-1] if "token=" in delta_link else None
 
-        return changes, new_token
+            yield data.get("value", []), new_token, resynced
 
     async def sync_site(
         self,
         site_id: str,
-        delta_token: str | None = None,
+        token_store: DeltaTokenStore | None = None,
         include_content: bool = True,
-    ) -> AsyncIterator[tuple[SharePointDocument, str]]:
+        include_permissions: bool = False,
+        download_dir: str | None = None,
+    ) -> AsyncIterator[tuple[SharePointDocument | DeltaResync, str]]:
         """
-        Sync all documents from a site.
-        Yields (document, action) where action is 'upsert' or 'delete'.
+        Sync changed documents from a site.
+        Yields (document, action) where action is 'upsert' or 'delete',
+        or (DeltaResync, 'resync') after a full re-enumeration.
+
+        Each drive resumes from its token in token_store (a full
+        enumeration the first time). The new token is stored once all of
+        the drive's changes have been yielded and downloaded, so an
+        interrupted sync or a failed download replays the same changes.
+        With include_content, files are streamed to download_dir (a new
+        temporary directory by default) and doc.local_path is set; the
+        caller removes them once processed.
+
+        When a drive's stored token has expired (410 Gone), the drive is
+        enumerated in full, which reports no deletions. Once that
+        enumeration has been yielded, a DeltaResync with the ids of every
+        live item in the drive follows; callers should delete indexed
+        documents of that drive whose ids it does not contain. Items whose
+        download failed are included, so they are not mistaken for deletions.
         """
+        token_store = token_store or DeltaTokenStore()
+        if include_content and download_dir is None:
+            download_dir = tempfile.mkdtemp(prefix="sharepoint-sync-")
+
         drives = await self.list_drives(site_id)
 
         for drive in drives:
             drive_id = drive["id"]
-            changes, new_token = await self.get_delta(site_id, drive_id, delta_token)
-
-            for item in changes:
-                # Check if deleted
-                if "deleted" in item:
-                    yield SharePointDocument(
-                        id=item["id"],
-                        name=item.get("name", ""),
-                        web_url="",
-                        drive_id=drive_id,
-                        site_id=site_id,
-                        content_type="",
-                        size=0,
-                        created_at=datetime.now(),
-                        modified_at=datetime.now(),
-                        created_by="",
-                        modified_by="",
-                        etag="",
-                        parent_path="",
-                    ), "delete"
-                    continue
+            new_token = None
+            complete = True
+            resync = None
+
+            async for items, token, resynced in self._iter_delta(site_id, drive_id, token_store.get(site_id, drive_id)):
+                new_token = token or new_token
+                if resynced and resync is None:
+                    resync = DeltaResync(site_id, drive_id)
+                docs = []
+
+                for item in items:
+                    # Check if deleted
+                    if "deleted" in item:
+                        yield self._deleted_document(item, site_id, drive_id), "delete"
+                        continue
 
-                # Skip folders
-                if "folder" in item:
-                    continue
+                    if resync is not None:
+                        resync.item_ids.add(item["id"])
+
+                    # Skip folders and unsupported files
+                    if "file" in item and self._should_sync(item):
+                        docs.append(self._to_document(item, site_id, drive_id))
 
-                # Check file extension
-                name = item.get("name", "")
-                ext = "." + name.split(".")[-1].lower() if "." in name else ""
+                if include_permissions and docs:
+                    await self.attach_permissions(docs)
 
-                if ext not in self.SUPPORTED_EXTENSIONS:
+                if not include_content:
+                    for doc in docs:
+                        yield doc, "upsert"
                     continue
 
-                doc = SharePointDocument(
-                    id=item["id"],
-                    name=name,
-                    web_url=item.get("webUrl", ""),
-                    drive_id=drive_id,
-                    site_id=site_id,
-                    content_type=item.get("file", {}).get("mimeType", ""),
-                    size=item.get("size", 0),
-                    created_at=datetime.fromisoformat(item["createdDateTime"].replace("Z", "+00:00")),
-                    modified_at=datetime.fromisoformat(item["lastModifiedDateTime"].replace("Z", "+00:00")),
-                    created_by=item.get("createdBy", {}).get("user", {}).get("email", ""),
-                    modified_by=item.get("lastModifiedBy", {}).get("user", {}).get("email", ""),
-                    etag=item.get("eTag", ""),
-                    parent_path=item.get("parentReference", {}).get("path", ""),
-                )
-
-                if include_content:
-                    doc = await self.download_document(doc)
-
-                yield doc, "upsert"
+                async for doc in self._download_all(docs, download_dir):
+                    if doc.local_path is None:
+                        complete = False
+                        continue
+                    yield doc, "upsert"
+
+            if resync is not None:
+                yield resync, "resync"
+
+            if new_token and complete:
+                token_store.put(site_id, drive_id, new_token)
+            elif not complete:
+                logger.warning(f"Keeping previous delta token for drive {drive_id} after failed downloads")
+
+    async def _download_all(
+        self,
+        docs: list[SharePointDocument],
+        directory: str,
+    ) -> AsyncIterator[SharePointDocument]:
+        """Download docs with bounded concurrency, yielding each as it completes."""
+        slots = asyncio.Semaphore(self.download_concurrency)
+
+        async def fetch(doc: SharePointDocument) -> SharePointDocument:
+            async with slots:
+                try:
+                    return await self.download_to_file(doc, directory)
+                except Exception as e:
+                    logger.warning(f"Failed to download {doc.name}: {e}")
+                    return doc
+
+        for next_done in asyncio.as_completed([fetch(doc) for doc in docs]):
+            yield await next_done
+
+    def _should_sync(self, item: dict) -> bool:
+        """Whether a file item has a supported extension and size."""
+        # Check file extension
+        name = item.get("name", "")
+        ext = "." + name.split(".")[-1].lower() if "." in name else ""
+
+        if ext not in self.SUPPORTED_EXTENSIONS:
+            return False
+
+        # Check file size
+        if item.get("size", 0) > self.max_file_size:
+            logger.warning(f"Skipping large file: {name} ({item['size']} bytes)")
+            return False
+
+        return True
+
+    def _to_document(self, item: dict, site_id: str, drive_id: str) -> SharePointDocument:
+        return SharePointDocument(
+            id=item["id"],
+            name=item.get("name", ""),
+            web_url=item.get("webUrl", ""),
+            drive_id=drive_id,
+            site_id=site_id,
+            content_type=item.get("file", {}).get("mimeType", ""),
+            size=item.get("size", 0),
+            created_at=datetime.fromisoformat(item["createdDateTime"].replace("Z", "+00:00")),
+            modified_at=datetime.fromisoformat(item["lastModifiedDateTime"].replace("Z", "+00:00")),
+            created_by=item.get("createdBy", {}).get("user", {}).get("email", ""),
+            modified_by=item.get("lastModifiedBy", {}).get("user", {}).get("email", ""),
+            etag=item.get("eTag", ""),
+            parent_path=item.get("parentReference", {}).get("path", ""),
+        )
+
+    def _deleted_document(self, item: dict, site_id: str, drive_id: str) -> SharePointDocument:
+        return SharePointDocument(
+            id=item["id"],
+            name=item.get("name", ""),
+            web_url="",
+            drive_id=drive_id,
+            site_id=site_id,
+            content_type="",
+            size=0,
+            created_at=datetime.now(),
+            modified_at=datetime.now(),
+            created_by="",
+            modified_by="",
+            etag="",
+            parent_path="",
+        )
 
 
 def compute_document_hash(content: bytes) -> str:
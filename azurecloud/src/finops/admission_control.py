@@ -0,0 +1,249 @@
+"""
+Pre-Request Admission Control for LLM Calls.
+
+Implements:
+- Per-tenant token buckets for LLM/embedding tokens per minute and
+  spend ($) per hour
+- Constant-time allow / degrade / deny decision before each LLM call
+- Degrade path: route to a cheaper model deployment and skip reranking
+  while a tenant is close to its limits
+- Buckets drained from CostTracker events via a tracker listener
+
+Buckets are debited with actual usage after the fact, so a bucket may go
+into debt (bounded at one capacity below zero); a tenant in debt is
+denied until the refill pays it back. An admission only checks that the
+request's estimate fits what is left; it does not reserve it.
+
+Usage:
+    controller = AdmissionController(
+        default_limits=TenantLimits(tokens_per_minute=200_000, cost_per_hour=25.0)
+    )
+    tracker.add_listener(controller.record)
+
+    decision = controller.admit("tenant-1", estimated_tokens=3000)
+    if decision.action == AdmissionAction.DENY:
+        ...  # reply 429 with decision.retry_after_s
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionAction(str, Enum):
+    """Outcome of an admission check."""
+    ALLOW = "allow"
+    DEGRADE = "degrade"
+    DENY = "deny"
+
+
+@dataclass
+class TenantLimits:
+    """
+    Rate limits for one tenant.
+
+    A limit of None is not enforced. Buckets hold burst_factor times one
+    window's allowance (a minute of tokens, an hour of spend).
+    """
+    tokens_per_minute: Optional[float] = None
+    cost_per_hour: Optional[float] = None
+    burst_factor: float = 1.0
+    # Degrade once a bucket would drop below this fraction of its capacity
+    degrade_below: float = 0.2
+
+
+@dataclass
+class AdmissionDecision:
+    """Admission outcome for one request."""
+    action: AdmissionAction
+    tenant_id: str
+    reason: str = ""
+    # Deployment to use instead of the default when degraded
+    model: Optional[str] = None
+    skip_rerank: bool = False
+    retry_after_s: float = 0.0
+    remaining: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def allowed(self) -> bool:
+        return self.action != AdmissionAction.DENY
+
+    def to_dict(self) -> dict:
+        return {
+            "action": self.action.value,
+            "tenant_id": self.tenant_id,
+            "reason": self.reason,
+            "model": self.model,
+            "skip_rerank": self.skip_rerank,
+            "retry_after_s": round(self.retry_after_s, 2),
+            "remaining": self.remaining,
+        }
+
+
+class TokenBucket:
+    """
+    Continuously refilling bucket; refill happens lazily on access.
+
+    consume() always succeeds and may leave the bucket in debt, down to
+    -capacity, since usage is only known after the call completes.
+    """
+
+    __slots__ = ("capacity", "refill_per_s", "level", "updated_at")
+
+    def __init__(self, capacity: float, refill_per_s: float, now: float):
+        self.capacity = capacity
+        self.refill_per_s = refill_per_s
+        self.level = capacity
+        self.updated_at = now
+
+    def refill(self, now: float) -> float:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.level = min(self.capacity, self.level + elapsed * self.refill_per_s)
+            self.updated_at = now
+        return self.level
+
+    def consume(self, amount: float, now: float):
+        self.refill(now)
+        self.level = max(-self.capacity, self.level - amount)
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until the bucket (as of its last refill) holds amount."""
+        deficit = amount - self.level
+        if deficit <= 0:
+            return 0.0
+        return deficit / self.refill_per_s if self.refill_per_s > 0 else float("inf")
+
+
+class AdmissionController:
+    """
+    Per-tenant admission control in front of LLM calls.
+
+    Every tenant gets a tokens/minute and a $/hour bucket from its limits
+    (or default_limits). admit() refills both buckets and compares the
+    request estimate with what is left: not enough in either bucket means
+    deny, a bucket ending up below degrade_below of its capacity means
+    degrade, anything else is allowed.
+    """
+
+    MAX_RETRY_AFTER_S = 3600.0
+
+    def __init__(
+        self,
+        default_limits: Optional[TenantLimits] = None,
+        tenant_limits: Optional[dict[str, TenantLimits]] = None,
+        degrade_model: str = "gpt-4o-mini",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.default_limits = default_limits
+        self.tenant_limits: dict[str, TenantLimits] = dict(tenant_limits or {})
+        self.degrade_model = degrade_model
+        self.clock = clock
+        self._token_buckets: dict[str, Optional[TokenBucket]] = {}
+        self._cost_buckets: dict[str, Optional[TokenBucket]] = {}
+        self._decisions = {action: 0 for action in AdmissionAction}
+
+    def set_limits(self, tenant_id: str, limits: TenantLimits):
+        """Set a tenant's limits; its buckets restart full."""
+        self.tenant_limits[tenant_id] = limits
+        self._token_buckets.pop(tenant_id, None)
+        self._cost_buckets.pop(tenant_id, None)
+
+    def limits_for(self, tenant_id: str) -> Optional[TenantLimits]:
+        return self.tenant_limits.get(tenant_id, self.default_limits)
+
+    def admit(
+        self,
+        tenant_id: str,
+        estimated_tokens: float = 0,
+        estimated_cost: float = 0.0,
+    ) -> AdmissionDecision:
+        """Decide whether a request may issue its LLM calls."""
+        now = self.clock()
+        tokens, cost = self._buckets(tenant_id, now)
+        limits = self.limits_for(tenant_id)
+        remaining = {}
+        action = AdmissionAction.ALLOW
+        reasons = []
+        retry_after = 0.0
+
+        for name, bucket, estimate in (
+            ("tokens_per_minute", tokens, estimated_tokens),
+            ("cost_per_hour", cost, estimated_cost),
+        ):
+            if bucket is None:
+                continue
+            level = bucket.refill(now)
+            remaining[name] = round(level, 6)
+            # Debt always denies, even for zero-estimate requests; an estimate
+            # above capacity only needs a full bucket
+            needed = min(max(estimate, 1e-9), bucket.capacity)
+            if level < needed:
+                action = AdmissionAction.DENY
+                reasons.append(f"{name} exhausted")
+                retry_after = max(retry_after, bucket.wait_time(needed))
+            elif level - estimate < bucket.capacity * limits.degrade_below:
+                if action == AdmissionAction.ALLOW:
+                    action = AdmissionAction.DEGRADE
+                reasons.append(f"{name} low")
+
+        self._decisions[action] += 1
+        if action == AdmissionAction.DENY:
+            logger.warning(f"Admission denied for tenant {tenant_id}: {', '.join(reasons)}")
+        degraded = action == AdmissionAction.DEGRADE
+        return AdmissionDecision(
+            action=action,
+            tenant_id=tenant_id,
+            reason=", ".join(reasons),
+            model=self.degrade_model if degraded else None,
+            skip_rerank=degraded,
+            retry_after_s=min(retry_after, self.MAX_RETRY_AFTER_S),
+            remaining=remaining,
+        )
+
+    def record_usage(self, tenant_id: str, tokens: float = 0, cost: float = 0.0):
+        """Debit a tenant's buckets with actual usage."""
+        now = self.clock()
+        token_bucket, cost_bucket = self._buckets(tenant_id, now)
+        if token_bucket is not None and tokens:
+            token_bucket.consume(tokens, now)
+        if cost_bucket is not None and cost:
+            cost_bucket.consume(cost, now)
+
+    def record(self, event: Any):
+        """CostTracker listener: debit the buckets from a CostEvent."""
+        tokens = event.quantity if event.unit == "tokens" else 0
+        self.record_usage(event.tenant_id, tokens, event.total_cost)
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "tenants": len(self._token_buckets),
+            "decisions": {action.value: count for action, count in self._decisions.items()},
+        }
+
+    def _buckets(self, tenant_id: str, now: float) -> tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+        if tenant_id not in self._token_buckets:
+            limits = self.limits_for(tenant_id)
+            self._token_buckets[tenant_id] = self._new_bucket(
+                limits.tokens_per_minute if limits else None, 60, limits, now
+            )
+            self._cost_buckets[tenant_id] = self._new_bucket(
+                limits.cost_per_hour if limits else None, 3600, limits, now
+            )
+        return self._token_buckets[tenant_id], self._cost_buckets[tenant_id]
+
+    @staticmethod
+    def _new_bucket(
+        rate: Optional[float],
+        window_s: float,
+        limits: Optional[TenantLimits],
+        now: float,
+    ) -> Optional[TokenBucket]:
+        if rate is None:
+            return None
+        return TokenBucket(capacity=rate * limits.burst_factor, refill_per_s=rate / window_s, now=now)
@@ -0,0 +1,372 @@
+"""
+Time-Bucketed Cost Ledger
+
+Implements:
+- Pre-aggregated rollups by minute, hour and day, keyed by
+  tenant x model x category (plus hour and day rollups by tenant x user
+  for top-user reports)
+- Compact per-bucket storage: series ids, costs, quantities and counts
+  in typed arrays instead of one object per event
+- Bounded ring buffer of raw events, optionally spilling evicted events
+  to SQLite on disk
+- Range queries that touch O(buckets) instead of O(events)
+
+A range is covered greedily by the coarsest aligned buckets that fit:
+minutes up to the first hour boundary, hours up to the first day
+boundary, whole days, then hours and minutes again at the tail. Ranges
+are resolved to whole minutes; the minutes containing start and end are
+included. Finer buckets older than their retention fall back to the
+enclosing coarser bucket.
+
+Naive datetimes are treated as UTC, matching datetime.utcnow() used by
+CostTracker.
+"""
+
+import logging
+import sqlite3
+from array import array
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any, Iterator, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+RESOLUTIONS = (DAY, HOUR, MINUTE)
+
+
+def to_epoch(ts: datetime) -> float:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+class RollupBucket:
+    """Aggregates for one time bucket, one slot per series seen in it."""
+
+    __slots__ = ("index", "series", "cost", "quantity", "count")
+
+    def __init__(self):
+        self.index: dict[int, int] = {}
+        self.series = array("I")
+        self.cost = array("d")
+        self.quantity = array("d")
+        self.count = array("I")
+
+    def add(self, series_id: int, cost: float, quantity: float):
+        slot = self.index.get(series_id)
+        if slot is None:
+            self.index[series_id] = len(self.series)
+            self.series.append(series_id)
+            self.cost.append(cost)
+            self.quantity.append(quantity)
+            self.count.append(1)
+        else:
+            self.cost[slot] += cost
+            self.quantity[slot] += quantity
+            self.count[slot] += 1
+
+
+class RollupStore:
+    """
+    Minute, hour and day buckets over interned series keys.
+
+    The first element of a series key is its partition (the tenant); each
+    time bucket keeps one RollupBucket per partition so tenant-scoped
+    queries only touch that tenant's series. retention maps a resolution
+    to how long its buckets are kept, in seconds; None keeps them forever.
+    Resolutions missing from retention are not tracked at all.
+    """
+
+    def __init__(self, retention: dict[int, Optional[float]]):
+        self.retention = retention
+        self.resolutions = [res for res in RESOLUTIONS if res in retention]
+        self.series_keys: list[tuple] = []
+        self._series_ids: dict[tuple, int] = {}
+        self._buckets: dict[int, dict[int, dict[str, RollupBucket]]] = {res: {} for res in self.resolutions}
+        self._horizon: dict[int, float] = {res: float("-inf") for res in self.resolutions}
+
+    def series_id(self, key: tuple) -> int:
+        series_id = self._series_ids.get(key)
+        if series_id is None:
+            series_id = len(self.series_keys)
+            self._series_ids[key] = series_id
+            self.series_keys.append(key)
+        return series_id
+
+    def add(self, epoch: float, key: tuple, cost: float, quantity: float):
+        series_id = self.series_id(key)
+        partition = key[0]
+        for res in self.resolutions:
+            start = int(epoch // res) * res
+            partitions = self._buckets[res].get(start)
+            if partitions is None:
+                partitions = self._buckets[res][start] = {}
+            bucket = partitions.get(partition)
+            if bucket is None:
+                bucket = partitions[partition] = RollupBucket()
+            bucket.add(series_id, cost, quantity)
+
+    def get(self, res: int, start: int, partition: Optional[str] = None) -> list[RollupBucket]:
+        """The bucket's per-partition rollups, or only one partition's."""
+        partitions = self._buckets[res].get(start)
+        if not partitions:
+            return []
+        if partition is None:
+            return list(partitions.values())
+        bucket = partitions.get(partition)
+        return [bucket] if bucket is not None else []
+
+    def is_expired(self, res: int, start: int) -> bool:
+        """True if the bucket is past retention or its resolution is not tracked."""
+        return res not in self._horizon or start < self._horizon[res]
+
+    def prune(self, now_epoch: float) -> int:
+        """Drop buckets past their retention; returns the number dropped."""
+        dropped = 0
+        for res, keep_s in self.retention.items():
+            if keep_s is None:
+                continue
+            horizon = int((now_epoch - keep_s) // res) * res
+            self._horizon[res] = max(self._horizon[res], horizon)
+            buckets = self._buckets[res]
+            for start in [s for s in buckets if s < horizon]:
+                del buckets[start]
+                dropped += 1
+        return dropped
+
+    def bucket_count(self) -> int:
+        return sum(len(p) for buckets in self._buckets.values() for p in buckets.values())
+
+
+def plan_buckets(start_epoch: float, end_epoch: float) -> list[tuple[int, int]]:
+    """
+    Cover [start, end] with the fewest aligned (resolution, bucket_start)
+    pairs, resolved to whole minutes.
+    """
+    t = int(start_epoch // MINUTE) * MINUTE
+    stop = int(end_epoch // MINUTE) * MINUTE + MINUTE
+    pieces = []
+    while t < stop:
+        for res in RESOLUTIONS:
+            if t % res == 0 and t + res <= stop:
+                pieces.append((res, t))
+                t += res
+                break
+    return pieces
+
+
+class CostLedger:
+    """
+    Rollup ledger behind CostTracker.
+
+    Every recorded event updates the minute/hour/day buckets of two
+    stores: (tenant, model, category) for cost breakdowns and
+    (tenant, user) for top users. Raw events are kept only in a bounded
+    ring buffer; with spill_path set, events evicted from it are written
+    to a SQLite file.
+    """
+
+    SPILL_BATCH = 1000
+    PRUNE_INTERVAL_S = HOUR
+
+    def __init__(
+        self,
+        raw_capacity: int = 100_000,
+        spill_path: Optional[str] = None,
+        minute_retention_s: float = 2 * DAY,
+        hour_retention_s: float = 90 * DAY,
+    ):
+        self.usage = RollupStore({MINUTE: minute_retention_s, HOUR: hour_retention_s, DAY: None})
+        # Top users need no minute precision; range edges round out to hours
+        self.users = RollupStore({HOUR: hour_retention_s, DAY: None})
+        self.recent: deque = deque(maxlen=raw_capacity)
+        self.spill_path = spill_path
+        self._spill_conn: Optional[sqlite3.Connection] = None
+        self._spill_pending: list[tuple] = []
+        self._next_prune = float("-inf")
+        self.total_events = 0
+        self.spilled_events = 0
+
+    def record(self, event: Any):
+        """Add a CostEvent to the rollups and the raw ring buffer."""
+        epoch = to_epoch(event.timestamp)
+        self.usage.add(
+            epoch,
+            (event.tenant_id, event.model, event.category.value),
+            event.total_cost,
+            event.quantity,
+        )
+        self.users.add(epoch, (event.tenant_id, event.user_id), event.total_cost, event.quantity)
+
+        if len(self.recent) == self.recent.maxlen and self.spill_path:
+            self._spill(self.recent[0])
+        self.recent.append(event)
+        self.total_events += 1
+
+        if epoch >= self._next_prune:
+            self.usage.prune(epoch)
+            self.users.prune(epoch)
+            self._next_prune = epoch + self.PRUNE_INTERVAL_S
+
+    def query(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        tenant_id: Optional[str] = None,
+        top_users: int = 10,
+    ) -> dict[str, Any]:
+        """
+        Aggregate cost over a range from the rollups.
+
+        Returns total_cost, event_count, by_category, by_tenant, by_model
+        and top_users.
+        """
+        by_category: dict[str, float] = defaultdict(float)
+        by_tenant: dict[str, float] = defaultdict(float)
+        by_model: dict[str, float] = defaultdict(float)
+        by_user: dict[str, float] = defaultdict(float)
+        total_cost = 0.0
+        event_count = 0
+
+        keys = self.usage.series_keys
+        for bucket in self._buckets_for(self.usage, start_time, end_time, tenant_id):
+            for series_id, cost, count in zip(bucket.series, bucket.cost, bucket.count):
+                tenant, model, category = keys[series_id]
+                total_cost += cost
+                event_count += count
+                by_category[category] += cost
+                by_tenant[tenant] += cost
+                by_model[model] += cost
+
+        user_keys = self.users.series_keys
+        for bucket in self._buckets_for(self.users, start_time, end_time, tenant_id):
+            for series_id, cost in zip(bucket.series, bucket.cost):
+                by_user[user_keys[series_id][1]] += cost
+
+        return {
+            "total_cost": total_cost,
+            "event_count": event_count,
+            "by_category": dict(by_category),
+            "by_tenant": dict(by_tenant),
+            "by_model": dict(by_model),
+            "top_users": sorted(by_user.items(), key=lambda x: x[1], reverse=True)[:top_users],
+        }
+
+    def query_by_tenant(self, start_time: datetime, end_time: datetime) -> dict[str, dict[str, Any]]:
+        """
+        Per-tenant totals over a range in one pass over the rollups.
+
+        Returns {tenant: {total_cost, event_count, by_category, by_model}}.
+        """
+        tenants: dict[str, dict[str, Any]] = {}
+        keys = self.usage.series_keys
+        for bucket in self._buckets_for(self.usage, start_time, end_time):
+            for series_id, cost, count in zip(bucket.series, bucket.cost, bucket.count):
+                tenant, model, category = keys[series_id]
+                totals = tenants.get(tenant)
+                if totals is None:
+                    totals = tenants[tenant] = {
+                        "total_cost": 0.0,
+                        "event_count": 0,
+                        "by_category": defaultdict(float),
+                        "by_model": defaultdict(float),
+                    }
+                totals["total_cost"] += cost
+                totals["event_count"] += count
+                totals["by_category"][category] += cost
+                totals["by_model"][model] += cost
+
+        for totals in tenants.values():
+            totals["by_category"] = dict(totals["by_category"])
+            totals["by_model"] = dict(totals["by_model"])
+        return tenants
+
+    def _buckets_for(
+        self,
+        store: RollupStore,
+        start_time: datetime,
+        end_time: datetime,
+        tenant_id: Optional[str] = None,
+    ) -> Iterator[RollupBucket]:
+        seen = set()
+        for res, start in plan_buckets(to_epoch(start_time), to_epoch(end_time)):
+            # Expired fine buckets fall back to the enclosing coarser one
+            while store.is_expired(res, start) and res != DAY:
+                res = HOUR if res == MINUTE else DAY
+                start = start // res * res
+            if (res, start) in seen:
+                continue
+            seen.add((res, start))
+            yield from store.get(res, start, tenant_id)
+
+    def iter_events(self, start_time: datetime, end_time: datetime) -> Iterator[dict]:
+        """Raw events in a range, from the spill file and the ring buffer."""
+        if self._spill_conn is not None:
+            self._flush_spill()
+            rows = self._spill_conn.execute(
+                "SELECT tenant_id, user_id, model, category, quantity, total_cost, ts "
+                "FROM cost_events WHERE ts BETWEEN ? AND ? ORDER BY ts",
+                (to_epoch(start_time), to_epoch(end_time)),
+            )
+            for tenant_id, user_id, model, category, quantity, total_cost, ts in rows:
+                yield {
+                    "timestamp": datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat(),
+                    "category": category,
+                    "quantity": quantity,
+                    "total_cost": total_cost,
+                    "tenant_id": tenant_id,
+                    "user_id": user_id,
+                    "model": model,
+                }
+        for event in self.recent:
+            if start_time <= event.timestamp <= end_time:
+                yield event.to_dict()
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "total_events": self.total_events,
+            "raw_events_retained": len(self.recent),
+            "spilled_events": self.spilled_events,
+            "series": len(self.usage.series_keys),
+            "buckets": self.usage.bucket_count() + self.users.bucket_count(),
+        }
+
+    def close(self):
+        if self._spill_conn is not None:
+            self._flush_spill()
+            self._spill_conn.close()
+            self._spill_conn = None
+
+    def _spill(self, event: Any):
+        if self._spill_conn is None:
+            self._spill_conn = sqlite3.connect(self.spill_path)
+            self._spill_conn.execute(
+                "CREATE TABLE IF NOT EXISTS cost_events ("
+                "ts REAL, tenant_id TEXT, user_id TEXT, model TEXT, category TEXT, "
+                "quantity REAL, total_cost REAL)"
+            )
+            self._spill_conn.execute("CREATE INDEX IF NOT EXISTS idx_cost_events_ts ON cost_events (ts)")
+        self._spill_pending.append((
+            to_epoch(event.timestamp), event.tenant_id, event.user_id, event.model,
+            event.category.value, event.quantity, event.total_cost,
+        ))
+        if len(self._spill_pending) >= self.SPILL_BATCH:
+            self._flush_spill()
+
+    def _flush_spill(self):
+        if not self._spill_pending:
+            return
+        try:
+            with self._spill_conn:
+                self._spill_conn.executemany(
+                    "INSERT INTO cost_events VALUES (?, ?, ?, ?, ?, ?, ?)", self._spill_pending
+                )
+            self.spilled_events += len(self._spill_pending)
+        except sqlite3.Error as e:
+            logger.error("Cost event spill to %s failed: %s", self.spill_path, e)
+        self._spill_pending = []
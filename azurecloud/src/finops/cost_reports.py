@@ -0,0 +1,195 @@
+"""
+Materialized Monthly Cost Reports.
+
+Implements:
+- Per-tenant, per-month aggregates maintained incrementally from
+  CostTracker events (O(1) per event)
+- Month-to-date optimizer recommendations for every tenant, recomputed
+  only for tenants whose totals changed since the last read
+- Department chargeback reports straight from the view, O(tenants)
+- Backfill of recent months from the ledger rollups in one pass
+
+Months are calendar months in UTC, keyed (year, month). Events are
+filed under the month of their own timestamp, so late events update the
+month they belong to.
+
+Usage:
+    view = CostReportView(tracker, chargeback=chargeback_service)
+    view.all_recommendations()          # {tenant_id: [recommendation, ...]}
+    view.chargeback_report((2024, 3))
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from src.finops.cost_tracker import (
+    ChargebackService,
+    CostEvent,
+    CostOptimizer,
+    CostSummary,
+    CostTracker,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+Month = tuple[int, int]
+
+
+def month_of(ts: datetime) -> Month:
+    return ts.year, ts.month
+
+
+def month_bounds(month: Month) -> tuple[datetime, datetime]:
+    """First instant of the month and the last second before the next one."""
+    year, number = month
+    start = datetime(year, number, 1)
+    next_start = datetime(year + number // 12, number % 12 + 1, 1)
+    return start, next_start - timedelta(seconds=1)
+
+
+def previous_month(month: Month) -> Month:
+    year, number = month
+    return (year, number - 1) if number > 1 else (year - 1, 12)
+
+
+class TenantMonth:
+    """Running totals for one tenant in one month."""
+
+    __slots__ = ("total_cost", "event_count", "by_category", "by_model")
+
+    def __init__(self):
+        self.total_cost = 0.0
+        self.event_count = 0
+        self.by_category: dict[str, float] = defaultdict(float)
+        self.by_model: dict[str, float] = defaultdict(float)
+
+    def add(self, category: str, model: str, cost: float):
+        self.total_cost += cost
+        self.event_count += 1
+        self.by_category[category] += cost
+        self.by_model[model] += cost
+
+
+class CostReportView:
+    """
+    Materialized view of month-to-date cost per tenant.
+
+    Subscribes to the tracker's events on construction, after backfilling
+    the most recent backfill_months months (including the current one)
+    from the ledger. Months older than months_retained are dropped.
+    """
+
+    def __init__(
+        self,
+        tracker: CostTracker,
+        chargeback: Optional[ChargebackService] = None,
+        backfill_months: int = 1,
+        months_retained: int = 13,
+        now: Optional[datetime] = None,
+    ):
+        self.tracker = tracker
+        self.chargeback = chargeback or ChargebackService(tracker)
+        self.months_retained = months_retained
+        self._months: dict[Month, dict[str, TenantMonth]] = {}
+        self._totals: dict[Month, float] = defaultdict(float)
+        self._recommendations: dict[tuple[Month, str], list[dict]] = {}
+
+        month = month_of(now or datetime.utcnow())
+        for _ in range(backfill_months):
+            self._backfill(month)
+            month = previous_month(month)
+        tracker.add_listener(self.apply)
+
+    def apply(self, event: CostEvent):
+        """Fold one event into the view; CostTracker listener."""
+        month = month_of(event.timestamp)
+        tenants = self._months.get(month)
+        if tenants is None:
+            tenants = self._months[month] = {}
+            self._prune()
+        tenant = tenants.get(event.tenant_id)
+        if tenant is None:
+            tenant = tenants[event.tenant_id] = TenantMonth()
+        tenant.add(event.category.value, event.model, event.total_cost)
+        self._totals[month] += event.total_cost
+        self._recommendations.pop((month, event.tenant_id), None)
+
+    def months(self) -> list[Month]:
+        return sorted(self._months)
+
+    def tenant_summary(self, tenant_id: str, month: Optional[Month] = None) -> Optional[CostSummary]:
+        """Month-to-date summary for a tenant, or None if it has no costs."""
+        month = month or month_of(datetime.utcnow())
+        tenant = self._months.get(month, {}).get(tenant_id)
+        if tenant is None:
+            return None
+        start, end = month_bounds(month)
+        return CostSummary(
+            period_start=start,
+            period_end=end,
+            total_cost=round(tenant.total_cost, 4),
+            by_category=dict(tenant.by_category),
+            by_tenant={tenant_id: tenant.total_cost},
+            by_model=dict(tenant.by_model),
+            event_count=tenant.event_count,
+            top_users=[],
+        )
+
+    def recommendations(self, tenant_id: str, month: Optional[Month] = None) -> list[dict]:
+        """Optimizer recommendations for a tenant's month, cached until it changes."""
+        month = month or month_of(datetime.utcnow())
+        key = (month, tenant_id)
+        cached = self._recommendations.get(key)
+        if cached is None:
+            summary = self.tenant_summary(tenant_id, month)
+            cached = CostOptimizer.recommend(summary) if summary else []
+            self._recommendations[key] = cached
+        return cached
+
+    def all_recommendations(self, month: Optional[Month] = None) -> dict[str, list[dict]]:
+        month = month or month_of(datetime.utcnow())
+        return {
+            tenant_id: self.recommendations(tenant_id, month)
+            for tenant_id in self._months.get(month, {})
+        }
+
+    def chargeback_report(self, month: Optional[Month] = None) -> dict:
+        """Department chargeback for a month, built from the view."""
+        month = month or month_of(datetime.utcnow())
+        tenants = self._months.get(month, {})
+        start, end = month_bounds(month)
+        return self.chargeback.build_report(
+            {tenant_id: tenant.total_cost for tenant_id, tenant in tenants.items()},
+            self._totals.get(month, 0.0),
+            start,
+            end,
+        )
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "months": len(self._months),
+            "tenant_months": sum(len(t) for t in self._months.values()),
+            "cached_recommendations": len(self._recommendations),
+        }
+
+    def _backfill(self, month: Month):
+        start, end = month_bounds(month)
+        tenants = self._months.setdefault(month, {})
+        for tenant_id, totals in self.tracker.ledger.query_by_tenant(start, end).items():
+            tenant = tenants[tenant_id] = TenantMonth()
+            tenant.total_cost = totals["total_cost"]
+            tenant.event_count = totals["event_count"]
+            tenant.by_category.update(totals["by_category"])
+            tenant.by_model.update(totals["by_model"])
+            self._totals[month] += totals["total_cost"]
+
+    def _prune(self):
+        for month in sorted(self._months)[:-self.months_retained]:
+            del self._months[month]
+            self._totals.pop(month, None)
+            for key in [k for k in self._recommendations if k[0] == month]:
+                del self._recommendations[key]
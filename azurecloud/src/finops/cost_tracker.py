@@ -7,7 +7,9 @@ Implements comprehensive cost tracking and optimization:
 - Cosmos DB RU tracking
 - Cost attribution by tenant/user
 - Budget alerts and forecasting
+- Event listeners for pre-request admission control
 - Cost optimization recommendations
+- Time-bucketed rollups for O(buckets) summaries
 """
 
 import asyncio
@@ -16,7 +18,9 @@ from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+
+from src.finops.cost_ledger import CostLedger
 
 logger = logging.getLogger(__name__)
 
@@ -181,11 +185,22 @@ class CostTracker:
     Tracks all cost events and provides aggregations.
     """
 
-    def __init__(self, cosmos_client=None, database_name: str = "rag_platform"):
+    def __init__(
+        self,
+        cosmos_client=None,
+        database_name: str = "rag_platform",
+        raw_event_capacity: int = 100_000,
+        spill_path: Optional[str] = None
+    ):
         self.cosmos_client = cosmos_client
         self.database_name = database_name
-        self._events: list[CostEvent] = []
-        self._hourly_cache: dict[str, dict] = {}
+        # Rollups answer summaries; raw events are kept in a bounded ring
+        self.ledger = CostLedger(raw_capacity=raw_event_capacity, spill_path=spill_path)
+        self._listeners: list[Callable[[CostEvent], None]] = []
+
+    def add_listener(self, listener: Callable[[CostEvent], None]):
+        """Call listener with every recorded event (e.g. admission control)."""
+        self._listeners.append(listener)
 
     def track_llm_usage(
         self,
@@ -216,8 +231,7 @@ class CostTracker:
             }
         )
 
-        self._events.append(event)
-        self._update_cache(event)
+        self._record(event)
         return event
 
     def track_embedding_usage(
@@ -245,8 +259,7 @@ class CostTracker:
             metadata={"batch_size": batch_size}
         )
 
-        self._events.append(event)
-        self._update_cache(event)
+        self._record(event)
         return event
 
     def track_search_usage(
@@ -273,8 +286,7 @@ class CostTracker:
             operation=query_type
         )
 
-        self._events.append(event)
-        self._update_cache(event)
+        self._record(event)
         return event
 
     def track_cosmos_usage(
@@ -301,29 +313,22 @@ class CostTracker:
             operation=operation
         )
 
-        self._events.append(event)
-        self._update_cache(event)
+        self._record(event)
         return event
 
-    def _update_cache(self, event: CostEvent):
-        """Update hourly cache for fast aggregations."""
-        hour_key = event.timestamp.strftime("%Y-%m-%d-%H")
-
-        if hour_key not in self._hourly_cache:
-            self._hourly_cache[hour_key] = {
-                "total": 0,
-                "by_category": defaultdict(float),
-                "by_tenant": defaultdict(float),
-                "by_model": defaultdict(float),
-                "count": 0
-            }
+    def _record(self, event: CostEvent):
+        """Add an event to the ledger rollups and notify listeners."""
+        self.ledger.record(event)
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Cost event listener failed: {e}")
 
-        cache = self._hourly_cache[hour_key]
-        cache["total"] += event.total_cost
-        cache["by_category"][event.category.value] += event.total_cost
-        cache["by_tenant"][event.tenant_id] += event.total_cost
-        cache["by_model"][event.model] += event.total_cost
-        cache["count"] += 1
+    @property
+    def recent_events(self) -> list[CostEvent]:
+        """Raw events still held in the ledger's ring buffer."""
+        return list(self.ledger.recent)
 
     def get_summary(
         self,
@@ -331,40 +336,40 @@ class CostTracker:
         end_time: datetime,
         tenant_id: str = None
     ) -> CostSummary:
-        """Get cost summary for a period."""
-        filtered_events = [
-            e for e in self._events
-            if start_time <= e.timestamp <= end_time
-            and (tenant_id is None or e.tenant_id == tenant_id)
-        ]
-
-        by_category = defaultdict(float)
-        by_tenant = defaultdict(float)
-        by_model = defaultdict(float)
-        by_user = defaultdict(float)
-
-        total_cost = 0
-        for event in filtered_events:
-            total_cost += event.total_cost
-            by_category[event.category.value] += event.total_cost
-            by_tenant[event.tenant_id] += event.total_cost
-            by_model[event.model] += event.total_cost
-            by_user[event.user_id] += event.total_cost
-
-        # Top 10 users by cost
-        top_users = sorted(by_user.items(), key=lambda x: x[1], reverse=True)[:10]
+        """Get cost summary for a period, from pre-aggregated rollups."""
+        totals = self.ledger.query(start_time, end_time, tenant_id)
 
         return CostSummary(
             period_start=start_time,
             period_end=end_time,
-            total_cost=round(total_cost, 4),
-            by_category=dict(by_category),
-            by_tenant=dict(by_tenant),
-            by_model=dict(by_model),
-            event_count=len(filtered_events),
-            top_users=top_users
+            total_cost=round(totals["total_cost"], 4),
+            by_category=totals["by_category"],
+            by_tenant=totals["by_tenant"],
+            by_model=totals["by_model"],
+            event_count=totals["event_count"],
+            top_users=totals["top_users"]
         )
 
+    def get_tenant_summaries(
+        self,
+        start_time: datetime,
+        end_time: datetime
+    ) -> dict[str, CostSummary]:
+        """Cost summaries for every tenant in one pass over the rollups."""
+        return {
+            tenant_id: CostSummary(
+                period_start=start_time,
+                period_end=end_time,
+                total_cost=round(totals["total_cost"], 4),
+                by_category=totals["by_category"],
+                by_tenant={tenant_id: totals["total_cost"]},
+                by_model=totals["by_model"],
+                event_count=totals["event_count"],
+                top_users=[]
+            )
+            for tenant_id, totals in self.ledger.query_by_tenant(start_time, end_time).items()
+        }
+
     def get_tenant_usage(self, tenant_id: str, hours: int = 24) -> dict:
         """Get usage breakdown for a tenant."""
         end_time = datetime.utcnow()
@@ -492,6 +497,19 @@ class CostOptimizer:
         start_time = end_time - timedelta(days=days)
 
         summary = self.cost_tracker.get_summary(start_time, end_time, tenant_id)
+        return self.recommend(summary)
+
+    def analyze_all(self, days: int = 30) -> dict[str, list[dict]]:
+        """Recommendations for every tenant from a single pass over the rollups."""
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(days=days)
+
+        summaries = self.cost_tracker.get_tenant_summaries(start_time, end_time)
+        return {tenant_id: self.recommend(summary) for tenant_id, summary in summaries.items()}
+
+    @staticmethod
+    def recommend(summary: CostSummary) -> list[dict]:
+        """Recommendations for one tenant's cost summary."""
         recommendations = []
 
         # Analyze LLM usage
@@ -566,7 +584,16 @@ class ChargebackService:
     ) -> dict:
         """Generate chargeback report for all departments."""
         summary = self.cost_tracker.get_summary(start_date, end_date)
+        return self.build_report(summary.by_tenant, summary.total_cost, start_date, end_date)
 
+    def build_report(
+        self,
+        by_tenant: dict[str, float],
+        total_cost: float,
+        start_date: datetime,
+        end_date: datetime
+    ) -> dict:
+        """Chargeback report from per-tenant totals."""
         # Aggregate by department
         by_department = defaultdict(lambda: {
             "total": 0,
@@ -574,7 +601,7 @@ class ChargebackService:
             "breakdown": defaultdict(float)
         })
 
-        for tenant_id, cost in summary.by_tenant.items():
+        for tenant_id, cost in by_tenant.items():
             department = self._department_mapping.get(tenant_id, "Unassigned")
             by_department[department]["total"] += cost
             by_department[department]["tenants"].append({
@@ -587,7 +614,7 @@ class ChargebackService:
                 "start": start_date.isoformat(),
                 "end": end_date.isoformat()
             },
-            "total_cost": round(summary.total_cost, 2),
+            "total_cost": round(total_cost, 2),
             "by_department": {
                 dept: {
                     "total": round(data["total"], 2),
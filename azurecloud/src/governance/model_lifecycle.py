@@ -3,8 +3,10 @@ Model Lifecycle Manager for Enterprise RAG Platform.
 
 Implements model versioning, deployment, and evaluation:
 - Model registry with version tracking
-- Shadow evaluation before promotion
-- Canary deployment with traffic splitting
+- Shadow evaluation before promotion, with concurrent paired calls and
+  latency percentiles from streaming sketches (see shared.quantile_sketch)
+- Canary deployment with traffic splitting, routed from single-flight,
+  stale-while-revalidate routing snapshots
 - Automatic rollback on degradation
 - A/B testing framework
 """
@@ -13,6 +15,7 @@ import asyncio
 import hashlib
 import json
 import logging
+import zlib
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
@@ -24,6 +27,9 @@ from azure.identity.aio import DefaultAzureCredential
 from openai import AsyncAzureOpenAI
 from pydantic import BaseModel
 
+from src.security.identity_cache import IdentityCache
+from src.shared.quantile_sketch import DDSketch
+
 logger = logging.getLogger(__name__)
 
 
@@ -108,6 +114,8 @@ class EvaluationResult:
     passed_thresholds: dict = field(default_factory=dict)
     failed_thresholds: dict = field(default_factory=dict)
     errors: list = field(default_factory=list)
+    # Serialized DDSketch per "<side>:<metric>", mergeable across windows
+    latency_sketches: dict = field(default_factory=dict)
 
     def to_dict(self) -> dict:
         return {
@@ -121,7 +129,8 @@ class EvaluationResult:
             "sample_count": self.sample_count,
             "passed_thresholds": self.passed_thresholds,
             "failed_thresholds": self.failed_thresholds,
-            "errors": self.errors
+            "errors": self.errors,
+            "latency_sketches": self.latency_sketches
         }
 
 
@@ -288,6 +297,56 @@ class ModelRegistry:
         )
 
 
+class ShadowComparison:
+    """
+    Running candidate/baseline metrics for a shadow evaluation.
+
+    Latency metrics go into DDSketches and everything else into running
+    sums, so memory does not grow with the number of queries compared.
+    """
+
+    SIDES = ("candidate", "baseline")
+
+    def __init__(self):
+        self.sketches: dict[str, dict[str, DDSketch]] = {side: {} for side in self.SIDES}
+        self.sums: dict[str, dict[str, float]] = {side: defaultdict(float) for side in self.SIDES}
+        self.counts: dict[str, dict[str, int]] = {side: defaultdict(int) for side in self.SIDES}
+
+    def add(self, side: str, result: dict):
+        for metric, value in result.items():
+            if metric.startswith("latency"):
+                if metric not in self.sketches[side]:
+                    self.sketches[side][metric] = DDSketch()
+                self.sketches[side][metric].add(value)
+            else:
+                self.sums[side][metric] += value
+                self.counts[side][metric] += 1
+
+    def aggregate(self) -> dict:
+        aggregated = {}
+        for side in self.SIDES:
+            for metric, sketch in self.sketches[side].items():
+                aggregated[f"{metric}_{side}"] = sketch.quantile(0.5)
+                # Small windows report the max, as p99 of under 100 samples is the max anyway
+                aggregated[f"{metric}_p99_{side}"] = sketch.quantile(0.99) if sketch.count > 100 else sketch.max
+            for metric, total in self.sums[side].items():
+                aggregated[f"{metric}_{side}"] = total / self.counts[side][metric]
+
+        # Calculate comparison scores
+        if "relevance_score_candidate" in aggregated and "relevance_score_baseline" in aggregated:
+            aggregated["relevance_score"] = aggregated["relevance_score_candidate"]
+            aggregated["relevance_delta"] = (
+                aggregated["relevance_score_candidate"] - aggregated["relevance_score_baseline"]
+            )
+        return aggregated
+
+    def sketches_to_dict(self) -> dict:
+        return {
+            f"{side}:{metric}": sketch.to_dict()
+            for side in self.SIDES for metric, sketch in self.sketches[side].items()
+        }
+
+
 class ShadowEvaluator:
     """
     Runs shadow evaluation comparing new model to baseline.
@@ -299,12 +358,15 @@ class ShadowEvaluator:
         openai_client: AsyncAzureOpenAI,
         registry: ModelRegistry,
         cosmos_client: CosmosClient,
-        database_name: str
+        database_name: str,
+        max_concurrency: int = 8
     ):
         self.openai_client = openai_client
         self.registry = registry
         self.cosmos_client = cosmos_client
         self.database_name = database_name
+        # Query pairs in flight at once (each pair is two model calls)
+        self.max_concurrency = max_concurrency
 
         # Default evaluation thresholds
         self.thresholds = {
@@ -342,12 +404,14 @@ class ShadowEvaluator:
 
         try:
             # Run evaluation
-            metrics = await self._run_comparison(
+            comparison = await self._run_comparison(
                 candidate_version,
                 baseline_version,
                 sample_queries
             )
+            metrics = comparison.aggregate()
             result.metrics = metrics
+            result.latency_sketches = comparison.sketches_to_dict()
 
             # Check thresholds
             for metric_name, threshold in thresholds.items():
@@ -394,47 +458,25 @@ class ShadowEvaluator:
         candidate_version: str,
         baseline_version: str,
         sample_queries: list[dict]
-    ) -> dict:
+    ) -> ShadowComparison:
         """Run comparison between candidate and baseline."""
-        candidate_metrics = defaultdict(list)
-        baseline_metrics = defaultdict(list)
-
-        for query in sample_queries:
-            # Run both models
-            candidate_result = await self._run_query(candidate_version, query)
-            baseline_result = await self._run_query(baseline_version, query)
-
-            # Collect metrics
-            for metric, value in candidate_result.items():
-                candidate_metrics[metric].append(value)
-            for metric, value in baseline_result.items():
-                baseline_metrics[metric].append(value)
-
-        # Aggregate metrics
-        aggregated = {}
-        for metric in candidate_metrics:
-            values = candidate_metrics[metric]
-            if metric.startswith("latency"):
-                aggregated[f"{metric}_candidate"] = sorted(values)[int(len(values) * 0.5)]  # p50
-                aggregated[f"{metric}_p99_candidate"] = sorted(values)[int(len(values) * 0.99)] if len(values) > 100 else max(values)
-            else:
-                aggregated[f"{metric}_candidate"] = sum(values) / len(values)
-
-        for metric in baseline_metrics:
-            values = baseline_metrics[metric]
-            if metric.startswith("latency"):
-                aggregated[f"{metric}_baseline"] = sorted(values)[int(len(values) * 0.5)]
-            else:
-                aggregated[f"{metric}_baseline"] = sum(values) / len(values)
-
-        # Calculate comparison scores
-        if "relevance_score_candidate" in aggregated and "relevance_score_baseline" in aggregated:
-            aggregated["relevance_score"] = aggregated["relevance_score_candidate"]
-            aggregated["relevance_delta"] = (
-                aggregated["relevance_score_candidate"] - aggregated["relevance_score_baseline"]
-            )
-
-        return aggregated
+        comparison = ShadowComparison()
+        queries = iter(sample_queries)
+
+        async def worker():
+            # Workers pull queries one at a time, so a long shadow window
+            # never has more than max_concurrency pairs pending
+            for query in queries:
+                # Run both models on the same query at the same time
+                candidate_result, baseline_result = await asyncio.gather(
+                    self._run_query(candidate_version, query),
+                    self._run_query(baseline_version, query)
+                )
+                comparison.add("candidate", candidate_result)
+                comparison.add("baseline", baseline_result)
+
+        await asyncio.gather(*(worker() for _ in range(self.max_concurrency)))
+        return comparison
 
     async def _run_query(self, model_version: str, query: dict) -> dict:
         """Run a single query and collect metrics."""
@@ -800,12 +842,23 @@ class TrafficRouter:
     Implements weighted routing for canary deployments.
     """
 
-    def __init__(self, registry: ModelRegistry, canary_deployer: CanaryDeployer):
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        canary_deployer: CanaryDeployer,
+        cache_ttl_seconds: float = 30,
+        stale_ttl_seconds: float = 300
+    ):
         self.registry = registry
         self.canary_deployer = canary_deployer
-        self._routing_cache: dict[str, dict] = {}
-        self._cache_ttl_seconds = 30
-        self._cache_timestamps: dict[str, datetime] = {}
+        # One routing snapshot per model/tenant, built in full and swapped in
+        # by a single assignment. An expired snapshot keeps serving requests
+        # while exactly one refresh runs, so expiry never stalls or stampedes
+        self._routing_cache = IdentityCache(
+            max_entries=10000,
+            ttl_s=cache_ttl_seconds,
+            stale_ttl_s=stale_ttl_seconds
+        )
 
     async def get_model_for_request(
         self,
@@ -814,20 +867,16 @@ class TrafficRouter:
         request_id: str
     ) -> ModelVersion:
         """Get the appropriate model version for a request."""
-        # Check cache
         cache_key = f"{model_id}:{tenant_id}"
-        if self._is_cache_valid(cache_key):
-            routing = self._routing_cache[cache_key]
-        else:
-            routing = await self._build_routing_config(model_id, tenant_id)
-            self._routing_cache[cache_key] = routing
-            self._cache_timestamps[cache_key] = datetime.utcnow()
+        routing = await self._routing_cache.get_or_load(
+            cache_key,
+            lambda: self._build_routing_config(model_id, tenant_id)
+        )
 
         # Determine which model to use
         if routing.get("canary"):
             # Use request_id for consistent routing
-            hash_value = int(hashlib.md5(request_id.encode()).hexdigest(), 16) % 100
-            if hash_value < routing["canary"]["traffic_percentage"]:
+            if routing_bucket(request_id) < routing["canary"]["traffic_percentage"]:
                 return routing["canary"]["model"]
 
         return routing["production"]
@@ -857,14 +906,19 @@ class TrafficRouter:
 
         return config
 
-    def _is_cache_valid(self, key: str) -> bool:
-        """Check if cache entry is still valid."""
-        if key not in self._routing_cache:
-            return False
-        if key not in self._cache_timestamps:
-            return False
-        elapsed = (datetime.utcnow() - self._cache_timestamps[key]).total_seconds()
-        return elapsed < self._cache_ttl_seconds
+    def get_stats(self) -> dict:
+        return self._routing_cache.get_stats()
+
+
+def routing_bucket(request_id: str, buckets: int = 100) -> int:
+    """
+    Stable traffic bucket for a request id.
+
+    CRC32 is stable across processes (unlike hash()) and far cheaper
+    than a cryptographic digest; bucketing needs neither secrecy nor
+    collision resistance.
+    """
+    return zlib.crc32(request_id.encode()) % buckets
 
 
 class ModelLifecycleManager:
@@ -19,6 +19,9 @@ import re
 from datetime import datetime
 from abc import ABC, abstractmethod
 
+from src.safety.pattern_scanner import PatternScanner, PatternSpec
+from src.shared.audit_sink import AuditSink
+
 
 class PolicyScope(Enum):
     """Where policies are enforced."""
@@ -102,6 +105,9 @@ class PolicyEvaluationResult:
     evaluation_time_ms: float
 
 
+CompiledCondition = Callable[[dict[str, Any]], bool]
+
+
 class ConditionEvaluator:
     """
     Evaluates policy conditions safely.
@@ -111,6 +117,10 @@ class ConditionEvaluator:
     - "response.citation_count < 1"
     - "cost.tokens_used > 10000"
     - "user.clearance_level not in ['restricted', 'confidential']"
+
+    Conditions are compiled once into closures over context.data and cached
+    by condition string; evaluate() and the compiled form give identical
+    results.
     """
 
     # Safe operators
@@ -127,8 +137,23 @@ class ConditionEvaluator:
         'matches': lambda a, b: bool(re.search(b, a)) if isinstance(a, str) else False,
     }
 
+    def __init__(self):
+        self._compiled: dict[str, CompiledCondition] = {}
+
+    def compile(self, condition: str) -> CompiledCondition:
+        """Compile a condition into a predicate over context data (cached)."""
+        compiled = self._compiled.get(condition)
+        if compiled is None:
+            compiled = self._compile(condition)
+            self._compiled[condition] = compiled
+        return compiled
+
     def evaluate(self, condition: str, context: PolicyContext) -> bool:
         """Evaluate a condition expression against context."""
+        return self.compile(condition)(context.data)
+
+    def evaluate_uncompiled(self, condition: str, context: PolicyContext) -> bool:
+        """Parse and evaluate a condition without the compile cache."""
         try:
             # Parse condition
             parsed = self._parse_condition(condition)
@@ -147,6 +172,78 @@ class ConditionEvaluator:
         except Exception:
             return False
 
+    def _compile(self, condition: str) -> CompiledCondition:
+        """Build a predicate closure for a condition."""
+        try:
+            parsed = self._parse_condition(condition)
+        except Exception:
+            parsed = None
+        if not parsed or parsed['operator'] not in self.OPERATORS:
+            return lambda data: False
+
+        left = self._compile_value(parsed['left'])
+        right = self._compile_value(parsed['right'])
+        operator = parsed['operator']
+        op = self.OPERATORS[operator]
+
+        if operator == 'matches' and getattr(right, 'is_literal', False):
+            try:
+                pattern = re.compile(right({}))
+            except (re.error, TypeError):
+                return lambda data: False
+
+            def op(a, _b, _search=pattern.search):
+                return bool(_search(a)) if isinstance(a, str) else False
+
+        def predicate(data: dict[str, Any]) -> bool:
+            try:
+                return op(left(data), right(data))
+            except Exception:
+                return False
+
+        return predicate
+
+    def _compile_value(self, expr: str) -> Callable[[dict[str, Any]], Any]:
+        """Compile an operand into a getter; mirrors _resolve_value."""
+        expr = expr.strip()
+        lowered = expr.lower()
+
+        def constant(value: Any) -> Callable[[dict[str, Any]], Any]:
+            def getter(data: dict[str, Any]) -> Any:
+                return value
+            getter.is_literal = True
+            return getter
+
+        if lowered == 'true':
+            return constant(True)
+        if lowered == 'false':
+            return constant(False)
+        if expr.startswith('"') or expr.startswith("'"):
+            return constant(expr[1:-1])
+        if expr.startswith('[') and expr.endswith(']'):
+            return constant([i.strip().strip('"\'') for i in expr[1:-1].split(',')])
+        try:
+            return constant(int(expr))
+        except ValueError:
+            pass
+        try:
+            return constant(float(expr))
+        except ValueError:
+            pass
+
+        parts = tuple(expr.split('.'))
+
+        def resolve(data: dict[str, Any]) -> Any:
+            value = data
+            for part in parts:
+                if isinstance(value, dict):
+                    value = value.get(part)
+                else:
+                    return None
+            return value
+
+        return resolve
+
     def _parse_condition(self, condition: str) -> dict | None:
         """Parse a condition string into components."""
         # Handle 'not in' first
@@ -320,32 +417,50 @@ class PolicyStore:
         ),
     ]
 
-    def __init__(self, cosmos_client: Any = None):
+    def __init__(self, cosmos_client: Any = None, evaluator: ConditionEvaluator | None = None):
         self.cosmos_client = cosmos_client
+        self.evaluator = evaluator or ConditionEvaluator()
         self._policies: dict[str, PolicyRule] = {}
+        self._compiled: dict[str, CompiledCondition] = {}
+        self._scope_index: dict[PolicyScope, list[tuple[PolicyRule, CompiledCondition]]] = {}
         self._load_default_policies()
 
     def _load_default_policies(self):
         """Load default enterprise policies."""
         for policy in self.DEFAULT_POLICIES:
             self._policies[policy.rule_id] = policy
+            self._compiled[policy.rule_id] = self.evaluator.compile(policy.condition)
 
     def get_policies_for_scope(self, scope: PolicyScope) -> list[PolicyRule]:
         """Get all enabled policies for a scope."""
-        return [
-            p for p in self._policies.values()
-            if p.enabled and (p.scope == scope or p.scope == PolicyScope.ALL)
-        ]
+        return [policy for policy, _ in self.get_compiled_for_scope(scope)]
+
+    def get_compiled_for_scope(
+        self,
+        scope: PolicyScope,
+    ) -> list[tuple[PolicyRule, CompiledCondition]]:
+        """Get enabled policies for a scope with their compiled conditions."""
+        entries = self._scope_index.get(scope)
+        if entries is None:
+            entries = [
+                (p, self._compiled[p.rule_id]) for p in self._policies.values()
+                if p.enabled and (p.scope == scope or p.scope == PolicyScope.ALL)
+            ]
+            self._scope_index[scope] = entries
+        return entries
 
     def add_policy(self, policy: PolicyRule):
         """Add or update a policy."""
         policy.updated_at = datetime.utcnow().isoformat()
         self._policies[policy.rule_id] = policy
+        self._compiled[policy.rule_id] = self.evaluator.compile(policy.condition)
+        self._scope_index.clear()
 
     def disable_policy(self, rule_id: str):
         """Disable a policy."""
         if rule_id in self._policies:
             self._policies[rule_id].enabled = False
+            self._scope_index.clear()
 
     def get_policy(self, rule_id: str) -> PolicyRule | None:
         """Get a specific policy."""
@@ -363,7 +478,7 @@ class PolicyEngine:
         audit_logger: Any = None,  # ComplianceAuditLogger
     ):
         self.store = policy_store
-        self.evaluator = ConditionEvaluator()
+        self.evaluator = policy_store.evaluator
         self.audit_logger = audit_logger
 
     async def evaluate(
@@ -375,18 +490,45 @@ class PolicyEngine:
 
         Returns aggregate result with overall action.
         """
-        start_time = datetime.utcnow()
+        return await self._evaluate_compiled(
+            context, self.store.get_compiled_for_scope(context.scope)
+        )
 
-        # Get applicable policies
-        policies = self.store.get_policies_for_scope(context.scope)
+    async def evaluate_batch(
+        self,
+        contexts: list[PolicyContext],
+    ) -> list[PolicyEvaluationResult]:
+        """
+        Evaluate many contexts (e.g. every retrieved chunk) in one call.
+
+        The compiled rule set is looked up once per scope and reused for all
+        contexts. Results are returned in input order.
+        """
+        rule_sets: dict[PolicyScope, list[tuple[PolicyRule, CompiledCondition]]] = {}
+        results = []
+        for context in contexts:
+            rules = rule_sets.get(context.scope)
+            if rules is None:
+                rules = self.store.get_compiled_for_scope(context.scope)
+                rule_sets[context.scope] = rules
+            results.append(await self._evaluate_compiled(context, rules))
+        return results
+
+    async def _evaluate_compiled(
+        self,
+        context: PolicyContext,
+        rules: list[tuple[PolicyRule, CompiledCondition]],
+    ) -> PolicyEvaluationResult:
+        """Evaluate a compiled rule set against one context in a single pass."""
+        start_time = datetime.utcnow()
 
         results = []
         warnings = []
         blocked = False
         overall_action = PolicyAction.ALLOW
 
-        for policy in policies:
-            result = self._evaluate_policy(policy, context)
+        for policy, predicate in rules:
+            result = self._evaluate_policy(policy, context, predicate)
             results.append(result)
 
             if result.triggered:
@@ -426,9 +568,12 @@ class PolicyEngine:
         self,
         policy: PolicyRule,
         context: PolicyContext,
+        predicate: CompiledCondition | None = None,
     ) -> PolicyResult:
         """Evaluate a single policy."""
-        triggered = self.evaluator.evaluate(policy.condition, context)
+        if predicate is None:
+            predicate = self.evaluator.compile(policy.condition)
+        triggered = predicate(context.data)
 
         if triggered:
             return PolicyResult(
@@ -472,6 +617,13 @@ class PolicyEnforcer:
     Enforces policy decisions by taking appropriate actions.
     """
 
+    PII_SCANNER = PatternScanner([
+        PatternSpec("ssn", r'\b\d{3}-\d{2}-\d{4}\b', '<<SSN_REDACTED>>', ignore_case=False),
+        PatternSpec("credit_card", r'\b\d{16}\b', '<<CARD_REDACTED>>', ignore_case=False),
+        PatternSpec("email", r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '<<EMAIL_REDACTED>>', ignore_case=False),
+        PatternSpec("phone", r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '<<PHONE_REDACTED>>', ignore_case=False),
+    ])
+
     def __init__(self, policy_engine: PolicyEngine):
         self.engine = policy_engine
         self._action_handlers: dict[PolicyAction, Callable] = {
@@ -548,21 +700,9 @@ class PolicyEnforcer:
         return data
 
     def _redact_pii(self, text: str) -> str:
-        """Redact common PII patterns."""
-        import re
-
-        patterns = [
-            (r'\b\d{3}-\d{2}-\d{4}\b', '<<SSN_REDACTED>>'),  # SSN
-            (r'\b\d{16}\b', '<<CARD_REDACTED>>'),  # Credit card
-            (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '<<EMAIL_REDACTED>>'),  # Email
-            (r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '<<PHONE_REDACTED>>'),  # Phone
-        ]
-
-        result = text
-        for pattern, replacement in patterns:
-            result = re.sub(pattern, replacement, result)
-
-        return result
+        """Redact common PII patterns in a single scan."""
+        redacted, _ = self.PII_SCANNER.redact(text)
+        return redacted
 
 
 class PolicyViolationError(Exception):
@@ -577,10 +717,25 @@ class PolicyViolationError(Exception):
 class ComplianceAuditLogger:
     """
     Logs all policy-related events for compliance.
+
+    Events are queued on a buffered AuditSink and written in per-tenant
+    batches in the background, so logging never blocks policy evaluation.
     """
 
-    def __init__(self, cosmos_client: Any = None):
+    def __init__(
+        self,
+        cosmos_client: Any = None,
+        database_name: str = "rag-platform",
+        container_name: str = "audit-logs",
+        sink: AuditSink | None = None,
+        spill_path: str | None = None,
+    ):
         self.cosmos_client = cosmos_client
+        container = None
+        if cosmos_client:
+            database = cosmos_client.get_database_client(database_name)
+            container = database.get_container_client(container_name)
+        self.sink = sink or AuditSink(container, name="policy", spill_path=spill_path)
 
     async def log_policy_trigger(
         self,
@@ -589,7 +744,7 @@ class ComplianceAuditLogger:
         result: PolicyResult,
     ):
         """Log a policy trigger event."""
-        event = {
+        self.sink.submit({
             "event_type": "policy_trigger",
             "timestamp": datetime.utcnow().isoformat(),
             "rule_id": policy.rule_id,
@@ -602,24 +757,18 @@ class ComplianceAuditLogger:
             "severity": result.severity.value,
             "message": result.message,
             "details": result.details,
-        }
-
-        # Store in Cosmos DB if available
-        if self.cosmos_client:
-            # Implementation would store to Cosmos
-            pass
-
-        # Also log to App Insights / stdout
-        print(f"[POLICY] {event}")
+        })
 
     async def log_policy_evaluation(
         self,
         result: PolicyEvaluationResult,
+        tenant_id: str = "",
     ):
         """Log overall policy evaluation."""
-        event = {
+        self.sink.submit({
             "event_type": "policy_evaluation",
             "timestamp": datetime.utcnow().isoformat(),
+            "tenant_id": tenant_id,
             "request_id": result.request_id,
             "scope": result.scope.value,
             "overall_action": result.overall_action.value,
@@ -629,9 +778,12 @@ class ComplianceAuditLogger:
             "triggered_rules": [
                 r.rule_id for r in result.results if r.triggered
             ],
-        }
+        })
 
-        if self.cosmos_client:
-            pass
+    async def flush(self):
+        """Write all queued events."""
+        await self.sink.flush()
 
-        print(f"[POLICY_EVAL] {event}")
+    async def close(self):
+        """Stop background delivery and flush remaining events."""
+        await self.sink.close()
@@ -13,7 +13,6 @@ import asyncio
 import hashlib
 import json
 import logging
-import re
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
@@ -25,6 +24,8 @@ from azure.identity.aio import DefaultAzureCredential
 from openai import AsyncAzureOpenAI
 from pydantic import BaseModel
 
+from src.safety.pattern_scanner import PatternScanner, PatternSpec
+
 logger = logging.getLogger(__name__)
 
 
@@ -256,18 +257,17 @@ class PIIDetector:
 
     def __init__(self, allowed_domains: list[str] = None):
         self.allowed_domains = allowed_domains or []
-        self.compiled_patterns = {
-            name: re.compile(pattern, re.IGNORECASE)
+        self.scanner = PatternScanner(
+            PatternSpec(name=name, pattern=pattern)
             for name, pattern in self.PATTERNS.items()
-        }
+        )
 
     async def detect_pii(self, context: AuditContext) -> list[AuditFinding]:
         """Detect PII in response."""
         findings = []
 
-        for pii_type, pattern in self.compiled_patterns.items():
-            matches = pattern.findall(context.response)
-
+        detected = self.scanner.group(self.scanner.iter_spans(context.response))
+        for pii_type, matches in detected.items():
             # Filter allowed domains for emails
             if pii_type == "email" and self.allowed_domains:
                 matches = [
@@ -5,8 +5,10 @@ Implements:
 - Named Entity Recognition (NER)
 - Entity normalization and deduplication
 - Relationship extraction
-- Graph node/edge creation
+- Graph node/edge creation, per item or bulk with in-memory merging
 - Integration with Azure Cosmos DB (Gremlin or SQL)
+- In-memory CSR snapshot for multi-hop traversal (see graph_snapshot)
+- Aho-Corasick entity name index for query matching (see entity_index)
 """
 
 from dataclasses import dataclass, field
@@ -18,6 +20,12 @@ import json
 import re
 from datetime import datetime
 
+from azure.core import MatchConditions
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError,
+)
 from openai import AsyncAzureOpenAI
 
 
@@ -90,6 +98,30 @@ class ExtractionResult:
     extraction_time_ms: float
 
 
+@dataclass
+class BulkUpsertResult:
+    """Outcome of a bulk entity or relationship upsert."""
+    submitted: int
+    unique: int
+    round_trips: int = 0
+    conflicts: int = 0
+    written_ids: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    # Final written document per id
+    documents: dict[str, dict] = field(default_factory=dict)
+
+    @property
+    def duplicates_merged(self) -> int:
+        return self.submitted - self.unique
+
+
+def relationship_id(source_id: str, relation_type: RelationType, target_id: str) -> str:
+    """Deterministic relationship ID for a (source, type, target) edge."""
+    return hashlib.sha256(
+        f"{source_id}:{relation_type.value}:{target_id}".encode()
+    ).hexdigest()[:16]
+
+
 class EntityNormalizer:
     """Normalizes and deduplicates entities."""
 
@@ -339,9 +371,7 @@ Respond with ONLY a JSON object in this exact format:
             except ValueError:
                 continue
 
-            rel_id = hashlib.sha256(
-                f"{source_id}:{rel_type.value}:{target_id}".encode()
-            ).hexdigest()[:16]
+            rel_id = relationship_id(source_id, rel_type, target_id)
 
             relationship = Relationship(
                 id=rel_id,
@@ -392,6 +422,9 @@ class GraphBuilder:
     Supports both Cosmos DB Gremlin and SQL-based graph storage.
     """
 
+    # ETag conflicts tolerated per document in a bulk write
+    BULK_MAX_RETRIES = 5
+
     def __init__(
         self,
         cosmos_client: Any,  # CosmosClient
@@ -401,6 +434,10 @@ class GraphBuilder:
         self.cosmos_client = cosmos_client
         self.database_name = database_name
         self.use_gremlin = use_gremlin
+        # Per-tenant adjacency snapshots; traversals use them once loaded
+        self.snapshots: dict[str, Any] = {}
+        # Per-tenant entity name indexes; name lookups use them once loaded
+        self.entity_indexes: dict[str, Any] = {}
 
         if use_gremlin:
             self._init_gremlin()
@@ -422,19 +459,7 @@ class GraphBuilder:
 
     async def upsert_entity(self, entity: Entity, tenant_id: str) -> str:
         """Insert or update an entity node."""
-        node = {
-            "id": entity.id,
-            "tenant_id": tenant_id,
-            "name": entity.name,
-            "normalized_name": entity.normalized_name,
-            "entity_type": entity.entity_type.value,
-            "confidence": entity.confidence,
-            "source_chunk_ids": entity.source_chunk_ids,
-            "source_doc_ids": entity.source_doc_ids,
-            "attributes": entity.attributes,
-            "aliases": entity.aliases,
-            "updated_at": datetime.utcnow().isoformat(),
-        }
+        node = self._entity_node(entity, tenant_id)
 
         # Check if exists
         try:
@@ -442,29 +467,14 @@ class GraphBuilder:
                 item=entity.id,
                 partition_key=tenant_id,
             )
-
-            # Merge source references
-            node["source_chunk_ids"] = list(set(
-                existing.get("source_chunk_ids", []) + entity.source_chunk_ids
-            ))
-            node["source_doc_ids"] = list(set(
-                existing.get("source_doc_ids", []) + entity.source_doc_ids
-            ))
-            node["aliases"] = list(set(
-                existing.get("aliases", []) + entity.aliases
-            ))
-
-            # Keep higher confidence
-            node["confidence"] = max(
-                existing.get("confidence", 0),
-                entity.confidence,
-            )
+            node = self._merge_node(node, existing)
 
         except Exception:
             # New entity
             node["created_at"] = datetime.utcnow().isoformat()
 
         self.nodes_container.upsert_item(body=node, partition_key=tenant_id)
+        self._update_entity_index(tenant_id, node)
         return entity.id
 
     async def upsert_relationship(
@@ -473,7 +483,180 @@ class GraphBuilder:
         tenant_id: str,
     ) -> str:
         """Insert or update a relationship edge."""
-        edge = {
+        edge = self._relationship_edge(relationship, tenant_id)
+
+        # Check if exists
+        try:
+            existing = self.edges_container.read_item(
+                item=relationship.id,
+                partition_key=tenant_id,
+            )
+            edge = self._merge_edge(edge, existing)
+
+        except Exception:
+            # New edge
+            edge["created_at"] = datetime.utcnow().isoformat()
+
+        self.edges_container.upsert_item(body=edge, partition_key=tenant_id)
+        self._update_snapshot(tenant_id, edge)
+        return relationship.id
+
+    async def bulk_upsert_entities(
+        self,
+        entities: list[Entity],
+        tenant_id: str,
+        max_concurrency: int = 8,
+    ) -> "BulkUpsertResult":
+        """
+        Upsert many entities, merging duplicates in memory first.
+
+        Duplicates (same id) are folded together exactly as successive
+        upsert_entity calls would fold them, so each distinct entity costs
+        one read and one write however often it was mentioned.
+        """
+        merged: dict[str, dict] = {}
+        for entity in entities:
+            node = self._entity_node(entity, tenant_id)
+            previous = merged.get(entity.id)
+            merged[entity.id] = self._merge_node(node, previous) if previous else node
+
+        result = await self._bulk_write(
+            self.nodes_container, merged, tenant_id, self._merge_node,
+            len(entities), max_concurrency,
+        )
+        for entity_id in result.written_ids:
+            self._update_entity_index(tenant_id, result.documents[entity_id])
+        return result
+
+    async def bulk_upsert_relationships(
+        self,
+        relationships: list[Relationship],
+        tenant_id: str,
+        max_concurrency: int = 8,
+    ) -> "BulkUpsertResult":
+        """Upsert many relationships, merging duplicate edges in memory first."""
+        merged: dict[str, dict] = {}
+        for relationship in relationships:
+            edge = self._relationship_edge(relationship, tenant_id)
+            previous = merged.get(relationship.id)
+            merged[relationship.id] = self._merge_edge(edge, previous) if previous else edge
+
+        result = await self._bulk_write(
+            self.edges_container, merged, tenant_id, self._merge_edge,
+            len(relationships), max_concurrency,
+        )
+        for edge_id in result.written_ids:
+            self._update_snapshot(tenant_id, result.documents[edge_id])
+        return result
+
+    async def ingest_extraction_results(
+        self,
+        results: list[ExtractionResult],
+        tenant_id: str,
+        max_concurrency: int = 8,
+    ) -> dict[str, "BulkUpsertResult"]:
+        """Bulk-upsert every entity, then every relationship, of a document's extractions."""
+        entities = [e for result in results for e in result.entities]
+        relationships = [r for result in results for r in result.relationships]
+        return {
+            "entities": await self.bulk_upsert_entities(entities, tenant_id, max_concurrency),
+            "relationships": await self.bulk_upsert_relationships(
+                relationships, tenant_id, max_concurrency
+            ),
+        }
+
+    async def _bulk_write(
+        self,
+        container: Any,
+        merged: dict[str, dict],
+        tenant_id: str,
+        merge: Any,
+        submitted: int,
+        max_concurrency: int,
+    ) -> "BulkUpsertResult":
+        """Write merged documents with bounded concurrency."""
+        result = BulkUpsertResult(submitted=submitted, unique=len(merged))
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def write(doc: dict):
+            async with semaphore:
+                # Counters are folded in here, on the event loop, not in the worker thread
+                stats = {"round_trips": 0, "conflicts": 0}
+                try:
+                    written = await asyncio.to_thread(
+                        self._write_with_etag, container, doc, tenant_id, merge, stats
+                    )
+                    result.documents[doc["id"]] = written
+                    result.written_ids.append(doc["id"])
+                except Exception as e:
+                    result.failed[doc["id"]] = str(e)
+                result.round_trips += stats["round_trips"]
+                result.conflicts += stats["conflicts"]
+
+        await asyncio.gather(*(write(doc) for doc in merged.values()))
+        return result
+
+    def _write_with_etag(
+        self,
+        container: Any,
+        doc: dict,
+        tenant_id: str,
+        merge: Any,
+        stats: dict[str, int],
+    ) -> dict:
+        """
+        Read-merge-write one document with optimistic concurrency.
+
+        Existing documents are replaced only if their ETag is unchanged and
+        new ones are created only if still absent; on a conflict the
+        document is re-read and merged again.
+        """
+        for attempt in range(self.BULK_MAX_RETRIES + 1):
+            try:
+                existing = container.read_item(item=doc["id"], partition_key=tenant_id)
+            except CosmosResourceNotFoundError:
+                existing = None
+            stats["round_trips"] += 1
+
+            try:
+                if existing is None:
+                    body = {**doc, "created_at": datetime.utcnow().isoformat()}
+                    container.create_item(body=body)
+                else:
+                    body = merge(doc, existing)
+                    container.replace_item(
+                        item=doc["id"],
+                        body=body,
+                        etag=existing["_etag"],
+                        match_condition=MatchConditions.IfNotModified,
+                    )
+                stats["round_trips"] += 1
+                return body
+            except (CosmosAccessConditionFailedError, CosmosResourceExistsError):
+                stats["round_trips"] += 1
+                stats["conflicts"] += 1
+        raise RuntimeError(f"Gave up on {doc['id']} after {self.BULK_MAX_RETRIES} conflicts")
+
+    @staticmethod
+    def _entity_node(entity: Entity, tenant_id: str) -> dict:
+        return {
+            "id": entity.id,
+            "tenant_id": tenant_id,
+            "name": entity.name,
+            "normalized_name": entity.normalized_name,
+            "entity_type": entity.entity_type.value,
+            "confidence": entity.confidence,
+            "source_chunk_ids": entity.source_chunk_ids,
+            "source_doc_ids": entity.source_doc_ids,
+            "attributes": entity.attributes,
+            "aliases": entity.aliases,
+            "mention_count": 1,
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+
+    @staticmethod
+    def _relationship_edge(relationship: Relationship, tenant_id: str) -> dict:
+        return {
             "id": relationship.id,
             "tenant_id": tenant_id,
             "source_entity_id": relationship.source_entity_id,
@@ -482,33 +665,157 @@ class GraphBuilder:
             "confidence": relationship.confidence,
             "source_chunk_ids": relationship.source_chunk_ids,
             "attributes": relationship.attributes,
+            "mention_count": 1,
             "updated_at": datetime.utcnow().isoformat(),
         }
 
-        # Check if exists
-        try:
-            existing = self.edges_container.read_item(
-                item=relationship.id,
-                partition_key=tenant_id,
+    @staticmethod
+    def _merge_node(node: dict, existing: dict) -> dict:
+        """Fold a new node onto an existing one: union references, keep max confidence."""
+        merged = dict(node)
+        for key in ("source_chunk_ids", "source_doc_ids", "aliases"):
+            merged[key] = list(dict.fromkeys(existing.get(key, []) + node[key]))
+        merged["confidence"] = max(existing.get("confidence", 0), node["confidence"])
+        merged["mention_count"] = existing.get("mention_count", 1) + node["mention_count"]
+        if "created_at" in existing:
+            merged["created_at"] = existing["created_at"]
+        return merged
+
+    @staticmethod
+    def _merge_edge(edge: dict, existing: dict) -> dict:
+        """Fold a new edge onto an existing one: union chunks, keep max confidence."""
+        merged = dict(edge)
+        merged["source_chunk_ids"] = list(dict.fromkeys(
+            existing.get("source_chunk_ids", []) + edge["source_chunk_ids"]
+        ))
+        merged["confidence"] = max(existing.get("confidence", 0), edge["confidence"])
+        merged["mention_count"] = existing.get("mention_count", 1) + edge["mention_count"]
+        if "created_at" in existing:
+            merged["created_at"] = existing["created_at"]
+        return merged
+
+    def _update_entity_index(self, tenant_id: str, node: dict):
+        index = self.entity_indexes.get(tenant_id)
+        if index is not None:
+            index.add_node(node)
+
+    def _update_snapshot(self, tenant_id: str, edge: dict):
+        snapshot = self.snapshots.get(tenant_id)
+        if snapshot is not None:
+            snapshot.upsert_edge(
+                edge["source_entity_id"],
+                edge["target_entity_id"],
+                edge["relation_type"],
+                edge["confidence"],
             )
 
-            # Merge source references
-            edge["source_chunk_ids"] = list(set(
-                existing.get("source_chunk_ids", []) + relationship.source_chunk_ids
-            ))
+    def load_entity_index(self, tenant_id: str):
+        """Build the tenant's entity name index from the nodes container."""
+        from src.graph.entity_index import EntityIndex
+
+        index = EntityIndex()
+        for node in self.nodes_container.query_items(
+            query=(
+                "SELECT c.id, c.name, c.normalized_name, c.entity_type, c.aliases "
+                "FROM c WHERE c.tenant_id = @tenant_id"
+            ),
+            parameters=[{"name": "@tenant_id", "value": tenant_id}],
+            partition_key=tenant_id,
+        ):
+            index.add_node(node)
+        index.rebuild()
+        self.entity_indexes[tenant_id] = index
+        return index
+
+    def match_entities(self, text: str, tenant_id: str) -> list[str]:
+        """Ids of known entities mentioned in text; empty without a loaded index."""
+        index = self.entity_indexes.get(tenant_id)
+        return index.entity_ids(text) if index is not None else []
+
+    def load_snapshot(self, tenant_id: str):
+        """Build the tenant's adjacency snapshot from the edges container."""
+        from src.graph.graph_snapshot import GraphSnapshot
+
+        edges = self._query_edge_topology(tenant_id, since_ts=None)
+        max_ts = 0
+
+        def rows():
+            nonlocal max_ts
+            for edge in edges:
+                max_ts = max(max_ts, edge.get("_ts", 0))
+                yield (
+                    edge["source_entity_id"],
+                    edge["target_entity_id"],
+                    edge["relation_type"],
+                    edge.get("confidence", 0.0),
+                )
 
-            # Keep higher confidence
-            edge["confidence"] = max(
-                existing.get("confidence", 0),
-                relationship.confidence,
-            )
+        snapshot = GraphSnapshot.from_edges(rows())
+        snapshot.synced_ts = max_ts
+        self.snapshots[tenant_id] = snapshot
+        return snapshot
 
-        except Exception:
-            # New edge
-            edge["created_at"] = datetime.utcnow().isoformat()
+    def refresh_snapshot(self, tenant_id: str) -> int:
+        """
+        Apply edges written since the last load/refresh; returns how many.
 
-        self.edges_container.upsert_item(body=edge, partition_key=tenant_id)
-        return relationship.id
+        Edges deleted directly in Cosmos are not seen by an incremental
+        refresh; reload the snapshot after bulk deletes.
+        """
+        snapshot = self.snapshots.get(tenant_id)
+        if snapshot is None:
+            self.load_snapshot(tenant_id)
+            return self.snapshots[tenant_id].edge_count
+
+        applied = 0
+        for edge in self._query_edge_topology(tenant_id, since_ts=snapshot.synced_ts):
+            snapshot.upsert_edge(
+                edge["source_entity_id"],
+                edge["target_entity_id"],
+                edge["relation_type"],
+                edge.get("confidence", 0.0),
+            )
+            snapshot.synced_ts = max(snapshot.synced_ts, edge.get("_ts", 0))
+            applied += 1
+        return applied
+
+    def _query_edge_topology(self, tenant_id: str, since_ts: int | None):
+        query = (
+            "SELECT c.source_entity_id, c.target_entity_id, c.relation_type, "
+            "c.confidence, c._ts FROM c WHERE c.tenant_id = @tenant_id"
+        )
+        parameters = [{"name": "@tenant_id", "value": tenant_id}]
+        if since_ts is not None:
+            # Edges written in the same second as the last sync are re-applied
+            query += " AND c._ts >= @since_ts"
+            parameters.append({"name": "@since_ts", "value": since_ts})
+        return self.edges_container.query_items(
+            query=query,
+            parameters=parameters,
+            partition_key=tenant_id,
+        )
+
+    def _read_items(
+        self,
+        container: Any,
+        ids: list[str],
+        tenant_id: str,
+        batch_size: int = 100,
+    ) -> dict[str, dict]:
+        """Read many items by id with one query per batch instead of a point read each."""
+        items = {}
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i:i + batch_size]
+            for item in container.query_items(
+                query="SELECT * FROM c WHERE c.tenant_id = @tenant_id AND ARRAY_CONTAINS(@ids, c.id)",
+                parameters=[
+                    {"name": "@tenant_id", "value": tenant_id},
+                    {"name": "@ids", "value": batch},
+                ],
+                partition_key=tenant_id,
+            ):
+                items[item["id"]] = item
+        return items
 
     async def get_related_entities(
         self,
@@ -529,6 +836,9 @@ class GraphBuilder:
         Returns:
             List of (Entity, Relationship) tuples
         """
+        if tenant_id in self.snapshots:
+            return self._related_from_snapshot(entity_id, tenant_id, relation_types, max_depth)
+
         results = []
         visited = {entity_id}
 
@@ -600,6 +910,58 @@ class GraphBuilder:
 
         return results
 
+    def _related_from_snapshot(
+        self,
+        entity_id: str,
+        tenant_id: str,
+        relation_types: list[RelationType] | None,
+        max_depth: int,
+    ) -> list[tuple[Entity, Relationship]]:
+        """Traverse in memory, then fetch entity and edge payloads in batches."""
+        hops = self.snapshots[tenant_id].k_hop([entity_id], max_depth, relation_types)
+        if not hops:
+            return []
+
+        edge_ids = {
+            hop.entity_id: relationship_id(hop.source_entity_id, hop.relation_type, hop.entity_id)
+            for hop in hops
+        }
+        nodes = self._read_items(self.nodes_container, [h.entity_id for h in hops], tenant_id)
+        edges = self._read_items(self.edges_container, list(edge_ids.values()), tenant_id)
+
+        results = []
+        for hop in hops:
+            entity_data = nodes.get(hop.entity_id)
+            if entity_data is None:
+                continue
+            edge = edges.get(edge_ids[hop.entity_id], {})
+            results.append((
+                self._entity_from_item(entity_data),
+                Relationship(
+                    id=edge_ids[hop.entity_id],
+                    source_entity_id=hop.source_entity_id,
+                    target_entity_id=hop.entity_id,
+                    relation_type=hop.relation_type,
+                    confidence=edge.get("confidence", hop.confidence),
+                    source_chunk_ids=edge.get("source_chunk_ids", []),
+                ),
+            ))
+        return results
+
+    @staticmethod
+    def _entity_from_item(item: dict) -> Entity:
+        return Entity(
+            id=item["id"],
+            name=item["name"],
+            normalized_name=item["normalized_name"],
+            entity_type=EntityType(item["entity_type"]),
+            confidence=item["confidence"],
+            source_chunk_ids=item.get("source_chunk_ids", []),
+            source_doc_ids=item.get("source_doc_ids", []),
+            attributes=item.get("attributes", {}),
+            aliases=item.get("aliases", []),
+        )
+
     async def find_entities_by_name(
         self,
         name_query: str,
@@ -607,7 +969,25 @@ class GraphBuilder:
         entity_types: list[EntityType] | None = None,
         limit: int = 10,
     ) -> list[Entity]:
-        """Find entities by name (partial match)."""
+        """
+        Find entities by name.
+
+        With a loaded entity index, exact surface-form matches (name,
+        normalized name, alias, abbreviation) are served from it; otherwise,
+        or when it has no match, falls back to a partial-match query.
+        """
+        index = self.entity_indexes.get(tenant_id)
+        if index is not None:
+            entity_ids = sorted(index.lookup(name_query))
+            if entity_ids:
+                items = self._read_items(self.nodes_container, entity_ids, tenant_id).values()
+                entities = [
+                    self._entity_from_item(item) for item in items
+                    if not entity_types or EntityType(item["entity_type"]) in entity_types
+                ]
+                entities.sort(key=lambda e: e.confidence, reverse=True)
+                return entities[:limit]
+
         query = f"""
         SELECT * FROM c
         WHERE c.tenant_id = '{tenant_id}'
@@ -650,6 +1030,11 @@ class GraphBuilder:
         """Get chunk IDs that mention the given entities."""
         all_chunk_ids = set()
 
+        if tenant_id in self.snapshots:
+            for entity_data in self._read_items(self.nodes_container, entity_ids, tenant_id).values():
+                all_chunk_ids.update(entity_data.get("source_chunk_ids", []))
+            return list(all_chunk_ids)
+
         for entity_id in entity_ids:
             try:
                 entity_data = self.nodes_container.read_item(
@@ -673,10 +1058,13 @@ class GraphExpander:
     def __init__(
         self,
         graph_builder: GraphBuilder,
-        entity_extractor: EntityExtractor,
+        entity_extractor: EntityExtractor | None = None,
+        llm_fallback: bool = True,
     ):
         self.graph = graph_builder
         self.extractor = entity_extractor
+        # Use LLM extraction only when the entity index finds nothing
+        self.llm_fallback = llm_fallback
 
     async def expand_with_graph(
         self,
@@ -699,37 +1087,30 @@ class GraphExpander:
         Returns:
             List of additional chunk IDs to include
         """
-        # Step 1: Extract entities from query
-        query_extraction = await self.extractor.extract(
-            text=query,
-            chunk_id="query",
-            doc_id="query",
-        )
-
-        query_entity_names = [e.normalized_name for e in query_extraction.entities]
-
-        # Step 2: Find matching entities in graph
-        matched_entities = []
-        for name in query_entity_names:
-            entities = await self.graph.find_entities_by_name(
-                name_query=name,
-                tenant_id=tenant_id,
-                limit=5,
-            )
-            matched_entities.extend(entities)
+        # Steps 1-2: Find known entities mentioned in the query, from the
+        # entity index in one pass, or via LLM extraction as a fallback
+        matched_ids = self.graph.match_entities(query, tenant_id)
+        if not matched_ids and self.llm_fallback and self.extractor is not None:
+            matched_ids = await self._match_with_llm(query, tenant_id)
 
         # Step 3: Expand to related entities
-        expanded_entity_ids = set(e.id for e in matched_entities)
+        expanded_entity_ids = set(matched_ids)
 
-        for entity in matched_entities:
-            related = await self.graph.get_related_entities(
-                entity_id=entity.id,
-                tenant_id=tenant_id,
-                max_depth=expansion_depth,
-            )
+        snapshot = self.graph.snapshots.get(tenant_id)
+        if snapshot is not None:
+            # One in-memory traversal from all matched entities at once
+            for hop in snapshot.k_hop(matched_ids, max_depth=expansion_depth):
+                expanded_entity_ids.add(hop.entity_id)
+        else:
+            for entity_id in matched_ids:
+                related = await self.graph.get_related_entities(
+                    entity_id=entity_id,
+                    tenant_id=tenant_id,
+                    max_depth=expansion_depth,
+                )
 
-            for related_entity, _ in related:
-                expanded_entity_ids.add(related_entity.id)
+                for related_entity, _ in related:
+                    expanded_entity_ids.add(related_entity.id)
 
         # Step 4: Get chunks for expanded entities
         expansion_chunks = await self.graph.get_chunks_for_entities(
@@ -743,3 +1124,21 @@ class GraphExpander:
 
         # Limit expansion
         return new_chunks[:max_expansion]
+
+    async def _match_with_llm(self, query: str, tenant_id: str) -> list[str]:
+        """Extract entities from the query with the LLM and look them up by name."""
+        query_extraction = await self.extractor.extract(
+            text=query,
+            chunk_id="query",
+            doc_id="query",
+        )
+
+        matched_ids = []
+        for entity in query_extraction.entities:
+            entities = await self.graph.find_entities_by_name(
+                name_query=entity.normalized_name,
+                tenant_id=tenant_id,
+                limit=5,
+            )
+            matched_ids.extend(e.id for e in entities)
+        return list(dict.fromkeys(matched_ids))
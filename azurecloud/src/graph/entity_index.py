@@ -0,0 +1,230 @@
+"""
+Aho-Corasick Entity Name Index
+
+Implements:
+- Token-level Aho-Corasick automaton over every known surface form of an
+  entity: name, normalized name, aliases and, for systems and services,
+  abbreviated forms (from EntityNormalizer.ABBREVIATIONS, e.g. "kv" for
+  "azure key vault")
+- All entity mentions in a text in one linear pass over its tokens
+- Incremental adds: new surface forms are searchable immediately through
+  a small pending set and folded into the automaton in batches
+- Removal by entity id
+
+Matching is on whole lowercase word tokens, so "kv" does not match inside
+"kvm" and "key vault" matches "Key  Vault". Purely numeric forms are not
+indexed.
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from src.graph.entity_extractor import Entity, EntityNormalizer, EntityType
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+@dataclass
+class EntityMention:
+    """A known entity found in a text."""
+    entity_id: str
+    surface: str
+    # Character offsets in the searched text
+    start: int
+    end: int
+
+
+class _Node:
+    __slots__ = ("children", "fail", "outputs")
+
+    def __init__(self):
+        self.children: dict[str, "_Node"] = {}
+        self.fail: Optional["_Node"] = None
+        # Surface keys (token tuples) ending at this node, including via fail links
+        self.outputs: list[tuple[str, ...]] = []
+
+
+class EntityIndex:
+    """
+    Locally maintained index of entity surface forms for one tenant.
+
+    Surface forms are registered per entity; a form shared by several
+    entities reports all of them.
+    """
+
+    # Pending forms folded into the automaton once there are this many
+    REBUILD_THRESHOLD = 500
+
+    def __init__(self, normalizer: Optional[EntityNormalizer] = None):
+        self.normalizer = normalizer or EntityNormalizer()
+        self._keys: dict[tuple[str, ...], set[str]] = {}
+        self._entity_keys: dict[str, set[tuple[str, ...]]] = {}
+        self._root = _Node()
+        self._pending: set[tuple[str, ...]] = set()
+        self._pending_max_len = 0
+        self._abbreviations = {
+            tuple(expansion.split()): abbreviation
+            for abbreviation, expansion in self.normalizer.ABBREVIATIONS.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._entity_keys)
+
+    def add(
+        self,
+        entity_id: str,
+        name: str,
+        entity_type: EntityType,
+        aliases: Iterable[str] = (),
+        normalized_name: Optional[str] = None,
+    ):
+        """Register an entity's surface forms; adds to any already registered."""
+        forms = {name, *aliases}
+        forms.add(normalized_name or self.normalizer.normalize(name, entity_type))
+        for alias in aliases:
+            forms.add(self.normalizer.normalize(alias, entity_type))
+
+        # Bare numbers ("2" for the version "v2") would match any count in a
+        # query; abbreviations only apply where the normalizer expands them
+        abbreviate = entity_type in (EntityType.SYSTEM, EntityType.SERVICE)
+        keys = set()
+        for form in forms:
+            key = tuple(tokenize(form))
+            if key and not all(token.isdigit() for token in key):
+                keys.add(key)
+                if abbreviate:
+                    keys.update(self._abbreviated(key))
+
+        registered = self._entity_keys.setdefault(entity_id, set())
+        for key in keys - registered:
+            registered.add(key)
+            owners = self._keys.get(key)
+            if owners is None:
+                self._keys[key] = {entity_id}
+                self._pending.add(key)
+                self._pending_max_len = max(self._pending_max_len, len(key))
+            else:
+                owners.add(entity_id)
+
+        if len(self._pending) >= self.REBUILD_THRESHOLD:
+            self.rebuild()
+
+    def add_entity(self, entity: Entity):
+        self.add(entity.id, entity.name, entity.entity_type, entity.aliases, entity.normalized_name)
+
+    def add_node(self, node: dict[str, Any]):
+        """Register a graph node document (as stored in the nodes container)."""
+        self.add(
+            node["id"],
+            node["name"],
+            EntityType(node["entity_type"]),
+            node.get("aliases", []),
+            node.get("normalized_name"),
+        )
+
+    def remove(self, entity_id: str) -> bool:
+        keys = self._entity_keys.pop(entity_id, None)
+        if keys is None:
+            return False
+        for key in keys:
+            owners = self._keys.get(key)
+            if owners is not None:
+                owners.discard(entity_id)
+                if not owners:
+                    # The automaton may keep the key until the next rebuild;
+                    # it simply has no owners to report
+                    del self._keys[key]
+                    self._pending.discard(key)
+        return True
+
+    def rebuild(self):
+        """Rebuild the automaton from all registered forms, clearing pending ones."""
+        root = _Node()
+        for key in self._keys:
+            node = root
+            for token in key:
+                child = node.children.get(token)
+                if child is None:
+                    child = node.children[token] = _Node()
+                node = child
+            node.outputs.append(key)
+
+        # Breadth-first failure links; outputs inherit along them
+        queue = deque()
+        for child in root.children.values():
+            child.fail = root
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for token, child in node.children.items():
+                fail = node.fail
+                while fail is not None and token not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children[token] if fail is not None else root
+                child.outputs = child.outputs + child.fail.outputs
+                queue.append(child)
+
+        self._root = root
+        self._pending = set()
+        self._pending_max_len = 0
+
+    def find(self, text: str) -> list[EntityMention]:
+        """All mentions of known entities in text, ordered by position."""
+        spans = [(m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+        tokens = [text[start:end].lower() for start, end in spans]
+        found: set[tuple[int, int, tuple[str, ...]]] = set()
+
+        root = self._root
+        node = root
+        for i, token in enumerate(tokens):
+            while node is not root and token not in node.children:
+                node = node.fail
+            node = node.children.get(token, root)
+            for key in node.outputs:
+                found.add((i - len(key) + 1, i, key))
+
+            # Forms added since the last rebuild: check the n-grams ending here
+            if self._pending:
+                for n in range(1, min(self._pending_max_len, i + 1) + 1):
+                    key = tuple(tokens[i - n + 1:i + 1])
+                    if key in self._pending:
+                        found.add((i - n + 1, i, key))
+
+        mentions = []
+        for first, last, key in sorted(found):
+            start, end = spans[first][0], spans[last][1]
+            for entity_id in sorted(self._keys.get(key, ())):
+                mentions.append(EntityMention(entity_id, text[start:end], start, end))
+        return mentions
+
+    def entity_ids(self, text: str) -> list[str]:
+        """Distinct ids of entities mentioned in text, in order of first mention."""
+        return list(dict.fromkeys(m.entity_id for m in self.find(text)))
+
+    def lookup(self, form: str) -> set[str]:
+        """Entities with exactly this surface form (after tokenization)."""
+        return set(self._keys.get(tuple(tokenize(form)), ()))
+
+    def get_stats(self) -> dict:
+        return {
+            "entities": len(self._entity_keys),
+            "surface_forms": len(self._keys),
+            "pending_forms": len(self._pending),
+        }
+
+    def _abbreviated(self, key: tuple[str, ...]) -> list[tuple[str, ...]]:
+        """Forms with one known expansion replaced by its abbreviation."""
+        forms = []
+        for expansion, abbreviation in self._abbreviations.items():
+            n = len(expansion)
+            for i in range(len(key) - n + 1):
+                if key[i:i + n] == expansion:
+                    forms.append(key[:i] + (abbreviation,) + key[i + n:])
+        return forms
@@ -0,0 +1,304 @@
+"""
+In-Memory CSR Adjacency Snapshot for Graph Expansion
+
+Implements:
+- Compressed-sparse-row (CSR) adjacency per tenant: node ids interned to
+  ints, out-edges stored contiguously in typed arrays, each row sorted by
+  confidence (highest first)
+- k-hop neighbourhoods with relationship-type filtering
+- Weight-ranked (best-first) traversal scoring paths by the product of
+  edge confidences
+- Incremental refresh: upserted edges go to a per-row delta overlay and
+  superseded CSR slots are tombstoned; the CSR is rebuilt once the
+  overlay grows past a fraction of the base
+
+Only topology and confidences live here; entity and relationship
+payloads are read from Cosmos DB once the traversal is done.
+"""
+
+import heapq
+from array import array
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+from src.graph.entity_extractor import RelationType
+
+
+RELATION_TYPES = list(RelationType)
+_TYPE_INDEX = {rt.value: i for i, rt in enumerate(RELATION_TYPES)}
+
+
+@dataclass
+class Hop:
+    """A node reached by a traversal and the edge it was reached through."""
+    entity_id: str
+    depth: int
+    source_entity_id: str
+    relation_type: RelationType
+    confidence: float
+    # Product of edge confidences along the path
+    score: float
+
+
+def type_mask(relation_types: Optional[Iterable[RelationType]]) -> int:
+    """Bitmask of allowed relation types; all types when None."""
+    if not relation_types:
+        return (1 << len(RELATION_TYPES)) - 1
+    mask = 0
+    for rt in relation_types:
+        mask |= 1 << _TYPE_INDEX[rt.value]
+    return mask
+
+
+class GraphSnapshot:
+    """
+    CSR adjacency over one tenant's relationship edges.
+
+    Edges are keyed by (source, target, relation type), matching the
+    deterministic relationship ids the extractor generates; upserting an
+    existing key replaces its confidence.
+    """
+
+    # Rebuild the CSR once the delta overlay holds this fraction of the base
+    COMPACT_RATIO = 0.1
+
+    def __init__(self):
+        self.node_ids: list[str] = []
+        self._index: dict[str, int] = {}
+        self.offsets = array("q", [0])
+        self.targets = array("q")
+        self.types = array("B")
+        self.weights = array("d")
+        self._dead: set[int] = set()
+        self._delta: dict[int, list[tuple[int, int, float]]] = {}
+        self._delta_edges = 0
+        # Highest Cosmos _ts applied, for incremental refresh
+        self.synced_ts = 0
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[tuple[str, str, str, float]]) -> "GraphSnapshot":
+        """Build from (source_id, target_id, relation_type value, confidence) tuples."""
+        snapshot = cls()
+        snapshot._build(snapshot._intern_edges(edges))
+        return snapshot
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets) - len(self._dead) + self._delta_edges
+
+    def node_index(self, entity_id: str) -> Optional[int]:
+        return self._index.get(entity_id)
+
+    def upsert_edge(self, source_id: str, target_id: str, relation_type: str, confidence: float):
+        """Insert an edge or replace the confidence of an existing one."""
+        source, target = self._intern(source_id), self._intern(target_id)
+        rel = _TYPE_INDEX[relation_type]
+        self._drop_edge(source, target, rel)
+        self._delta.setdefault(source, []).append((target, rel, confidence))
+        self._delta_edges += 1
+        if self._delta_edges > max(1024, len(self.targets) * self.COMPACT_RATIO):
+            self.compact()
+
+    def remove_edge(self, source_id: str, target_id: str, relation_type: str) -> bool:
+        source, target = self._index.get(source_id), self._index.get(target_id)
+        if source is None or target is None:
+            return False
+        return self._drop_edge(source, target, _TYPE_INDEX[relation_type])
+
+    def neighbors(self, node: int, mask: int = -1) -> Iterator[tuple[int, int, float]]:
+        """(target, relation type index, confidence) out-edges, highest confidence first."""
+        start, end = self._row(node)
+        delta = self._delta.get(node)
+        if delta:
+            edges = [
+                (self.targets[i], self.types[i], self.weights[i])
+                for i in range(start, end) if i not in self._dead
+            ] + delta
+            edges.sort(key=lambda e: -e[2])
+            for edge in edges:
+                if mask >> edge[1] & 1:
+                    yield edge
+            return
+
+        targets, types, weights, dead = self.targets, self.types, self.weights, self._dead
+        for i in range(start, end):
+            if mask >> types[i] & 1 and (not dead or i not in dead):
+                yield targets[i], types[i], weights[i]
+
+    def k_hop(
+        self,
+        start_ids: Iterable[str],
+        max_depth: int = 1,
+        relation_types: Optional[list[RelationType]] = None,
+        max_nodes: Optional[int] = None,
+    ) -> list[Hop]:
+        """
+        Breadth-first neighbourhood up to max_depth hops.
+
+        Each node is reported once, through the first edge that reached it;
+        within a row higher-confidence edges are taken first. Start nodes
+        are not reported.
+        """
+        mask = type_mask(relation_types)
+        frontier = [(i, 1.0) for i in self._indexes(start_ids)]
+        visited = {i for i, _ in frontier}
+        hops: list[Hop] = []
+
+        for depth in range(1, max_depth + 1):
+            next_frontier = []
+            for node, score in frontier:
+                for target, rel, weight in self.neighbors(node, mask):
+                    if target in visited:
+                        continue
+                    visited.add(target)
+                    hops.append(self._hop(target, depth, node, rel, weight, score * weight))
+                    if max_nodes is not None and len(hops) >= max_nodes:
+                        return hops
+                    next_frontier.append((target, score * weight))
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return hops
+
+    def ranked_traversal(
+        self,
+        start_ids: Iterable[str],
+        max_depth: int = 2,
+        relation_types: Optional[list[RelationType]] = None,
+        limit: int = 30,
+    ) -> list[Hop]:
+        """
+        Best-first traversal: the limit nodes with the highest path score.
+
+        A path's score is the product of its edge confidences (all <= 1), so
+        nodes come out in non-increasing score order. Each node is reported
+        once, through the highest-scoring path that reaches it first; a node
+        settled at max_depth is not expanded further.
+        """
+        mask = type_mask(relation_types)
+        starts = set(self._indexes(start_ids))
+        heap = [(-1.0, 0, i, -1, 0, 0.0) for i in starts]
+        settled = set()
+        hops: list[Hop] = []
+
+        while heap and len(hops) < limit:
+            neg_score, depth, node, source, rel, weight = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            if node not in starts:
+                hops.append(self._hop(node, depth, source, rel, weight, -neg_score))
+            if depth == max_depth:
+                continue
+            for target, target_rel, target_weight in self.neighbors(node, mask):
+                if target not in settled:
+                    heapq.heappush(heap, (
+                        neg_score * target_weight, depth + 1, target, node, target_rel, target_weight,
+                    ))
+        return hops
+
+    def compact(self):
+        """Fold the delta overlay and tombstones back into a fresh CSR."""
+        edges = []
+        for node in range(len(self.node_ids)):
+            for target, rel, weight in self.neighbors(node):
+                edges.append((node, target, rel, weight))
+        self._build(edges)
+
+    def get_stats(self) -> dict:
+        return {
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "delta_edges": self._delta_edges,
+            "tombstones": len(self._dead),
+            "csr_bytes": sum(
+                a.itemsize * len(a) for a in (self.offsets, self.targets, self.types, self.weights)
+            ),
+        }
+
+    def _build(self, edges: list[tuple[int, int, int, float]]):
+        """Counting-sort edges by source into CSR rows, each row by confidence."""
+        n = len(self.node_ids)
+        counts = [0] * (n + 1)
+        for source, _, _, _ in edges:
+            counts[source + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        offsets = array("q", counts)
+
+        cursor = counts[:-1]
+        slots: list = [None] * len(edges)
+        for edge in edges:
+            source = edge[0]
+            slots[cursor[source]] = edge
+            cursor[source] += 1
+        for node in range(n):
+            start, end = offsets[node], offsets[node + 1]
+            if end - start > 1:
+                slots[start:end] = sorted(slots[start:end], key=lambda e: -e[3])
+
+        self.offsets = offsets
+        self.targets = array("q", (e[1] for e in slots))
+        self.types = array("B", (e[2] for e in slots))
+        self.weights = array("d", (e[3] for e in slots))
+        self._dead = set()
+        self._delta = {}
+        self._delta_edges = 0
+
+    def _intern_edges(self, edges: Iterable[tuple[str, str, str, float]]) -> list[tuple[int, int, int, float]]:
+        # Later duplicates of a (source, target, type) key win, as upserts would
+        latest: dict[tuple[int, int, int], float] = {}
+        for source_id, target_id, relation_type, confidence in edges:
+            key = (self._intern(source_id), self._intern(target_id), _TYPE_INDEX[relation_type])
+            latest[key] = confidence
+        return [(s, t, r, w) for (s, t, r), w in latest.items()]
+
+    def _intern(self, entity_id: str) -> int:
+        index = self._index.get(entity_id)
+        if index is None:
+            index = self._index[entity_id] = len(self.node_ids)
+            self.node_ids.append(entity_id)
+        return index
+
+    def _indexes(self, entity_ids: Iterable[str]) -> list[int]:
+        indexes = []
+        for entity_id in entity_ids:
+            index = self._index.get(entity_id)
+            if index is not None and index not in indexes:
+                indexes.append(index)
+        return indexes
+
+    def _row(self, node: int) -> tuple[int, int]:
+        # Nodes interned after the last build have no CSR row yet
+        if node + 1 >= len(self.offsets):
+            return 0, 0
+        return self.offsets[node], self.offsets[node + 1]
+
+    def _drop_edge(self, source: int, target: int, rel: int) -> bool:
+        delta = self._delta.get(source)
+        if delta:
+            for j, (t, r, _) in enumerate(delta):
+                if t == target and r == rel:
+                    del delta[j]
+                    self._delta_edges -= 1
+                    return True
+        start, end = self._row(source)
+        for i in range(start, end):
+            if self.targets[i] == target and self.types[i] == rel and i not in self._dead:
+                self._dead.add(i)
+                return True
+        return False
+
+    def _hop(self, node: int, depth: int, source: int, rel: int, weight: float, score: float) -> Hop:
+        return Hop(
+            entity_id=self.node_ids[node],
+            depth=depth,
+            source_entity_id=self.node_ids[source],
+            relation_type=RELATION_TYPES[rel],
+            confidence=weight,
+            score=score,
+        )
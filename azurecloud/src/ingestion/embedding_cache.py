@@ -0,0 +1,273 @@
+"""
+Content-Addressed Embedding Cache for Ingestion
+
+Implements:
+- Embedding keys from normalized chunk content + embedding model + dimensions
+- Persistent local cache (SQLite file) and Cosmos DB-backed cache
+- Cache-first embedding of chunk batches: only new content reaches the
+  embedding API, duplicates within a batch are embedded once
+- Reuse statistics per batch, mergeable across a whole document
+
+Re-ingesting an edited document re-chunks every changed page, and a page
+insertion shifts every later page, so most "changed" chunks carry content
+that was embedded before. Keys ignore chunk ids and page numbers on purpose.
+"""
+
+import base64
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Iterable, Protocol
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_content(text: str) -> str:
+    """Unicode NFC with whitespace runs collapsed, as embedded."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def embedding_key(text: str, model: str, dimensions: int) -> str:
+    """Cache key for the embedding of text under a model and dimension."""
+    payload = f"{model}\x1f{dimensions}\x1f{normalize_content(text)}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def pack_vector(vector: list[float]) -> bytes:
+    """float32 bytes; embeddings are float32 on the wire, so this is lossless."""
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(data: bytes) -> list[float]:
+    return array("f", data).tolist()
+
+
+class EmbeddingCache(Protocol):
+    """Storage for embeddings by key."""
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]: ...
+
+    def put_many(self, entries: dict[str, list[float]], model: str, dimensions: int): ...
+
+
+class LocalEmbeddingCache:
+    """
+    Embedding cache in a local SQLite file.
+
+    Suited to a single ingestion host or a mounted file share; the
+    connection is shared across threads behind a lock.
+    """
+
+    # SQLite's default limit on bound parameters per statement is 999
+    READ_BATCH_SIZE = 500
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, dimensions INTEGER NOT NULL,"
+            " vector BLOB NOT NULL, created_at TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), self.READ_BATCH_SIZE):
+                batch = keys[i:i + self.READ_BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                for key, vector in self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ):
+                    found[key] = unpack_vector(vector)
+        return found
+
+    def put_many(self, entries: dict[str, list[float]], model: str, dimensions: int):
+        created_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, model, dimensions, pack_vector(vector), created_at)
+                    for key, vector in entries.items()
+                ],
+            )
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+class CosmosEmbeddingCache:
+    """
+    Embedding cache in a Cosmos DB container partitioned on /id.
+
+    Vectors are stored base64-encoded as float32, about a third of the
+    size of a JSON float array. Reads are batched into one query per
+    READ_BATCH_SIZE keys.
+    """
+
+    READ_BATCH_SIZE = 100
+
+    def __init__(self, container: Any):
+        self.container = container
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {}
+        for i in range(0, len(keys), self.READ_BATCH_SIZE):
+            for item in self.container.query_items(
+                query="SELECT c.id, c.vector FROM c WHERE ARRAY_CONTAINS(@ids, c.id)",
+                parameters=[{"name": "@ids", "value": keys[i:i + self.READ_BATCH_SIZE]}],
+                enable_cross_partition_query=True,
+            ):
+                found[item["id"]] = unpack_vector(base64.b64decode(item["vector"]))
+        return found
+
+    def put_many(self, entries: dict[str, list[float]], model: str, dimensions: int):
+        created_at = datetime.now(timezone.utc).isoformat()
+        for key, vector in entries.items():
+            self.container.upsert_item(body={
+                "id": key,
+                "model": model,
+                "dimensions": dimensions,
+                "vector": base64.b64encode(pack_vector(vector)).decode(),
+                "created_at": created_at,
+            })
+
+
+@dataclass
+class EmbeddingReuseStats:
+    """Embedding reuse for one or more chunk batches."""
+    chunks: int = 0
+    # Chunks whose embedding came from the cache
+    reused: int = 0
+    # Distinct texts sent to the embedding API
+    embedded: int = 0
+    # Chunks that shared a fresh embedding with an earlier chunk of the batch
+    duplicates: int = 0
+    api_calls: int = 0
+    cache_errors: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.chunks if self.chunks else 0.0
+
+    def merge(self, other: "EmbeddingReuseStats") -> "EmbeddingReuseStats":
+        return EmbeddingReuseStats(**{
+            name: getattr(self, name) + getattr(other, name)
+            for name in asdict(self)
+        })
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "reuse_ratio": round(self.reuse_ratio, 4)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EmbeddingReuseStats":
+        return cls(**{name: data.get(name, 0) for name in asdict(cls())})
+
+    @classmethod
+    def total(cls, stats: Iterable["EmbeddingReuseStats"]) -> "EmbeddingReuseStats":
+        result = cls()
+        for item in stats:
+            result = result.merge(item)
+        return result
+
+
+class _CacheFill:
+    """Cache lookup for a chunk batch, completed with embeddings of the misses."""
+
+    def __init__(self, chunks, cache, model, dimensions, text_field):
+        self.chunks = chunks
+        self.cache = cache
+        self.model = model
+        self.dimensions = dimensions
+        self.stats = EmbeddingReuseStats(chunks=len(chunks))
+        self.keys = [embedding_key(chunk[text_field], model, dimensions) for chunk in chunks]
+        # Distinct texts by key, in chunk order
+        self.texts: dict[str, str] = {}
+        for key, chunk in zip(self.keys, chunks):
+            self.texts.setdefault(key, chunk[text_field])
+
+        self.cached: dict[str, list[float]] = {}
+        if cache is not None and self.texts:
+            try:
+                self.cached = cache.get_many(list(self.texts))
+            except Exception as e:
+                self.stats.cache_errors += 1
+                logger.warning(f"Embedding cache read failed, embedding all chunks: {e}")
+
+        self.missing = [key for key in self.texts if key not in self.cached]
+
+    @property
+    def missing_texts(self) -> list[str]:
+        return [self.texts[key] for key in self.missing]
+
+    def complete(self, vectors: list[list[float]]) -> EmbeddingReuseStats:
+        stats = self.stats
+        fresh = dict(zip(self.missing, vectors))
+        if fresh:
+            stats.api_calls = 1
+            stats.embedded = len(fresh)
+            if self.cache is not None:
+                try:
+                    self.cache.put_many(fresh, self.model, self.dimensions)
+                except Exception as e:
+                    stats.cache_errors += 1
+                    logger.warning(f"Embedding cache write failed: {e}")
+
+        embedded_keys = set()
+        for chunk, key in zip(self.chunks, self.keys):
+            if key in self.cached:
+                chunk["embedding"] = self.cached[key]
+                stats.reused += 1
+            else:
+                chunk["embedding"] = fresh[key]
+                if key in embedded_keys:
+                    stats.duplicates += 1
+                embedded_keys.add(key)
+
+        return stats
+
+
+def embed_with_cache(
+    chunks: list[dict],
+    embed_texts: Callable[[list[str]], list[list[float]]],
+    cache: EmbeddingCache | None,
+    model: str,
+    dimensions: int,
+    text_field: str = "content",
+) -> EmbeddingReuseStats:
+    """
+    Set chunk["embedding"] on every chunk, embedding only uncached content.
+
+    embed_texts is called at most once, with the distinct uncached texts.
+    Cache read or write failures are logged and degrade to embedding
+    everything; they never fail the batch.
+    """
+    fill = _CacheFill(chunks, cache, model, dimensions, text_field)
+    return fill.complete(embed_texts(fill.missing_texts) if fill.missing else [])
+
+
+async def aembed_with_cache(
+    chunks: list[dict],
+    embed_texts: Callable[[list[str]], Awaitable[list[list[float]]]],
+    cache: EmbeddingCache | None,
+    model: str,
+    dimensions: int,
+    text_field: str = "content",
+) -> EmbeddingReuseStats:
+    """embed_with_cache with an async embed_texts, such as an embedding scheduler."""
+    fill = _CacheFill(chunks, cache, model, dimensions, text_field)
+    return fill.complete(await embed_texts(fill.missing_texts) if fill.missing else [])
@@ -0,0 +1,284 @@
+"""
+Adaptive, Rate-Limit-Aware Embedding Scheduler
+
+Implements:
+- Batches packed by token count (and the API's item limit) instead of a
+  fixed number of chunks
+- Client-side tokens-per-minute and requests-per-minute budgets, refilled
+  continuously and corrected from x-ratelimit-remaining-* response headers
+- AIMD concurrency: one more request in flight per window of successes,
+  halved once per throttling episode on 429
+- Retry-After honoured for all workers at once, so a 429 pauses the
+  scheduler instead of triggering a retry storm
+
+One scheduler is shared by all embedding activities on a worker (see
+worker_resources), so concurrent documents draw from the same budget.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingThrottled(Exception):
+    """The embedding endpoint rejected a request with 429."""
+
+    def __init__(self, retry_after_s: float | None = None, headers: dict | None = None):
+        super().__init__(f"Embedding request throttled (retry after {retry_after_s}s)")
+        self.retry_after_s = retry_after_s
+        self.headers = headers or {}
+
+
+@dataclass
+class EmbeddingResponse:
+    vectors: list[list[float]]
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+EmbedFn = Callable[[list[str]], Awaitable[EmbeddingResponse]]
+
+
+def retry_after_from_headers(headers: dict) -> float | None:
+    """Seconds to wait from retry-after-ms or retry-after, if present."""
+    lowered = {k.lower(): v for k, v in (headers or {}).items()}
+    try:
+        if "retry-after-ms" in lowered:
+            return float(lowered["retry-after-ms"]) / 1000
+        if "retry-after" in lowered:
+            return float(lowered["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def pack_batches(
+    token_counts: list[int],
+    max_batch_tokens: int,
+    max_batch_items: int,
+) -> list[list[int]]:
+    """
+    Group item indices into consecutive batches under both limits.
+
+    An item larger than max_batch_tokens gets a batch of its own.
+    """
+    batches: list[list[int]] = []
+    current: list[int] = []
+    current_tokens = 0
+    for i, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > max_batch_tokens or len(current) >= max_batch_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class RateBudget:
+    """
+    Token and request budgets over a rolling window (a minute by default).
+
+    Both refill continuously at limit / window_s and hold at most one
+    window's worth. Response headers can only lower the local view: the
+    service's remaining count includes other clients of the deployment.
+    """
+
+    def __init__(
+        self,
+        tokens_per_window: int,
+        requests_per_window: int,
+        window_s: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.token_limit = tokens_per_window
+        self.request_limit = requests_per_window
+        self.window_s = window_s
+        self.clock = clock
+        self.tokens = float(tokens_per_window)
+        self.requests = float(requests_per_window)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self._updated
+        self._updated = now
+        self.tokens = min(self.token_limit, self.tokens + elapsed * self.token_limit / self.window_s)
+        self.requests = min(self.request_limit, self.requests + elapsed * self.request_limit / self.window_s)
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Take tokens and one request if available and return 0, otherwise
+        return the seconds until they will be (taking nothing).
+        """
+        self._refill()
+        # A batch larger than the whole window's budget can never fit; let
+        # it through once the budget is full and go into debt
+        tokens = min(tokens, self.token_limit)
+        if self.tokens >= tokens and self.requests >= 1:
+            self.tokens -= tokens
+            self.requests -= 1
+            return 0.0
+        token_wait = max(0.0, tokens - self.tokens) * self.window_s / self.token_limit
+        request_wait = max(0.0, 1 - self.requests) * self.window_s / self.request_limit
+        return max(token_wait, request_wait)
+
+    def update_from_headers(self, headers: dict):
+        lowered = {k.lower(): v for k, v in (headers or {}).items()}
+        self._refill()
+        try:
+            if "x-ratelimit-remaining-tokens" in lowered:
+                self.tokens = min(self.tokens, float(lowered["x-ratelimit-remaining-tokens"]))
+            if "x-ratelimit-remaining-requests" in lowered:
+                self.requests = min(self.requests, float(lowered["x-ratelimit-remaining-requests"]))
+        except (TypeError, ValueError):
+            pass
+
+    def drain(self):
+        """Forget any remaining budget, after the service said it is exhausted."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class AdaptiveEmbeddingScheduler:
+    """
+    Embeds texts through embed_fn within TPM/RPM budgets, adapting concurrency.
+
+    embed_fn sends one batch and returns its vectors and response headers,
+    or raises EmbeddingThrottled on 429.
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        tokens_per_minute: int,
+        requests_per_minute: int,
+        max_batch_tokens: int = 16_000,
+        max_batch_items: int = 2048,
+        initial_concurrency: int = 2,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        max_retries: int = 6,
+        window_s: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.embed_fn = embed_fn
+        self.budget = RateBudget(tokens_per_minute, requests_per_minute, window_s, clock)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_items = max_batch_items
+        self.concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.clock = clock
+        self._in_flight = 0
+        self._slots = asyncio.Condition()
+        self._paused_until = 0.0
+        self._successes = 0
+        # Bumped on every decrease; a 429 only decreases concurrency if its
+        # request was sent in the current epoch
+        self._epoch = 0
+        self._stats = {"requests": 0, "throttled": 0, "tokens": 0, "items": 0,
+                       "budget_wait_s": 0.0, "max_concurrency_reached": initial_concurrency}
+
+    async def embed(self, texts: list[str], token_counts: list[int] | None = None) -> list[list[float]]:
+        """Embeddings for texts, in order."""
+        if token_counts is None:
+            token_counts = [estimate_tokens(text) for text in texts]
+        batches = pack_batches(token_counts, self.max_batch_tokens, self.max_batch_items)
+        vectors: list[list[float] | None] = [None] * len(texts)
+
+        async def run(indices: list[int]):
+            batch_vectors = await self._send(
+                [texts[i] for i in indices], sum(token_counts[i] for i in indices)
+            )
+            for i, vector in zip(indices, batch_vectors):
+                vectors[i] = vector
+
+        await asyncio.gather(*(run(indices) for indices in batches))
+        return vectors
+
+    async def _send(self, texts: list[str], tokens: int) -> list[list[float]]:
+        for attempt in range(self.max_retries + 1):
+            await self._acquire()
+            try:
+                await self._wait_for_budget(tokens)
+                epoch = self._epoch
+                self._stats["requests"] += 1
+                try:
+                    response = await self.embed_fn(texts)
+                except EmbeddingThrottled as e:
+                    self._on_throttled(e, epoch, attempt)
+                    continue
+                self.budget.update_from_headers(response.headers)
+                self._on_success(tokens, len(texts))
+                return response.vectors
+            finally:
+                await self._release()
+        raise EmbeddingThrottled(self._paused_until - self.clock())
+
+    async def _acquire(self):
+        async with self._slots:
+            await self._slots.wait_for(lambda: self._in_flight < self.concurrency)
+            self._in_flight += 1
+
+    async def _release(self):
+        async with self._slots:
+            self._in_flight -= 1
+            self._slots.notify_all()
+
+    async def _wait_for_budget(self, tokens: int):
+        while True:
+            wait = max(0.0, self._paused_until - self.clock())
+            if wait == 0:
+                wait = self.budget.reserve(tokens)
+                if wait == 0:
+                    return
+            self._stats["budget_wait_s"] += wait
+            await asyncio.sleep(wait)
+
+    def _on_success(self, tokens: int, items: int):
+        self._stats["tokens"] += tokens
+        self._stats["items"] += items
+        self._successes += 1
+        # Additive increase: one more slot per window of `concurrency` successes
+        if self._successes >= self.concurrency and self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self._successes = 0
+            # Waiters re-check against the new limit when this slot is released
+            self._stats["max_concurrency_reached"] = max(
+                self._stats["max_concurrency_reached"], self.concurrency
+            )
+
+    def _on_throttled(self, error: EmbeddingThrottled, epoch: int, attempt: int):
+        self._stats["throttled"] += 1
+        retry_after = error.retry_after_s
+        if retry_after is None:
+            retry_after = retry_after_from_headers(error.headers)
+        if retry_after is None:
+            retry_after = min(60.0, 2.0 ** attempt)
+        self._paused_until = max(self._paused_until, self.clock() + retry_after)
+        self.budget.drain()
+
+        # Multiplicative decrease, once per episode
+        if epoch == self._epoch:
+            self._epoch += 1
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            self._successes = 0
+            logger.warning(
+                f"Embedding endpoint throttled, concurrency -> {self.concurrency}, "
+                f"pausing {retry_after:.1f}s"
+            )
+
+    def get_stats(self) -> dict:
+        return {**self._stats, "concurrency": self.concurrency, "in_flight": self._in_flight}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count when none is known (about four characters per token)."""
+    return max(1, len(text) // 4)
@@ -6,7 +6,10 @@ Implements:
 - Incremental reprocessing with page-level hashing
 - Self-healing loops for tables and captions
 - Deterministic chunk IDs for stable citations
-- Tombstoning for deleted documents
+- Tombstoning for deleted documents, paged and checkpointed (see tombstoning)
+- Content-hash embedding reuse across re-ingestions (see embedding_cache)
+- Worker-scoped SDK clients and tokenizers (see worker_resources)
+- Token-packed, rate-limit-aware embedding batches (see embedding_scheduler)
 """
 
 import azure.functions as func
@@ -16,19 +19,52 @@ from azure.cosmos import CosmosClient
 from azure.search.documents import SearchClient
 from azure.ai.formrecognizer import DocumentAnalysisClient
 from azure.identity import DefaultAzureCredential
+from azure.core.exceptions import ServiceRequestError
 
 from dataclasses import dataclass, field, asdict
 from typing import Any
 from enum import Enum
+import asyncio
 import hashlib
 import json
 import logging
 from datetime import datetime, timezone
 
+from src.ingestion.embedding_cache import (
+    CosmosEmbeddingCache,
+    EmbeddingReuseStats,
+    LocalEmbeddingCache,
+    aembed_with_cache,
+)
+from src.ingestion.embedding_scheduler import (
+    AdaptiveEmbeddingScheduler,
+    EmbeddingResponse,
+    EmbeddingThrottled,
+    estimate_tokens,
+    pack_batches,
+    retry_after_from_headers,
+)
+from src.ingestion.tombstoning import ChunkTombstoner, TombstoneCheckpoint
+from src.ingestion.worker_resources import worker_resources
+
 
 # Initialize Durable Functions app
 app = df.DFApp(http_auth_level=func.AuthLevel.FUNCTION)
 
+EMBEDDING_MODEL = "text-embedding-3-large"
+EMBEDDING_DIMENSIONS = 3072
+
+# Chunks per embed_chunks activity are packed up to this many tokens; each
+# activity then packs its own API batches (see embedding_scheduler)
+EMBED_ACTIVITY_MAX_TOKENS = 100_000
+
+# Failures that mean a shared client's connection is broken; the client is
+# rebuilt and the call retried once (see worker_resources)
+RECONNECT_ERRORS = (ConnectionError, ServiceRequestError)
+
+# Pages of chunk keys tombstoned per activity call (ChunkTombstoner.page_size each)
+TOMBSTONE_PAGES_PER_ACTIVITY = 10
+
 
 class IngestionStatus(Enum):
     """Status of document ingestion."""
@@ -310,17 +346,23 @@ def ingestion_orchestrator(context: df.DurableOrchestrationContext):
             "sensitivity": ctx.sensitivity,
         })
 
-        # Step 6: Generate embeddings (fan-out for parallelism)
+        # Step 6: Generate embeddings (fan-out for parallelism, packed by tokens)
         embedding_tasks = []
-        batch_size = 20
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
+        for indices in pack_batches(
+            [chunk["token_count"] for chunk in chunks],
+            max_batch_tokens=EMBED_ACTIVITY_MAX_TOKENS,
+            max_batch_items=2048,
+        ):
+            batch = [chunks[i] for i in indices]
             embedding_tasks.append(
                 context.call_activity("embed_chunks", {"chunks": batch})
             )
 
         embedded_batches = yield context.task_all(embedding_tasks)
-        embedded_chunks = [chunk for batch in embedded_batches for chunk in batch]
+        embedded_chunks = [chunk for batch in embedded_batches for chunk in batch["chunks"]]
+        embedding_reuse = EmbeddingReuseStats.total(
+            EmbeddingReuseStats.from_dict(batch["embedding_stats"]) for batch in embedded_batches
+        ).to_dict()
 
         # Step 7: Index to Azure AI Search
         index_result = yield context.call_activity("index_chunks", {
@@ -339,6 +381,7 @@ def ingestion_orchestrator(context: df.DurableOrchestrationContext):
             "page_hashes": extraction_result["page_hashes"],
             "page_count": len(extraction_result["pages"]),
             "chunk_count": len(embedded_chunks),
+            "embedding_reuse": embedding_reuse,
             "status": IngestionStatus.INDEXED.value,
         })
 
@@ -354,6 +397,7 @@ def ingestion_orchestrator(context: df.DurableOrchestrationContext):
             "doc_id": ctx.doc_id,
             "chunks_indexed": len(embedded_chunks),
             "pages_processed": len(pages_to_process),
+            "embedding_reuse": embedding_reuse,
         }
 
     except Exception as e:
@@ -380,14 +424,28 @@ def tombstone_orchestrator(context: df.DurableOrchestrationContext):
     """
     Tombstone orchestrator for deleted documents.
 
-    Marks chunks as inactive rather than deleting immediately.
+    Marks chunks as inactive rather than deleting immediately. Chunks are
+    tombstoned a bounded number of pages per activity, with progress
+    checkpointed in the manifest, so a restarted orchestration resumes
+    where the previous one stopped.
     """
     input_data = context.get_input()
     doc_id = input_data["doc_id"]
     tenant_id = input_data["tenant_id"]
 
+    # Resume from the manifest checkpoint, if a previous run left one
+    manifest = yield context.call_activity("load_manifest", {"doc_id": doc_id, "tenant_id": tenant_id})
+    checkpoint = (manifest or {}).get("tombstone_checkpoint") or {"doc_id": doc_id}
+    if checkpoint.get("completed"):
+        checkpoint = {"doc_id": doc_id}
+
     # Mark all chunks as inactive
-    yield context.call_activity("tombstone_chunks", {"doc_id": doc_id})
+    while not checkpoint.get("completed"):
+        checkpoint = yield context.call_activity("tombstone_chunks", {
+            "doc_id": doc_id,
+            "tenant_id": tenant_id,
+            "checkpoint": checkpoint,
+        })
 
     # Update manifest
     yield context.call_activity("update_manifest", {
@@ -396,7 +454,11 @@ def tombstone_orchestrator(context: df.DurableOrchestrationContext):
         "status": IngestionStatus.ARCHIVED.value,
     })
 
-    return {"status": "tombstoned", "doc_id": doc_id}
+    return {
+        "status": "tombstoned",
+        "doc_id": doc_id,
+        "tombstoned_count": checkpoint.get("tombstoned", 0),
+    }
 
 
 # ============================================================================
@@ -435,7 +497,7 @@ def table_repair_orchestrator(context: df.DurableOrchestrationContext):
         # Re-embed and index repaired chunks
         embedded = yield context.call_activity("embed_chunks", {"chunks": repaired_chunks})
         yield context.call_activity("index_chunks", {
-            "chunks": embedded,
+            "chunks": embedded["chunks"],
             "doc_id": doc_id,
             "is_repair": True,
         })
@@ -454,17 +516,15 @@ def table_repair_orchestrator(context: df.DurableOrchestrationContext):
 @app.activity_trigger(input_name="input")
 async def load_manifest(input: dict) -> dict | None:
     """Load document manifest from Cosmos DB."""
-    cosmos_client = CosmosClient.from_connection_string(
-        _get_env("COSMOS_CONNECTION_STRING")
-    )
-    database = cosmos_client.get_database_client(_get_env("COSMOS_DATABASE"))
-    container = database.get_container_client("document-manifests")
-
     doc_id = input["doc_id"]
     tenant_id = input["tenant_id"]
 
     try:
-        manifest = container.read_item(item=doc_id, partition_key=tenant_id)
+        manifest = _run_cosmos(
+            lambda db: db.get_container_client("document-manifests").read_item(
+                item=doc_id, partition_key=tenant_id,
+            )
+        )
         return manifest
     except Exception:
         return None
@@ -475,18 +535,18 @@ async def download_and_hash(input: dict) -> dict:
     """Download blob and compute content hash."""
     blob_uri = input["blob_uri"]
 
-    credential = DefaultAzureCredential()
-    blob_client = BlobServiceClient(
-        account_url=_extract_account_url(blob_uri),
-        credential=credential,
-    ).get_blob_client(
-        container=_extract_container_from_uri(blob_uri),
-        blob=_extract_blob_name(blob_uri),
-    )
+    account_url = _extract_account_url(blob_uri)
 
     # Download content
-    download_stream = blob_client.download_blob()
-    content = download_stream.readall()
+    content = worker_resources.run(
+        f"blob:{account_url}",
+        lambda: BlobServiceClient(account_url=account_url, credential=_get_credential()),
+        lambda service: service.get_blob_client(
+            container=_extract_container_from_uri(blob_uri),
+            blob=_extract_blob_name(blob_uri),
+        ).download_blob().readall(),
+        retry_on=RECONNECT_ERRORS,
+    )
 
     # Compute hash
     content_hash = hashlib.sha256(content).hexdigest()
@@ -506,10 +566,12 @@ async def download_and_hash(input: dict) -> dict:
 @app.activity_trigger(input_name="input")
 async def extract_document(input: dict) -> dict:
     """Extract document using Azure Document Intelligence."""
-    credential = DefaultAzureCredential()
-    client = DocumentAnalysisClient(
-        endpoint=_get_env("DOC_INTELLIGENCE_ENDPOINT"),
-        credential=credential,
+    client = worker_resources.get(
+        "document_intelligence",
+        lambda: DocumentAnalysisClient(
+            endpoint=_get_env("DOC_INTELLIGENCE_ENDPOINT"),
+            credential=_get_credential(),
+        ),
     )
 
     with open(input["blob_content_path"], "rb") as f:
@@ -709,30 +771,37 @@ async def chunk_pages(input: dict) -> list[dict]:
 
 
 @app.activity_trigger(input_name="input")
-async def embed_chunks(input: dict) -> list[dict]:
-    """Generate embeddings for chunks."""
-    from openai import AzureOpenAI
+async def embed_chunks(input: dict) -> dict:
+    """
+    Generate embeddings for chunks.
 
+    Embeddings are looked up by content hash first; only chunks with new
+    content are sent to the embedding API, through this worker's
+    rate-limit-aware scheduler.
+    """
     chunks = input["chunks"]
+    scheduler = worker_resources.get("embedding_scheduler", _build_embedding_scheduler)
+    token_counts = {
+        chunk["content"]: chunk.get("token_count") or estimate_tokens(chunk["content"])
+        for chunk in chunks
+    }
 
-    client = AzureOpenAI(
-        azure_endpoint=_get_env("AZURE_OPENAI_ENDPOINT"),
-        api_version="2024-02-15-preview",
-        azure_ad_token_provider=_get_token_provider(),
-    )
-
-    # Batch embed
-    texts = [c["content"] for c in chunks]
+    async def embed_texts(texts: list[str]) -> list[list[float]]:
+        return await scheduler.embed(texts, [token_counts[text] for text in texts])
 
-    response = client.embeddings.create(
-        input=texts,
-        model="text-embedding-3-large",
+    stats = await aembed_with_cache(
+        chunks,
+        embed_texts,
+        _get_embedding_cache(),
+        EMBEDDING_MODEL,
+        EMBEDDING_DIMENSIONS,
+    )
+    logging.info(
+        f"Embedded {stats.embedded} of {stats.chunks} chunks, "
+        f"reused {stats.reused} ({stats.reuse_ratio:.0%})"
     )
 
-    for i, chunk in enumerate(chunks):
-        chunk["embedding"] = response.data[i].embedding
-
-    return chunks
+    return {"chunks": chunks, "embedding_stats": stats.to_dict()}
 
 
 @app.activity_trigger(input_name="input")
@@ -742,13 +811,6 @@ async def index_chunks(input: dict) -> dict:
     doc_id = input["doc_id"]
     is_repair = input.get("is_repair", False)
 
-    credential = DefaultAzureCredential()
-    search_client = SearchClient(
-        endpoint=_get_env("AZURE_SEARCH_ENDPOINT"),
-        index_name=_get_env("AZURE_SEARCH_INDEX"),
-        credential=credential,
-    )
-
     # Prepare documents for indexing
     documents = []
     for chunk in chunks:
@@ -778,7 +840,7 @@ async def index_chunks(input: dict) -> dict:
             "sensitivity": chunk.get("sensitivity", "internal"),
             "is_active": True,
             "indexed_at": datetime.now(timezone.utc).isoformat(),
-            "embedding_model_version": "text-embedding-3-large",
+            "embedding_model_version": EMBEDDING_MODEL,
             "ingestion_version": "v1.0",
         }
         documents.append(doc)
@@ -787,7 +849,7 @@ async def index_chunks(input: dict) -> dict:
     batch_size = 100
     for i in range(0, len(documents), batch_size):
         batch = documents[i:i + batch_size]
-        search_client.upload_documents(documents=batch)
+        _run_search(lambda client: client.upload_documents(documents=batch))
 
     return {
         "indexed_count": len(documents),
@@ -798,46 +860,37 @@ async def index_chunks(input: dict) -> dict:
 
 @app.activity_trigger(input_name="input")
 async def tombstone_chunks(input: dict) -> dict:
-    """Mark all chunks for a document as inactive."""
-    doc_id = input["doc_id"]
+    """
+    Mark a document's chunks as inactive, up to TOMBSTONE_PAGES_PER_ACTIVITY pages.
 
-    credential = DefaultAzureCredential()
-    search_client = SearchClient(
-        endpoint=_get_env("AZURE_SEARCH_ENDPOINT"),
-        index_name=_get_env("AZURE_SEARCH_INDEX"),
-        credential=credential,
+    Returns the updated checkpoint; the orchestrator calls again until it
+    is completed.
+    """
+    doc_id = input["doc_id"]
+    tenant_id = input["tenant_id"]
+    checkpoint = TombstoneCheckpoint.from_dict(input.get("checkpoint") or {"doc_id": doc_id})
+
+    tombstoner = ChunkTombstoner(worker_resources.get("search", _build_search_client))
+    # Once per worker: fail with rebuild instructions on an index whose
+    # key field is not filterable/sortable
+    worker_resources.get("tombstone_index_check", tombstoner.check_index)
+    checkpoint = tombstoner.run(
+        doc_id,
+        checkpoint,
+        max_pages=TOMBSTONE_PAGES_PER_ACTIVITY,
+        on_checkpoint=lambda cp: _save_tombstone_checkpoint(tenant_id, cp),
     )
-
-    # Find all chunks for this document
-    results = search_client.search(
-        search_text="*",
-        filter=f"doc_id eq '{doc_id}'",
-        select=["id"],
+    logging.info(
+        f"Tombstoned {checkpoint.tombstoned} chunks of {doc_id} "
+        f"in {checkpoint.pages} pages (completed: {checkpoint.completed})"
     )
 
-    # Update each to inactive
-    updates = []
-    for result in results:
-        updates.append({
-            "id": result["id"],
-            "is_active": False,
-        })
-
-    if updates:
-        search_client.merge_documents(documents=updates)
-
-    return {"tombstoned_count": len(updates)}
+    return checkpoint.to_dict()
 
 
 @app.activity_trigger(input_name="input")
 async def update_manifest(input: dict) -> dict:
     """Update document manifest in Cosmos DB."""
-    cosmos_client = CosmosClient.from_connection_string(
-        _get_env("COSMOS_CONNECTION_STRING")
-    )
-    database = cosmos_client.get_database_client(_get_env("COSMOS_DATABASE"))
-    container = database.get_container_client("document-manifests")
-
     manifest = {
         "id": input["doc_id"],
         "doc_id": input["doc_id"],
@@ -849,13 +902,18 @@ async def update_manifest(input: dict) -> dict:
         "page_hashes": input.get("page_hashes", {}),
         "page_count": input.get("page_count"),
         "chunk_count": input.get("chunk_count"),
+        "embedding_reuse": input.get("embedding_reuse"),
         "error_message": input.get("error_message"),
         "last_ingested_utc": datetime.now(timezone.utc).isoformat(),
         "embedding_model_version": "text-embedding-3-large",
         "ingestion_version": "v1.0",
     }
 
-    container.upsert_item(body=manifest, partition_key=input["tenant_id"])
+    _run_cosmos(
+        lambda db: db.get_container_client("document-manifests").upsert_item(
+            body=manifest, partition_key=input["tenant_id"],
+        )
+    )
 
     return {"status": "updated"}
 
@@ -874,8 +932,6 @@ async def queue_table_repair(input: dict) -> dict:
 @app.activity_trigger(input_name="input")
 async def repair_table_with_vision(input: dict) -> dict:
     """Attempt to repair a table using GPT-4V."""
-    from openai import AzureOpenAI
-
     doc_id = input["doc_id"]
     chunk_id = input["chunk_id"]
     page_number = input["page_number"]
@@ -887,11 +943,7 @@ async def repair_table_with_vision(input: dict) -> dict:
     # 3. Return improved markdown representation
 
     # Placeholder implementation
-    client = AzureOpenAI(
-        azure_endpoint=_get_env("AZURE_OPENAI_ENDPOINT"),
-        api_version="2024-02-15-preview",
-        azure_ad_token_provider=_get_token_provider(),
-    )
+    client = worker_resources.get("openai", _build_openai_client)
 
     # This would actually send the image to vision model
     # For now, return failure to indicate repair not attempted
@@ -939,16 +991,136 @@ def _get_env(name: str) -> str:
     return value
 
 
+def _get_embedding_cache():
+    """
+    Embedding cache for this worker.
+
+    A local SQLite file when EMBEDDING_CACHE_PATH is set, otherwise the
+    "embedding-cache" Cosmos DB container, partitioned on /id (provisioned
+    by infrastructure/bicep/main.bicep; not the Terraform "embeddings-cache"
+    container, which is partitioned on /cacheKey).
+    """
+    import os
+    path = os.environ.get("EMBEDDING_CACHE_PATH")
+    if path:
+        return worker_resources.get("embedding_cache", lambda: LocalEmbeddingCache(path))
+
+    database = worker_resources.get("cosmos", _build_cosmos_database)
+    return CosmosEmbeddingCache(database.get_container_client("embedding-cache"))
+
+
+def _get_credential() -> DefaultAzureCredential:
+    """Azure AD credential shared by this worker's clients; caches its tokens."""
+    return worker_resources.get("credential", DefaultAzureCredential)
+
+
 def _get_token_provider():
     """Get Azure AD token provider."""
     from azure.identity import get_bearer_token_provider
-    credential = DefaultAzureCredential()
     return get_bearer_token_provider(
-        credential,
+        _get_credential(),
         "https://cognitiveservices.azure.com/.default"
     )
 
 
+def _build_openai_client():
+    from openai import AzureOpenAI
+    return AzureOpenAI(
+        azure_endpoint=_get_env("AZURE_OPENAI_ENDPOINT"),
+        api_version="2024-02-15-preview",
+        azure_ad_token_provider=_get_token_provider(),
+    )
+
+
+def _build_embedding_scheduler() -> AdaptiveEmbeddingScheduler:
+    """
+    Embedding scheduler for this worker, budgeted to the deployment quota
+    (EMBEDDING_TPM / EMBEDDING_RPM).
+    """
+    import os
+    from openai import APIConnectionError, RateLimitError
+
+    def send(client, texts):
+        # The scheduler owns retries and backoff, so the SDK must not retry 429s
+        return client.with_options(max_retries=0).embeddings.with_raw_response.create(
+            input=texts,
+            model=EMBEDDING_MODEL,
+            dimensions=EMBEDDING_DIMENSIONS,
+        )
+
+    async def embed_batch(texts: list[str]) -> EmbeddingResponse:
+        try:
+            raw = await asyncio.to_thread(
+                worker_resources.run,
+                "openai",
+                _build_openai_client,
+                lambda client: send(client, texts),
+                (*RECONNECT_ERRORS, APIConnectionError),
+            )
+        except RateLimitError as e:
+            headers = dict(e.response.headers)
+            raise EmbeddingThrottled(retry_after_from_headers(headers), headers)
+        return EmbeddingResponse(
+            vectors=[item.embedding for item in raw.parse().data],
+            headers=dict(raw.headers),
+        )
+
+    return AdaptiveEmbeddingScheduler(
+        embed_batch,
+        tokens_per_minute=int(os.environ.get("EMBEDDING_TPM", "350000")),
+        requests_per_minute=int(os.environ.get("EMBEDDING_RPM", "2100")),
+    )
+
+
+def _build_search_client() -> SearchClient:
+    return SearchClient(
+        endpoint=_get_env("AZURE_SEARCH_ENDPOINT"),
+        index_name=_get_env("AZURE_SEARCH_INDEX"),
+        credential=_get_credential(),
+    )
+
+
+def _build_cosmos_database():
+    cosmos_client = CosmosClient.from_connection_string(
+        _get_env("COSMOS_CONNECTION_STRING")
+    )
+    return cosmos_client.get_database_client(_get_env("COSMOS_DATABASE"))
+
+
+def _run_search(operation):
+    """Run operation on this worker's SearchClient, reconnecting once if broken."""
+    return worker_resources.run("search", _build_search_client, operation, RECONNECT_ERRORS)
+
+
+def _run_cosmos(operation):
+    """Run operation on this worker's Cosmos database client, reconnecting once if broken."""
+    return worker_resources.run("cosmos", _build_cosmos_database, operation, RECONNECT_ERRORS)
+
+
+def _save_tombstone_checkpoint(tenant_id: str, checkpoint: TombstoneCheckpoint):
+    """Record tombstoning progress on the manifest without rewriting it."""
+    try:
+        _run_cosmos(
+            lambda db: db.get_container_client("document-manifests").patch_item(
+                item=checkpoint.doc_id,
+                partition_key=tenant_id,
+                patch_operations=[
+                    {"op": "set", "path": "/tombstone_checkpoint", "value": checkpoint.to_dict()},
+                ],
+            )
+        )
+    except Exception as e:
+        # No manifest (never fully ingested) or a transient failure: the
+        # run continues, a restart just resumes from an earlier page
+        logging.warning(f"Could not checkpoint tombstoning of {checkpoint.doc_id}: {e}")
+
+
+def _get_encoder():
+    """cl100k_base tokenizer, loaded once per worker."""
+    import tiktoken
+    return worker_resources.get("tiktoken:cl100k_base", lambda: tiktoken.get_encoding("cl100k_base"))
+
+
 def _extract_page_content(result: Any, page_num: int) -> str:
     """Extract text content for a specific page."""
     content_parts = []
@@ -1062,8 +1234,7 @@ def _table_to_text(table: dict) -> str:
 
 def _chunk_text(text: str, max_tokens: int = 512, overlap_tokens: int = 64) -> list[str]:
     """Chunk text into segments."""
-    import tiktoken
-    encoder = tiktoken.get_encoding("cl100k_base")
+    encoder = _get_encoder()
 
     tokens = encoder.encode(text)
     chunks = []
@@ -1080,6 +1251,5 @@ def _chunk_text(text: str, max_tokens: int = 512, overlap_tokens: int = 64) -> l
 
 def _count_tokens(text: str) -> int:
     """Count tokens in text."""
-    import tiktoken
-    encoder = tiktoken.get_encoding("cl100k_base")
+    encoder = _get_encoder()
     return len(encoder.encode(text))
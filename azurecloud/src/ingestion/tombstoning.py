@@ -0,0 +1,178 @@
+"""
+Paged, Batched Tombstoning for Deleted Documents
+
+Implements:
+- Keyset paging over a document's chunk keys (doc_id filter, ordered by
+  id, continuing after the last key seen), so paging is stable while
+  chunks are being updated and is not bound by the $skip limit
+- Tombstone merges in index-sized batches with bounded concurrency
+- Retry of per-document indexing failures within a batch
+- Checkpoints after every page; a restarted run resumes after the last
+  tombstoned key
+
+Requires the index key field (id) to be filterable and sortable. Azure AI
+Search cannot change those attributes on an existing field, so an index
+created before they were set must be dropped, recreated from
+configs/search-indexes and re-ingested; check_index() reports this before
+any tombstoning starts.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+class TombstoneError(Exception):
+    """Chunks could not be tombstoned after retries."""
+
+
+@dataclass
+class TombstoneCheckpoint:
+    """Progress of tombstoning one document, stored in its manifest."""
+    doc_id: str
+    # Last chunk key tombstoned; the next page starts after it
+    continuation_token: str | None = None
+    tombstoned: int = 0
+    pages: int = 0
+    completed: bool = False
+    updated_at: str | None = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TombstoneCheckpoint":
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+def _odata_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def chunk_page_filter(doc_id: str, after_key: str | None) -> str:
+    """OData filter for a document's chunks with keys after after_key."""
+    expression = f"doc_id eq {_odata_string(doc_id)}"
+    if after_key is not None:
+        expression += f" and id gt {_odata_string(after_key)}"
+    return expression
+
+
+class ChunkTombstoner:
+    """
+    Marks a document's chunks inactive, page by page.
+
+    Each page of keys is split into batches of at most batch_size
+    documents, merged with up to max_concurrency batches in flight.
+    """
+
+    # Azure AI Search accepts at most 1000 documents per indexing request
+    MAX_BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        search_client: Any,
+        page_size: int = 4000,
+        batch_size: int = 1000,
+        max_concurrency: int = 4,
+        max_retries: int = 2,
+    ):
+        self.search_client = search_client
+        self.page_size = page_size
+        self.batch_size = min(batch_size, self.MAX_BATCH_SIZE)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+
+    def check_index(self) -> bool:
+        """
+        Verify the index supports keyset paging on id.
+
+        Raises TombstoneError when the service rejects the id filter or
+        sort (HTTP 400), i.e. the index predates the key field change.
+        """
+        try:
+            list(self.search_client.search(
+                search_text="*",
+                filter=chunk_page_filter("", ""),
+                select=["id"],
+                order_by=["id asc"],
+                top=1,
+            ))
+        except Exception as e:
+            if getattr(e, "status_code", None) != 400:
+                raise
+            raise TombstoneError(
+                "Index rejects filtering or sorting on 'id'; it must be rebuilt from "
+                "configs/search-indexes (key field filterable and sortable) and "
+                f"re-ingested before documents can be tombstoned: {e}"
+            ) from e
+        return True
+
+    def page_keys(self, doc_id: str, after_key: str | None) -> list[str]:
+        """Up to page_size chunk keys of the document after after_key, in key order."""
+        results = self.search_client.search(
+            search_text="*",
+            filter=chunk_page_filter(doc_id, after_key),
+            select=["id"],
+            order_by=["id asc"],
+            top=self.page_size,
+        )
+        return [result["id"] for result in results]
+
+    def tombstone_batch(self, keys: list[str]) -> int:
+        """Merge is_active=false into one batch, retrying documents that failed."""
+        pending = keys
+        for attempt in range(self.max_retries + 1):
+            results = self.search_client.merge_documents(
+                documents=[{"id": key, "is_active": False} for key in pending]
+            )
+            # 404: the chunk is already gone, which is as good as tombstoned
+            pending = [
+                r.key for r in results
+                if not r.succeeded and getattr(r, "status_code", None) != 404
+            ]
+            if not pending:
+                return len(keys)
+            logger.warning(f"{len(pending)} chunks failed to tombstone (attempt {attempt + 1})")
+        raise TombstoneError(f"{len(pending)} chunks failed to tombstone, first: {pending[0]}")
+
+    def tombstone_page(self, keys: list[str]) -> int:
+        batches = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+        if len(batches) == 1 or self.max_concurrency <= 1:
+            return sum(self.tombstone_batch(batch) for batch in batches)
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as pool:
+            return sum(pool.map(self.tombstone_batch, batches))
+
+    def run(
+        self,
+        doc_id: str,
+        checkpoint: TombstoneCheckpoint | None = None,
+        max_pages: int | None = None,
+        on_checkpoint: Callable[[TombstoneCheckpoint], None] | None = None,
+    ) -> TombstoneCheckpoint:
+        """
+        Tombstone the document's chunks, resuming from checkpoint.
+
+        Stops after max_pages pages (the returned checkpoint is then not
+        completed) or when no chunks remain. on_checkpoint is called after
+        every page with the updated checkpoint.
+        """
+        checkpoint = checkpoint or TombstoneCheckpoint(doc_id=doc_id)
+        pages = 0
+        while not checkpoint.completed and (max_pages is None or pages < max_pages):
+            keys = self.page_keys(doc_id, checkpoint.continuation_token)
+            if keys:
+                checkpoint.tombstoned += self.tombstone_page(keys)
+                checkpoint.continuation_token = keys[-1]
+                checkpoint.pages += 1
+                pages += 1
+            if len(keys) < self.page_size:
+                checkpoint.completed = True
+            checkpoint.updated_at = datetime.now(timezone.utc).isoformat()
+            if on_checkpoint is not None:
+                on_checkpoint(checkpoint)
+        return checkpoint
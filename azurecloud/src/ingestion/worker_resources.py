@@ -0,0 +1,136 @@
+"""
+Worker-Scoped Resource Registry for Ingestion Activities
+
+Implements:
+- One instance per resource per host process (SDK clients, credentials,
+  tokenizers), shared by every activity invocation on the worker
+- Thread-safe, build-once construction of each resource
+- Recovery from broken connections: the failed instance is dropped and
+  rebuilt, and the operation retried once on the fresh instance
+- Rebuild after fork, so child processes never share parent sockets
+
+Durable Functions activities run many times per host process; building an
+OpenAI, Search or Cosmos client per invocation repeats credential, TLS and
+connection-pool setup for every document.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Callable, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ResourceRegistry:
+    """Named, lazily built resources shared across invocations in one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resources: dict[str, Any] = {}
+        self._building: dict[str, threading.Lock] = {}
+        self._pid = os.getpid()
+        self._stats = {"builds": {}, "hits": 0, "rebuilds": 0}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._resources
+
+    def get(self, name: str, factory: Callable[[], T]) -> T:
+        """The named resource, built with factory on first use in this process."""
+        self._check_fork()
+        resource = self._resources.get(name)
+        if resource is not None:
+            self._stats["hits"] += 1
+            return resource
+
+        # Per-name lock, so one slow client build does not block the others
+        with self._lock:
+            build_lock = self._building.setdefault(name, threading.Lock())
+        with build_lock:
+            resource = self._resources.get(name)
+            if resource is None:
+                resource = factory()
+                self._resources[name] = resource
+                builds = self._stats["builds"]
+                builds[name] = builds.get(name, 0) + 1
+                logger.info(f"Built worker resource {name}")
+            else:
+                self._stats["hits"] += 1
+        return resource
+
+    def invalidate(self, name: str, resource: Any = None) -> bool:
+        """
+        Drop the named resource so the next get rebuilds it.
+
+        With resource given, only drops it if it is still the current
+        instance, so concurrent callers recovering from the same failure
+        rebuild once.
+        """
+        with self._lock:
+            current = self._resources.get(name)
+            if current is None or (resource is not None and current is not resource):
+                return False
+            # Not closed: other invocations may still hold it mid-operation
+            del self._resources[name]
+        return True
+
+    def run(
+        self,
+        name: str,
+        factory: Callable[[], T],
+        operation: Callable[[T], Any],
+        retry_on: tuple[type[BaseException], ...] = (ConnectionError,),
+    ) -> Any:
+        """
+        Run operation on the named resource.
+
+        If it fails with one of retry_on (a broken connection), the
+        resource is rebuilt and the operation retried once.
+        """
+        resource = self.get(name, factory)
+        try:
+            return operation(resource)
+        except retry_on as e:
+            logger.warning(f"Worker resource {name} failed ({e}), rebuilding")
+            if self.invalidate(name, resource):
+                self._stats["rebuilds"] += 1
+            return operation(self.get(name, factory))
+
+    def clear(self):
+        with self._lock:
+            resources, self._resources = self._resources, {}
+        for resource in resources.values():
+            _close_quietly(resource)
+
+    def get_stats(self) -> dict:
+        return {
+            "resources": sorted(self._resources),
+            "builds": dict(self._stats["builds"]),
+            "hits": self._stats["hits"],
+            "rebuilds": self._stats["rebuilds"],
+        }
+
+    def _check_fork(self):
+        pid = os.getpid()
+        if pid != self._pid:
+            # Forked: connections belong to the parent, start over
+            with self._lock:
+                self._resources = {}
+                self._building = {}
+                self._pid = pid
+
+
+def _close_quietly(resource: Any):
+    close = getattr(resource, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"Error closing worker resource: {e}")
+
+
+# Process-wide registry used by the ingestion activities
+worker_resources = ResourceRegistry()
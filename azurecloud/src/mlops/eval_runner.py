@@ -0,0 +1,198 @@
+"""
+Bounded-Parallel Evaluation Runner
+
+Implements:
+- Concurrent scoring of samples against several evaluators, bounded by a
+  global limit on calls in flight and optional per-evaluator limits
+- A timeout on each evaluator call (not on the sample as a whole, and not
+  on the wait for a slot); a sample with a call that times out or fails is
+  reported as failed
+- Results returned in sample order, whatever order they complete in
+- Incremental checkpointing to an append-only JSONL file, so an
+  interrupted run only re-scores samples that had not finished
+
+Evaluator calls are remote LLM-judge requests, so a run is bound by
+their latency rather than local CPU. With max_concurrency=1 the runner
+is strictly sequential and yields the same results; the call timeout
+applies there too.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+ScoreFn = Callable[[Any], Awaitable[float]]
+
+
+@dataclass
+class SampleResult:
+    """Scores of one sample, or why it has none."""
+    sample_id: str
+    scores: Optional[dict[str, float]] = None
+    error: Optional[str] = None
+    resumed: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.scores is not None
+
+
+class EvalCheckpoint:
+    """
+    Completed samples of one evaluation run, appended as JSON lines.
+
+    Each line is {"sample_id": ..., "scores": {...}} and is flushed as
+    soon as the sample completes. A torn last line (crash mid-write) is
+    ignored on load.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def load(self) -> dict[str, dict[str, float]]:
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    completed[record["sample_id"]] = record["scores"]
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping unreadable checkpoint line in {self.path}")
+        return completed
+
+    def record(self, sample_id: str, scores: dict[str, float]):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps({"sample_id": sample_id, "scores": scores}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clear(self):
+        """Remove the checkpoint once the run it belongs to has completed."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class EvaluationRunner:
+    """
+    Scores (sample_id, target) pairs with every evaluator.
+
+    evaluators maps a metric name to an async function returning the
+    score for one target. call_timeout_s bounds each of those calls;
+    None disables the timeout.
+    """
+
+    def __init__(
+        self,
+        evaluators: dict[str, ScoreFn],
+        max_concurrency: int = 8,
+        per_evaluator_concurrency: Optional[dict[str, int]] = None,
+        call_timeout_s: Optional[float] = None,
+        checkpoint: Optional[EvalCheckpoint] = None,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.evaluators = evaluators
+        self.max_concurrency = max_concurrency
+        self.per_evaluator_concurrency = per_evaluator_concurrency or {}
+        self.call_timeout_s = call_timeout_s
+        self.checkpoint = checkpoint
+        self._stats = {"calls": 0, "failed": 0, "timed_out": 0, "resumed": 0, "max_in_flight": 0}
+        self._in_flight = 0
+
+    async def run(self, samples: list[tuple[str, Any]]) -> list[SampleResult]:
+        """Results for samples, in the order given."""
+        completed = self.checkpoint.load() if self.checkpoint else {}
+        names = set(self.evaluators)
+        global_slots = asyncio.Semaphore(self.max_concurrency)
+        evaluator_slots = {
+            name: asyncio.Semaphore(limit)
+            for name, limit in self.per_evaluator_concurrency.items()
+            if name in self.evaluators
+        }
+        # Bound the samples in progress too, so thousands of samples do not
+        # all start (and hold their targets) at once
+        sample_slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def score(name: str, fn: ScoreFn, target: Any) -> float:
+            limit = evaluator_slots.get(name)
+            if limit is not None:
+                await limit.acquire()
+            try:
+                async with global_slots:
+                    self._in_flight += 1
+                    self._stats["calls"] += 1
+                    self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._in_flight)
+                    try:
+                        # Only the call itself counts against the timeout,
+                        # not the wait for a slot
+                        return await asyncio.wait_for(fn(target), self.call_timeout_s)
+                    finally:
+                        self._in_flight -= 1
+            finally:
+                if limit is not None:
+                    limit.release()
+
+        async def evaluate(sample_id: str, target: Any) -> SampleResult:
+            previous = completed.get(sample_id)
+            if previous is not None and names <= set(previous):
+                self._stats["resumed"] += 1
+                return SampleResult(sample_id, {name: previous[name] for name in self.evaluators}, resumed=True)
+
+            async with sample_slots:
+                calls = [
+                    asyncio.ensure_future(score(name, fn, target))
+                    for name, fn in self.evaluators.items()
+                ]
+                try:
+                    values = await asyncio.gather(*calls)
+                except asyncio.TimeoutError:
+                    self._stats["timed_out"] += 1
+                    return await self._failed(sample_id, calls, f"timed out after {self.call_timeout_s}s")
+                except Exception as e:
+                    return await self._failed(sample_id, calls, str(e))
+
+            scores = dict(zip(self.evaluators, values))
+            if self.checkpoint:
+                self.checkpoint.record(sample_id, scores)
+            return SampleResult(sample_id, scores)
+
+        start = time.perf_counter()
+        try:
+            results = await asyncio.gather(*(evaluate(sample_id, target) for sample_id, target in samples))
+        finally:
+            if self.checkpoint:
+                self.checkpoint.close()
+        logger.info(
+            f"Evaluated {len(results)} samples in {time.perf_counter() - start:.1f}s "
+            f"({self._stats['resumed']} from checkpoint, {self._stats['failed']} failed)"
+        )
+        return list(results)
+
+    async def _failed(self, sample_id: str, calls: list[asyncio.Future], error: str) -> SampleResult:
+        # The sample is lost either way; stop its other evaluator calls
+        for call in calls:
+            call.cancel()
+        await asyncio.gather(*calls, return_exceptions=True)
+        self._stats["failed"] += 1
+        logger.error(f"Failed to evaluate sample {sample_id}: {error}")
+        return SampleResult(sample_id, error=error)
+
+    def get_stats(self) -> dict:
+        return dict(self._stats)
@@ -6,6 +6,7 @@ Implements continuous evaluation in production:
 - Drift detection (retrieval score, query patterns, quality)
 - User feedback correlation
 - Automated alerting on quality regression
+- Bounded-parallel, checkpointed evaluator runs (see eval_runner)
 
 Integrates with Azure AI Foundry for managed evaluation.
 """
@@ -29,6 +30,8 @@ from azure.ai.evaluation.evaluators import (
     ResponseCompletenessEvaluator,
 )
 
+from src.mlops.eval_runner import EvalCheckpoint, EvaluationRunner
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,6 +47,11 @@ class OnlineEvalConfig:
     groundedness_threshold: float = 0.8
     relevance_threshold: float = 0.7
     drift_alert_threshold: float = 0.15  # 15% drift triggers alert
+    max_concurrency: int = int(os.getenv("EVAL_MAX_CONCURRENCY", "8"))  # 1 = sequential
+    per_evaluator_concurrency: dict = field(default_factory=dict)  # e.g. {"groundedness": 4}
+    # Per evaluator call, also when max_concurrency is 1; None disables it
+    call_timeout_s: Optional[float] = 120.0
+    checkpoint_dir: str = os.getenv("EVAL_CHECKPOINT_DIR", "")  # Empty disables checkpointing
 
 
 @dataclass
@@ -285,6 +293,18 @@ class OnlineEvaluator:
             "query": item.transformed_query or item.question
         }
 
+    @staticmethod
+    def _score_fn(evaluator):
+        """Adapt a Foundry evaluator to a score function over eval targets."""
+        async def score(target: dict) -> float:
+            result = await evaluator.evaluate(
+                query=target["inputs"]["question"],
+                response=target["outputs"]["response"],
+                context=target["context"]
+            )
+            return result.get("score", 0)
+        return score
+
     async def run_evaluation(self) -> OnlineEvalSummary:
         """
         Run online evaluation batch.
@@ -324,27 +344,23 @@ class OnlineEvaluator:
             "completeness": ResponseCompletenessEvaluator(project=project),
         }
 
-        # Run evaluation
-        results = []
-        for sample in samples:
-            try:
-                target = await self._prepare_eval_target(sample)
-
-                # Run each evaluator
-                scores = {}
-                for name, evaluator in evaluators.items():
-                    result = await evaluator.evaluate(
-                        query=target["inputs"]["question"],
-                        response=target["outputs"]["response"],
-                        context=target["context"]
-                    )
-                    scores[name] = result.get("score", 0)
-
-                results.append(scores)
-
-            except Exception as e:
-                logger.error(f"Failed to evaluate sample {sample.id}: {e}")
-                continue
+        # Run evaluation; a run interrupted today resumes from its checkpoint
+        checkpoint = None
+        if self.config.checkpoint_dir:
+            checkpoint = EvalCheckpoint(os.path.join(
+                self.config.checkpoint_dir, f"online-eval-{period_end:%Y%m%d}.jsonl"
+            ))
+        runner = EvaluationRunner(
+            {name: self._score_fn(evaluator) for name, evaluator in evaluators.items()},
+            max_concurrency=self.config.max_concurrency,
+            per_evaluator_concurrency=self.config.per_evaluator_concurrency,
+            call_timeout_s=self.config.call_timeout_s,
+            checkpoint=checkpoint,
+        )
+        targets = [(sample.id, await self._prepare_eval_target(sample)) for sample in samples]
+        results = [r.scores for r in await runner.run(targets) if r.ok]
+        if checkpoint:
+            checkpoint.clear()
 
         if not results:
             return self._empty_summary(run_id, period_start, period_end)
@@ -4,9 +4,11 @@ Pre-retrieval, Retrieval, Post-retrieval, and Generation pipeline
 """
 
 import os
+import time
 import logging
 import hashlib
 from typing import Optional, List, Dict, Any
+from uuid import UUID
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 
@@ -15,6 +17,8 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.outputs import LLMResult
 from langchain.retrievers import ContextualCompressionRetriever
 from langchain.retrievers.document_compressors import LLMChainFilter
 from pydantic import BaseModel, Field
@@ -36,6 +40,83 @@ class UserContext:
     department: Optional[str] = None
     locale: str = "en"
     timezone: str = "UTC"
+    tenant_id: Optional[str] = None
+
+
+class UsageCallbackHandler(AsyncCallbackHandler):
+    """Collects token usage and wall time per pipeline stage for one query.
+
+    Stages are identified by a "stage:<name>" tag on the runnable config.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._started: Dict[UUID, float] = {}
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    async def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    async def on_llm_end(
+        self,
+        response: LLMResult,
+        *,
+        run_id: UUID,
+        tags: Optional[List[str]] = None,
+        **kwargs
+    ) -> None:
+        started = self._started.pop(run_id, None)
+        wall_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+        llm_output = response.llm_output or {}
+        token_usage = llm_output.get("token_usage") or {}
+        self.record(
+            stage=self._stage_from_tags(tags),
+            model=llm_output.get("model_name", ""),
+            prompt_tokens=token_usage.get("prompt_tokens", 0),
+            completion_tokens=token_usage.get("completion_tokens", 0),
+            wall_time_ms=wall_ms
+        )
+
+    def record(
+        self,
+        stage: str,
+        model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        wall_time_ms: float = 0.0
+    ) -> None:
+        """Fold one model call into the stage totals."""
+        totals = self.stages.setdefault(stage, {
+            "calls": 0,
+            "model": model,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "wall_time_ms": 0.0
+        })
+        totals["calls"] += 1
+        totals["model"] = model or totals["model"]
+        totals["prompt_tokens"] += prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+        totals["wall_time_ms"] = round(totals["wall_time_ms"] + wall_time_ms, 2)
+
+    def tokens_used(self) -> Dict[str, int]:
+        """Prompt/completion totals across all stages."""
+        return {
+            "prompt": sum(s["prompt_tokens"] for s in self.stages.values()),
+            "completion": sum(s["completion_tokens"] for s in self.stages.values())
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {"tokens": self.tokens_used(), "by_stage": self.stages}
+
+    @staticmethod
+    def _stage_from_tags(tags: Optional[List[str]]) -> str:
+        for tag in tags or []:
+            if tag.startswith("stage:"):
+                return tag[len("stage:"):]
+        return "llm"
 
 
 @dataclass
@@ -48,6 +129,7 @@ class QueryContext:
     filters: Dict[str, Any] = field(default_factory=dict)
     intent: Optional[str] = None
     rewritten_query: Optional[str] = None
+    usage: UsageCallbackHandler = field(default_factory=UsageCallbackHandler)
 
 
 class IntentClassification(BaseModel):
@@ -90,6 +172,7 @@ class RAGResponse(BaseModel):
     model_used: str
     tokens_used: Dict[str, int]
     latency_ms: Dict[str, int]
+    usage: Dict[str, Any] = Field(default_factory=dict)
 
 
 # =============================================================================
@@ -115,7 +198,10 @@ class RAGOrchestrator:
         chat_fallback_deployment: str = "gpt-4o-mini",
         search_endpoint: str = None,
         search_index: str = "enterprise-knowledge-index",
-        cosmos_endpoint: str = None
+        cosmos_endpoint: str = None,
+        admission_controller: Any = None,
+        estimated_query_tokens: int = 6000,
+        cost_tracker: Any = None
     ):
         self.azure_openai_endpoint = azure_openai_endpoint
         self.embedding_deployment = embedding_deployment
@@ -124,6 +210,15 @@ class RAGOrchestrator:
         self.search_endpoint = search_endpoint
         self.search_index = search_index
         self.cosmos_endpoint = cosmos_endpoint
+        # Optional finops AdmissionController (anything with
+        # admit(tenant_id, estimated_tokens) -> decision); consulted before
+        # the first LLM call of every uncached query
+        self.admission_controller = admission_controller
+        self.estimated_query_tokens = estimated_query_tokens
+        # Optional finops CostTracker; per-stage LLM usage of every admitted
+        # query is reported to it and its cost debits the controller. Do not
+        # also register the controller as a listener on the same tracker.
+        self.cost_tracker = cost_tracker
 
         # Initialize LLM clients
         self._init_clients()
@@ -243,6 +338,13 @@ Sources:
             | StrOutputParser()
         )
 
+        # Same prompt on the cheaper deployment, for degraded admissions
+        self.generation_chain_fallback = (
+            generation_prompt
+            | self.llm_fallback
+            | StrOutputParser()
+        )
+
     async def process_query(
         self,
         query: str,
@@ -256,15 +358,17 @@ Sources:
 
         Pipeline:
         1. Check cache
-        2. Classify intent
-        3. Rewrite query
-        4. Apply ACL filters
-        5. Retrieve chunks
-        6. Rerank
-        7. Generate response
-        8. Cache result
+        2. Admission control (deny, or degrade to the fallback model
+           without reranking)
+        3. Classify intent
+        4. Rewrite query
+        5. Apply ACL filters
+        6. Retrieve chunks
+        7. Rerank
+        8. Generate response
+        9. Cache result
+        10. Debit admission control with the query's actual usage
         """
-        import time
         start_time = time.time()
         latencies = {}
 
@@ -276,6 +380,7 @@ Sources:
             filters=filters or {}
         )
 
+        admitted = False
         try:
             # Step 1: Check Cache
             cache_start = time.time()
@@ -287,6 +392,18 @@ Sources:
                 cached["latency_ms"] = latencies
                 return RAGResponse(**cached)
 
+            # Admission control before any LLM call
+            degraded = False
+            if self.admission_controller is not None:
+                decision = self.admission_controller.admit(
+                    self._tenant_id(user),
+                    estimated_tokens=self.estimated_query_tokens
+                )
+                if not decision.allowed:
+                    return self._throttled_response(ctx, decision, latencies)
+                degraded = decision.action == "degrade"
+            admitted = True
+
             # Step 2: Intent Classification
             intent_start = time.time()
             intent_result = await self._classify_intent(ctx)
@@ -315,14 +432,17 @@ Sources:
             if not chunks:
                 return self._no_results_response(ctx, latencies)
 
-            # Step 6: Reranking
+            # Step 6: Reranking (skipped when degraded)
             rerank_start = time.time()
-            reranked_chunks = await self._rerank_chunks(ctx, chunks)
+            if degraded:
+                reranked_chunks = chunks[:5]
+            else:
+                reranked_chunks = await self._rerank_chunks(ctx, chunks)
             latencies["rerank"] = int((time.time() - rerank_start) * 1000)
 
             # Step 7: Generation
             generation_start = time.time()
-            response = await self._generate_response(ctx, reranked_chunks)
+            response = await self._generate_response(ctx, reranked_chunks, degraded=degraded)
             latencies["generation"] = int((time.time() - generation_start) * 1000)
 
             # Step 8: Cache Result
@@ -332,6 +452,8 @@ Sources:
 
             latencies["total"] = int((time.time() - start_time) * 1000)
             response.latency_ms = latencies
+            response.tokens_used = ctx.usage.tokens_used()
+            response.usage = ctx.usage.summary()
 
             return response
 
@@ -346,9 +468,42 @@ Sources:
                 intent=ctx.intent or "error",
                 was_cached=False,
                 model_used=self.chat_deployment,
-                tokens_used={"prompt": 0, "completion": 0},
-                latency_ms=latencies
+                tokens_used=ctx.usage.tokens_used(),
+                latency_ms=latencies,
+                usage=ctx.usage.summary()
             )
+        finally:
+            if admitted:
+                self._record_usage(ctx)
+
+    def _record_usage(self, ctx: QueryContext):
+        """Report an admitted query's actual usage and debit its tenant's buckets"""
+        tenant_id = self._tenant_id(ctx.user)
+        cost = 0.0
+        try:
+            if self.cost_tracker is not None:
+                for stage, totals in ctx.usage.stages.items():
+                    if not (totals["prompt_tokens"] or totals["completion_tokens"]):
+                        continue
+                    event = self.cost_tracker.track_llm_usage(
+                        model=totals["model"] or self.chat_deployment,
+                        input_tokens=totals["prompt_tokens"],
+                        output_tokens=totals["completion_tokens"],
+                        tenant_id=tenant_id,
+                        user_id=ctx.user.user_id if ctx.user else "",
+                        operation=stage
+                    )
+                    cost += event.total_cost
+
+            if self.admission_controller is not None:
+                tokens = ctx.usage.tokens_used()
+                self.admission_controller.record_usage(
+                    tenant_id,
+                    tokens=tokens["prompt"] + tokens["completion"],
+                    cost=cost
+                )
+        except Exception as e:
+            logger.error(f"Usage recording failed for tenant {tenant_id}: {e}")
 
     async def _check_cache(self, ctx: QueryContext) -> Optional[Dict]:
         """Check Cosmos DB cache for existing response"""
@@ -407,7 +562,7 @@ Sources:
         result = await self.intent_chain.ainvoke({
             "query": ctx.query,
             "context": context_str
-        })
+        }, config=self._run_config(ctx, "intent"))
 
         logger.info(f"Intent: {result.intent} (confidence: {result.confidence})")
         return result
@@ -424,11 +579,15 @@ Sources:
             "history": history_str,
             "business_unit": ctx.user.business_unit if ctx.user else "Unknown",
             "department": ctx.user.department if ctx.user else "Unknown"
-        })
+        }, config=self._run_config(ctx, "rewrite"))
 
         logger.info(f"Query rewritten: {ctx.query} -> {result.rewritten}")
         return result
 
+    def _run_config(self, ctx: QueryContext, stage: str) -> Dict[str, Any]:
+        """Runnable config that attributes LLM usage to a pipeline stage"""
+        return {"callbacks": [ctx.usage], "tags": [f"stage:{stage}"]}
+
     def _build_acl_filters(self, user: UserContext) -> Dict[str, Any]:
         """Build ACL filters based on user's group memberships"""
         if not user or not user.groups:
@@ -446,10 +605,17 @@ Sources:
         from azure.identity.aio import DefaultAzureCredential
 
         try:
-            # Generate query embedding
+            # Generate query embedding (embedding clients do not report usage
+            # through callbacks, so only the call and its wall time are recorded)
+            embed_start = time.perf_counter()
             query_embedding = await self.embeddings.aembed_query(
                 ctx.rewritten_query or ctx.query
             )
+            ctx.usage.record(
+                stage="embedding",
+                model=self.embedding_deployment,
+                wall_time_ms=(time.perf_counter() - embed_start) * 1000
+            )
 
             credential = DefaultAzureCredential()
             async with SearchClient(
@@ -553,7 +719,8 @@ Return JSON: [{{"chunk_id": "...", "score": X}}, ...]""")
 
         try:
             response = await self.llm.ainvoke(
-                rerank_prompt.format(query=ctx.query, passages=passages_str)
+                rerank_prompt.format(query=ctx.query, passages=passages_str),
+                config=self._run_config(ctx, "rerank")
             )
 
             import json
@@ -575,9 +742,12 @@ Return JSON: [{{"chunk_id": "...", "score": X}}, ...]""")
     async def _generate_response(
         self,
         ctx: QueryContext,
-        chunks: List[RetrievalResult]
+        chunks: List[RetrievalResult],
+        degraded: bool = False
     ) -> RAGResponse:
         """Generate grounded response with citations"""
+        chain = self.generation_chain_fallback if degraded else self.generation_chain
+        model_used = self.chat_fallback_deployment if degraded else self.chat_deployment
 
         # Build context
         context_parts = []
@@ -598,12 +768,12 @@ Return JSON: [{{"chunk_id": "...", "score": X}}, ...]""")
                 history_messages.append(AIMessage(content=msg["content"]))
 
         try:
-            response = await self.generation_chain.ainvoke({
+            response = await chain.ainvoke({
                 "context": context_str,
                 "sources": sources_str,
                 "history": history_messages,
                 "query": ctx.query
-            })
+            }, config=self._run_config(ctx, "generation"))
 
             # Build citations
             citations = []
@@ -630,8 +800,8 @@ Return JSON: [{{"chunk_id": "...", "score": X}}, ...]""")
                 grounding_score=grounding_score,
                 intent=ctx.intent or "qa",
                 was_cached=False,
-                model_used=self.chat_deployment,
-                tokens_used={"prompt": 0, "completion": 0},  # Would come from callback
+                model_used=model_used,
+                tokens_used=ctx.usage.tokens_used(),
                 latency_ms={}
             )
 
@@ -706,8 +876,9 @@ Return JSON: [{{"chunk_id": "...", "score": X}}, ...]""")
                 intent="clarify",
                 was_cached=False,
                 model_used=self.chat_deployment,
-                tokens_used={"prompt": 0, "completion": 0},
-                latency_ms=latencies
+                tokens_used=ctx.usage.tokens_used(),
+                latency_ms=latencies,
+                usage=ctx.usage.summary()
             )
         elif intent.intent == "action":
             return RAGResponse(
@@ -718,12 +889,39 @@ Return JSON: [{{"chunk_id": "...", "score": X}}, ...]""")
                 intent="action",
                 was_cached=False,
                 model_used=self.chat_deployment,
-                tokens_used={"prompt": 0, "completion": 0},
-                latency_ms=latencies
+                tokens_used=ctx.usage.tokens_used(),
+                latency_ms=latencies,
+                usage=ctx.usage.summary()
             )
         else:
             return self._no_results_response(ctx, latencies)
 
+    def _tenant_id(self, user: Optional[UserContext]) -> str:
+        """Tenant used for admission control and cost attribution"""
+        if not user:
+            return "default"
+        return user.tenant_id or user.business_unit or "default"
+
+    def _throttled_response(
+        self,
+        ctx: QueryContext,
+        decision: Any,
+        latencies: Dict[str, int]
+    ) -> RAGResponse:
+        """Response when admission control denies the query"""
+        return RAGResponse(
+            answer=f"Your organization has reached its AI usage limit. Please try again in {max(1, round(decision.retry_after_s))} seconds.",
+            citations=[],
+            confidence=0.0,
+            grounding_score=0.0,
+            intent="throttled",
+            was_cached=False,
+            model_used="",
+            tokens_used=ctx.usage.tokens_used(),
+            latency_ms=latencies,
+            usage={"admission": decision.to_dict()}
+        )
+
     def _no_results_response(self, ctx: QueryContext, latencies: Dict[str, int]) -> RAGResponse:
         """Response when no relevant documents found"""
         return RAGResponse(
@@ -734,6 +932,7 @@ Return JSON: [{{"chunk_id": "...", "score": X}}, ...]""")
             intent=ctx.intent or "qa",
             was_cached=False,
             model_used=self.chat_deployment,
-            tokens_used={"prompt": 0, "completion": 0},
-            latency_ms=latencies
+            tokens_used=ctx.usage.tokens_used(),
+            latency_ms=latencies,
+            usage=ctx.usage.summary()
         )
@@ -18,6 +18,8 @@ from datetime import datetime
 
 from openai import AsyncAzureOpenAI
 
+from src.shared.usage_accounting import tracked_chat, usage_scope
+
 
 class RerankStrategy(Enum):
     """Reranking strategy options."""
@@ -168,11 +170,12 @@ Respond with ONLY a JSON object:
         chunks_to_rerank = chunks[:config.max_chunks_to_rerank]
 
         # Score chunks in batches
-        all_scores = await self._score_batches(
-            query=query,
-            chunks=chunks_to_rerank,
-            config=config,
-        )
+        with usage_scope("rerank"):
+            all_scores = await self._score_batches(
+                query=query,
+                chunks=chunks_to_rerank,
+                config=config,
+            )
 
         # Calculate combined scores
         for score in all_scores:
@@ -284,7 +287,8 @@ Respond with ONLY a JSON object:
         """Simple relevance scoring."""
         prompt = self.RELEVANCE_PROMPT.format(query=query, content=content)
 
-        response = await self.client.chat.completions.create(
+        response = await tracked_chat(
+            self.client,
             model=config.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=config.temperature,
@@ -361,7 +365,8 @@ Respond with ONLY a JSON object:
     async def _call_llm(self, prompt: str, config: RerankConfig) -> dict:
         """Make LLM call and parse JSON response."""
         try:
-            response = await self.client.chat.completions.create(
+            response = await tracked_chat(
+                self.client,
                 model=config.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=config.temperature,
@@ -26,6 +26,25 @@ from azure.search.documents.models import (
     QueryAnswerType,
 )
 
+from src.security.acl_filter_cache import (
+    ACLFilterCache,
+    GroupBitmapIndex,
+    compute_identity_version,
+)
+from src.shared.usage_accounting import tracked_embedding
+
+
+# Fields returned for every search hit
+SEARCH_SELECT_FIELDS = [
+    "id", "doc_id", "chunk_id", "chunk_type", "content",
+    "content_md", "heading", "section_path", "page_start",
+    "page_end", "reading_order", "table_headers", "figure_ref",
+    "source_uri", "doc_title", "entities", "chunk_token_count"
+]
+
+# Extra fields needed to check ACLs locally in post-filter mode
+ACL_SELECT_FIELDS = ["sensitivity", "acl_users", "acl_groups"]
+
 
 class QueryIntent(Enum):
     """Query intent classification for routing."""
@@ -54,6 +73,7 @@ class UserContext:
     groups: list[str] = field(default_factory=list)
     clearance_level: str = "public"
     department: str | None = None
+    version: str | None = None  # ACL identity version, computed if not supplied
 
 
 @dataclass
@@ -78,6 +98,8 @@ class RetrievalConfig:
 
     # ACL handling
     max_acl_groups: int = 100  # Azure Search search.in() limit workaround
+    acl_mode: str = "filter"  # "filter" (OData search.in) or "post_filter" (local bitmap check)
+    post_filter_overfetch: int = 3  # Candidate multiplier when ACLs are checked locally
 
     # Semantic search
     use_semantic_ranker: bool = True
@@ -114,6 +136,11 @@ class RetrievedChunk:
     entities: list[str] = field(default_factory=list)
     token_count: int = 0
 
+    # Access control (populated in post-filter mode)
+    sensitivity: str | None = None
+    acl_users: list[str] = field(default_factory=list)
+    acl_groups: list[str] = field(default_factory=list)
+
 
 @dataclass
 class RetrievalResult:
@@ -196,6 +223,8 @@ class QueryRouter:
             image_boost=base_config.image_boost,
             recency_boost=base_config.recency_boost,
             max_acl_groups=base_config.max_acl_groups,
+            acl_mode=base_config.acl_mode,
+            post_filter_overfetch=base_config.post_filter_overfetch,
             use_semantic_ranker=base_config.use_semantic_ranker,
             semantic_config=base_config.semantic_config,
         )
@@ -293,74 +322,146 @@ class QueryExpander:
 
 
 class ACLFilterBuilder:
-    """Builds ACL filters with overflow handling."""
+    """
+    Builds ACL filters with overflow handling.
 
-    def __init__(self, max_groups: int = 100):
+    Filters for users with many groups are cached per (tenant, identity
+    version, additional filters). In post-filter mode the group clause is left out of the
+    search filter and chunks are checked locally against a group bitmap.
+    """
+
+    # Below this many groups building the string is as cheap as a cache lookup
+    CACHE_MIN_GROUPS = 64
+
+    def __init__(
+        self,
+        max_groups: int = 100,
+        filter_cache: ACLFilterCache | None = None,
+        bitmap_index: GroupBitmapIndex | None = None,
+    ):
         self.max_groups = max_groups
+        self.filter_cache = filter_cache or ACLFilterCache()
+        self.bitmap_index = bitmap_index or GroupBitmapIndex()
 
     def build_filter(
         self,
         user_context: UserContext,
-        additional_filters: dict[str, Any] | None = None
+        additional_filters: dict[str, Any] | None = None,
+        post_filter: bool = False,
+        security_filter: str | None = None,
     ) -> tuple[str, list[str]]:
         """
         Build OData filter string for ACL enforcement.
 
+        Args:
+            security_filter: Pre-built ACL filter (from SecureRetriever) used
+                in place of the ACL clauses; tenant isolation is still applied
+
         Returns:
             Tuple of (filter_string, warnings)
         """
-        warnings = []
-        filter_parts = []
-
-        # Tenant isolation (always required)
-        filter_parts.append(f"tenant_id eq '{user_context.tenant_id}'")
-
-        # Active chunks only
-        filter_parts.append("is_active eq true")
+        if additional_filters and "_raw_filter" in additional_filters:
+            raise ValueError("_raw_filter is not accepted; pass security_filter instead")
 
-        # ACL filtering
-        acl_conditions = []
+        if security_filter or post_filter or len(user_context.groups) < self.CACHE_MIN_GROUPS:
+            return self._build_filter(user_context, additional_filters, post_filter, security_filter)
 
-        # Public documents
-        acl_conditions.append("sensitivity eq 'public'")
+        version = self._version(user_context)
+        cached = self.filter_cache.get(user_context.tenant_id, version, additional_filters)
+        if cached is not None:
+            filter_string, warnings = cached
+            return filter_string, list(warnings)
 
-        # User-specific access
-        acl_conditions.append(f"acl_users/any(u: u eq '{user_context.user_id}')")
+        filter_string, warnings = self._build_filter(user_context, additional_filters, post_filter)
+        self.filter_cache.put(
+            user_context.tenant_id, version, additional_filters, (filter_string, tuple(warnings))
+        )
+        return filter_string, warnings
+
+    def allows(self, user_context: UserContext, chunk: RetrievedChunk) -> bool:
+        """Local ACL check used in post-filter mode."""
+        if chunk.sensitivity == "public":
+            return True
+        if user_context.user_id in chunk.acl_users:
+            return True
+        user_mask = self.bitmap_index.user_mask(self._version(user_context), user_context.groups)
+        return self.bitmap_index.allows(user_mask, chunk.acl_groups)
+
+    def _version(self, user_context: UserContext) -> str:
+        """Identity version, memoized on the context."""
+        if not user_context.version:
+            user_context.version = compute_identity_version(
+                user_context.user_id,
+                user_context.tenant_id,
+                user_context.groups,
+                user_context.clearance_level,
+            )
+        return user_context.version
 
-        # Group-based access with overflow handling
-        if user_context.groups:
-            if len(user_context.groups) > self.max_groups:
-                # Truncate and warn
-                warnings.append(
-                    f"User has {len(user_context.groups)} groups, "
-                    f"truncated to {self.max_groups} for search filter. "
-                    "Some documents may not be visible."
-                )
-                groups_to_use = user_context.groups[:self.max_groups]
-            else:
-                groups_to_use = user_context.groups
+    def _build_filter(
+        self,
+        user_context: UserContext,
+        additional_filters: dict[str, Any] | None,
+        post_filter: bool,
+        security_filter: str | None = None,
+    ) -> tuple[str, list[str]]:
+        warnings = []
+        filter_parts = []
+        additional_filters = additional_filters or {}
 
-            # Build search.in() clause
-            groups_csv = ",".join(groups_to_use)
-            acl_conditions.append(f"acl_groups/any(g: search.in(g, '{groups_csv}'))")
+        # Tenant isolation (always required, even under a pre-built filter)
+        filter_parts.append(f"tenant_id eq '{user_context.tenant_id}'")
 
-        # Combine ACL conditions with OR
-        acl_filter = f"({' or '.join(acl_conditions)})"
-        filter_parts.append(acl_filter)
+        if security_filter:
+            # Pre-built filter already carries the ACL and sensitivity clauses
+            filter_parts.append(f"({security_filter})")
+        else:
+            # Active chunks only
+            filter_parts.append("is_active eq true")
+
+        if not security_filter and not post_filter:
+            # ACL filtering
+            acl_conditions = []
+
+            # Public documents
+            acl_conditions.append("sensitivity eq 'public'")
+
+            # User-specific access
+            acl_conditions.append(f"acl_users/any(u: u eq '{user_context.user_id}')")
+
+            # Group-based access with overflow handling
+            if user_context.groups:
+                if len(user_context.groups) > self.max_groups:
+                    # Truncate and warn
+                    warnings.append(
+                        f"User has {len(user_context.groups)} groups, "
+                        f"truncated to {self.max_groups} for search filter. "
+                        "Some documents may not be visible."
+                    )
+                    groups_to_use = user_context.groups[:self.max_groups]
+                else:
+                    groups_to_use = user_context.groups
+
+                # Build search.in() clause
+                groups_csv = ",".join(groups_to_use)
+                acl_conditions.append(f"acl_groups/any(g: search.in(g, '{groups_csv}'))")
+
+            # Combine ACL conditions with OR
+            acl_filter = f"({' or '.join(acl_conditions)})"
+            filter_parts.append(acl_filter)
 
         # Add any additional filters
-        if additional_filters:
-            for field, value in additional_filters.items():
-                if isinstance(value, list):
-                    # Collection filter
-                    values_csv = ",".join(str(v) for v in value)
-                    filter_parts.append(f"{field}/any(x: search.in(x, '{values_csv}'))")
-                elif isinstance(value, str):
-                    filter_parts.append(f"{field} eq '{value}'")
-                elif isinstance(value, bool):
-                    filter_parts.append(f"{field} eq {str(value).lower()}")
-                elif isinstance(value, (int, float)):
-                    filter_parts.append(f"{field} eq {value}")
+        for field, value in additional_filters.items():
+            if isinstance(value, list):
+                # Collection filter
+                values_csv = ",".join(str(v) for v in value)
+                filter_parts.append(f"{field}/any(x: search.in(x, '{values_csv}'))")
+            elif isinstance(value, str):
+                filter_parts.append(f"{field} eq '{value}'")
+            elif isinstance(value, bool):
+                filter_parts.append(f"{field} eq {str(value).lower()}")
+            elif isinstance(value, (int, float)):
+                filter_parts.append(f"{field} eq {value}")
 
         return " and ".join(filter_parts), warnings
 
@@ -407,6 +508,7 @@ class HybridRetriever:
         user_context: UserContext,
         additional_filters: dict[str, Any] | None = None,
         override_config: RetrievalConfig | None = None,
+        security_filter: str | None = None,
     ) -> RetrievalResult:
         """
         Execute hybrid retrieval with full pipeline.
@@ -416,6 +518,7 @@ class HybridRetriever:
             user_context: Security context
             additional_filters: Extra OData filters
             override_config: Override default config
+            security_filter: Pre-built ACL filter from SecureRetriever
 
         Returns:
             RetrievalResult with ranked chunks
@@ -435,8 +538,9 @@ class HybridRetriever:
         rewritten_queries = self.query_expander.expand_query(query, intent)
 
         # Step 4: Build ACL filter
+        post_filter = config.acl_mode == "post_filter" and not security_filter
         filter_string, acl_warnings = self.acl_builder.build_filter(
-            user_context, additional_filters
+            user_context, additional_filters, post_filter=post_filter, security_filter=security_filter
         )
         warnings.extend(acl_warnings)
 
@@ -445,7 +549,13 @@ class HybridRetriever:
             queries=rewritten_queries,
             filter_string=filter_string,
             config=config,
+            post_filter=post_filter,
         )
+        if post_filter:
+            all_results = [
+                {cid: c for cid, c in results.items() if self.acl_builder.allows(user_context, c)}
+                for results in all_results
+            ]
 
         # Step 6: Apply RRF fusion
         fused_results = self._apply_rrf_fusion(all_results, config)
@@ -471,7 +581,10 @@ class HybridRetriever:
             intent=intent,
             total_candidates=len(fused_results),
             retrieval_time_ms=retrieval_time_ms,
-            filters_applied={"filter": filter_string},
+            filters_applied={
+                "filter": filter_string,
+                "acl_mode": "post_filter" if post_filter else "filter",
+            },
             warnings=warnings,
         )
 
@@ -480,8 +593,12 @@ class HybridRetriever:
         queries: list[str],
         filter_string: str,
         config: RetrievalConfig,
+        post_filter: bool = False,
     ) -> list[dict[str, RetrievedChunk]]:
         """Execute vector and BM25 searches for all query variants."""
+        # Over-fetch when ACLs are checked locally so top-k survives trimming
+        overfetch = config.post_filter_overfetch if post_filter else 1
+        select = SEARCH_SELECT_FIELDS + ACL_SELECT_FIELDS if post_filter else SEARCH_SELECT_FIELDS
 
         async def search_single_query(q: str) -> dict[str, RetrievedChunk]:
             """Execute both vector and BM25 for one query."""
@@ -493,7 +610,7 @@ class HybridRetriever:
             # Vector search
             vector_query = VectorizedQuery(
                 vector=embedding,
-                k_nearest_neighbors=config.vector_k,
+                k_nearest_neighbors=config.vector_k * overfetch,
                 fields="embedding",
             )
 
@@ -501,13 +618,8 @@ class HybridRetriever:
                 search_text=None,
                 vector_queries=[vector_query],
                 filter=filter_string,
-                select=[
-                    "id", "doc_id", "chunk_id", "chunk_type", "content",
-                    "content_md", "heading", "section_path", "page_start",
-                    "page_end", "reading_order", "table_headers", "figure_ref",
-                    "source_uri", "doc_title", "entities", "chunk_token_count"
-                ],
-                top=config.vector_k,
+                select=select,
+                top=config.vector_k * overfetch,
             )
 
             for rank, result in enumerate(vector_results, 1):
@@ -522,13 +634,8 @@ class HybridRetriever:
                 search_text=q,
                 query_type=QueryType.FULL,
                 filter=filter_string,
-                select=[
-                    "id", "doc_id", "chunk_id", "chunk_type", "content",
-                    "content_md", "heading", "section_path", "page_start",
-                    "page_end", "reading_order", "table_headers", "figure_ref",
-                    "source_uri", "doc_title", "entities", "chunk_token_count"
-                ],
-                top=config.bm25_top,
+                select=select,
+                top=config.bm25_top * overfetch,
                 semantic_configuration_name=(
                     config.semantic_config if config.use_semantic_ranker else None
                 ),
@@ -613,7 +720,8 @@ class HybridRetriever:
 
     async def _get_embedding(self, text: str) -> list[float]:
         """Get embedding for text using Azure OpenAI."""
-        response = await self.embedding_client.embeddings.create(
+        response = await tracked_embedding(
+            self.embedding_client,
             input=text,
             model="text-embedding-3-large",
         )
@@ -639,6 +747,9 @@ class HybridRetriever:
             doc_title=result.get("doc_title"),
             entities=result.get("entities", []),
             token_count=result.get("chunk_token_count", 0),
+            sensitivity=result.get("sensitivity"),
+            acl_users=result.get("acl_users") or [],
+            acl_groups=result.get("acl_groups") or [],
         )
 
 
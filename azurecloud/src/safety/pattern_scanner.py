@@ -0,0 +1,342 @@
+"""
+Single-Pass Pattern Scanner for PII and Prompt-Injection Detection.
+
+Scans text for a set of named patterns and produces typed,
+non-overlapping spans; redaction is done from those spans in a single
+join rather than a findall + sub per pattern, so detection and redaction
+share one scan.
+
+Each pattern keeps its own compiled regex: CPython's re engine has no
+automaton for alternations, and a combined `a|b|c` pattern loses the
+per-pattern literal-prefix fast paths (measured 1.2-4x slower). Instead
+the per-pattern matches are merged lazily in text order, and patterns
+whose required leading literal is absent from the text are skipped
+without running their regex.
+
+Overlap rule: the leftmost match wins; at the same position the pattern
+listed first wins. Order specs by priority (e.g. SSN before phone).
+
+Usage:
+    scanner = PatternScanner([
+        PatternSpec("ssn", r"\\b\\d{3}-\\d{2}-\\d{4}\\b", replacement="[SSN REDACTED]"),
+        PatternSpec("email", EMAIL_PATTERN, replacement="[EMAIL REDACTED]"),
+    ])
+    spans = scanner.scan(text)
+    redacted, counts = scanner.redact(text, spans=spans)
+
+    for piece in scanner.redact_stream(file_chunks):   # large documents
+        out.write(piece)
+"""
+
+import heapq
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+
+
+@dataclass
+class PatternSpec:
+    """A named pattern contributed to a scanner."""
+    name: str
+    pattern: str
+    replacement: Optional[str] = None
+    ignore_case: bool = True
+
+
+@dataclass
+class ScanSpan:
+    """A typed match with absolute offsets into the scanned text."""
+    name: str
+    start: int
+    end: int
+    text: str
+
+
+def required_literal(pattern: str, ignore_case: bool = True) -> Optional[str]:
+    """
+    Leading literal every match of pattern must contain, if any.
+
+    Only plain ASCII letters are considered, after an optional leading \\b;
+    a top-level alternation or a quantifier on the first character means
+    there is no required literal.
+    """
+    body = pattern[2:] if pattern.startswith("\\b") else pattern
+    match = re.match(r"[A-Za-z]+", body)
+    if not match or _has_top_level_alternation(pattern):
+        return None
+    literal = match.group()
+    if body[len(literal):len(literal) + 1] in ("?", "*", "+", "{"):
+        literal = literal[:-1]
+    if not literal:
+        return None
+    return literal.lower() if ignore_case else literal
+
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+    return False
+
+
+class PatternScanner:
+    """
+    Scans text for many named patterns in one pass over the text.
+
+    Patterns keep their own case sensitivity, so sets compiled with and
+    without IGNORECASE can share one scanner.
+    """
+
+    # Characters of look-behind kept between chunks when streaming; a match
+    # longer than this that straddles a chunk boundary may be missed
+    STREAM_OVERLAP = 512
+    # Characters of already-emitted text kept in front of the buffer
+    STREAM_CONTEXT = 64
+
+    def __init__(self, specs: Iterable[PatternSpec]):
+        self.specs = list(specs)
+        if not self.specs:
+            raise ValueError("PatternScanner needs at least one pattern")
+
+        self._compiled = [
+            re.compile(spec.pattern, re.IGNORECASE if spec.ignore_case else 0)
+            for spec in self.specs
+        ]
+        self._literals = [
+            required_literal(spec.pattern, spec.ignore_case) for spec in self.specs
+        ]
+        self._replacements = {
+            spec.name: spec.replacement for spec in self.specs if spec.replacement is not None
+        }
+
+    @property
+    def names(self) -> list[str]:
+        return [spec.name for spec in self.specs]
+
+    def candidates(self, text: str) -> list[int]:
+        """
+        Indexes of the patterns that can match text.
+
+        The literal prefilter is only applied to ASCII text: IGNORECASE
+        also folds some non-ASCII letters (e.g. the long s) onto ASCII ones,
+        which a lower() substring test would miss.
+        """
+        if not text.isascii():
+            return list(range(len(self.specs)))
+
+        lowered = None
+        indexes = []
+        for i, literal in enumerate(self._literals):
+            if literal is None:
+                indexes.append(i)
+                continue
+            if self.specs[i].ignore_case:
+                if lowered is None:
+                    lowered = text.lower()
+                haystack = lowered
+            else:
+                haystack = text
+            if literal in haystack:
+                indexes.append(i)
+        return indexes
+
+    def iter_spans(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> Iterator[ScanSpan]:
+        """
+        Yield non-overlapping spans in text order.
+
+        Keeps the next match of every pattern in a heap keyed by
+        (start, spec order); a pattern is searched again only after its
+        pending match is consumed or overlapped by an earlier span.
+        """
+        end = len(text) if endpos is None else endpos
+        compiled = self._compiled
+        heap = []
+        for i in self.candidates(text):
+            match = compiled[i].search(text, pos, end)
+            if match:
+                heap.append((match.start(), i, match))
+        heapq.heapify(heap)
+
+        cursor = pos
+        while heap:
+            start, i, match = heap[0]
+            if start < cursor or match.end() == start:
+                # Overlapped by the previous span, or empty: look further on
+                resume = cursor if start < cursor else start + 1
+                match = compiled[i].search(text, resume, end) if resume <= end else None
+                if match:
+                    heapq.heapreplace(heap, (match.start(), i, match))
+                else:
+                    heapq.heappop(heap)
+                continue
+
+            yield ScanSpan(
+                name=self.specs[i].name,
+                start=start,
+                end=match.end(),
+                text=match.group(),
+            )
+            cursor = match.end()
+            match = compiled[i].search(text, cursor, end)
+            if match:
+                heapq.heapreplace(heap, (match.start(), i, match))
+            else:
+                heapq.heappop(heap)
+
+    def matching_names(self, text: str) -> list[str]:
+        """
+        Names of the patterns that match anywhere in text, in spec order.
+
+        Unlike scan(), overlapping matches all count, which is what a
+        "which rules fired" check needs.
+        """
+        names = []
+        for i in self.candidates(text):
+            name = self.specs[i].name
+            if name not in names and self._compiled[i].search(text):
+                names.append(name)
+        return names
+
+    def scan(self, text: str) -> list[ScanSpan]:
+        """All non-overlapping spans in text order."""
+        return list(self.iter_spans(text))
+
+    def search(self, text: str) -> Optional[ScanSpan]:
+        """The first span, or None; cheapest check for "any match"."""
+        return next(self.iter_spans(text), None)
+
+    def group(self, spans: Iterable[ScanSpan]) -> dict[str, list[str]]:
+        """Matched texts grouped by pattern name, in spec order."""
+        grouped: dict[str, list[str]] = {}
+        for span in spans:
+            grouped.setdefault(span.name, []).append(span.text)
+        order = {name: i for i, name in enumerate(self.names)}
+        return dict(sorted(grouped.items(), key=lambda item: order[item[0]]))
+
+    def redact(
+        self,
+        text: str,
+        names: Optional[Iterable[str]] = None,
+        spans: Optional[list[ScanSpan]] = None,
+        replacements: Optional[dict[str, str]] = None,
+    ) -> tuple[str, dict[str, int]]:
+        """
+        Replace matched spans with their replacement text.
+
+        Args:
+            names: Only redact these pattern names (default: all with a replacement)
+            spans: Precomputed spans from scan(); scanned here if omitted
+            replacements: Per-call overrides of the spec replacements
+
+        Returns:
+            Tuple of (redacted_text, count per pattern name)
+        """
+        if spans is None:
+            spans = self.scan(text)
+        table = {**self._replacements, **(replacements or {})}
+        allowed = set(names) if names is not None else None
+
+        pieces = []
+        counts: dict[str, int] = {}
+        cursor = 0
+        for span in spans:
+            if allowed is not None and span.name not in allowed:
+                continue
+            replacement = table.get(span.name)
+            if replacement is None:
+                continue
+            pieces.append(text[cursor:span.start])
+            pieces.append(replacement)
+            cursor = span.end
+            counts[span.name] = counts.get(span.name, 0) + 1
+
+        if not counts:
+            return text, counts
+        pieces.append(text[cursor:])
+        return "".join(pieces), counts
+
+    def scan_stream(self, chunks: Iterable[str]) -> Iterator[ScanSpan]:
+        """
+        Scan text arriving in chunks; span offsets are absolute.
+
+        Matches straddling chunk boundaries are found intact as long as
+        they are shorter than STREAM_OVERLAP characters.
+        """
+        for _, _, spans in self._segments(chunks):
+            yield from spans
+
+    def redact_stream(
+        self,
+        chunks: Iterable[str],
+        names: Optional[Iterable[str]] = None,
+        replacements: Optional[dict[str, str]] = None,
+    ) -> Iterator[str]:
+        """Redact text arriving in chunks, yielding redacted pieces."""
+        for segment, offset, spans in self._segments(chunks):
+            relative = [
+                ScanSpan(span.name, span.start - offset, span.end - offset, span.text)
+                for span in spans
+            ]
+            redacted, _ = self.redact(segment, names=names, spans=relative, replacements=replacements)
+            if redacted:
+                yield redacted
+
+    def _segments(self, chunks: Iterable[str]) -> Iterator[tuple[str, int, list[ScanSpan]]]:
+        """
+        Split a chunked stream into final segments with their spans.
+
+        Yields (segment, absolute offset of segment, spans within it).
+        Text within STREAM_OVERLAP of the buffered end is held back until
+        more input arrives, and a match that might still grow is deferred
+        whole to the next segment. A little already-emitted context is kept
+        in front of the buffer so word boundaries and look-behinds see the
+        real preceding characters.
+        """
+        context = ""   # already-emitted text kept for \b and look-behind
+        buffer = ""    # text not yet emitted
+        offset = 0     # absolute offset of buffer[0]
+
+        pending = iter(chunks)
+        final = False
+        while not final:
+            try:
+                buffer += next(pending)
+            except StopIteration:
+                final = True
+
+            limit = len(buffer) if final else len(buffer) - self.STREAM_OVERLAP
+            if limit <= 0 and not final:
+                continue
+
+            text = context + buffer
+            base = len(context)
+            cut = limit
+            spans = []
+            for span in self.iter_spans(text, base):
+                start, end = span.start - base, span.end - base
+                if end > limit:
+                    # May still grow with the next chunk; defer it whole
+                    cut = min(cut, start)
+                    break
+                spans.append(ScanSpan(span.name, offset + start, offset + end, span.text))
+
+            segment = buffer[:cut]
+            yield segment, offset, spans
+            context = (context + segment)[-self.STREAM_CONTEXT:]
+            buffer = buffer[cut:]
+            offset += cut
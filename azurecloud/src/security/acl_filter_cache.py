@@ -0,0 +1,199 @@
+"""
+ACL Filter Cache and Group Bitmaps
+
+Implements:
+- Identity versioning (stable digest of the security attributes)
+- LRU cache of finished OData filter strings keyed by
+  (tenant, identity version, additional filters)
+- Group-id -> compact-integer dictionary with bitmap-encoded ACLs for
+  checking retrieved chunks locally (post-filter mode)
+
+Users with hundreds of groups send the same multi-kilobyte filter many
+times per session; caching the finished string avoids re-joining the
+group list on every query.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Iterable
+
+
+def compute_identity_version(
+    user_id: str,
+    tenant_id: str,
+    groups: Iterable[str],
+    clearance: str = "",
+) -> str:
+    """Digest of the attributes that determine a user's ACL filter."""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(f"{tenant_id}\x1f{user_id}\x1f{clearance}\x1e".encode())
+    digest.update("\x1f".join(groups).encode())
+    return digest.hexdigest()
+
+
+def filters_key(additional_filters: dict[str, Any] | None) -> tuple:
+    """Canonical, hashable form of additional filters for use in a cache key."""
+    if not additional_filters:
+        return ()
+    return tuple(
+        (name, _freeze(value)) for name, value in sorted(additional_filters.items())
+    )
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return filters_key(value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(map(repr, value)))
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class ACLFilterCache:
+    """
+    Bounded LRU of built filters.
+
+    Entries never need explicit invalidation: a change in group membership
+    or clearance produces a new identity version and therefore a new key.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str, tuple], Any] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        tenant_id: str,
+        version: str,
+        additional_filters: dict[str, Any] | None = None,
+    ) -> Any | None:
+        key = (tenant_id, version, filters_key(additional_filters))
+        value = self._entries.get(key)
+        if value is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def put(
+        self,
+        tenant_id: str,
+        version: str,
+        additional_filters: dict[str, Any] | None,
+        value: Any,
+    ):
+        key = (tenant_id, version, filters_key(additional_filters))
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
+
+
+class GroupBitmapIndex:
+    """
+    Maps group ids to compact integers and encodes group sets as bitmaps.
+
+    A user's groups are encoded once per identity version; checking a
+    retrieved chunk is then a single AND of its ACL bitmap against the
+    user's. Python ints serve as arbitrary-length bitmaps.
+
+    Once more than max_groups ids are registered, the next user_mask miss
+    drops every id and memoized mask and starts over, so groups of users
+    no longer seen do not accumulate. A user mask is therefore only valid
+    until the next user_mask call.
+    """
+
+    def __init__(
+        self,
+        max_cached_users: int = 10000,
+        max_cached_acls: int = 100000,
+        max_groups: int = 200000,
+    ):
+        self._ids: dict[str, int] = {}
+        self._user_masks: OrderedDict[str, int] = OrderedDict()
+        self._acl_masks: OrderedDict[tuple[str, ...], int] = OrderedDict()
+        self.max_cached_users = max_cached_users
+        self.max_cached_acls = max_cached_acls
+        self.max_groups = max_groups
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def group_id(self, group: str) -> int:
+        """Compact integer for a group, assigned on first sight."""
+        gid = self._ids.get(group)
+        if gid is None:
+            gid = len(self._ids)
+            self._ids[group] = gid
+        return gid
+
+    def encode(self, groups: Iterable[str]) -> int:
+        """Bitmap of groups, registering unknown ids."""
+        mask = 0
+        for group in groups:
+            mask |= 1 << self.group_id(group)
+        return mask
+
+    def user_mask(self, version: str, groups: Iterable[str]) -> int:
+        """Bitmap of a user's groups, memoized by identity version."""
+        mask = self._user_masks.get(version)
+        if mask is None:
+            if len(self._ids) > self.max_groups:
+                self.clear()
+            mask = self.encode(groups)
+            self._user_masks[version] = mask
+            while len(self._user_masks) > self.max_cached_users:
+                self._user_masks.popitem(last=False)
+        else:
+            self._user_masks.move_to_end(version)
+        return mask
+
+    def acl_mask(self, acl_groups: Iterable[str]) -> int:
+        """
+        Bitmap of a chunk's ACL groups, memoized by the group list.
+
+        Chunks of one document share an ACL, so the same lists recur
+        across queries. Ids are registered so memoized masks stay valid
+        as new users are encoded.
+        """
+        key = tuple(acl_groups)
+        mask = self._acl_masks.get(key)
+        if mask is None:
+            mask = self.encode(key)
+            self._acl_masks[key] = mask
+            if len(self._acl_masks) > self.max_cached_acls:
+                self._acl_masks.popitem(last=False)
+        return mask
+
+    def allows(self, user_mask: int, acl_groups: Iterable[str]) -> bool:
+        """True if any ACL group is one of the user's groups."""
+        return bool(self.acl_mask(acl_groups) & user_mask)
+
+    def clear(self):
+        """Drop all group ids and memoized masks."""
+        self._ids.clear()
+        self._user_masks.clear()
+        self._acl_masks.clear()
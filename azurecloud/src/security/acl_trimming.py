@@ -9,19 +9,23 @@ Implements:
 - Audit logging for compliance
 """
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import Any
 from enum import Enum
 import asyncio
 import hashlib
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from functools import lru_cache
 
 import aiohttp
 from azure.identity import DefaultAzureCredential
 from azure.search.documents import SearchClient
 
+from src.security.acl_filter_cache import ACLFilterCache, compute_identity_version
+from src.security.identity_cache import AsyncTokenCache, IdentityCache
+from src.shared.audit_sink import AuditSink
+
 
 class SensitivityLevel(Enum):
     """Document sensitivity levels."""
@@ -45,6 +49,27 @@ class UserIdentity:
     manager_id: str | None = None
     is_admin: bool = False
     resolved_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    # Digest of the ACL-relevant attributes, see identity_version()
+    version: str = field(default="", compare=False)
+    # Memoized base ACL filter as (version, ACLFilterResult), set by ACLFilterBuilder
+    acl_filter: tuple | None = field(default=None, repr=False, compare=False)
+
+
+def identity_version(identity: UserIdentity) -> str:
+    """
+    Version of an identity's ACL-relevant attributes, memoized on the identity.
+
+    Resolved identities are treated as immutable; a membership change comes
+    back from the resolver as a new identity with a new version.
+    """
+    if not identity.version:
+        identity.version = compute_identity_version(
+            identity.user_id,
+            identity.tenant_id,
+            identity.groups,
+            identity.clearance_level.value,
+        )
+    return identity.version
 
 
 @dataclass
@@ -76,18 +101,52 @@ class GroupMembershipResolver:
     """
     Resolves user group memberships from Microsoft Graph.
 
-    Includes caching and batch resolution for efficiency.
+    Identities and group lists are held in bounded TTL caches with
+    stale-while-revalidate, concurrent lookups for the same user are
+    coalesced, and the Graph token and HTTP session are shared across calls.
     """
 
     GRAPH_ENDPOINT = "https://graph.microsoft.com/v1.0"
+    GRAPH_SCOPE = "https://graph.microsoft.com/.default"
     CACHE_TTL_MINUTES = 15
+    STALE_TTL_MINUTES = 5
+    MAX_CACHED_USERS = 10000
 
     def __init__(
         self,
         credential: DefaultAzureCredential | None = None,
+        session: aiohttp.ClientSession | None = None,
     ):
         self.credential = credential or DefaultAzureCredential()
-        self._cache: dict[str, tuple[list[str], datetime]] = {}
+        self._tokens = AsyncTokenCache(self.credential, self.GRAPH_SCOPE)
+        self._session = session
+        self._owns_session = session is None
+        self._cache = IdentityCache(
+            max_entries=self.MAX_CACHED_USERS,
+            ttl_s=self.CACHE_TTL_MINUTES * 60,
+            stale_ttl_s=self.STALE_TTL_MINUTES * 60,
+        )
+        self._identities = IdentityCache(
+            max_entries=self.MAX_CACHED_USERS,
+            ttl_s=self.CACHE_TTL_MINUTES * 60,
+            stale_ttl_s=self.STALE_TTL_MINUTES * 60,
+        )
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared Graph session, created on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100),
+                timeout=aiohttp.ClientTimeout(total=30),
+            )
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """Close the shared session if this resolver created it."""
+        if self._session and self._owns_session and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def resolve_groups(
         self,
@@ -100,46 +159,41 @@ class GroupMembershipResolver:
         Uses transitive membership to get nested groups.
         """
         cache_key = f"{tenant_id}:{user_id}"
+        return await self._cache.get_or_load(
+            cache_key, lambda: self._fetch_groups(user_id)
+        )
 
-        # Check cache
-        if cache_key in self._cache:
-            groups, cached_at = self._cache[cache_key]
-            if datetime.utcnow() - cached_at < timedelta(minutes=self.CACHE_TTL_MINUTES):
-                return groups
-
-        # Get token for Graph API
-        token = self.credential.get_token("https://graph.microsoft.com/.default")
-
-        async with aiohttp.ClientSession() as session:
-            # Use memberOf with $count for efficiency
-            url = f"{self.GRAPH_ENDPOINT}/users/{user_id}/transitiveMemberOf"
-            headers = {
-                "Authorization": f"Bearer {token.token}",
-                "ConsistencyLevel": "eventual",
-            }
-            params = {
-                "$select": "id",
-                "$top": "999",
-            }
-
-            groups = []
-            next_link = url
-
-            while next_link:
-                async with session.get(next_link, headers=headers, params=params if next_link == url else None) as response:
-                    if response.status != 200:
-                        # Handle errors gracefully
-                        break
-
-                    data = await response.json()
-                    for item in data.get("value", []):
-                        if item.get("@odata.type") == "#microsoft.graph.group":
-                            groups.append(item["id"])
-
-                    next_link = data.get("@odata.nextLink")
-
-        # Update cache
-        self._cache[cache_key] = (groups, datetime.utcnow())
+    async def _fetch_groups(self, user_id: str) -> list[str]:
+        """Page through transitiveMemberOf for a user."""
+        token = await self._tokens.get_token()
+        session = self._get_session()
+
+        # Use memberOf with $count for efficiency
+        url = f"{self.GRAPH_ENDPOINT}/users/{user_id}/transitiveMemberOf"
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "ConsistencyLevel": "eventual",
+        }
+        params = {
+            "$select": "id",
+            "$top": "999",
+        }
+
+        groups = []
+        next_link = url
+
+        while next_link:
+            async with session.get(next_link, headers=headers, params=params if next_link == url else None) as response:
+                if response.status != 200:
+                    # Handle errors gracefully
+                    break
+
+                data = await response.json()
+                for item in data.get("value", []):
+                    if item.get("@odata.type") == "#microsoft.graph.group":
+                        groups.append(item["id"])
+
+                next_link = data.get("@odata.nextLink")
 
         return groups
 
@@ -149,23 +203,21 @@ class GroupMembershipResolver:
         tenant_id: str,
     ) -> UserIdentity:
         """Resolve complete user identity including profile and groups."""
-        token = self.credential.get_token("https://graph.microsoft.com/.default")
-
-        async with aiohttp.ClientSession() as session:
-            headers = {"Authorization": f"Bearer {token.token}"}
-
-            # Get user profile
-            profile_url = f"{self.GRAPH_ENDPOINT}/users/{user_id}"
-            params = {"$select": "id,mail,department,jobTitle,manager"}
-
-            async with session.get(profile_url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    profile = await response.json()
-                else:
-                    profile = {}
+        cache_key = f"{tenant_id}:{user_id}"
+        return await self._identities.get_or_load(
+            cache_key, lambda: self._fetch_user_identity(user_id, tenant_id)
+        )
 
-        # Resolve groups
-        groups = await self.resolve_groups(user_id, tenant_id)
+    async def _fetch_user_identity(
+        self,
+        user_id: str,
+        tenant_id: str,
+    ) -> UserIdentity:
+        """Fetch profile and groups from Graph concurrently."""
+        profile, groups = await asyncio.gather(
+            self._fetch_profile(user_id),
+            self.resolve_groups(user_id, tenant_id),
+        )
 
         # Determine clearance level based on groups or department
         clearance = self._determine_clearance(groups, profile.get("department"))
@@ -186,6 +238,20 @@ class GroupMembershipResolver:
             is_admin=is_admin,
         )
 
+    async def _fetch_profile(self, user_id: str) -> dict[str, Any]:
+        """Get the user profile; an empty profile on Graph errors."""
+        token = await self._tokens.get_token()
+        session = self._get_session()
+
+        headers = {"Authorization": f"Bearer {token}"}
+        profile_url = f"{self.GRAPH_ENDPOINT}/users/{user_id}"
+        params = {"$select": "id,mail,department,jobTitle,manager"}
+
+        async with session.get(profile_url, headers=headers, params=params) as response:
+            if response.status == 200:
+                return await response.json()
+            return {}
+
     def _determine_clearance(
         self,
         groups: list[str],
@@ -213,12 +279,17 @@ class GroupMembershipResolver:
         return False
 
     def clear_cache(self, user_id: str | None = None, tenant_id: str | None = None):
-        """Clear group membership cache."""
-        if user_id and tenant_id:
-            cache_key = f"{tenant_id}:{user_id}"
-            self._cache.pop(cache_key, None)
-        else:
-            self._cache.clear()
+        """Clear group membership and identity caches."""
+        cache_key = f"{tenant_id}:{user_id}" if user_id and tenant_id else None
+        self._cache.invalidate(cache_key)
+        self._identities.invalidate(cache_key)
+
+    def get_cache_stats(self) -> dict[str, Any]:
+        """Hit rates and sizes of the group and identity caches."""
+        return {
+            "groups": self._cache.get_stats(),
+            "identities": self._identities.get_stats(),
+        }
 
 
 class ACLFilterBuilder:
@@ -240,9 +311,11 @@ class ACLFilterBuilder:
         self,
         group_resolver: GroupMembershipResolver,
         audit_logger: Any = None,  # SecurityAuditLogger
+        filter_cache: ACLFilterCache | None = None,
     ):
         self.resolver = group_resolver
         self.audit_logger = audit_logger
+        self.filter_cache = filter_cache or ACLFilterCache()
 
     async def build_filter(
         self,
@@ -257,6 +330,86 @@ class ACLFilterBuilder:
         2. Chunked: Split groups across multiple OR clauses
         3. Fallback: Use only user ID + public access
         """
+        version = identity_version(user_identity)
+        cached = self.filter_cache.get(user_identity.tenant_id, version, additional_filters)
+        if cached is None:
+            result, cache_hit = self._compose_filter(user_identity, version, additional_filters)
+            self.filter_cache.put(user_identity.tenant_id, version, additional_filters, result)
+        else:
+            result, cache_hit = cached, True
+
+        # Log the filter decision
+        if self.audit_logger:
+            await self.audit_logger.log(SecurityAuditEntry(
+                timestamp=datetime.utcnow().isoformat(),
+                user_id=user_identity.user_id,
+                tenant_id=user_identity.tenant_id,
+                action="build_acl_filter",
+                resource_type="search_query",
+                resource_id=None,
+                decision="allow",
+                reason=f"Strategy: {result.strategy_used}",
+                details={
+                    "groups_total": len(user_identity.groups),
+                    "groups_included": result.groups_included,
+                    "groups_truncated": result.groups_truncated,
+                },
+            ))
+
+        return ACLFilterResult(
+            filter_string=result.filter_string,
+            strategy_used=result.strategy_used,
+            groups_included=result.groups_included,
+            groups_truncated=result.groups_truncated,
+            warnings=list(result.warnings),
+            cache_hit=cache_hit,
+        )
+
+    def _compose_filter(
+        self,
+        user_identity: UserIdentity,
+        version: str,
+        additional_filters: dict[str, Any] | None,
+    ) -> tuple[ACLFilterResult, bool]:
+        """Append additional filters to the identity's base filter."""
+        base, base_hit = self._get_base_filter(user_identity, version)
+        warnings = list(base.warnings)
+        filter_string = base.filter_string
+
+        # Additional filters
+        if additional_filters:
+            filter_parts = [filter_string]
+            for field, value in additional_filters.items():
+                filter_parts.append(self._build_field_filter(field, value))
+            filter_string = " and ".join(filter_parts)
+
+        # Check filter length
+        if len(filter_string) > self.MAX_FILTER_LENGTH:
+            warnings.append("Filter string exceeds recommended length, may impact performance.")
+
+        return replace(base, filter_string=filter_string, warnings=warnings), base_hit
+
+    def _get_base_filter(
+        self,
+        identity: UserIdentity,
+        version: str,
+    ) -> tuple[ACLFilterResult, bool]:
+        """
+        Return the identity's tenant/ACL/sensitivity filter.
+
+        The result is memoized on the identity, which the resolver caches,
+        so the group list is only joined once per resolved identity.
+        """
+        cached = identity.acl_filter
+        if cached is not None and cached[0] == version:
+            return cached[1], True
+
+        base = self._build_base_filter(identity)
+        identity.acl_filter = (version, base)
+        return base, False
+
+    def _build_base_filter(self, user_identity: UserIdentity) -> ACLFilterResult:
+        """Build the identity-dependent part of the filter."""
         warnings = []
         filter_parts = []
 
@@ -301,37 +454,8 @@ class ACLFilterBuilder:
         if sensitivity_filter:
             filter_parts.append(sensitivity_filter)
 
-        # Additional filters
-        if additional_filters:
-            for field, value in additional_filters.items():
-                filter_parts.append(self._build_field_filter(field, value))
-
-        filter_string = " and ".join(filter_parts)
-
-        # Check filter length
-        if len(filter_string) > self.MAX_FILTER_LENGTH:
-            warnings.append("Filter string exceeds recommended length, may impact performance.")
-
-        # Log the filter decision
-        if self.audit_logger:
-            await self.audit_logger.log(SecurityAuditEntry(
-                timestamp=datetime.utcnow().isoformat(),
-                user_id=user_identity.user_id,
-                tenant_id=user_identity.tenant_id,
-                action="build_acl_filter",
-                resource_type="search_query",
-                resource_id=None,
-                decision="allow",
-                reason=f"Strategy: {strategy}",
-                details={
-                    "groups_total": len(groups),
-                    "groups_included": groups_included,
-                    "groups_truncated": groups_truncated,
-                },
-            ))
-
         return ACLFilterResult(
-            filter_string=filter_string,
+            filter_string=" and ".join(filter_parts),
             strategy_used=strategy,
             groups_included=groups_included,
             groups_truncated=groups_truncated,
@@ -434,7 +558,9 @@ class SecurityAuditLogger:
     """
     Logs security decisions for compliance.
 
-    Writes to Cosmos DB with immutable retention.
+    Writes to Cosmos DB with immutable retention. Entries are handed to a
+    buffered AuditSink, so logging does not add a Cosmos round trip to the
+    request path.
     """
 
     def __init__(
@@ -442,31 +568,39 @@ class SecurityAuditLogger:
         cosmos_client: Any,
         database_name: str = "rag-platform",
         container_name: str = "audit-logs",
+        sink: AuditSink | None = None,
+        spill_path: str | None = None,
     ):
         database = cosmos_client.get_database_client(database_name)
         self.container = database.get_container_client(container_name)
+        self.sink = sink or AuditSink(self.container, name="security", spill_path=spill_path)
 
     async def log(self, entry: SecurityAuditEntry):
-        """Log a security audit entry."""
+        """Queue a security audit entry for batched delivery."""
         entry_id = hashlib.sha256(
             f"{entry.user_id}:{entry.timestamp}:{entry.action}".encode()
         ).hexdigest()[:16]
 
-        self.container.upsert_item(
-            body={
-                "id": entry_id,
-                "tenant_id": entry.tenant_id,
-                "timestamp": entry.timestamp,
-                "user_id": entry.user_id,
-                "action": entry.action,
-                "resource_type": entry.resource_type,
-                "resource_id": entry.resource_id,
-                "decision": entry.decision,
-                "reason": entry.reason,
-                "details": entry.details,
-            },
-            partition_key=entry.tenant_id,
-        )
+        self.sink.submit({
+            "id": entry_id,
+            "tenant_id": entry.tenant_id,
+            "timestamp": entry.timestamp,
+            "user_id": entry.user_id,
+            "action": entry.action,
+            "resource_type": entry.resource_type,
+            "resource_id": entry.resource_id,
+            "decision": entry.decision,
+            "reason": entry.reason,
+            "details": entry.details,
+        })
+
+    async def flush(self):
+        """Write all queued entries (e.g. before shutdown or a query)."""
+        await self.sink.flush()
+
+    async def close(self):
+        """Stop background delivery and flush remaining entries."""
+        await self.sink.close()
 
     async def query_logs(
         self,
@@ -478,6 +612,9 @@ class SecurityAuditLogger:
         limit: int = 100,
     ) -> list[SecurityAuditEntry]:
         """Query audit logs."""
+        # Make entries queued by this process visible to the query
+        await self.sink.flush()
+
         conditions = [f"c.tenant_id = '{tenant_id}'"]
 
         if user_id:
@@ -572,12 +709,13 @@ class SecureRetriever:
             groups=identity.groups,
             clearance_level=identity.clearance_level.value,
             department=identity.department,
+            version=identity_version(identity),
         )
 
         result = await self.retriever.retrieve(
             query=query,
             user_context=user_context,
-            additional_filters={"_raw_filter": filter_result.filter_string},
+            security_filter=filter_result.filter_string,
         )
 
         return {
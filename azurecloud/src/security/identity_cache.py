@@ -0,0 +1,208 @@
+"""
+Identity Cache for Security Trimming
+
+Implements:
+- Bounded LRU cache with TTL and stale-while-revalidate
+- Single-flight coalescing of concurrent lookups per key
+- Async access-token cache with proactive refresh
+
+Used by GroupMembershipResolver so that concurrent requests from the same
+user share one Microsoft Graph round trip, and repeat requests are served
+from memory.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+
+    Callers that arrive while a call is in flight await the same result.
+    The shared call is shielded, so one caller being cancelled does not
+    cancel it for the others.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+
+class IdentityCache:
+    """
+    Bounded LRU cache with TTL and stale-while-revalidate.
+
+    - Fresh entries (younger than ttl_s) are returned directly.
+    - Stale entries (younger than ttl_s + stale_ttl_s) are returned
+      immediately while one background refresh reloads them.
+    - Misses are loaded through single-flight, so N concurrent callers
+      for the same key trigger one load.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_s: float = 900,
+        stale_ttl_s: float = 300,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.stale_ttl_s = stale_ttl_s
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._flights = SingleFlight()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "loads": 0,
+                       "load_errors": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> tuple[Any, str]:
+        """Return (value, state) where state is "fresh", "stale" or "miss"."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, "miss"
+
+        value, stored_at = entry
+        age = time.monotonic() - stored_at
+        if age < self.ttl_s:
+            self._entries.move_to_end(key)
+            return value, "fresh"
+        if age < self.ttl_s + self.stale_ttl_s:
+            self._entries.move_to_end(key)
+            return value, "stale"
+
+        del self._entries[key]
+        return None, "miss"
+
+    def put(self, key: str, value: Any, stored_at: float | None = None):
+        """Store a value, evicting the least recently used entry if full."""
+        self._entries[key] = (value, time.monotonic() if stored_at is None else stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the cached value, loading it on a miss."""
+        value, state = self.get(key)
+
+        if state == "fresh":
+            self._stats["hits"] += 1
+            return value
+
+        if state == "stale":
+            self._stats["stale_hits"] += 1
+            if not self._flights.in_flight(key):
+                asyncio.ensure_future(self._refresh(key, loader))
+            return value
+
+        self._stats["misses"] += 1
+        return await self._flights.do(key, lambda: self._load(key, loader))
+
+    def invalidate(self, key: str | None = None):
+        """Drop one entry, or all entries when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def get_stats(self) -> dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "hit_rate": (self._stats["hits"] + self._stats["stale_hits"]) / lookups if lookups else 0.0,
+        }
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        self._stats["loads"] += 1
+        try:
+            value = await loader()
+        except Exception:
+            self._stats["load_errors"] += 1
+            raise
+        self.put(key, value)
+        return value
+
+    async def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]):
+        """Background revalidation; the stale value stays in place on failure."""
+        try:
+            await self._flights.do(key, lambda: self._load(key, loader))
+        except Exception as e:
+            logger.warning("Identity cache refresh failed for %s: %s", key, e)
+
+
+class AsyncTokenCache:
+    """
+    Caches an Azure AD access token and refreshes it before expiry.
+
+    The synchronous credential is called in a worker thread. Within
+    refresh_margin_s of expiry the current token is still returned while a
+    single background refresh runs; only an expired token blocks callers.
+    """
+
+    DEFAULT_LIFETIME_S = 3600
+
+    def __init__(
+        self,
+        credential: Any,
+        scope: str,
+        refresh_margin_s: float = 300,
+    ):
+        self.credential = credential
+        self.scope = scope
+        self.refresh_margin_s = refresh_margin_s
+        self._token: str | None = None
+        self._expires_on: float = 0.0
+        self._flights = SingleFlight()
+
+    async def get_token(self) -> str:
+        now = time.time()
+        if self._token and now < self._expires_on - self.refresh_margin_s:
+            return self._token
+
+        if self._token and now < self._expires_on:
+            if not self._flights.in_flight(self.scope):
+                asyncio.ensure_future(self._background_refresh())
+            return self._token
+
+        return await self._flights.do(self.scope, self._refresh)
+
+    async def _refresh(self) -> str:
+        access_token = await asyncio.to_thread(self.credential.get_token, self.scope)
+        expires_on = getattr(access_token, "expires_on", None)
+        if not isinstance(expires_on, (int, float)):
+            expires_on = time.time() + self.DEFAULT_LIFETIME_S
+        self._token = access_token.token
+        self._expires_on = float(expires_on)
+        return self._token
+
+    async def _background_refresh(self):
+        try:
+            await self._flights.do(self.scope, self._refresh)
+        except Exception as e:
+            logger.warning("Token refresh for %s failed: %s", self.scope, e)
@@ -0,0 +1,351 @@
+"""
+Buffered Audit Sink
+Non-blocking audit pipeline shared by the security and compliance audit loggers.
+
+Callers enqueue audit documents into a bounded in-memory queue and return
+immediately. A background flusher groups queued documents by partition key
+(tenant) and writes them to Cosmos DB in transactional batches off the event
+loop. When the queue is full or Cosmos is unavailable, documents are appended
+to a local JSONL spill file and replayed once writes succeed again, so no
+audit record is dropped.
+
+The spill file path is stable per sink name, so records spilled before a
+restart or crash are replayed by the next sink with that name. Processes
+sharing the file serialize appends and replay hand-offs with a lock file;
+replay files abandoned by a crash mid-replay are picked up once stale.
+Replayed documents are upserted by id, so a repeated replay is harmless.
+
+Usage:
+    sink = AuditSink(container, name="security")
+    sink.submit({"id": "...", "tenant_id": "t1", ...})
+    await sink.flush()   # optional; e.g. before shutdown
+    sink.get_metrics()
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: spill appends are not locked across processes
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+# Queued by close() to stop the flusher after it has written what precedes it
+_STOP = object()
+
+
+class AuditSink:
+    """
+    Bounded, batched, spill-to-disk audit writer.
+
+    With no container configured, flushed documents are emitted to the
+    module logger instead (local development and tests).
+    """
+
+    # Cosmos DB transactional batches are limited to 100 operations
+    MAX_BATCH_OPERATIONS = 100
+    # Replay files untouched this long were left behind by a crashed process
+    STALE_REPLAY_S = 300
+
+    def __init__(
+        self,
+        container: Any = None,
+        name: str = "audit",
+        max_queue_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval_s: float = 0.5,
+        spill_path: str | None = None,
+        partition_key_field: str = "tenant_id",
+    ):
+        self.container = container
+        self.name = name
+        self.batch_size = max(1, min(batch_size, self.MAX_BATCH_OPERATIONS))
+        self.flush_interval_s = flush_interval_s
+        self.partition_key_field = partition_key_field
+        self.spill_path = spill_path or os.path.join(
+            tempfile.gettempdir(), f"audit-spill-{name}.jsonl"
+        )
+
+        self._queue: asyncio.Queue[Any] = asyncio.Queue(
+            maxsize=max_queue_size
+        )
+        self._flusher: asyncio.Task | None = None
+        self._write_lock = asyncio.Lock()
+        self._closed = False
+        self._has_spill = os.path.exists(self.spill_path) or bool(self._stale_replays())
+
+        self._delivery_latency_ms: deque[float] = deque(maxlen=1000)
+        self._write_latency_ms: deque[float] = deque(maxlen=1000)
+        self._metrics = {
+            "submitted": 0,
+            "delivered": 0,
+            "batches_written": 0,
+            "batch_failures": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "spill_errors": 0,
+        }
+
+    def submit(self, document: dict[str, Any]) -> None:
+        """
+        Enqueue an audit document without waiting for it to be written.
+
+        Falls back to the spill file when the queue is full.
+        """
+        document.setdefault("id", uuid.uuid4().hex)
+        self._metrics["submitted"] += 1
+        self._ensure_flusher()
+
+        try:
+            self._queue.put_nowait((time.perf_counter(), document))
+        except asyncio.QueueFull:
+            self._spill([document])
+
+    async def flush(self) -> None:
+        """Write everything currently queued, then replay any spill file."""
+        batch = self._drain(self._queue.qsize())
+        if batch:
+            await self._write(batch)
+        await self._replay_spill()
+
+    async def close(self) -> None:
+        """Stop the background flusher once it has written its batch, then flush."""
+        self._closed = True
+        if self._flusher and not self._flusher.done():
+            # Blocks only while the queue is full, which the flusher is draining
+            await self._queue.put(_STOP)
+            await self._flusher
+        self._flusher = None
+        await self.flush()
+
+    def get_metrics(self) -> dict[str, Any]:
+        """Delivery counters plus queue depth and latency percentiles."""
+        return {
+            **self._metrics,
+            "queue_depth": self._queue.qsize(),
+            "spill_pending": self._has_spill,
+            "delivery_latency_ms": _percentiles(self._delivery_latency_ms),
+            "write_latency_ms": _percentiles(self._write_latency_ms),
+        }
+
+    def _ensure_flusher(self) -> None:
+        """Start the background flusher on first use inside a running loop."""
+        if self._closed or (self._flusher and not self._flusher.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flusher = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        """Collect up to batch_size documents or until the interval elapses."""
+        batch: list[tuple[float, dict[str, Any]]] = []
+        try:
+            while True:
+                first = await self._queue.get()
+                if first is _STOP:
+                    return
+                batch = [first]
+                stopping = False
+                deadline = time.perf_counter() + self.flush_interval_s
+
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                try:
+                    await self._write(batch)
+                    if self._has_spill:
+                        await self._replay_spill()
+                except Exception as e:  # never let the flusher die
+                    logger.error("Audit sink %s flush error: %s", self.name, e)
+                batch = []
+                if stopping:
+                    return
+        except asyncio.CancelledError:
+            # Cancelled from outside (e.g. loop shutdown): keep the batch in
+            # hand. Upserts are idempotent, so partitions already written
+            # before the cancellation are safe to replay.
+            if batch:
+                self._spill([document for _, document in batch])
+            raise
+
+    def _drain(self, limit: int) -> list[tuple[float, dict[str, Any]]]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is _STOP:
+                # Leave the stop marker for the flusher that close() awaits
+                self._queue.put_nowait(item)
+                break
+            batch.append(item)
+        return batch
+
+    async def _write(self, batch: list[tuple[float, dict[str, Any]]]) -> None:
+        """Write one batch grouped per partition; failed partitions are spilled."""
+        partitions: dict[str, list[tuple[float, dict[str, Any]]]] = {}
+        for enqueued_at, document in batch:
+            key = str(document.get(self.partition_key_field, ""))
+            partitions.setdefault(key, []).append((enqueued_at, document))
+
+        async with self._write_lock:
+            for partition_key, items in partitions.items():
+                for i in range(0, len(items), self.batch_size):
+                    chunk = items[i:i + self.batch_size]
+                    documents = [document for _, document in chunk]
+                    start = time.perf_counter()
+                    try:
+                        await self._write_partition(partition_key, documents)
+                    except Exception as e:
+                        self._metrics["batch_failures"] += 1
+                        logger.warning(
+                            "Audit sink %s write failed for partition %s (%d items), spilling: %s",
+                            self.name, partition_key, len(documents), e,
+                        )
+                        self._spill(documents)
+                        continue
+
+                    done = time.perf_counter()
+                    self._write_latency_ms.append((done - start) * 1000)
+                    self._delivery_latency_ms.extend(
+                        (done - enqueued_at) * 1000 for enqueued_at, _ in chunk
+                    )
+                    self._metrics["batches_written"] += 1
+                    self._metrics["delivered"] += len(documents)
+
+    async def _write_partition(self, partition_key: str, documents: list[dict[str, Any]]) -> None:
+        """Persist documents sharing one partition key."""
+        if self.container is None:
+            for document in documents:
+                logger.info("[AUDIT:%s] %s", self.name, json.dumps(document, default=str))
+            return
+
+        # The Cosmos container client is synchronous; keep it off the event loop
+        if len(documents) == 1:
+            await asyncio.to_thread(
+                self.container.upsert_item,
+                body=documents[0],
+                partition_key=partition_key,
+            )
+        else:
+            await asyncio.to_thread(
+                self.container.execute_item_batch,
+                batch_operations=[("upsert", (document,)) for document in documents],
+                partition_key=partition_key,
+            )
+
+    @contextmanager
+    def _spill_lock(self):
+        """Exclusive lock on the spill file across processes."""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.spill_path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _spill(self, documents: list[dict[str, Any]]) -> None:
+        """Append documents to the local spill file."""
+        try:
+            with self._spill_lock(), open(self.spill_path, "a", encoding="utf-8") as f:
+                for document in documents:
+                    f.write(json.dumps(document, default=str) + "\n")
+            self._has_spill = True
+            self._metrics["spilled"] += len(documents)
+        except OSError as e:
+            # Last resort: keep the record in the application log
+            self._metrics["spill_errors"] += len(documents)
+            for document in documents:
+                logger.error(
+                    "Audit sink %s could not spill record (%s): %s",
+                    self.name, e, json.dumps(document, default=str),
+                )
+
+    def _stale_replays(self) -> list[str]:
+        """Replay files abandoned by a process that crashed mid-replay."""
+        cutoff = time.time() - self.STALE_REPLAY_S
+        stale = []
+        for path in glob.glob(f"{glob.escape(self.spill_path)}.*.replay"):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    stale.append(path)
+            except OSError:
+                continue
+        return stale
+
+    async def _replay_spill(self) -> None:
+        """Re-deliver spilled documents; anything still failing is re-spilled."""
+        if not self._has_spill:
+            return
+        self._has_spill = False
+
+        replay_paths = []
+        # Claim abandoned replay files by renaming them, so only one sink replays each
+        for path in self._stale_replays():
+            claimed = f"{self.spill_path}.{uuid.uuid4().hex[:8]}.replay"
+            try:
+                os.replace(path, claimed)
+                replay_paths.append(claimed)
+            except OSError:
+                continue
+
+        replay_path = f"{self.spill_path}.{uuid.uuid4().hex[:8]}.replay"
+        try:
+            with self._spill_lock():
+                os.replace(self.spill_path, replay_path)
+            replay_paths.append(replay_path)
+        except OSError:
+            pass
+
+        for path in replay_paths:
+            now = time.perf_counter()
+            batch = []
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        batch.append((now, json.loads(line)))
+
+            delivered_before = self._metrics["delivered"]
+            await self._write(batch)
+            self._metrics["replayed"] += self._metrics["delivered"] - delivered_before
+            os.remove(path)
+
+
+def _percentiles(samples: deque[float]) -> dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
@@ -0,0 +1,150 @@
+"""
+Streaming Quantile Sketch
+DDSketch for latency percentiles in bounded memory.
+
+Values are counted in logarithmic buckets, so any quantile is returned
+within a relative error of `relative_accuracy` of the exact value (1% by
+default) while memory depends only on the range of values, not on how
+many were added. Sketches with the same accuracy merge exactly, so
+per-worker or per-window sketches can be combined into one distribution.
+
+Usage:
+    sketch = DDSketch()
+    for latency_ms in latencies:
+        sketch.add(latency_ms)
+    sketch.quantile(0.99)
+    sketch.merge(other_sketch)
+"""
+
+import math
+from typing import Optional
+
+
+class DDSketch:
+    """
+    Quantile sketch with relative-error guarantees (Masson et al., 2019).
+
+    Only non-negative values are supported, which covers latencies, sizes
+    and costs. Values below min_value are counted in a zero bucket. When
+    more than max_buckets are in use, the lowest buckets are collapsed
+    together, which only costs accuracy at the bottom of the distribution.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        max_buckets: int = 2048,
+        min_value: float = 1e-9,
+    ):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(k-1), gamma^k]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        if value < 0:
+            raise ValueError("DDSketch only accepts non-negative values")
+        if value < self.min_value:
+            self.zero_count += count
+        else:
+            key = self._key(value)
+            self.buckets[key] = self.buckets.get(key, 0) + count
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+        self.count += count
+        self.sum += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def _collapse(self):
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        target = keys[excess]
+        for key in keys[:excess]:
+            self.buckets[target] += self.buckets.pop(key)
+
+    def merge(self, other: "DDSketch"):
+        """Add other's values to this sketch."""
+        if not math.isclose(other.gamma, self.gamma):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        if other.count == 0:
+            return
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Value at quantile q (0..1), or None if the sketch is empty.
+
+        Matches sorted(values)[int(q * (n - 1))] within the relative accuracy.
+        """
+        if self.count == 0:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+
+        rank = int(q * (self.count - 1))
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0 if self.min < self.min_value else self.min
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Never report outside the observed range
+                return min(max(self._value(key), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "min_value": self.min_value,
+            "buckets": {str(k): v for k, v in self.buckets.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"], data["max_buckets"], data["min_value"])
+        sketch.buckets = {int(k): v for k, v in data["buckets"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
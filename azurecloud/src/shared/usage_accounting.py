@@ -0,0 +1,292 @@
+"""
+Usage Accounting for Azure OpenAI Calls
+Captures token usage, model, wall time and queueing time for every chat and
+embedding call, and aggregates it per scope (plan step, task) and per request.
+
+Usage:
+    meter = UsageMeter(request_id="plan-123")
+    with meter.activate():
+        with usage_scope("step:retrieve"):
+            response = await tracked_chat(client, model="gpt-4o", messages=[...])
+    meter.summary()  # {"total": {...}, "by_scope": {"step:retrieve": {...}}, ...}
+
+Calls made while no meter is active pass straight through to the client.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterator
+
+from src.finops.cost_tracker import PricingModel
+
+
+_active_meter: ContextVar["UsageMeter | None"] = ContextVar("usage_meter", default=None)
+_active_scope: ContextVar[tuple[str, ...]] = ContextVar("usage_scope", default=())
+
+
+@dataclass
+class UsageRecord:
+    """Usage captured for a single model call."""
+    operation: str  # "chat" or "embedding"
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    wall_time_ms: float
+    queue_time_ms: float
+    cost_usd: float
+    scope: tuple[str, ...] = ()
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+    error: str | None = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self) -> dict:
+        return {
+            "operation": self.operation,
+            "model": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "wall_time_ms": round(self.wall_time_ms, 2),
+            "queue_time_ms": round(self.queue_time_ms, 2),
+            "cost_usd": self.cost_usd,
+            "scope": list(self.scope),
+            "timestamp": self.timestamp.isoformat(),
+            "error": self.error,
+        }
+
+
+@dataclass
+class UsageTotals:
+    """Aggregated usage over a set of calls."""
+    calls: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    wall_time_ms: float = 0.0
+    queue_time_ms: float = 0.0
+    by_model: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, record: UsageRecord) -> None:
+        """Fold a record into the totals."""
+        self.calls += 1
+        if record.error:
+            self.errors += 1
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.cost_usd += record.cost_usd
+        self.wall_time_ms += record.wall_time_ms
+        self.queue_time_ms += record.queue_time_ms
+        self.by_model[record.model] = self.by_model.get(record.model, 0) + record.total_tokens
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "wall_time_ms": round(self.wall_time_ms, 2),
+            "queue_time_ms": round(self.queue_time_ms, 2),
+            "by_model": dict(self.by_model),
+        }
+
+
+class UsageMeter:
+    """
+    Per-request usage collector.
+
+    Records are attributed to the scope stack that is active when the call is
+    made. Scopes are held in context variables, so calls fanned out with
+    asyncio.gather keep the scope of the task that spawned them.
+    """
+
+    def __init__(
+        self,
+        request_id: str | None = None,
+        max_concurrency: int | None = None,
+        cost_tracker: Any = None,  # CostTracker
+        tenant_id: str = "",
+        user_id: str = "",
+    ):
+        self.request_id = request_id
+        self.cost_tracker = cost_tracker
+        self.tenant_id = tenant_id
+        self.user_id = user_id
+        self.records: list[UsageRecord] = []
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    @staticmethod
+    def current() -> "UsageMeter | None":
+        """Return the meter active in the current context, if any."""
+        return _active_meter.get()
+
+    @contextmanager
+    def activate(self) -> Iterator["UsageMeter"]:
+        """Make this meter the target for tracked calls in the current context."""
+        token = _active_meter.set(self)
+        try:
+            yield self
+        finally:
+            _active_meter.reset(token)
+
+    async def chat(self, client: Any, **kwargs: Any) -> Any:
+        """Call chat.completions.create and record its usage."""
+        return await self._call(
+            "chat", kwargs.get("model", ""), client.chat.completions.create, kwargs
+        )
+
+    async def embed(self, client: Any, **kwargs: Any) -> Any:
+        """Call embeddings.create and record its usage."""
+        return await self._call(
+            "embedding", kwargs.get("model", ""), client.embeddings.create, kwargs
+        )
+
+    async def _call(self, operation: str, model: str, fn: Any, kwargs: dict) -> Any:
+        """Run a model call through the concurrency gate and time it."""
+        submitted = time.perf_counter()
+        if self._semaphore:
+            await self._semaphore.acquire()
+        started = time.perf_counter()
+        try:
+            response = await fn(**kwargs)
+        except Exception as e:
+            self.record(
+                operation=operation,
+                model=model,
+                wall_time_ms=(time.perf_counter() - started) * 1000,
+                queue_time_ms=(started - submitted) * 1000,
+                error=str(e),
+            )
+            raise
+        finally:
+            if self._semaphore:
+                self._semaphore.release()
+
+        prompt_tokens, completion_tokens = _extract_tokens(response)
+        self.record(
+            operation=operation,
+            model=getattr(response, "model", None) or model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            wall_time_ms=(time.perf_counter() - started) * 1000,
+            queue_time_ms=(started - submitted) * 1000,
+        )
+        return response
+
+    def record(
+        self,
+        operation: str,
+        model: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        wall_time_ms: float = 0.0,
+        queue_time_ms: float = 0.0,
+        error: str | None = None,
+    ) -> UsageRecord:
+        """Record usage for a call made outside the tracked helpers."""
+        if operation == "embedding":
+            cost = PricingModel.get_embedding_cost(model, prompt_tokens)
+        else:
+            cost = PricingModel.get_llm_cost(model, prompt_tokens, completion_tokens)
+
+        record = UsageRecord(
+            operation=operation,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            wall_time_ms=wall_time_ms,
+            queue_time_ms=queue_time_ms,
+            cost_usd=cost,
+            scope=_active_scope.get(),
+            error=error,
+        )
+        self.records.append(record)
+
+        if self.cost_tracker and not error:
+            scope_name = "/".join(record.scope) or operation
+            if operation == "embedding":
+                self.cost_tracker.track_embedding_usage(
+                    model, prompt_tokens, self.tenant_id, self.user_id
+                )
+            else:
+                self.cost_tracker.track_llm_usage(
+                    model, prompt_tokens, completion_tokens,
+                    self.tenant_id, self.user_id, operation=scope_name,
+                )
+
+        return record
+
+    def totals(self, scope: str | None = None) -> UsageTotals:
+        """Aggregate all records, or only those recorded under a scope."""
+        totals = UsageTotals()
+        for record in self.records:
+            if scope is None or scope in record.scope:
+                totals.add(record)
+        return totals
+
+    def by_scope(self) -> dict[str, UsageTotals]:
+        """Aggregate records per scope label, including enclosing scopes."""
+        result: dict[str, UsageTotals] = {}
+        for record in self.records:
+            for label in record.scope:
+                result.setdefault(label, UsageTotals()).add(record)
+        return result
+
+    def summary(self) -> dict:
+        """Serializable summary for result payloads."""
+        return {
+            "request_id": self.request_id,
+            "total": self.totals().to_dict(),
+            "by_scope": {k: v.to_dict() for k, v in self.by_scope().items()},
+        }
+
+
+@contextmanager
+def usage_scope(name: str) -> Iterator[None]:
+    """Attribute tracked calls made inside the block to a named scope."""
+    token = _active_scope.set(_active_scope.get() + (name,))
+    try:
+        yield
+    finally:
+        _active_scope.reset(token)
+
+
+async def tracked_chat(client: Any, **kwargs: Any) -> Any:
+    """chat.completions.create, recorded against the active meter if there is one."""
+    meter = _active_meter.get()
+    if meter is None:
+        return await client.chat.completions.create(**kwargs)
+    return await meter.chat(client, **kwargs)
+
+
+async def tracked_embedding(client: Any, **kwargs: Any) -> Any:
+    """embeddings.create, recorded against the active meter if there is one."""
+    meter = _active_meter.get()
+    if meter is None:
+        return await client.embeddings.create(**kwargs)
+    return await meter.embed(client, **kwargs)
+
+
+def _extract_tokens(response: Any) -> tuple[int, int]:
+    """Read (prompt, completion) token counts from an OpenAI response."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    prompt = getattr(usage, "prompt_tokens", 0)
+    completion = getattr(usage, "completion_tokens", 0)
+    return (
+        prompt if isinstance(prompt, int) else 0,
+        completion if isinstance(completion, int) else 0,
+    )
@@ -0,0 +1,155 @@
+"""
+ACL Filter Benchmark
+Measures filter construction for users with 50, 300 and 1000 groups:
+uncached build vs cached lookup for both ACL filter builders, and the
+per-chunk cost of the bitmap post-filter check.
+
+Run: python -m src.tests.benchmarks.bench_acl_filter --queries 20000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from src.retrieval.hybrid_retriever import (
+    ACLFilterBuilder as RetrievalACLFilterBuilder,
+    RetrievedChunk,
+    UserContext,
+)
+from src.security.acl_trimming import (
+    ACLFilterBuilder as SecurityACLFilterBuilder,
+    SensitivityLevel,
+    UserIdentity,
+)
+
+
+GROUP_COUNTS = [50, 300, 1000]
+ADDITIONAL_FILTERS = {"doc_type": "policy", "department": ["engineering", "security"]}
+
+
+def _groups(count: int, rng: random.Random) -> list[str]:
+    return [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(count)]
+
+
+def _chunks(groups: list[str], count: int, rng: random.Random) -> list[RetrievedChunk]:
+    """Chunks whose ACLs hit the user's groups about half the time."""
+    chunks = []
+    for i in range(count):
+        acl = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(3)]
+        if rng.random() < 0.5:
+            acl.append(rng.choice(groups))
+        chunks.append(RetrievedChunk(
+            id=f"c{i}", doc_id="d", chunk_id=f"c{i}", chunk_type="text", content="",
+            content_md=None, heading=None, section_path=[], page_start=None,
+            page_end=None, reading_order=0, table_headers=None, figure_ref=None,
+            source_uri="", doc_title=None, sensitivity="internal", acl_groups=acl,
+        ))
+    return chunks
+
+
+def _rate(count: int, seconds: float) -> int:
+    return round(count / seconds) if seconds else 0
+
+
+def bench_security_builder(groups: list[str], queries: int) -> dict:
+    """acl_trimming.ACLFilterBuilder: rebuild per query vs cached."""
+    builder = SecurityACLFilterBuilder(group_resolver=None)
+    identity = UserIdentity(
+        user_id="user-1", tenant_id="tenant-1", email="u@corp.com", groups=groups,
+        roles=[], clearance_level=SensitivityLevel.INTERNAL,
+    )
+
+    async def run(clear_cache: bool) -> float:
+        start = time.perf_counter()
+        for _ in range(queries):
+            if clear_cache:
+                builder.filter_cache.clear()
+                identity.acl_filter = None
+            await builder.build_filter(identity, ADDITIONAL_FILTERS)
+        return time.perf_counter() - start
+
+    uncached_s = asyncio.run(run(clear_cache=True))
+    cached_s = asyncio.run(run(clear_cache=False))
+    base = builder._build_base_filter(identity)
+
+    return {
+        "strategy": base.strategy_used,
+        "filter_chars": len(base.filter_string),
+        "uncached_qps": _rate(queries, uncached_s),
+        "cached_qps": _rate(queries, cached_s),
+        "speedup": round(uncached_s / cached_s, 1),
+    }
+
+
+def bench_retrieval_builder(groups: list[str], queries: int) -> dict:
+    """hybrid_retriever.ACLFilterBuilder: rebuild per query vs cached."""
+    builder = RetrievalACLFilterBuilder(max_groups=len(groups))
+    user = UserContext(user_id="user-1", tenant_id="tenant-1", groups=groups)
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        filter_string, _ = builder._build_filter(user, ADDITIONAL_FILTERS, post_filter=False)
+    uncached_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        builder.build_filter(user, ADDITIONAL_FILTERS)
+    cached_s = time.perf_counter() - start
+
+    post_filter_string, _ = builder.build_filter(user, ADDITIONAL_FILTERS, post_filter=True)
+    return {
+        "filter_chars": len(filter_string),
+        "post_filter_chars": len(post_filter_string),
+        "uncached_qps": _rate(queries, uncached_s),
+        "cached_qps": _rate(queries, cached_s),
+        "speedup": round(uncached_s / cached_s, 1),
+    }
+
+
+def bench_post_filter(groups: list[str], chunks: list[RetrievedChunk], rounds: int) -> dict:
+    """Per-chunk local ACL check: bitmap vs building a set per query."""
+    builder = RetrievalACLFilterBuilder()
+    user = UserContext(user_id="user-1", tenant_id="tenant-1", groups=groups)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        group_set = set(user.groups)
+        set_allowed = sum(1 for c in chunks if group_set.intersection(c.acl_groups))
+    set_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        bitmap_allowed = sum(1 for c in chunks if builder.allows(user, c))
+    bitmap_s = time.perf_counter() - start
+
+    assert set_allowed == bitmap_allowed
+    checks = rounds * len(chunks)
+    return {
+        "allowed": f"{bitmap_allowed}/{len(chunks)}",
+        "set_checks_per_sec": _rate(checks, set_s),
+        "bitmap_checks_per_sec": _rate(checks, bitmap_s),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ACL filter cache and bitmap benchmark")
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--chunks", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for count in GROUP_COUNTS:
+        groups = _groups(count, rng)
+        chunks = _chunks(groups, args.chunks, rng)
+        rounds = max(1, args.queries // 10)
+        print(f"--- {count} groups ---")
+        print("  security builder: ", bench_security_builder(groups, args.queries))
+        print("  retrieval builder:", bench_retrieval_builder(groups, args.queries))
+        print("  post-filter:      ", bench_post_filter(groups, chunks, rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Cost Ledger Benchmark
+Records synthetic cost events over a month and measures summary latency
+for a full-month budget check and a 24-hour tenant usage query: a scan
+over the raw event list (previous CostTracker) vs the rollup ledger.
+Also measures month-end reporting for all tenants (optimizer
+recommendations plus chargeback): a scan per tenant, one rollup query per
+tenant, one all-tenant rollup pass, and reads from the materialized view.
+
+Run: python -m src.tests.benchmarks.bench_cost_ledger --events 500000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from src.finops.cost_ledger import CostLedger
+from src.finops.cost_reports import CostReportView
+from src.finops.cost_tracker import (
+    ChargebackService,
+    CostCategory,
+    CostEvent,
+    CostOptimizer,
+    CostTracker,
+)
+
+
+MONTH_START = datetime(2024, 3, 1)
+
+
+def _events(count: int, tenants: int, seed: int) -> list[CostEvent]:
+    rng = random.Random(seed)
+    step = 30 * 86400 / count
+    categories = list(CostCategory)
+    models = ["gpt-4o", "gpt-4o-mini", "text-embedding-3-large", "standard_s1"]
+    return [
+        CostEvent(
+            timestamp=MONTH_START + timedelta(seconds=i * step),
+            category=rng.choice(categories),
+            quantity=rng.randint(1, 4000),
+            unit="tokens",
+            unit_price=0.0,
+            total_cost=rng.uniform(0.0001, 0.2),
+            tenant_id=f"tenant-{rng.randrange(tenants)}",
+            user_id=f"user-{rng.randrange(tenants * 20)}",
+            model=rng.choice(models),
+        )
+        for i in range(count)
+    ]
+
+
+def _scan_summary(events: list[CostEvent], start: datetime, end: datetime, tenant_id: str) -> float:
+    """The per-event filter and aggregation get_summary used to do."""
+    total = 0.0
+    by_category, by_model, by_user = {}, {}, {}
+    for e in events:
+        if start <= e.timestamp <= end and e.tenant_id == tenant_id:
+            total += e.total_cost
+            by_category[e.category.value] = by_category.get(e.category.value, 0) + e.total_cost
+            by_model[e.model] = by_model.get(e.model, 0) + e.total_cost
+            by_user[e.user_id] = by_user.get(e.user_id, 0) + e.total_cost
+    sorted(by_user.items(), key=lambda x: x[1], reverse=True)[:10]
+    return total
+
+
+def _month_end_report(events, ledger, tenants, start, end, repeat) -> dict:
+    """All tenants' recommendations plus a chargeback report, four ways."""
+    tracker = CostTracker()
+    tracker.ledger = ledger
+    optimizer = CostOptimizer(tracker)
+    chargeback = ChargebackService(tracker)
+    tenant_ids = [f"tenant-{i}" for i in range(tenants)]
+
+    def per_tenant_scan():
+        by_tenant = {t: _scan_summary(events, start, end, t) for t in tenant_ids}
+        chargeback.build_report(by_tenant, sum(by_tenant.values()), start, end)
+
+    def per_tenant_rollup():
+        summaries = {t: tracker.get_summary(start, end, t) for t in tenant_ids}
+        for summary in summaries.values():
+            optimizer.recommend(summary)
+        chargeback.generate_chargeback_report(start, end)
+
+    def single_pass():
+        summaries = tracker.get_tenant_summaries(start, end)
+        for summary in summaries.values():
+            optimizer.recommend(summary)
+        chargeback.build_report(
+            {t: s.total_cost for t, s in summaries.items()},
+            sum(s.total_cost for s in summaries.values()), start, end,
+        )
+
+    view = CostReportView(tracker, chargeback=chargeback, now=start)
+
+    def materialized():
+        view.all_recommendations((start.year, start.month))
+        view.chargeback_report((start.year, start.month))
+
+    return {
+        "query": f"month_end_report_{tenants}_tenants",
+        "per_tenant_scan_ms": _ms(per_tenant_scan, 1),
+        "per_tenant_rollup_ms": _ms(per_tenant_rollup, repeat),
+        "single_pass_ms": _ms(single_pass, repeat),
+        "view_ms": _ms(materialized, repeat),
+    }
+
+
+def _ms(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - start) / repeat * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost ledger benchmark")
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=9)
+    args = parser.parse_args()
+
+    events = _events(args.events, args.tenants, args.seed)
+    ledger = CostLedger()
+    start = time.perf_counter()
+    for event in events:
+        ledger.record(event)
+    record_s = time.perf_counter() - start
+    print(f"recorded {len(events)} events in {record_s:.2f}s "
+          f"({round(len(events) / record_s)} events/s), ledger: {ledger.get_stats()}")
+
+    month_end = MONTH_START + timedelta(days=30)
+    ranges = {
+        "month_budget_check": (MONTH_START, month_end),
+        "last_24h_usage": (month_end - timedelta(hours=24, minutes=7), month_end),
+    }
+    for name, (range_start, range_end) in ranges.items():
+        scan = _scan_summary(events, range_start, range_end, "tenant-1")
+        rollup = ledger.query(range_start, range_end, "tenant-1")["total_cost"]
+        scan_ms = _ms(lambda: _scan_summary(events, range_start, range_end, "tenant-1"), args.repeat)
+        rollup_ms = _ms(lambda: ledger.query(range_start, range_end, "tenant-1"), args.repeat)
+        print({
+            "query": name,
+            "scan_ms": scan_ms,
+            "rollup_ms": rollup_ms,
+            "speedup": round(scan_ms / rollup_ms, 1) if rollup_ms else None,
+            "cost_delta": round(abs(scan - rollup), 6),
+        })
+
+    month_last_second = datetime(2024, 3, 31, 23, 59, 59)
+    print(_month_end_report(events, ledger, args.tenants, MONTH_START, month_last_second, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
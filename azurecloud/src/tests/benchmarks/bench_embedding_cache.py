@@ -0,0 +1,108 @@
+"""
+Embedding Cache Benchmark
+Re-ingests edits to a large synthetic document and counts the chunks sent
+to the embedding API with and without the content-hash embedding cache.
+As in the ingestion orchestrator, only pages whose hash changed are
+re-chunked; an inserted page shifts every later page number and so marks
+all of them changed. Also reports the local cache lookup cost per chunk.
+
+Run: python -m src.tests.benchmarks.bench_embedding_cache --pages 500
+"""
+
+import argparse
+import hashlib
+import random
+import tempfile
+import time
+
+from src.ingestion.embedding_cache import LocalEmbeddingCache, embed_with_cache
+
+
+MODEL = "text-embedding-3-large"
+DIMS = 3072
+BATCH_SIZE = 20
+
+
+class CountingEmbedder:
+    def __init__(self, dims: int):
+        self.dims = dims
+        self.texts = 0
+        self.calls = 0
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.texts += len(texts)
+        self.calls += 1
+        return [[0.0] * self.dims for _ in texts]
+
+
+def _document(pages: int, chunks_per_page: int, rng: random.Random) -> list[list[str]]:
+    return [
+        [f"paragraph {rng.getrandbits(64):x} " * 40 for _ in range(chunks_per_page)]
+        for _ in range(pages)
+    ]
+
+
+def _changed_pages(old: list[list[str]], new: list[list[str]]) -> list[int]:
+    """Page numbers whose content hash differs, as diff_pages computes them."""
+    def page_hash(page):
+        return hashlib.sha256("\n".join(page).encode()).hexdigest()
+
+    changed = []
+    for number in range(max(len(old), len(new))):
+        if number >= len(old) or number >= len(new) or page_hash(old[number]) != page_hash(new[number]):
+            changed.append(number)
+    return changed
+
+
+def _ingest(document, pages, embedder, cache):
+    chunks = [{"content": text} for number in pages if number < len(document)
+              for text in document[number]]
+    for i in range(0, len(chunks), BATCH_SIZE):
+        embed_with_cache(chunks[i:i + BATCH_SIZE], embedder, cache, MODEL, DIMS)
+    return len(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding cache benchmark")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--chunks-per-page", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    original = _document(args.pages, args.chunks_per_page, rng)
+
+    edited_page = [page[:] for page in original]
+    edited_page[args.pages // 2][0] = "revised paragraph " * 40
+
+    inserted_page = [page[:] for page in original]
+    inserted_page.insert(3, _document(1, args.chunks_per_page, rng)[0])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, edited in [("edit_one_chunk", edited_page), ("insert_page", inserted_page)]:
+            cache = LocalEmbeddingCache(f"{tmp}/{name}.db")
+            _ingest(original, range(args.pages), CountingEmbedder(DIMS), cache)
+
+            pages = _changed_pages(original, edited)
+            uncached, cached = CountingEmbedder(DIMS), CountingEmbedder(DIMS)
+            rechunked = _ingest(edited, pages, uncached, None)
+            start = time.perf_counter()
+            _ingest(edited, pages, cached, cache)
+            elapsed = time.perf_counter() - start
+
+            print({
+                "edit": name,
+                "changed_pages": len(pages),
+                "rechunked": rechunked,
+                "embedded_without_cache": uncached.texts,
+                "embedded_with_cache": cached.texts,
+                "api_calls_without_cache": uncached.calls,
+                "api_calls_with_cache": cached.calls,
+                "reuse_ratio": round(1 - cached.texts / rechunked, 4) if rechunked else 0.0,
+                "lookup_us_per_chunk": round(elapsed / max(rechunked, 1) * 1e6, 1),
+            })
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
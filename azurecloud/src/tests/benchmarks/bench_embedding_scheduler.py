@@ -0,0 +1,116 @@
+"""
+Embedding Scheduler Benchmark
+Embeds a synthetic corpus (mixed chunk sizes) against a local fake
+endpoint that enforces a token quota over a sliding window, with time
+scaled down so a "minute" lasts --window-s seconds. Compares the previous
+strategy (fixed batches of 20 chunks, fixed concurrency, exponential
+backoff on 429) with the adaptive scheduler, reporting achieved
+throughput as a fraction of the quota ceiling and the number of 429s.
+
+Run: python -m src.tests.benchmarks.bench_embedding_scheduler --windows 10
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import deque
+
+from src.ingestion.embedding_scheduler import (
+    AdaptiveEmbeddingScheduler,
+    EmbeddingResponse,
+    EmbeddingThrottled,
+)
+
+
+class QuotaEndpoint:
+    def __init__(self, limit: int, window_s: float, latency_s: float):
+        self.limit, self.window_s, self.latency_s = limit, window_s, latency_s
+        self.used: deque[tuple[float, int]] = deque()
+        self.throttled = 0
+
+    async def __call__(self, texts: list[str], tokens: int) -> EmbeddingResponse:
+        now = time.monotonic()
+        while self.used and self.used[0][0] <= now - self.window_s:
+            self.used.popleft()
+        in_window = sum(n for _, n in self.used)
+        if in_window + tokens > self.limit:
+            self.throttled += 1
+            wait = self.used[0][0] + self.window_s - now if self.used else self.window_s
+            raise EmbeddingThrottled(headers={"retry-after-ms": str(int(wait * 1000) + 1)})
+        self.used.append((now, tokens))
+        await asyncio.sleep(self.latency_s)
+        return EmbeddingResponse(
+            vectors=[[0.0] for _ in texts],
+            headers={"x-ratelimit-remaining-tokens": str(self.limit - in_window - tokens)},
+        )
+
+
+async def fixed_batches(endpoint, texts, tokens, concurrency: int) -> None:
+    """Previous strategy: batches of 20, fixed concurrency, generic backoff."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(start: int):
+        batch = texts[start:start + 20]
+        batch_tokens = sum(tokens[start:start + 20])
+        async with semaphore:
+            for attempt in range(20):
+                try:
+                    return await endpoint(batch, batch_tokens)
+                except EmbeddingThrottled:
+                    await asyncio.sleep(min(2.0, 0.01 * 2 ** attempt))
+            raise RuntimeError("gave up")
+
+    await asyncio.gather(*(send(i) for i in range(0, len(texts), 20)))
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    total_tokens = args.windows * args.limit
+    tokens = []
+    while sum(tokens) < total_tokens:
+        tokens.append(rng.randint(50, 512))
+    texts = [f"chunk {i}" for i in range(len(tokens))]
+    token_of = dict(zip(texts, tokens))
+    ceiling = args.limit / args.window_s
+
+    for name in ("fixed_20", "adaptive"):
+        endpoint = QuotaEndpoint(args.limit, args.window_s, args.latency_ms / 1000)
+        start = time.monotonic()
+        if name == "fixed_20":
+            await fixed_batches(endpoint, texts, tokens, args.concurrency)
+            extra = {}
+        else:
+            scheduler = AdaptiveEmbeddingScheduler(
+                lambda batch: endpoint(batch, sum(token_of[t] for t in batch)),
+                tokens_per_minute=args.limit,
+                requests_per_minute=10**6,
+                max_batch_tokens=args.limit // 10,
+                window_s=args.window_s,
+            )
+            await scheduler.embed(texts, tokens)
+            extra = {"final_concurrency": scheduler.concurrency}
+        elapsed = time.monotonic() - start
+        print({
+            "strategy": name,
+            "chunks": len(texts),
+            "seconds": round(elapsed, 2),
+            "quota_utilization": round(sum(tokens) / elapsed / ceiling, 3),
+            "throttled_429": endpoint.throttled,
+            **extra,
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive embedding scheduler benchmark")
+    parser.add_argument("--windows", type=int, default=10, help="Corpus size in quota windows")
+    parser.add_argument("--limit", type=int, default=100_000, help="Tokens per window")
+    parser.add_argument("--window-s", type=float, default=0.5)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=8, help="Fixed-batch concurrency")
+    parser.add_argument("--seed", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+GitHub Crawl Benchmark
+Serves a synthetic repository from a local fake GitHub API (aiohttp) that
+charges a fixed latency per request, and compares the serial list_files
+walk (contents + commits call per file) with the incremental crawl: a
+first full crawl, then a re-crawl after a small fraction of files changed.
+Reports HTTP round trips and wall time for each.
+
+Run: python -m src.tests.benchmarks.bench_git_crawl --files 2000
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import time
+
+from aiohttp import web
+
+from src.connectors.git_connector import GitCrawlState, GitHubConnector
+
+
+def _sha(content: str) -> str:
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+class FakeGitHub:
+    def __init__(self, files: dict[str, str], latency_s: float):
+        self.files, self.latency_s, self.requests = files, latency_s, 0
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/repos/{owner}/{repo}/git/trees/{branch}", self.tree),
+            web.get("/repos/{owner}/{repo}/git/blobs/{sha}", self.blob),
+            web.get("/repos/{owner}/{repo}/contents/{path:.*}", self.contents),
+            web.get("/repos/{owner}/{repo}/commits", self.commits),
+            web.post("/graphql", self.graphql),
+        ])
+
+    async def _wait(self):
+        self.requests += 1
+        await asyncio.sleep(self.latency_s)
+
+    @staticmethod
+    def _content(content: str):
+        return web.json_response({"encoding": "base64", "content": base64.b64encode(content.encode()).decode()})
+
+    async def tree(self, request):
+        await self._wait()
+        entries = [{"path": p, "type": "blob", "sha": _sha(c), "size": len(c)} for p, c in sorted(self.files.items())]
+        return web.json_response({"sha": _sha(json.dumps(entries)), "tree": entries})
+
+    async def blob(self, request):
+        await self._wait()
+        by_sha = {_sha(c): c for c in self.files.values()}
+        return self._content(by_sha[request.match_info["sha"]])
+
+    async def contents(self, request):
+        await self._wait()
+        return self._content(self.files[request.match_info["path"]])
+
+    async def commits(self, request):
+        await self._wait()
+        return web.json_response([{"commit": {
+            "committer": {"date": "2024-05-01T10:00:00Z"}, "author": {"email": "a@example.com"}, "message": "m",
+        }}])
+
+    async def graphql(self, request):
+        await self._wait()
+        query = (await request.json())["query"]
+        node = {"committedDate": "2024-05-01T10:00:00Z", "message": "m", "author": {"email": "a@example.com"}}
+        history = {alias: {"nodes": [node]} for alias in re.findall(r"(f\d+): history", query)}
+        return web.json_response({"data": {"repository": {"object": history}}})
+
+
+async def run(args):
+    files = {f"docs/section_{i // 100}/page_{i}.md": f"# Page {i}\n" + "text " * 200 for i in range(args.files)}
+    fake = FakeGitHub(files, args.latency_ms / 1000)
+    runner = web.AppRunner(fake.app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    connector = GitHubConnector("token", max_concurrency=args.concurrency)
+    connector.API_BASE = base
+    await connector.connect()
+    state = GitCrawlState("o/r", "main")
+
+    async def measure(name: str, docs):
+        fake.requests = 0
+        start = time.perf_counter()
+        count = len([d async for d in docs])
+        print({
+            "mode": name,
+            "documents": count,
+            "round_trips": fake.requests,
+            "seconds": round(time.perf_counter() - start, 2),
+        })
+
+    try:
+        if args.files <= args.serial_limit:
+            await measure("list_files (serial)", connector.list_files("o", "r"))
+        await measure("crawl (first)", connector.crawl("o", "r", state=state))
+        for i in range(0, args.files, max(1, int(1 / args.change_rate))):
+            files[f"docs/section_{i // 100}/page_{i}.md"] += "edited\n"
+        await measure(f"crawl ({args.change_rate:.0%} changed)", connector.crawl("o", "r", state=state))
+        await measure("crawl (unchanged)", connector.crawl("o", "r", state=state))
+    finally:
+        await connector.close()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental GitHub crawl benchmark")
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--change-rate", type=float, default=0.01)
+    parser.add_argument("--serial-limit", type=int, default=5000, help="Skip the serial baseline above this size")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
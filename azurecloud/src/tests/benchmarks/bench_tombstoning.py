@@ -0,0 +1,96 @@
+"""
+Tombstoning Benchmark
+Tombstones a large synthetic document against a local fake search index
+that charges a fixed latency per query and per indexing request, and
+reports chunks per second for several batch sizes and concurrency
+levels. Also interrupts one run halfway and reports how much work the
+resumed run repeats.
+
+Run: python -m src.tests.benchmarks.bench_tombstoning --chunks 50000
+"""
+
+import argparse
+import bisect
+import threading
+import time
+
+from src.ingestion.tombstoning import ChunkTombstoner, TombstoneCheckpoint
+
+
+class Result:
+    __slots__ = ("key", "succeeded", "status_code")
+
+    def __init__(self, key: str):
+        self.key, self.succeeded, self.status_code = key, True, 200
+
+
+class LatencyIndex:
+    def __init__(self, chunks: int, query_ms: float, merge_ms: float):
+        self.keys = [f"doc_c{i:07d}" for i in range(chunks)]
+        self.active = dict.fromkeys(self.keys, True)
+        self.query_s, self.merge_s = query_ms / 1000, merge_ms / 1000
+        self.merged = 0
+        self.lock = threading.Lock()
+        self.fail_after: int | None = None
+
+    def search(self, search_text, filter, select, order_by, top):
+        time.sleep(self.query_s)
+        after = filter.split("id gt '")[1].rstrip("'") if "id gt" in filter else ""
+        start = bisect.bisect_right(self.keys, after) if after else 0
+        return [{"id": k} for k in self.keys[start:start + top]]
+
+    def merge_documents(self, documents):
+        with self.lock:
+            if self.fail_after is not None and self.merged >= self.fail_after:
+                raise RuntimeError("worker recycled")
+            self.merged += len(documents)
+        time.sleep(self.merge_s)
+        for doc in documents:
+            self.active[doc["id"]] = False
+        return [Result(doc["id"]) for doc in documents]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paged tombstoning benchmark")
+    parser.add_argument("--chunks", type=int, default=50_000)
+    parser.add_argument("--query-ms", type=float, default=40)
+    parser.add_argument("--merge-ms", type=float, default=60)
+    args = parser.parse_args()
+
+    for batch_size, concurrency in [(1000, 1), (1000, 4), (500, 8), (1000, 8)]:
+        index = LatencyIndex(args.chunks, args.query_ms, args.merge_ms)
+        tombstoner = ChunkTombstoner(index, batch_size=batch_size, max_concurrency=concurrency)
+        start = time.perf_counter()
+        checkpoint = tombstoner.run("doc")
+        elapsed = time.perf_counter() - start
+        assert not any(index.active.values())
+        print({
+            "batch_size": batch_size,
+            "concurrency": concurrency,
+            "pages": checkpoint.pages,
+            "seconds": round(elapsed, 2),
+            "chunks_per_s": round(checkpoint.tombstoned / elapsed),
+        })
+
+    index = LatencyIndex(args.chunks, args.query_ms, args.merge_ms)
+    index.fail_after = args.chunks // 2
+    tombstoner = ChunkTombstoner(index)
+    saved = []
+    try:
+        tombstoner.run("doc", on_checkpoint=lambda cp: saved.append(cp.to_dict()))
+    except RuntimeError:
+        pass
+    before = index.merged
+    index.fail_after = None
+    resumed = tombstoner.run("doc", TombstoneCheckpoint.from_dict(saved[-1]))
+    print({
+        "resumed_from_page": saved[-1]["pages"],
+        "merged_before_crash": before,
+        "merged_after_resume": index.merged - before,
+        "repeated": before + (index.merged - before) - args.chunks,
+        "completed": resumed.completed and not any(index.active.values()),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Traffic Router Benchmark
+Drives a TrafficRouter at a high request rate against a fake registry
+with fixed read latency and a short routing TTL, and reports registry
+refreshes per cache expiry and request latency. Compares the previous
+behaviour (every request that sees an expired entry rebuilds it) with
+the single-flight, stale-while-revalidate router. Also times MD5 against
+CRC32 request bucketing.
+
+Run: python -m src.tests.benchmarks.bench_traffic_router --seconds 3
+"""
+
+import argparse
+import asyncio
+import hashlib
+import time
+import timeit
+from types import SimpleNamespace
+
+from src.governance.model_lifecycle import TrafficRouter, routing_bucket
+
+
+class LatencyRegistry:
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.reads = 0
+        self.read_times: list[float] = []
+        self.production = SimpleNamespace(full_id="m:1")
+
+    async def get_default_model(self, model_id):
+        self.reads += 1
+        self.read_times.append(time.monotonic())
+        await asyncio.sleep(self.latency_s)
+        return self.production
+
+    async def get_models_by_stage(self, model_id, stage):
+        await asyncio.sleep(self.latency_s)
+        return []
+
+
+class ExpiringRouter(TrafficRouter):
+    """Previous behaviour: rebuild on every request that finds the entry expired."""
+
+    def __init__(self, registry, deployer, cache_ttl_seconds):
+        super().__init__(registry, deployer)
+        self.ttl = cache_ttl_seconds
+        self.cache: dict[str, tuple[dict, float]] = {}
+
+    async def get_model_for_request(self, model_id, tenant_id, request_id):
+        key = f"{model_id}:{tenant_id}"
+        entry = self.cache.get(key)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]["production"]
+        routing = await self._build_routing_config(model_id, tenant_id)
+        self.cache[key] = (routing, time.monotonic())
+        return routing["production"]
+
+
+async def drive(router, seconds: float, rate: int) -> list[float]:
+    latencies = []
+
+    async def request(i: int):
+        start = time.perf_counter()
+        await router.get_model_for_request("m", "t1", f"req-{i}")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    tasks, i = [], 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        # One tick of requests every millisecond
+        for _ in range(max(1, rate // 1000)):
+            tasks.append(asyncio.ensure_future(request(i)))
+            i += 1
+        await asyncio.sleep(0.001)
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+async def run(args):
+    deployer = SimpleNamespace(_active_canaries={})
+    for name in ("expiring", "single_flight"):
+        registry = LatencyRegistry(args.registry_ms / 1000)
+        if name == "expiring":
+            router = ExpiringRouter(registry, deployer, args.ttl_s)
+        else:
+            router = TrafficRouter(registry, deployer, cache_ttl_seconds=args.ttl_s)
+        await router.get_model_for_request("m", "t1", "warmup")
+        latencies = sorted(await drive(router, args.seconds, args.rate))
+        # Reads more than half a TTL apart belong to different expiries
+        reads = registry.read_times[1:]
+        expiries = sum(1 for a, b in zip([0.0] + reads, reads) if b - a > args.ttl_s / 2)
+        print({
+            "router": name,
+            "requests": len(latencies),
+            "expiries": expiries,
+            "registry_reads": len(reads),
+            "reads_per_expiry": round(len(reads) / max(1, expiries), 2),
+            "p50_ms": round(latencies[len(latencies) // 2], 3),
+            "p99_ms": round(latencies[int(len(latencies) * 0.99)], 3),
+        })
+
+    ids = [f"req-{i}" for i in range(10_000)]
+    md5 = timeit.timeit(lambda: [int(hashlib.md5(r.encode()).hexdigest(), 16) % 100 for r in ids], number=20)
+    crc = timeit.timeit(lambda: [routing_bucket(r) for r in ids], number=20)
+    print({"bucketing": "ns_per_request", "md5": round(md5 / 200_000 * 1e9), "crc32": round(crc / 200_000 * 1e9)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traffic router refresh benchmark")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--rate", type=int, default=20_000, help="Requests per second")
+    parser.add_argument("--ttl-s", type=float, default=0.5)
+    parser.add_argument("--registry-ms", type=float, default=40)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
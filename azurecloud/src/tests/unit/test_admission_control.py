@@ -0,0 +1,245 @@
+"""
+Unit tests for pre-request admission control
+
+Tests:
+- Token bucket refill and bounded debt
+- Allow / degrade / deny decisions per tenant
+- Retry-after hints for denied requests
+- Buckets drained by CostTracker events
+- RAGOrchestrator debits admitted queries and throttles a busy tenant
+"""
+
+import importlib.util
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.finops.admission_control import (
+    AdmissionAction,
+    AdmissionController,
+    TenantLimits,
+    TokenBucket,
+)
+from src.finops.cost_tracker import CostTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _controller(clock: FakeClock, **limits) -> AdmissionController:
+    return AdmissionController(
+        default_limits=TenantLimits(**limits),
+        degrade_model="gpt-4o-mini",
+        clock=clock,
+    )
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket."""
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = TokenBucket(capacity=100, refill_per_s=10, now=0)
+
+        bucket.consume(80, now=0)
+        assert bucket.refill(now=5) == 70
+        assert bucket.refill(now=60) == 100
+
+    def test_debt_is_bounded(self):
+        bucket = TokenBucket(capacity=100, refill_per_s=10, now=0)
+
+        bucket.consume(1000, now=0)
+
+        assert bucket.level == -100
+        assert bucket.wait_time(50) == 15
+
+
+class TestAdmissionController:
+    """Tests for AdmissionController."""
+
+    def test_unlimited_tenant_is_allowed(self):
+        controller = AdmissionController()
+
+        decision = controller.admit("t1", estimated_tokens=10_000)
+
+        assert decision.action == AdmissionAction.ALLOW
+        assert decision.remaining == {}
+
+    def test_degrades_near_limit_then_denies(self):
+        clock = FakeClock()
+        controller = _controller(clock, tokens_per_minute=10_000)
+
+        assert controller.admit("t1", estimated_tokens=2000).action == AdmissionAction.ALLOW
+
+        controller.record_usage("t1", tokens=7000)
+        degraded = controller.admit("t1", estimated_tokens=2000)
+        assert degraded.action == AdmissionAction.DEGRADE
+        assert degraded.model == "gpt-4o-mini"
+        assert degraded.skip_rerank is True
+
+        controller.record_usage("t1", tokens=2500)
+        denied = controller.admit("t1", estimated_tokens=2000)
+        assert denied.action == AdmissionAction.DENY
+        assert not denied.allowed
+        # 500 left, 1500 missing at 10_000/min
+        assert denied.retry_after_s == 9.0
+
+    def test_refill_restores_admission(self):
+        clock = FakeClock()
+        controller = _controller(clock, tokens_per_minute=6000)
+        controller.record_usage("t1", tokens=6000)
+        assert controller.admit("t1", estimated_tokens=100).action == AdmissionAction.DENY
+
+        clock.now += 60
+
+        assert controller.admit("t1", estimated_tokens=100).action == AdmissionAction.ALLOW
+
+    def test_tenants_are_isolated(self):
+        clock = FakeClock()
+        controller = _controller(clock, tokens_per_minute=1000)
+
+        controller.record_usage("noisy", tokens=5000)
+
+        assert controller.admit("noisy").action == AdmissionAction.DENY
+        assert controller.admit("quiet").action == AdmissionAction.ALLOW
+
+    def test_cost_bucket_denies_overspend(self):
+        clock = FakeClock()
+        controller = _controller(clock, cost_per_hour=2.0)
+
+        controller.record_usage("t1", cost=2.5)
+        decision = controller.admit("t1")
+
+        assert decision.action == AdmissionAction.DENY
+        assert "cost_per_hour" in decision.reason
+
+    def test_estimate_above_capacity_needs_full_bucket(self):
+        clock = FakeClock()
+        controller = _controller(clock, tokens_per_minute=1000)
+
+        assert controller.admit("t1", estimated_tokens=5000).allowed
+
+    def test_per_tenant_limits_override_default(self):
+        clock = FakeClock()
+        controller = _controller(clock, tokens_per_minute=1000)
+        controller.set_limits("big", TenantLimits(tokens_per_minute=100_000))
+
+        controller.record_usage("big", tokens=5000)
+
+        assert controller.admit("big", estimated_tokens=1000).action == AdmissionAction.ALLOW
+        assert controller.get_stats()["decisions"]["allow"] == 1
+
+
+class TestCostTrackerListener:
+    """Admission buckets follow CostTracker events."""
+
+    def test_tracked_usage_drains_buckets(self):
+        clock = FakeClock()
+        controller = _controller(clock, tokens_per_minute=10_000)
+        tracker = CostTracker()
+        tracker.add_listener(controller.record)
+
+        tracker.track_llm_usage("gpt-4o", 8000, 1500, tenant_id="t1", user_id="u1")
+        tracker.track_search_usage(5, tenant_id="t1", user_id="u1")
+
+        decision = controller.admit("t1", estimated_tokens=1000)
+        assert decision.action == AdmissionAction.DENY
+        assert decision.remaining["tokens_per_minute"] == 500
+
+    def test_failing_listener_does_not_break_tracking(self):
+        tracker = CostTracker()
+
+        def broken(event):
+            raise RuntimeError("boom")
+
+        tracker.add_listener(broken)
+        tracker.track_embedding_usage("text-embedding-3-large", 100, tenant_id="t1", user_id="u1")
+
+        assert len(tracker.recent_events) == 1
+
+
+RAG_CHAIN = Path(__file__).resolve().parents[2] / "rag-orchestrator" / "rag_chain.py"
+
+
+@pytest.fixture
+def rag_chain():
+    pytest.importorskip("langchain")
+    pytest.importorskip("langchain_openai")
+    spec = importlib.util.spec_from_file_location("rag_chain", RAG_CHAIN)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _orchestrator(rag_chain, controller: AdmissionController, tracker: CostTracker = None):
+    """RAGOrchestrator without Azure clients; each generation uses 3500 tokens."""
+    orchestrator = rag_chain.RAGOrchestrator.__new__(rag_chain.RAGOrchestrator)
+    orchestrator.chat_deployment = "gpt-4o"
+    orchestrator.admission_controller = controller
+    orchestrator.estimated_query_tokens = 1500
+    orchestrator.cost_tracker = tracker
+
+    chunk = rag_chain.RetrievalResult(
+        chunk_id="c1", document_id="d1", title="Travel policy", chunk_text="Book economy.", score=1.0
+    )
+
+    async def rewrite(ctx):
+        return rag_chain.RewrittenQuery(original=ctx.query, rewritten=ctx.query, reasoning="unchanged")
+
+    async def generate(ctx, chunks, degraded=False):
+        model = "gpt-4o-mini" if degraded else "gpt-4o"
+        ctx.usage.record(stage="generation", model=model, prompt_tokens=3000, completion_tokens=500)
+        return rag_chain.RAGResponse(
+            answer="Book economy.", citations=[], confidence=0.9, grounding_score=0.9,
+            intent="qa", model_used=model, tokens_used={}, latency_ms={},
+        )
+
+    orchestrator._check_cache = AsyncMock(return_value=None)
+    orchestrator._classify_intent = AsyncMock(
+        return_value=rag_chain.IntentClassification(intent="qa", confidence=0.9)
+    )
+    orchestrator._rewrite_query = rewrite
+    orchestrator._retrieve_chunks = AsyncMock(return_value=[chunk])
+    orchestrator._rerank_chunks = AsyncMock(side_effect=lambda ctx, chunks: chunks)
+    orchestrator._generate_response = generate
+    orchestrator._cache_response = AsyncMock()
+    return orchestrator
+
+
+class TestRAGOrchestratorAdmission:
+    """Admitted queries debit their tenant's buckets."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_queries_degrade_then_deny(self, rag_chain):
+        controller = _controller(FakeClock(), tokens_per_minute=10_000)
+        orchestrator = _orchestrator(rag_chain, controller)
+        user = rag_chain.UserContext(user_id="u1", user_name="User", groups=[], tenant_id="t1")
+
+        responses = [await orchestrator.process_query("travel policy?", user) for _ in range(4)]
+
+        # 10_000 -> 6_500 -> 3_000 (below 20% after the estimate) -> in debt
+        assert [r.model_used for r in responses[:3]] == ["gpt-4o", "gpt-4o", "gpt-4o-mini"]
+        assert orchestrator._rerank_chunks.await_count == 2
+        assert responses[3].intent == "throttled"
+        assert controller.get_stats()["decisions"] == {"allow": 2, "degrade": 1, "deny": 1}
+
+        other = rag_chain.UserContext(user_id="u2", user_name="Other", groups=[], tenant_id="t2")
+        assert (await orchestrator.process_query("travel policy?", other)).intent == "qa"
+
+    @pytest.mark.asyncio
+    async def test_cost_reported_through_tracker(self, rag_chain):
+        controller = _controller(FakeClock(), cost_per_hour=0.01)
+        tracker = CostTracker()
+        orchestrator = _orchestrator(rag_chain, controller, tracker)
+        user = rag_chain.UserContext(user_id="u1", user_name="User", groups=[], tenant_id="t1")
+
+        await orchestrator.process_query("travel policy?", user)
+
+        assert len(tracker.recent_events) == 1
+        # 3000 in + 500 out on gpt-4o is $0.0125, over the $0.01/hour budget
+        assert (await orchestrator.process_query("travel policy?", user)).intent == "throttled"
@@ -0,0 +1,222 @@
+"""
+Unit tests for the buffered AuditSink
+
+Tests:
+- Non-blocking submit and per-tenant batched writes
+- Spill to file on write failure, replay on recovery
+- Spill on queue backpressure
+- Close delivers batches the flusher already holds
+- Spill files replayed after a restart, abandoned replay files recovered
+- Compliance logger routes policy triggers through the sink
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from unittest.mock import MagicMock
+
+from src.shared.audit_sink import AuditSink
+from src.governance.policy_engine import (
+    ComplianceAuditLogger,
+    PolicyContext,
+    PolicyEngine,
+    PolicyScope,
+    PolicyStore,
+)
+
+
+def _doc(tenant: str, i: int) -> dict:
+    return {"id": f"{tenant}-{i}", "tenant_id": tenant, "action": "secure_retrieve"}
+
+
+@pytest.fixture
+def container():
+    return MagicMock()
+
+
+class TestAuditSink:
+    """Tests for AuditSink delivery."""
+
+    @pytest.mark.asyncio
+    async def test_batches_per_partition(self, container, tmp_path):
+        sink = AuditSink(container, spill_path=str(tmp_path / "spill.jsonl"))
+        for i in range(3):
+            sink.submit(_doc("t1", i))
+        sink.submit(_doc("t2", 0))
+
+        # Nothing is written on the submit path
+        container.execute_item_batch.assert_not_called()
+        container.upsert_item.assert_not_called()
+
+        await sink.close()
+
+        batch_call = container.execute_item_batch.call_args
+        assert batch_call.kwargs["partition_key"] == "t1"
+        assert len(batch_call.kwargs["batch_operations"]) == 3
+        container.upsert_item.assert_called_once()
+        assert container.upsert_item.call_args.kwargs["partition_key"] == "t2"
+        assert sink.get_metrics()["delivered"] == 4
+
+    @pytest.mark.asyncio
+    async def test_background_flusher_delivers(self, container, tmp_path):
+        sink = AuditSink(container, flush_interval_s=0.01, spill_path=str(tmp_path / "spill.jsonl"))
+        sink.submit(_doc("t1", 0))
+
+        for _ in range(100):
+            if sink.get_metrics()["delivered"]:
+                break
+            await asyncio.sleep(0.01)
+
+        assert sink.get_metrics()["delivered"] == 1
+        assert sink.get_metrics()["delivery_latency_ms"]["max"] > 0
+        await sink.close()
+
+    @pytest.mark.asyncio
+    async def test_outage_spills_then_replays(self, container, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        container.execute_item_batch.side_effect = RuntimeError("503")
+        sink = AuditSink(container, spill_path=str(spill))
+        sink.submit(_doc("t1", 0))
+        sink.submit(_doc("t1", 1))
+
+        await sink.flush()
+        # Replay during the same flush fails again and re-spills
+        assert [json.loads(l)["id"] for l in spill.read_text().splitlines()] == ["t1-0", "t1-1"]
+        assert sink.get_metrics()["delivered"] == 0
+
+        container.execute_item_batch.side_effect = None
+        await sink.close()
+
+        assert not spill.exists()
+        metrics = sink.get_metrics()
+        assert metrics["delivered"] == 2
+        assert metrics["replayed"] == 2
+        assert metrics["spill_pending"] is False
+
+    @pytest.mark.asyncio
+    async def test_backpressure_spills_instead_of_blocking(self, container, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        sink = AuditSink(container, max_queue_size=2, spill_path=str(spill))
+        for i in range(5):
+            sink.submit(_doc("t1", i))
+
+        assert sink.get_metrics()["spilled"] == 3
+        assert len(spill.read_text().splitlines()) == 3
+
+        await sink.close()
+        assert sink.get_metrics()["delivered"] == 5
+
+    @pytest.mark.asyncio
+    async def test_close_delivers_batch_held_by_flusher(self, container, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        sink = AuditSink(container, flush_interval_s=1.0, spill_path=str(spill))
+        for i in range(5):
+            sink.submit(_doc("t1", i))
+        # Flusher has dequeued the batch and is waiting out the interval
+        await asyncio.sleep(0.05)
+        assert sink.get_metrics()["queue_depth"] == 0
+
+        await sink.close()
+
+        assert len(container.execute_item_batch.call_args.kwargs["batch_operations"]) == 5
+        assert sink.get_metrics()["delivered"] == 5
+        assert not spill.exists()
+
+    @pytest.mark.asyncio
+    async def test_close_waits_for_in_progress_write(self, container, tmp_path):
+        container.execute_item_batch.side_effect = lambda **kwargs: time.sleep(0.1)
+        sink = AuditSink(container, flush_interval_s=0.01, spill_path=str(tmp_path / "spill.jsonl"))
+        for i in range(5):
+            sink.submit(_doc("t1", i))
+        await asyncio.sleep(0.05)
+
+        await sink.close()
+
+        assert sink.get_metrics()["delivered"] == 5
+
+    @pytest.mark.asyncio
+    async def test_cancelled_flusher_spills_batch(self, container, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        sink = AuditSink(container, flush_interval_s=1.0, spill_path=str(spill))
+        for i in range(3):
+            sink.submit(_doc("t1", i))
+        await asyncio.sleep(0.05)
+
+        sink._flusher.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await sink._flusher
+
+        assert [json.loads(l)["id"] for l in spill.read_text().splitlines()] == ["t1-0", "t1-1", "t1-2"]
+
+    def test_default_spill_path_is_stable_per_name(self):
+        assert AuditSink(name="security").spill_path == AuditSink(name="security").spill_path
+        assert AuditSink(name="security").spill_path != AuditSink(name="policy").spill_path
+
+    @pytest.mark.asyncio
+    async def test_restart_replays_previous_spill(self, container, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        container.execute_item_batch.side_effect = RuntimeError("503")
+        crashed = AuditSink(container, spill_path=str(spill))
+        crashed.submit(_doc("t1", 0))
+        crashed.submit(_doc("t1", 1))
+        await crashed.flush()
+        assert spill.exists()
+
+        container.execute_item_batch.side_effect = None
+        restarted = AuditSink(container, spill_path=str(spill))
+        assert restarted.get_metrics()["spill_pending"] is True
+        await restarted.close()
+
+        assert restarted.get_metrics()["replayed"] == 2
+        assert not spill.exists()
+
+    @pytest.mark.asyncio
+    async def test_stale_replay_file_is_recovered(self, container, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        abandoned = tmp_path / "spill.jsonl.dead0001.replay"
+        in_progress = tmp_path / "spill.jsonl.live0001.replay"
+        abandoned.write_text(json.dumps(_doc("t1", 0)) + "\n")
+        in_progress.write_text(json.dumps(_doc("t1", 1)) + "\n")
+        old = time.time() - AuditSink.STALE_REPLAY_S - 1
+        os.utime(abandoned, (old, old))
+
+        sink = AuditSink(container, spill_path=str(spill))
+        await sink.close()
+
+        container.upsert_item.assert_called_once()
+        assert container.upsert_item.call_args.kwargs["body"]["id"] == "t1-0"
+        assert not abandoned.exists()
+        # A recent replay file may belong to a live process
+        assert in_progress.exists()
+
+
+class TestComplianceAuditLogger:
+    """Policy triggers are queued rather than printed inline."""
+
+    @pytest.mark.asyncio
+    async def test_policy_trigger_goes_through_sink(self, tmp_path):
+        sink = AuditSink(None, spill_path=str(tmp_path / "spill.jsonl"))
+        audit = ComplianceAuditLogger(sink=sink)
+        engine = PolicyEngine(PolicyStore(), audit_logger=audit)
+
+        await engine.evaluate(PolicyContext(
+            scope=PolicyScope.RETRIEVAL,
+            tenant_id="t1",
+            user_id="u1",
+            request_id="r1",
+            data={"chunk": {"tenant_id": "t2"}, "user": {"tenant_id": "t1"}},
+        ))
+
+        assert sink.get_metrics()["queue_depth"] >= 1
+        await audit.close()
+        assert sink.get_metrics()["delivered"] == sink.get_metrics()["submitted"]
+
+    def test_spill_path_and_shared_container(self, tmp_path):
+        cosmos = MagicMock()
+        audit = ComplianceAuditLogger(cosmos, spill_path=str(tmp_path / "policy.jsonl"))
+
+        assert audit.sink.spill_path == str(tmp_path / "policy.jsonl")
+        cosmos.get_database_client.return_value.get_container_client.assert_called_once_with("audit-logs")
@@ -0,0 +1,133 @@
+"""
+Unit tests for the time-bucketed cost ledger
+
+Tests:
+- Range planning over minute/hour/day buckets
+- Rollup summaries match a scan over raw events
+- Bounded raw ring buffer with SQLite spill
+- CostTracker and BudgetManager on top of the ledger
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.finops.cost_ledger import DAY, HOUR, MINUTE, CostLedger, plan_buckets, to_epoch
+from src.finops.cost_tracker import BudgetManager, CostCategory, CostEvent, CostTracker
+
+
+START = datetime(2024, 3, 1)
+
+
+def _events(count: int, days: int = 10, seed: int = 3) -> list[CostEvent]:
+    rng = random.Random(seed)
+    events = []
+    for _ in range(count):
+        events.append(CostEvent(
+            timestamp=START + timedelta(seconds=rng.uniform(0, days * DAY)),
+            category=rng.choice(list(CostCategory)),
+            quantity=rng.randint(1, 2000),
+            unit="tokens",
+            unit_price=0.0,
+            total_cost=round(rng.uniform(0.0001, 0.5), 6),
+            tenant_id=rng.choice(["t1", "t2", "t3"]),
+            user_id=f"user-{rng.randint(1, 30)}",
+            model=rng.choice(["gpt-4o", "gpt-4o-mini"]),
+        ))
+    return sorted(events, key=lambda e: e.timestamp)
+
+
+def _scan(events, start, end, tenant_id=None):
+    selected = [
+        e for e in events
+        if start <= e.timestamp <= end and (tenant_id is None or e.tenant_id == tenant_id)
+    ]
+    by_category = {}
+    for e in selected:
+        by_category[e.category.value] = by_category.get(e.category.value, 0) + e.total_cost
+    return sum(e.total_cost for e in selected), len(selected), by_category
+
+
+class TestPlanBuckets:
+    """Tests for plan_buckets."""
+
+    def test_uses_coarsest_aligned_buckets(self):
+        start = to_epoch(datetime(2024, 3, 1, 22, 58))
+        end = to_epoch(datetime(2024, 3, 4, 1, 1, 30))
+
+        pieces = plan_buckets(start, end)
+
+        assert [res for res, _ in pieces].count(DAY) == 2
+        assert [res for res, _ in pieces].count(HOUR) == 2
+        assert [res for res, _ in pieces].count(MINUTE) == 4
+        assert pieces[0][1] == int(start) and pieces[-1][1] + MINUTE > end
+
+    def test_pieces_are_contiguous(self):
+        pieces = plan_buckets(to_epoch(START) + 125, to_epoch(START) + 5 * DAY + 7000)
+        for (res, start), (_, next_start) in zip(pieces, pieces[1:]):
+            assert start + res == next_start
+
+
+class TestCostLedger:
+    """Tests for CostLedger."""
+
+    @pytest.mark.parametrize("tenant_id", [None, "t2"])
+    def test_rollup_summary_matches_event_scan(self, tenant_id):
+        events = _events(5000)
+        ledger = CostLedger(minute_retention_s=30 * DAY)
+        for event in events:
+            ledger.record(event)
+        start = START + timedelta(days=1, hours=3, minutes=17)
+        end = START + timedelta(days=6, hours=11, minutes=42, seconds=59, microseconds=999999)
+
+        totals = ledger.query(start, end, tenant_id)
+        total, count, by_category = _scan(events, start, end, tenant_id)
+
+        assert totals["total_cost"] == pytest.approx(total)
+        assert totals["event_count"] == count
+        assert totals["by_category"] == pytest.approx(by_category)
+        if tenant_id:
+            assert set(totals["by_tenant"]) == {tenant_id}
+
+    def test_expired_minutes_fall_back_to_hours(self):
+        events = _events(2000)
+        ledger = CostLedger(minute_retention_s=DAY)
+        for event in events:
+            ledger.record(event)
+        start, end = START + timedelta(hours=2), START + timedelta(hours=5, minutes=59, seconds=59)
+
+        assert ledger.query(start, end)["total_cost"] == pytest.approx(_scan(events, start, end)[0])
+        assert ledger.get_stats()["buckets"] < 2 * 3 * len(events)
+
+    def test_raw_events_bounded_and_spilled(self, tmp_path):
+        events = _events(2500)
+        ledger = CostLedger(raw_capacity=1000, spill_path=str(tmp_path / "spill.db"))
+        for event in events:
+            ledger.record(event)
+
+        assert len(ledger.recent) == 1000
+        assert len(list(ledger.iter_events(START, START + timedelta(days=30)))) == 2500
+        ledger.close()
+        assert ledger.get_stats()["spilled_events"] == 1500
+
+
+class TestCostTrackerOnLedger:
+    """CostTracker summaries and budgets come from the rollups."""
+
+    def test_summary_and_budget(self):
+        tracker = CostTracker(raw_event_capacity=10)
+        budgets = BudgetManager(tracker)
+        budgets.set_budget("tenant-1", monthly_budget=1.0)
+
+        for _ in range(50):
+            tracker.track_llm_usage("gpt-4o", 100_000, 10_000, "tenant-1", "alice")
+        tracker.track_search_usage(1000, "tenant-2", "bob")
+
+        now = datetime.utcnow()
+        summary = tracker.get_summary(now - timedelta(hours=1), now, "tenant-1")
+
+        assert summary.event_count == 50
+        assert summary.top_users[0][0] == "alice"
+        assert len(tracker.recent_events) == 10
+        assert budgets.check_budget("tenant-1")["status"] == "exceeded"
@@ -0,0 +1,128 @@
+"""
+Unit tests for materialized monthly cost reports
+
+Tests:
+- Single-pass per-tenant summaries match per-tenant queries
+- Backfill from the ledger plus incremental updates from events
+- Recommendation cache invalidated by new events
+- Chargeback report from the view matches the tracker-based report
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.finops.cost_reports import CostReportView, month_bounds, previous_month
+from src.finops.cost_tracker import (
+    ChargebackService,
+    CostCategory,
+    CostEvent,
+    CostOptimizer,
+    CostTracker,
+)
+
+
+MARCH = (2024, 3)
+MARCH_START = datetime(2024, 3, 1)
+
+
+def _event(tenant_id: str, cost: float, ts: datetime, category=CostCategory.LLM_INPUT, model="gpt-4o"):
+    return CostEvent(
+        timestamp=ts, category=category, quantity=100, unit="tokens", unit_price=0.0,
+        total_cost=cost, tenant_id=tenant_id, user_id="u1", model=model,
+    )
+
+
+@pytest.fixture
+def tracker():
+    tracker = CostTracker()
+    for day in range(10):
+        ts = MARCH_START + timedelta(days=day, hours=3)
+        tracker._record(_event("t1", 1.0, ts, model="gpt-4"))
+        tracker._record(_event("t2", 0.5, ts, CostCategory.SEARCH, "standard_s1"))
+    # February event must stay out of March
+    tracker._record(_event("t1", 100.0, datetime(2024, 2, 20)))
+    return tracker
+
+
+class TestMonthHelpers:
+    """Tests for month key helpers."""
+
+    def test_month_bounds_across_year_end(self):
+        assert month_bounds((2024, 12)) == (datetime(2024, 12, 1), datetime(2024, 12, 31, 23, 59, 59))
+        assert previous_month((2024, 1)) == (2023, 12)
+
+
+class TestTenantSummaries:
+    """Tests for CostTracker.get_tenant_summaries."""
+
+    def test_single_pass_matches_per_tenant_queries(self, tracker):
+        start, end = month_bounds(MARCH)
+
+        summaries = tracker.get_tenant_summaries(start, end)
+
+        assert set(summaries) == {"t1", "t2"}
+        for tenant_id, summary in summaries.items():
+            expected = tracker.get_summary(start, end, tenant_id)
+            assert summary.total_cost == expected.total_cost
+            assert summary.by_category == expected.by_category
+            assert summary.event_count == expected.event_count
+
+
+class TestCostReportView:
+    """Tests for CostReportView."""
+
+    def test_backfill_then_incremental_updates(self, tracker):
+        view = CostReportView(tracker, now=datetime(2024, 3, 15))
+
+        assert view.tenant_summary("t1", MARCH).total_cost == 10.0
+
+        tracker._record(_event("t1", 2.5, datetime(2024, 3, 20)))
+        tracker._record(_event("t3", 1.0, datetime(2024, 3, 21)))
+
+        assert view.tenant_summary("t1", MARCH).total_cost == 12.5
+        assert view.tenant_summary("t3", MARCH).event_count == 1
+        assert view.tenant_summary("t1", (2024, 2)) is None
+
+    def test_late_event_lands_in_its_own_month(self, tracker):
+        view = CostReportView(tracker, backfill_months=2, now=datetime(2024, 3, 15))
+
+        tracker._record(_event("t1", 1.0, datetime(2024, 2, 28)))
+
+        assert view.tenant_summary("t1", (2024, 2)).total_cost == 101.0
+        assert view.tenant_summary("t1", MARCH).total_cost == 10.0
+
+    def test_recommendations_match_optimizer_and_refresh(self, tracker):
+        view = CostReportView(tracker, now=datetime(2024, 3, 15))
+        start, end = month_bounds(MARCH)
+
+        expected = CostOptimizer.recommend(tracker.get_summary(start, end, "t2"))
+        assert view.recommendations("t2", MARCH) == expected
+        assert any(r["category"] == "search" for r in expected)
+
+        first = view.recommendations("t1", MARCH)
+        assert view.recommendations("t1", MARCH) is first
+
+        tracker._record(_event("t1", 0.1, datetime(2024, 3, 22)))
+        assert view.recommendations("t1", MARCH) is not first
+        assert set(view.all_recommendations(MARCH)) == {"t1", "t2"}
+
+    def test_chargeback_matches_tracker_report(self, tracker):
+        chargeback = ChargebackService(tracker)
+        chargeback.set_department_mapping("t1", "Finance")
+        view = CostReportView(tracker, chargeback=chargeback, now=datetime(2024, 3, 15))
+        start, end = month_bounds(MARCH)
+
+        from_view = view.chargeback_report(MARCH)
+        from_tracker = chargeback.generate_chargeback_report(start, end)
+
+        assert from_view["total_cost"] == from_tracker["total_cost"] == 15.0
+        assert from_view["by_department"] == from_tracker["by_department"]
+
+    def test_old_months_are_dropped(self, tracker):
+        view = CostReportView(tracker, months_retained=2, now=datetime(2024, 3, 15))
+
+        tracker._record(_event("t1", 1.0, datetime(2024, 4, 2)))
+        tracker._record(_event("t1", 1.0, datetime(2024, 5, 2)))
+
+        assert view.months() == [(2024, 4), (2024, 5)]
@@ -0,0 +1,182 @@
+"""
+Unit tests for the content-addressed embedding cache
+
+Tests:
+- Keys from normalized content, model and dimensions
+- Local SQLite cache persistence and Cosmos-backed cache
+- Cache-first embedding: only new content reaches the embedding API
+- Reuse statistics and degradation on cache failures
+"""
+
+import pytest
+
+from src.ingestion.embedding_cache import (
+    CosmosEmbeddingCache,
+    EmbeddingReuseStats,
+    LocalEmbeddingCache,
+    embed_with_cache,
+    embedding_key,
+)
+
+
+MODEL = "text-embedding-3-large"
+DIMS = 4
+
+
+class FakeEmbedder:
+    """Deterministic embedding API that records what it was asked for."""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(texts)
+        return [[float(len(t)), 0.5, -1.0, 0.25] for t in texts]
+
+    @property
+    def texts(self) -> list[str]:
+        return [t for call in self.calls for t in call]
+
+
+class FakeContainer:
+    def __init__(self):
+        self.items: dict[str, dict] = {}
+        self.queries = 0
+
+    def query_items(self, query, parameters=None, enable_cross_partition_query=False):
+        self.queries += 1
+        ids = parameters[0]["value"]
+        return iter([dict(self.items[i]) for i in ids if i in self.items])
+
+    def upsert_item(self, body):
+        self.items[body["id"]] = body
+
+
+class BrokenCache:
+    def get_many(self, keys):
+        raise ConnectionError("cache unavailable")
+
+    def put_many(self, entries, model, dimensions):
+        raise ConnectionError("cache unavailable")
+
+
+def _chunks(*texts: str) -> list[dict]:
+    return [{"id": f"c{i}", "content": text} for i, text in enumerate(texts)]
+
+
+class TestEmbeddingKey:
+    """Tests for embedding_key."""
+
+    def test_normalizes_whitespace_and_unicode(self):
+        assert embedding_key("Key  Vault\nsecrets ", MODEL, DIMS) == embedding_key(
+            "Key Vault secrets", MODEL, DIMS
+        )
+        assert embedding_key("caf\u00e9", MODEL, DIMS) == embedding_key("cafe\u0301", MODEL, DIMS)
+
+    def test_model_and_dimensions_are_part_of_key(self):
+        key = embedding_key("text", MODEL, DIMS)
+
+        assert key != embedding_key("text", "text-embedding-3-small", DIMS)
+        assert key != embedding_key("text", MODEL, 256)
+        assert key != embedding_key("Text", MODEL, DIMS)
+
+
+class TestCaches:
+    """Tests for the cache backends."""
+
+    def test_local_cache_persists(self, tmp_path):
+        path = str(tmp_path / "embeddings.db")
+        cache = LocalEmbeddingCache(path)
+        cache.put_many({"a": [0.1, 0.2], "b": [1.0, -2.0]}, MODEL, 2)
+        cache.close()
+
+        reopened = LocalEmbeddingCache(path)
+
+        assert len(reopened) == 2
+        found = reopened.get_many(["a", "b", "missing"])
+        assert found["a"] == pytest.approx([0.1, 0.2])
+        assert found["b"] == [1.0, -2.0]
+        assert "missing" not in found
+
+    def test_local_cache_reads_in_batches(self):
+        cache = LocalEmbeddingCache()
+        cache.put_many({f"k{i}": [float(i)] for i in range(1200)}, MODEL, 1)
+
+        assert len(cache.get_many([f"k{i}" for i in range(1500)])) == 1200
+
+    def test_cosmos_cache_round_trip(self):
+        container = FakeContainer()
+        cache = CosmosEmbeddingCache(container)
+        cache.put_many({f"k{i}": [float(i), 0.5] for i in range(150)}, MODEL, 2)
+
+        found = cache.get_many([f"k{i}" for i in range(150)])
+
+        assert found["k7"] == [7.0, 0.5]
+        assert len(found) == 150
+        assert container.queries == 2
+        assert isinstance(container.items["k7"]["vector"], str)
+
+
+class TestEmbedWithCache:
+    """Tests for embed_with_cache."""
+
+    def test_reingestion_embeds_only_new_content(self):
+        cache, embedder = LocalEmbeddingCache(), FakeEmbedder()
+        original = _chunks("intro", "setup", "usage", "faq")
+        embed_with_cache(original, embedder, cache, MODEL, DIMS)
+
+        edited = _chunks("intro", "setup  ", "usage v2", "faq", "appendix")
+        stats = embed_with_cache(edited, embedder, cache, MODEL, DIMS)
+
+        assert embedder.calls[-1] == ["usage v2", "appendix"]
+        assert stats.reused == 3
+        assert stats.embedded == 2
+        assert stats.reuse_ratio == pytest.approx(0.6)
+        assert edited[0]["embedding"] == original[0]["embedding"]
+        assert all(len(c["embedding"]) == DIMS for c in edited)
+
+    def test_duplicates_embedded_once(self):
+        embedder = FakeEmbedder()
+        chunks = _chunks("same", "other", "same")
+
+        stats = embed_with_cache(chunks, embedder, LocalEmbeddingCache(), MODEL, DIMS)
+
+        assert embedder.texts == ["same", "other"]
+        assert stats.duplicates == 1
+        assert chunks[2]["embedding"] == chunks[0]["embedding"]
+
+    def test_fully_cached_batch_makes_no_api_call(self):
+        cache, embedder = LocalEmbeddingCache(), FakeEmbedder()
+        embed_with_cache(_chunks("a", "b"), embedder, cache, MODEL, DIMS)
+
+        stats = embed_with_cache(_chunks("b", "a"), embedder, cache, MODEL, DIMS)
+
+        assert len(embedder.calls) == 1
+        assert stats.api_calls == 0
+        assert stats.reuse_ratio == 1.0
+
+    def test_cache_failure_degrades_to_embedding(self):
+        embedder = FakeEmbedder()
+        chunks = _chunks("a", "b")
+
+        stats = embed_with_cache(chunks, embedder, BrokenCache(), MODEL, DIMS)
+
+        assert stats.embedded == 2
+        assert stats.cache_errors == 2
+        assert all(c["embedding"] for c in chunks)
+
+
+class TestEmbeddingReuseStats:
+    """Tests for EmbeddingReuseStats."""
+
+    def test_total_across_batches(self):
+        batches = [
+            EmbeddingReuseStats(chunks=20, reused=15, embedded=5, api_calls=1).to_dict(),
+            EmbeddingReuseStats(chunks=10, reused=10).to_dict(),
+        ]
+
+        total = EmbeddingReuseStats.total(EmbeddingReuseStats.from_dict(b) for b in batches)
+
+        assert total.chunks == 30
+        assert total.api_calls == 1
+        assert total.to_dict()["reuse_ratio"] == pytest.approx(25 / 30, abs=1e-4)
@@ -0,0 +1,231 @@
+"""
+Unit tests for the adaptive embedding scheduler
+
+Tests:
+- Token- and item-bounded batch packing
+- TPM/RPM budget refill and header corrections
+- AIMD concurrency on success and throttling
+- Sustained throughput near quota against a fake TPM-enforcing endpoint
+"""
+
+import asyncio
+import time
+from collections import deque
+
+import pytest
+
+from src.ingestion.embedding_cache import LocalEmbeddingCache, aembed_with_cache
+from src.ingestion.embedding_scheduler import (
+    AdaptiveEmbeddingScheduler,
+    EmbeddingResponse,
+    EmbeddingThrottled,
+    RateBudget,
+    pack_batches,
+    retry_after_from_headers,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TPMEndpoint:
+    """
+    Embedding endpoint enforcing a token limit over a sliding window.
+
+    Token counts are taken from the text ("t<tokens>:<id>") so the test
+    controls them exactly.
+    """
+
+    def __init__(self, tokens_per_window: int, window_s: float, latency_s: float = 0.005):
+        self.limit = tokens_per_window
+        self.window_s = window_s
+        self.latency_s = latency_s
+        self.used: deque[tuple[float, int]] = deque()
+        self.requests = 0
+        self.throttled = 0
+        self.tokens_served = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, texts: list[str]) -> EmbeddingResponse:
+        self.requests += 1
+        tokens = sum(int(t.split(":")[0][1:]) for t in texts)
+        now = time.monotonic()
+        while self.used and self.used[0][0] <= now - self.window_s:
+            self.used.popleft()
+        in_window = sum(n for _, n in self.used)
+        if in_window + tokens > self.limit:
+            self.throttled += 1
+            # Time until enough of the window expires
+            freed, wait = 0, self.window_s
+            for at, n in self.used:
+                freed += n
+                if in_window - freed + tokens <= self.limit:
+                    wait = at + self.window_s - now
+                    break
+            raise EmbeddingThrottled(headers={"retry-after-ms": str(int(wait * 1000) + 1)})
+        self.used.append((now, tokens))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency_s)
+        self.in_flight -= 1
+        self.tokens_served += tokens
+        return EmbeddingResponse(
+            vectors=[[float(t.split(":")[1])] for t in texts],
+            headers={"x-ratelimit-remaining-tokens": str(self.limit - in_window - tokens)},
+        )
+
+
+def _texts(count: int, tokens: int) -> list[str]:
+    return [f"t{tokens}:{i}" for i in range(count)]
+
+
+class TestPacking:
+    """Tests for pack_batches and header parsing."""
+
+    def test_packs_by_tokens(self):
+        assert pack_batches([400, 300, 300, 500, 100], 1000, 10) == [[0, 1, 2], [3, 4]]
+
+    def test_item_limit_and_oversized_items(self):
+        assert pack_batches([1] * 5, 100, 2) == [[0, 1], [2, 3], [4]]
+        assert pack_batches([50, 5000, 50], 1000, 10) == [[0], [1], [2]]
+
+    def test_retry_after_headers(self):
+        assert retry_after_from_headers({"Retry-After-Ms": "1500"}) == 1.5
+        assert retry_after_from_headers({"retry-after": "2"}) == 2.0
+        assert retry_after_from_headers({}) is None
+
+
+class TestRateBudget:
+    """Tests for RateBudget."""
+
+    def test_reserve_and_refill(self):
+        clock = FakeClock()
+        budget = RateBudget(6000, 60, window_s=60, clock=clock)
+
+        assert budget.reserve(5000) == 0
+        assert budget.reserve(2000) == pytest.approx(10.0)
+
+        clock.now = 10
+        assert budget.reserve(2000) == 0
+
+    def test_request_budget(self):
+        clock = FakeClock()
+        budget = RateBudget(10**6, 2, window_s=60, clock=clock)
+
+        assert budget.reserve(1) == 0
+        assert budget.reserve(1) == 0
+        assert budget.reserve(1) == pytest.approx(30.0)
+
+    def test_headers_only_lower_budget(self):
+        budget = RateBudget(10_000, 100, clock=FakeClock())
+
+        budget.update_from_headers({"x-ratelimit-remaining-tokens": "50000"})
+        assert budget.tokens == 10_000
+        budget.update_from_headers({"x-ratelimit-remaining-tokens": "1200"})
+        assert budget.tokens == 1200
+
+
+class TestAdaptiveEmbeddingScheduler:
+    """Tests for AdaptiveEmbeddingScheduler."""
+
+    @pytest.mark.asyncio
+    async def test_preserves_order(self):
+        endpoint = TPMEndpoint(10**6, 60)
+        scheduler = AdaptiveEmbeddingScheduler(
+            endpoint, 10**6, 10**4, max_batch_tokens=1000, initial_concurrency=4,
+        )
+        texts = _texts(50, 100)
+
+        vectors = await scheduler.embed(texts, [100] * 50)
+
+        assert vectors == [[float(i)] for i in range(50)]
+        assert endpoint.requests == 5
+
+    @pytest.mark.asyncio
+    async def test_additive_increase(self):
+        endpoint = TPMEndpoint(10**7, 60, latency_s=0.001)
+        scheduler = AdaptiveEmbeddingScheduler(
+            endpoint, 10**7, 10**5, max_batch_tokens=100, initial_concurrency=1, max_concurrency=6,
+        )
+
+        await scheduler.embed(_texts(200, 100), [100] * 200)
+
+        assert scheduler.concurrency == 6
+        assert endpoint.max_in_flight > 1
+
+    @pytest.mark.asyncio
+    async def test_simultaneous_throttles_halve_once(self):
+        calls = 0
+
+        async def flaky(texts):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            if calls <= 8:
+                raise EmbeddingThrottled(retry_after_s=0.02)
+            return EmbeddingResponse([[0.0] for _ in texts])
+
+        scheduler = AdaptiveEmbeddingScheduler(
+            flaky, 10**7, 10**5, max_batch_tokens=10, initial_concurrency=8,
+        )
+
+        await scheduler.embed(_texts(8, 10), [10] * 8)
+
+        assert scheduler.get_stats()["throttled"] == 8
+        # One episode: 8 -> 4, not 8 -> 1
+        assert scheduler.concurrency >= 4
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        async def always_throttled(texts):
+            raise EmbeddingThrottled(retry_after_s=0.001)
+
+        scheduler = AdaptiveEmbeddingScheduler(always_throttled, 10**6, 10**4, max_retries=2)
+
+        with pytest.raises(EmbeddingThrottled):
+            await scheduler.embed(["t1:0"], [1])
+
+    @pytest.mark.asyncio
+    async def test_sustains_quota_without_error_storm(self):
+        window_s, limit = 0.2, 20_000
+        endpoint = TPMEndpoint(limit, window_s)
+        scheduler = AdaptiveEmbeddingScheduler(
+            endpoint, limit, 10**5, max_batch_tokens=2000, initial_concurrency=2,
+            window_s=window_s,
+        )
+        # Five windows' worth of tokens
+        texts = _texts(200, 500)
+
+        start = time.monotonic()
+        vectors = await scheduler.embed(texts, [500] * 200)
+        elapsed = time.monotonic() - start
+
+        assert len(vectors) == 200
+        # Long-run rate against the quota ceiling (limit per window)
+        assert (200 * 500 / elapsed) / (limit / window_s) > 0.85
+        # Only the opening burst is throttled, no storm of retries
+        assert endpoint.throttled <= 4
+
+    @pytest.mark.asyncio
+    async def test_cache_fill_through_scheduler(self):
+        endpoint = TPMEndpoint(10**6, 60)
+        scheduler = AdaptiveEmbeddingScheduler(endpoint, 10**6, 10**4, max_batch_tokens=300)
+        cache = LocalEmbeddingCache()
+        chunks = [{"content": text} for text in _texts(10, 100)]
+
+        async def embed_texts(texts):
+            return await scheduler.embed(texts, [100] * len(texts))
+
+        await aembed_with_cache(chunks, embed_texts, cache, "m", 1)
+        stats = await aembed_with_cache(
+            [{"content": c["content"]} for c in chunks], embed_texts, cache, "m", 1
+        )
+
+        assert endpoint.requests == 4
+        assert stats.reuse_ratio == 1.0
@@ -0,0 +1,198 @@
+"""
+Unit tests for the Aho-Corasick entity name index
+
+Tests:
+- Whole-token matching of names, aliases, normalized and abbreviated forms
+- No matches on bare numbers or abbreviations of non-system entities
+- Overlapping and shared surface forms
+- Incremental adds before and after automaton rebuilds, and removal
+- GraphBuilder name lookups and GraphExpander with LLM fallback
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.graph.entity_extractor import (
+    Entity,
+    EntityType,
+    ExtractionResult,
+    GraphBuilder,
+    GraphExpander,
+)
+from src.graph.entity_index import EntityIndex
+
+
+def _index() -> EntityIndex:
+    index = EntityIndex()
+    index.add("kv", "Key Vault", EntityType.SERVICE, aliases=["AKV"],
+              normalized_name="azure key vault")
+    index.add("aks", "AKS", EntityType.SERVICE)
+    index.add("pol", "Data Retention Policy", EntityType.POLICY)
+    index.add("ret", "Retention", EntityType.TERM)
+    index.rebuild()
+    return index
+
+
+class TestEntityIndex:
+    """Tests for EntityIndex."""
+
+    def test_finds_all_mentions_in_one_pass(self):
+        index = _index()
+        text = "Does AKS read secrets from the azure key vault under the data retention policy?"
+
+        mentions = index.find(text)
+
+        assert [(m.entity_id, m.surface) for m in mentions] == [
+            ("aks", "AKS"),
+            ("kv", "azure key vault"),
+            ("kv", "key vault"),
+            ("pol", "data retention"),
+            ("pol", "data retention policy"),
+            ("ret", "retention"),
+        ]
+        assert index.entity_ids(text) == ["aks", "kv", "pol", "ret"]
+
+    def test_matches_whole_tokens_only(self):
+        index = _index()
+
+        assert index.entity_ids("kvm akvault retentions") == []
+        assert index.entity_ids("Rotate the KV keys") == ["kv"]
+        assert index.entity_ids("AKV") == ["kv"]
+
+    def test_abbreviated_forms(self):
+        index = EntityIndex()
+        index.add("k8s", "Azure Kubernetes Service", EntityType.SERVICE)
+
+        assert index.entity_ids("scale the aks cluster") == ["k8s"]
+
+    def test_no_false_matches_on_numbers_or_abbreviations(self):
+        index = _index()
+        index.add("v2", "v2", EntityType.VERSION)
+        index.add("azsql", "Azure SQL", EntityType.TERM)
+
+        assert index.entity_ids("show me the top 2 sql injection risks") == []
+        assert index.entity_ids("upgrade to v2 of azure sql") == ["v2", "azsql"]
+        assert index.lookup("2") == set()
+
+    def test_incremental_adds_visible_before_rebuild(self):
+        index = _index()
+
+        index.add("sql", "Orders Database", EntityType.SYSTEM)
+        assert index.get_stats()["pending_forms"] > 0
+        assert index.entity_ids("orders database and key vault") == ["sql", "kv"]
+
+        index.rebuild()
+        assert index.get_stats()["pending_forms"] == 0
+        assert index.entity_ids("orders database and key vault") == ["sql", "kv"]
+
+    def test_shared_form_reports_every_entity(self):
+        index = _index()
+        index.add("kv2", "Key Vault", EntityType.SYSTEM)
+
+        assert index.lookup("key vault") == {"kv", "kv2"}
+
+    def test_remove(self):
+        index = _index()
+
+        assert index.remove("aks") is True
+        assert index.entity_ids("AKS cluster") == []
+        assert index.remove("aks") is False
+
+    def test_rebuild_threshold(self):
+        index = EntityIndex()
+        index.REBUILD_THRESHOLD = 10
+
+        for i in range(20):
+            index.add(f"e{i}", f"system number {i}", EntityType.TERM)
+
+        assert index.get_stats()["pending_forms"] < 10
+        assert index.entity_ids("about system number 17") == ["e17"]
+
+
+class FakeNodes:
+    def __init__(self, items):
+        self.items = {i["id"]: i for i in items}
+        self.queries = []
+
+    def query_items(self, query, parameters=None, partition_key=None):
+        self.queries.append(query)
+        params = {p["name"]: p["value"] for p in parameters or []}
+        if "@ids" in params:
+            return iter([self.items[i] for i in params["@ids"] if i in self.items])
+        return iter(list(self.items.values()))
+
+    def upsert_item(self, body, partition_key=None):
+        self.items[body["id"]] = body
+
+    def read_item(self, item, partition_key=None):
+        return dict(self.items[item])
+
+
+def _builder() -> GraphBuilder:
+    nodes = FakeNodes([
+        {"id": "kv", "name": "Key Vault", "normalized_name": "azure key vault",
+         "entity_type": "service", "aliases": [], "confidence": 0.9,
+         "source_chunk_ids": ["c-kv"]},
+    ])
+    client = MagicMock()
+    client.get_database_client.return_value.get_container_client.side_effect = (
+        lambda name: nodes if name == "graph-nodes" else MagicMock()
+    )
+    return GraphBuilder(client, "graph")
+
+
+class TestGraphIntegration:
+    """GraphBuilder and GraphExpander on top of the index."""
+
+    @pytest.mark.asyncio
+    async def test_find_by_name_served_from_index(self):
+        builder = _builder()
+        builder.load_entity_index("t1")
+        builder.nodes_container.queries.clear()
+
+        found = await builder.find_entities_by_name("KV", "t1")
+
+        assert [e.id for e in found] == ["kv"]
+        assert not any("LOWER" in q for q in builder.nodes_container.queries)
+
+    @pytest.mark.asyncio
+    async def test_upserted_entities_are_indexed(self):
+        builder = _builder()
+        builder.load_entity_index("t1")
+
+        await builder.upsert_entity(Entity(
+            id="aks", name="AKS", normalized_name="azure kubernetes service",
+            entity_type=EntityType.SERVICE, confidence=0.8,
+            source_chunk_ids=["c-aks"], source_doc_ids=["d"],
+        ), "t1")
+
+        assert builder.match_entities("restart aks nodes", "t1") == ["aks"]
+
+    @pytest.mark.asyncio
+    async def test_expander_skips_llm_when_index_matches(self):
+        builder = _builder()
+        builder.load_entity_index("t1")
+        extractor = MagicMock()
+        extractor.extract = AsyncMock()
+        expander = GraphExpander(builder, extractor)
+
+        chunks = await expander.expand_with_graph("who owns the key vault?", [], "t1")
+
+        assert chunks == ["c-kv"]
+        extractor.extract.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_expander_falls_back_to_llm(self):
+        builder = _builder()
+        builder.load_entity_index("t1")
+        extractor = MagicMock()
+        extractor.extract = AsyncMock(return_value=ExtractionResult([], [], "query", "query", 0.0))
+        expander = GraphExpander(builder, extractor)
+
+        assert await expander.expand_with_graph("unrelated question", [], "t1") == []
+        extractor.extract.assert_awaited_once()
+
+        no_fallback = GraphExpander(builder, extractor, llm_fallback=False)
+        await no_fallback.expand_with_graph("unrelated question", [], "t1")
+        extractor.extract.assert_awaited_once()
@@ -0,0 +1,137 @@
+"""
+Unit tests for the bounded-parallel evaluation runner
+
+Tests:
+- Concurrent results identical to a sequential run, in sample order
+- Global and per-evaluator concurrency limits
+- Per-call timeouts, also in sequential mode, and failures
+- Resuming an interrupted run from its checkpoint
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from src.mlops.eval_runner import EvalCheckpoint, EvaluationRunner
+
+
+class FakeJudge:
+    """Deterministic async evaluator with random latency and failures."""
+
+    def __init__(self, name: str, seed: int = 0, fail: set[str] = frozenset(), slow: set[str] = frozenset()):
+        self.name = name
+        self.rng = random.Random(seed)
+        self.fail = fail
+        self.slow = slow
+        self.calls: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, target: dict) -> float:
+        self.calls.append(target["id"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(1.0 if target["id"] in self.slow else self.rng.uniform(0, 0.005))
+            if target["id"] in self.fail:
+                raise RuntimeError("judge error")
+            return (hash((self.name, target["id"])) % 100) / 100
+        finally:
+            self.in_flight -= 1
+
+
+def _samples(count: int) -> list[tuple[str, dict]]:
+    return [(f"s{i}", {"id": f"s{i}"}) for i in range(count)]
+
+
+def _judges(**kwargs) -> dict[str, FakeJudge]:
+    return {name: FakeJudge(name, seed=i, **kwargs) for i, name in enumerate(["groundedness", "relevance", "completeness"])}
+
+
+class TestEvaluationRunner:
+    """Tests for EvaluationRunner."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_matches_sequential(self):
+        samples = _samples(40)
+        sequential = await EvaluationRunner(_judges(fail={"s7"}), max_concurrency=1).run(samples)
+        concurrent = await EvaluationRunner(_judges(fail={"s7"}), max_concurrency=12).run(samples)
+
+        assert concurrent == sequential
+        assert [r.sample_id for r in concurrent] == [s for s, _ in samples]
+        assert not concurrent[7].ok and "judge error" in concurrent[7].error
+        assert sum(r.ok for r in concurrent) == 39
+
+    @pytest.mark.asyncio
+    async def test_sequential_mode_has_one_call_in_flight(self):
+        judges = _judges()
+        runner = EvaluationRunner(judges, max_concurrency=1)
+
+        await runner.run(_samples(5))
+
+        assert runner.get_stats()["max_in_flight"] == 1
+        assert judges["groundedness"].calls == ["s0", "s1", "s2", "s3", "s4"]
+
+    @pytest.mark.asyncio
+    async def test_global_and_per_evaluator_limits(self):
+        judges = _judges()
+        runner = EvaluationRunner(judges, max_concurrency=6, per_evaluator_concurrency={"groundedness": 2})
+
+        await runner.run(_samples(30))
+
+        assert runner.get_stats()["max_in_flight"] == 6
+        assert judges["groundedness"].max_in_flight == 2
+        assert judges["relevance"].max_in_flight > 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("max_concurrency", [1, 4])
+    async def test_timeout_fails_only_that_sample(self, max_concurrency):
+        runner = EvaluationRunner(_judges(slow={"s2"}), max_concurrency=max_concurrency, call_timeout_s=0.1)
+
+        results = await runner.run(_samples(6))
+
+        assert [r.ok for r in results] == [True, True, False, True, True, True]
+        assert "timed out" in results[2].error
+        assert runner.get_stats()["timed_out"] == 1
+
+    @pytest.mark.asyncio
+    async def test_resumes_from_checkpoint(self, tmp_path):
+        path = str(tmp_path / "run.jsonl")
+        samples = _samples(20)
+        judges = _judges(fail={"s3"})
+
+        # Interrupt the first run after a few samples have completed
+        task = asyncio.ensure_future(
+            EvaluationRunner(judges, max_concurrency=1, checkpoint=EvalCheckpoint(path)).run(samples)
+        )
+        while len(EvalCheckpoint(path).load()) < 8:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        done = EvalCheckpoint(path).load()
+
+        resumed_judges = _judges()
+        runner = EvaluationRunner(resumed_judges, max_concurrency=4, checkpoint=EvalCheckpoint(path))
+        results = await runner.run(samples)
+
+        assert runner.get_stats()["resumed"] == len(done)
+        # Checkpointed samples are not scored again; the failed one is retried
+        assert not set(resumed_judges["relevance"].calls) & set(done)
+        assert "s3" in resumed_judges["relevance"].calls
+        reference = await EvaluationRunner(_judges(), max_concurrency=1).run(samples)
+        assert [r.scores for r in results] == [r.scores for r in reference]
+
+    def test_checkpoint_ignores_torn_line(self, tmp_path):
+        path = tmp_path / "run.jsonl"
+        checkpoint = EvalCheckpoint(str(path))
+        checkpoint.record("s0", {"relevance": 0.5})
+        checkpoint.close()
+        with open(path, "a") as f:
+            f.write('{"sample_id": "s1", "sco')
+
+        assert checkpoint.load() == {"s0": {"relevance": 0.5}}
+
+        checkpoint.clear()
+        assert not path.exists()
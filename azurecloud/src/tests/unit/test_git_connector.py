@@ -0,0 +1,269 @@
+"""
+Unit tests for the incremental GitHub crawl
+
+Tests:
+- Crawl against a local fake GitHub API matches list_files documents
+- Last commits resolved in batched GraphQL queries
+- Unchanged blobs skipped, deletions reported, resume after interruption
+- Truncated listings and failed downloads never mark the tree as crawled
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import re
+
+import pytest
+from aiohttp import web
+
+from src.connectors.git_connector import GitCrawlState, GitHubConnector
+
+
+class FakeGitHub:
+    """Local GitHub REST/GraphQL API over an in-memory repository."""
+
+    def __init__(self, files: dict[str, str], latency_s: float = 0.0):
+        self.files = dict(files)
+        self.latency_s = latency_s
+        self.requests: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Paths left out of a truncated tree listing
+        self.truncated_paths: set[str] = set()
+        # Paths whose blob download fails
+        self.fail_blobs: set[str] = set()
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/repos/{owner}/{repo}/git/trees/{branch}", self.tree),
+            web.get("/repos/{owner}/{repo}/git/blobs/{sha}", self.blob),
+            web.get("/repos/{owner}/{repo}/contents/{path:.*}", self.contents),
+            web.get("/repos/{owner}/{repo}/commits", self.commits),
+            web.post("/graphql", self.graphql),
+        ])
+
+    @staticmethod
+    def sha(content: str) -> str:
+        return hashlib.sha1(content.encode()).hexdigest()
+
+    def commit(self, path: str) -> dict:
+        return {"date": "2024-05-01T10:00:00Z", "email": f"{path.split('/')[0]}@example.com", "message": f"Update {path}"}
+
+    async def _enter(self, request):
+        self.requests.append(request.path)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency_s)
+        self.in_flight -= 1
+
+    async def tree(self, request):
+        await self._enter(request)
+        if request.match_info["branch"] != "main":
+            raise web.HTTPNotFound()
+        entries = [
+            {"path": path, "type": "blob", "sha": self.sha(content), "size": len(content)}
+            for path, content in sorted(self.files.items())
+        ]
+        tree_sha = hashlib.sha1(json.dumps(entries).encode()).hexdigest()
+        listed = [entry for entry in entries if entry["path"] not in self.truncated_paths]
+        return web.json_response({"sha": tree_sha, "tree": listed, "truncated": bool(self.truncated_paths)})
+
+    async def blob(self, request):
+        await self._enter(request)
+        by_sha = {self.sha(c): c for p, c in self.files.items() if p not in self.fail_blobs}
+        content = by_sha.get(request.match_info["sha"])
+        if content is None:
+            raise web.HTTPNotFound()
+        return web.json_response({"encoding": "base64", "content": base64.b64encode(content.encode()).decode()})
+
+    async def contents(self, request):
+        await self._enter(request)
+        content = self.files[request.match_info["path"]]
+        return web.json_response({"encoding": "base64", "content": base64.b64encode(content.encode()).decode()})
+
+    async def commits(self, request):
+        await self._enter(request)
+        info = self.commit(request.query["path"])
+        return web.json_response([{"commit": {
+            "committer": {"date": info["date"]}, "author": {"email": info["email"]}, "message": info["message"],
+        }}])
+
+    async def graphql(self, request):
+        await self._enter(request)
+        body = await request.json()
+        history = {}
+        for alias, literal in re.findall(r'(f\d+): history\(first: 1, path: ("(?:[^"\\]|\\.)*")\)', body["query"]):
+            info = self.commit(json.loads(literal))
+            history[alias] = {"nodes": [{
+                "committedDate": info["date"], "message": info["message"], "author": {"email": info["email"]},
+            }]}
+        return web.json_response({"data": {"repository": {"object": history}}})
+
+
+@pytest.fixture
+def repo_files():
+    files = {f"docs/page_{i:03d}.md": f"# Page {i}\n\nBody {i}" for i in range(120)}
+    files["README.md"] = "# Readme"
+    files['docs/quote "and" slash\\.md'] = "escaped path"
+    files["src/main.py"] = "print('not a doc')"
+    return files
+
+
+async def _serve(fake: FakeGitHub):
+    runner = web.AppRunner(fake.app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def _connector(base: str, **kwargs) -> GitHubConnector:
+    connector = GitHubConnector("token", **kwargs)
+    connector.API_BASE = base
+    await connector.connect()
+    return connector
+
+
+class TestGitHubCrawl:
+    """Tests for GitHubConnector.crawl."""
+
+    @pytest.mark.asyncio
+    async def test_crawl_matches_list_files_with_fewer_requests(self, repo_files):
+        fake = FakeGitHub(repo_files, latency_s=0.002)
+        runner, base = await _serve(fake)
+        try:
+            connector = await _connector(base, max_concurrency=8, commit_batch_size=50)
+            listed = {d.path: d async for d in connector.list_files("o", "r")}
+            listed_requests = len(fake.requests)
+
+            fake.requests.clear()
+            crawled = {d.path: d async for d in connector.crawl("o", "r")}
+            await connector.close()
+        finally:
+            await runner.cleanup()
+
+        assert crawled == listed
+        assert len(crawled) == 122
+        assert crawled['docs/quote "and" slash\\.md'].last_commit_author == "docs@example.com"
+        assert listed_requests == 1 + 2 * 122
+        # One tree, one blob per file, one commit query per 50 paths
+        assert len(fake.requests) == 1 + 122 + 3
+        assert 1 < fake.max_in_flight <= 8
+
+    @pytest.mark.asyncio
+    async def test_second_crawl_fetches_only_changes(self, repo_files):
+        fake = FakeGitHub(repo_files)
+        runner, base = await _serve(fake)
+        try:
+            connector = await _connector(base)
+            state = GitCrawlState("o/r", "main")
+            assert len([d async for d in connector.crawl("o", "r", state=state)]) == 122
+
+            # Nothing changed: only the tree is requested
+            fake.requests.clear()
+            assert [d async for d in connector.crawl("o", "r", state=state)] == []
+            assert fake.requests == ["/repos/o/r/git/trees/main"]
+
+            fake.files["docs/page_001.md"] = "# Page 1, edited"
+            fake.files["docs/new.md"] = "# New"
+            del fake.files["docs/page_002.md"]
+            fake.requests.clear()
+            # State survives a round trip through storage
+            state = GitCrawlState.from_dict(state.to_dict())
+            changed = [d async for d in connector.crawl("o", "r", state=state)]
+            await connector.close()
+        finally:
+            await runner.cleanup()
+
+        assert sorted(d.path for d in changed) == ["docs/new.md", "docs/page_001.md"]
+        assert state.deleted == ["docs/page_002.md"]
+        # Tree, two blobs, one commit query
+        assert len(fake.requests) == 1 + 2 + 1
+
+    @pytest.mark.asyncio
+    async def test_interrupted_crawl_resumes(self, repo_files):
+        fake = FakeGitHub(repo_files)
+        runner, base = await _serve(fake)
+        try:
+            connector = await _connector(base, commit_batch_size=20)
+            state = GitCrawlState("o/r", "main")
+            seen = []
+            async for doc in connector.crawl("o", "r", state=state):
+                seen.append(doc.path)
+                if len(seen) == 30:
+                    break
+
+            assert len(state.files) == 29 and not state.tree_sha
+            rest = [d.path async for d in connector.crawl("o", "r", state=state)]
+            await connector.close()
+        finally:
+            await runner.cleanup()
+
+        assert len(rest) == 122 - 29
+        assert state.tree_sha
+        assert set(state.files) == {p for p in repo_files if p.endswith(".md")}
+
+    @pytest.mark.asyncio
+    async def test_reports_deleted_paths(self, repo_files):
+        fake = FakeGitHub(repo_files)
+        runner, base = await _serve(fake)
+        try:
+            connector = await _connector(base)
+            state = GitCrawlState("o/r", "main")
+            _ = [d async for d in connector.crawl("o", "r", state=state)]
+            del fake.files["README.md"]
+            _ = [d async for d in connector.crawl("o", "r", state=state)]
+            await connector.close()
+        finally:
+            await runner.cleanup()
+
+        assert state.deleted == ["README.md"]
+        assert "README.md" not in state.files
+
+    @pytest.mark.asyncio
+    async def test_truncated_listing_reports_no_deletions(self, repo_files):
+        fake = FakeGitHub(repo_files)
+        runner, base = await _serve(fake)
+        try:
+            connector = await _connector(base)
+            state = GitCrawlState("o/r", "main")
+            _ = [d async for d in connector.crawl("o", "r", state=state)]
+            first_tree = state.tree_sha
+
+            fake.files["docs/page_001.md"] = "# Page 1, edited"
+            fake.truncated_paths = {"README.md", "docs/page_050.md"}
+            changed = [d.path async for d in connector.crawl("o", "r", state=state)]
+            await connector.close()
+        finally:
+            await runner.cleanup()
+
+        assert changed == ["docs/page_001.md"]
+        assert state.deleted == []
+        assert "README.md" in state.files and "docs/page_050.md" in state.files
+        # Not recorded: the next crawl must list the tree again
+        assert state.tree_sha == first_tree
+
+    @pytest.mark.asyncio
+    async def test_failed_changed_blob_is_retried(self, repo_files):
+        fake = FakeGitHub(repo_files)
+        runner, base = await _serve(fake)
+        try:
+            connector = await _connector(base)
+            state = GitCrawlState("o/r", "main")
+            _ = [d async for d in connector.crawl("o", "r", state=state)]
+            old_sha = state.files["docs/page_001.md"]
+
+            fake.files["docs/page_001.md"] = "# Page 1, edited"
+            fake.fail_blobs = {"docs/page_001.md"}
+            assert [d async for d in connector.crawl("o", "r", state=state)] == []
+            assert state.files["docs/page_001.md"] == old_sha
+
+            fake.fail_blobs = set()
+            retried = [d.path async for d in connector.crawl("o", "r", state=state)]
+            await connector.close()
+        finally:
+            await runner.cleanup()
+
+        assert retried == ["docs/page_001.md"]
+        assert state.files["docs/page_001.md"] == FakeGitHub.sha("# Page 1, edited")
@@ -0,0 +1,210 @@
+"""
+Unit tests for bulk merge-upsert in GraphBuilder
+
+Tests:
+- Bulk entity and relationship upserts match successive per-item upserts
+- Duplicates merged in memory: one read and one write per distinct item
+- Optimistic-concurrency retries on ETag conflicts
+- Snapshot kept current by bulk relationship writes
+"""
+
+import itertools
+
+import pytest
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError,
+)
+
+from src.graph.entity_extractor import (
+    Entity,
+    EntityType,
+    ExtractionResult,
+    GraphBuilder,
+    RelationType,
+    Relationship,
+    relationship_id,
+)
+
+
+VOLATILE = {"updated_at", "created_at", "_etag"}
+
+
+class EtagContainer:
+    """In-memory container with ETags and conditional writes."""
+
+    def __init__(self):
+        self.items: dict[str, dict] = {}
+        self.calls = 0
+        self._etags = itertools.count(1)
+        # Ids whose next conditional write loses to a concurrent writer
+        self.conflict_once: set[str] = set()
+
+    def _store(self, body):
+        self.items[body["id"]] = {**body, "_etag": str(next(self._etags))}
+
+    def read_item(self, item, partition_key=None):
+        self.calls += 1
+        if item not in self.items:
+            raise CosmosResourceNotFoundError(message="not found")
+        return dict(self.items[item])
+
+    def upsert_item(self, body, partition_key=None):
+        self.calls += 1
+        self._store(body)
+
+    def create_item(self, body):
+        self.calls += 1
+        if body["id"] in self.items:
+            raise CosmosResourceExistsError(message="exists")
+        if body["id"] in self.conflict_once:
+            self.conflict_once.discard(body["id"])
+            self._store({**body, "aliases": ["racer"], "mention_count": 1})
+            raise CosmosResourceExistsError(message="exists")
+        self._store(body)
+
+    def replace_item(self, item, body, etag=None, match_condition=None):
+        self.calls += 1
+        if item in self.conflict_once:
+            self.conflict_once.discard(item)
+            self._store({**self.items[item], "mention_count": self.items[item]["mention_count"] + 1})
+            raise CosmosAccessConditionFailedError(message="precondition failed")
+        if self.items[item]["_etag"] != etag:
+            raise CosmosAccessConditionFailedError(message="precondition failed")
+        self._store(body)
+
+
+class FakeCosmos:
+    def __init__(self):
+        self.containers = {"graph-nodes": EtagContainer(), "graph-edges": EtagContainer()}
+
+    def get_database_client(self, name):
+        return self
+
+    def get_container_client(self, name):
+        return self.containers[name]
+
+
+def _entity(name: str, chunk: str, confidence: float = 0.8, aliases=None) -> Entity:
+    return Entity(
+        id=name, name=name.upper(), normalized_name=name, entity_type=EntityType.SERVICE,
+        confidence=confidence, source_chunk_ids=[chunk], source_doc_ids=["doc-1"],
+        aliases=aliases or [],
+    )
+
+
+def _relationship(source: str, target: str, chunk: str, confidence: float = 0.7) -> Relationship:
+    return Relationship(
+        id=relationship_id(source, RelationType.DEPENDS_ON, target), source_entity_id=source,
+        target_entity_id=target, relation_type=RelationType.DEPENDS_ON, confidence=confidence,
+        source_chunk_ids=[chunk],
+    )
+
+
+def _mentions() -> tuple[list[Entity], list[Relationship]]:
+    entities = [
+        _entity("kv", "c1", 0.7, ["key vault"]),
+        _entity("aks", "c1"),
+        _entity("kv", "c2", 0.9, ["akv"]),
+        _entity("kv", "c2"),
+        _entity("aks", "c3", 0.95),
+        _entity("sql", "c3"),
+    ]
+    relationships = [
+        _relationship("aks", "kv", "c1"),
+        _relationship("aks", "kv", "c2", 0.9),
+        _relationship("aks", "sql", "c3"),
+    ]
+    return entities, relationships
+
+
+def _stable(container: EtagContainer) -> dict:
+    return {
+        item_id: {k: v for k, v in doc.items() if k not in VOLATILE}
+        for item_id, doc in container.items.items()
+    }
+
+
+class TestBulkUpsert:
+    """Tests for GraphBuilder bulk upserts."""
+
+    @pytest.mark.asyncio
+    async def test_bulk_matches_per_item_path(self):
+        entities, relationships = _mentions()
+        per_item, bulk = GraphBuilder(FakeCosmos(), "g"), GraphBuilder(FakeCosmos(), "g")
+        # Pre-existing state both paths merge into
+        for builder in (per_item, bulk):
+            await builder.upsert_entity(_entity("kv", "c0", 0.5, ["vault"]), "t1")
+
+        for entity in entities:
+            await per_item.upsert_entity(entity, "t1")
+        for relationship in relationships:
+            await per_item.upsert_relationship(relationship, "t1")
+        await bulk.bulk_upsert_entities(entities, "t1")
+        await bulk.bulk_upsert_relationships(relationships, "t1")
+
+        assert _stable(bulk.nodes_container) == _stable(per_item.nodes_container)
+        assert _stable(bulk.edges_container) == _stable(per_item.edges_container)
+        kv = bulk.nodes_container.items["kv"]
+        assert kv["source_chunk_ids"] == ["c0", "c1", "c2"]
+        assert kv["aliases"] == ["vault", "key vault", "akv"]
+        assert kv["mention_count"] == 4
+        assert kv["confidence"] == 0.9
+
+    @pytest.mark.asyncio
+    async def test_round_trips_scale_with_unique_items(self):
+        builder = GraphBuilder(FakeCosmos(), "g")
+        entities = [_entity(f"e{i % 10}", f"c{i}") for i in range(100)]
+
+        result = await builder.bulk_upsert_entities(entities, "t1", max_concurrency=4)
+
+        assert result.unique == 10
+        assert result.duplicates_merged == 90
+        assert result.round_trips == 20
+        assert builder.nodes_container.calls == 20
+        assert builder.nodes_container.items["e3"]["mention_count"] == 10
+        assert not result.failed
+
+    @pytest.mark.asyncio
+    async def test_etag_conflicts_are_retried_and_merged(self):
+        builder = GraphBuilder(FakeCosmos(), "g")
+        await builder.upsert_entity(_entity("kv", "c0"), "t1")
+        nodes = builder.nodes_container
+        nodes.conflict_once = {"kv", "aks"}
+
+        result = await builder.bulk_upsert_entities([_entity("kv", "c1"), _entity("aks", "c1")], "t1")
+
+        assert result.conflicts == 2
+        assert sorted(result.written_ids) == ["aks", "kv"]
+        # The concurrent writers' changes survive the retry
+        assert nodes.items["kv"]["mention_count"] == 3
+        assert nodes.items["aks"]["aliases"] == ["racer"]
+        assert nodes.items["aks"]["mention_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        builder = GraphBuilder(FakeCosmos(), "g")
+        builder.BULK_MAX_RETRIES = 0
+        builder.nodes_container.conflict_once = {"kv"}
+
+        result = await builder.bulk_upsert_entities([_entity("kv", "c1")], "t1")
+
+        assert "kv" in result.failed
+        assert result.written_ids == []
+
+    @pytest.mark.asyncio
+    async def test_ingest_updates_loaded_snapshot(self):
+        builder = GraphBuilder(FakeCosmos(), "g")
+        builder.edges_container.query_items = lambda **kwargs: iter([])
+        snapshot = builder.load_snapshot("t1")
+        entities, relationships = _mentions()
+
+        results = await builder.ingest_extraction_results(
+            [ExtractionResult(entities, relationships, "c1", "doc-1", 0.0)], "t1"
+        )
+
+        assert results["relationships"].unique == 2
+        hops = snapshot.k_hop(["aks"])
+        assert sorted(h.entity_id for h in hops) == ["kv", "sql"]
+        assert next(h for h in hops if h.entity_id == "kv").confidence == 0.9
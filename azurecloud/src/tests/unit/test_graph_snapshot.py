@@ -0,0 +1,211 @@
+"""
+Unit tests for the in-memory CSR graph snapshot
+
+Tests:
+- CSR build, confidence-ordered rows and relation-type filtering
+- k-hop neighbourhoods and weight-ranked traversal
+- Incremental upserts, removals and compaction
+- GraphBuilder traversal from the snapshot matches the per-node Cosmos walk
+"""
+
+import re
+
+import pytest
+
+from src.graph.entity_extractor import (
+    Entity,
+    EntityType,
+    GraphBuilder,
+    RelationType,
+    Relationship,
+    relationship_id,
+)
+from src.graph.graph_snapshot import GraphSnapshot
+
+
+EDGES = [
+    ("a", "b", "depends_on", 0.9),
+    ("a", "c", "references", 0.5),
+    ("b", "d", "depends_on", 0.8),
+    ("c", "d", "owns", 0.99),
+    ("d", "e", "contains", 0.7),
+    ("c", "f", "references", 0.6),
+]
+
+
+class FakeContainer:
+    """Just enough of a Cosmos container for GraphBuilder."""
+
+    def __init__(self):
+        self.items: dict[str, dict] = {}
+        self.queries = 0
+        self.ts = 100
+
+    def upsert_item(self, body, partition_key=None):
+        self.ts += 1
+        self.items[body["id"]] = {**body, "_ts": self.ts}
+
+    def read_item(self, item, partition_key=None):
+        self.queries += 1
+        if item not in self.items:
+            raise KeyError(item)
+        return dict(self.items[item])
+
+    def query_items(self, query, parameters=None, partition_key=None):
+        self.queries += 1
+        params = {p["name"]: p["value"] for p in parameters or []}
+        items = list(self.items.values())
+        if "@ids" in params:
+            items = [i for i in items if i["id"] in params["@ids"]]
+        if "@since_ts" in params:
+            items = [i for i in items if i["_ts"] >= params["@since_ts"]]
+        source = re.search(r"c.source_entity_id = '([^']+)'", query)
+        if source:
+            items = [i for i in items if i["source_entity_id"] == source.group(1)]
+        types = re.search(r"c.relation_type IN \(([^)]+)\)", query)
+        if types:
+            allowed = re.findall(r"'([^']+)'", types.group(1))
+            items = [i for i in items if i["relation_type"] in allowed]
+        return iter([dict(i) for i in items])
+
+
+class FakeCosmos:
+    def __init__(self):
+        self.containers = {"graph-nodes": FakeContainer(), "graph-edges": FakeContainer()}
+
+    def get_database_client(self, name):
+        return self
+
+    def get_container_client(self, name):
+        return self.containers[name]
+
+
+@pytest.fixture
+def snapshot():
+    return GraphSnapshot.from_edges(EDGES)
+
+
+async def _populated_builder() -> GraphBuilder:
+    builder = GraphBuilder(FakeCosmos(), "graph")
+    for name in "abcdef":
+        await builder.upsert_entity(Entity(
+            id=name, name=name.upper(), normalized_name=name, entity_type=EntityType.SYSTEM,
+            confidence=0.9, source_chunk_ids=[f"chunk-{name}"], source_doc_ids=["doc"],
+        ), "t1")
+    for source, target, rel, confidence in EDGES:
+        relation_type = RelationType(rel)
+        await builder.upsert_relationship(Relationship(
+            id=relationship_id(source, relation_type, target), source_entity_id=source,
+            target_entity_id=target, relation_type=relation_type, confidence=confidence,
+            source_chunk_ids=[f"chunk-{source}"],
+        ), "t1")
+    return builder
+
+
+class TestGraphSnapshot:
+    """Tests for GraphSnapshot."""
+
+    def test_rows_sorted_by_confidence(self, snapshot):
+        a = snapshot.node_index("a")
+
+        targets = [snapshot.node_ids[t] for t, _, _ in snapshot.neighbors(a)]
+
+        assert targets == ["b", "c"]
+        assert snapshot.get_stats()["edges"] == len(EDGES)
+
+    def test_k_hop_depths(self, snapshot):
+        hops = snapshot.k_hop(["a"], max_depth=2)
+
+        assert [(h.entity_id, h.depth) for h in hops] == [("b", 1), ("c", 1), ("d", 2), ("f", 2)]
+        assert hops[2].source_entity_id == "b"
+        assert hops[2].score == pytest.approx(0.72)
+
+    def test_relation_type_filter(self, snapshot):
+        hops = snapshot.k_hop(["a"], max_depth=3, relation_types=[RelationType.DEPENDS_ON])
+
+        assert [h.entity_id for h in hops] == ["b", "d"]
+
+    def test_max_nodes_caps_result(self, snapshot):
+        assert len(snapshot.k_hop(["a"], max_depth=3, max_nodes=3)) == 3
+
+    def test_ranked_traversal_uses_best_path(self, snapshot):
+        hops = snapshot.ranked_traversal(["a"], max_depth=3, limit=10)
+
+        assert [h.entity_id for h in hops] == ["b", "d", "e", "c", "f"]
+        d = hops[1]
+        assert d.source_entity_id == "b"
+        assert d.score == pytest.approx(0.72)
+
+    def test_incremental_upsert_and_remove(self, snapshot):
+        snapshot.upsert_edge("a", "c", "references", 0.95)
+        snapshot.upsert_edge("e", "g", "owns", 0.4)
+
+        assert [h.entity_id for h in snapshot.k_hop(["a"])] == ["c", "b"]
+        assert [h.entity_id for h in snapshot.k_hop(["d"], max_depth=2)] == ["e", "g"]
+        assert snapshot.edge_count == len(EDGES) + 1
+
+        assert snapshot.remove_edge("a", "b", "depends_on") is True
+        assert [h.entity_id for h in snapshot.k_hop(["a"])] == ["c"]
+
+    def test_compaction_preserves_graph(self, snapshot):
+        snapshot.upsert_edge("a", "c", "references", 0.95)
+        snapshot.upsert_edge("e", "g", "owns", 0.4)
+        snapshot.remove_edge("a", "b", "depends_on")
+        before = [(h.entity_id, h.depth) for h in snapshot.k_hop(["a"], max_depth=4)]
+
+        snapshot.compact()
+
+        assert snapshot.get_stats()["delta_edges"] == 0
+        assert snapshot.get_stats()["tombstones"] == 0
+        assert [(h.entity_id, h.depth) for h in snapshot.k_hop(["a"], max_depth=4)] == before
+
+
+class TestGraphBuilderSnapshot:
+    """GraphBuilder traversal backed by the snapshot."""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_matches_cosmos_walk(self):
+        builder = await _populated_builder()
+        walked = await builder.get_related_entities("a", "t1", max_depth=3)
+
+        builder.load_snapshot("t1")
+        edges = builder.edges_container
+        edges.queries = 0
+        from_snapshot = await builder.get_related_entities("a", "t1", max_depth=3)
+
+        def key(results):
+            return sorted((e.id, r.id, r.source_chunk_ids) for e, r in results)
+
+        assert key(from_snapshot) == key(walked)
+        assert edges.queries == 1
+
+    @pytest.mark.asyncio
+    async def test_upserts_and_refresh_reach_snapshot(self):
+        builder = await _populated_builder()
+        snapshot = builder.load_snapshot("t1")
+
+        await builder.upsert_relationship(Relationship(
+            id=relationship_id("f", RelationType.OWNS, "a"), source_entity_id="f",
+            target_entity_id="a", relation_type=RelationType.OWNS, confidence=0.5,
+            source_chunk_ids=["chunk-f"],
+        ), "t1")
+        assert [h.entity_id for h in snapshot.k_hop(["f"])] == ["a"]
+
+        builder.edges_container.upsert_item({
+            "id": "x", "tenant_id": "t1", "source_entity_id": "e",
+            "target_entity_id": "b", "relation_type": "references", "confidence": 0.3,
+        })
+        assert builder.refresh_snapshot("t1") >= 1
+        assert [h.entity_id for h in snapshot.k_hop(["e"])] == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_chunks_for_entities_batched(self):
+        builder = await _populated_builder()
+        builder.load_snapshot("t1")
+        nodes = builder.nodes_container
+        nodes.queries = 0
+
+        chunks = await builder.get_chunks_for_entities(["a", "b", "missing"], "t1")
+
+        assert sorted(chunks) == ["chunk-a", "chunk-b"]
+        assert nodes.queries == 1
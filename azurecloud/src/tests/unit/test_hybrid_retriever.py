@@ -186,6 +186,75 @@ class TestACLFilterBuilder:
 
         assert "doc_type eq 'policy'" in filter_str
 
+    def test_filter_cached_per_identity(self, builder):
+        """Repeat queries reuse the finished filter string."""
+        user = UserContext(
+            user_id="user@company.com",
+            tenant_id="tenant-123",
+            groups=[f"group-{i}" for i in range(80)],
+        )
+        first, _ = builder.build_filter(user, {"doc_type": "policy"})
+        second, _ = builder.build_filter(user, {"doc_type": "policy"})
+
+        assert first is second
+        assert builder.filter_cache.get_stats()["hits"] == 1
+
+    def test_group_change_misses_cache(self, builder):
+        """A new identity version yields a new filter."""
+        groups = [f"group-{i}" for i in range(80)]
+        builder.build_filter(UserContext(user_id="u", tenant_id="t", groups=groups))
+
+        filter_str, _ = builder.build_filter(
+            UserContext(user_id="u", tenant_id="t", groups=groups + ["group-new"])
+        )
+
+        assert "group-new" in filter_str
+        assert builder.filter_cache.get_stats()["hits"] == 0
+
+    def test_security_filter_keeps_tenant_clause(self, builder, user_context):
+        """A pre-built security filter replaces the ACL clauses, not tenant isolation."""
+        prebuilt = "tenant_id eq 'tenant-123' and (sensitivity eq 'public')"
+
+        filter_str, _ = builder.build_filter(
+            user_context, {"doc_type": "policy"}, security_filter=prebuilt
+        )
+
+        assert filter_str == (
+            f"tenant_id eq 'tenant-123' and ({prebuilt}) and doc_type eq 'policy'"
+        )
+
+    def test_raw_filter_key_rejected(self, builder, user_context):
+        """Callers cannot swap the security filter in through additional_filters."""
+        with pytest.raises(ValueError):
+            builder.build_filter(user_context, {"_raw_filter": "tenant_id eq 'other'"})
+
+    def test_post_filter_mode(self, builder):
+        """Post-filter mode drops the group clause and checks chunks locally."""
+        user = UserContext(
+            user_id="user@company.com",
+            tenant_id="tenant-123",
+            groups=[f"group-{i}" for i in range(500)],
+        )
+
+        filter_str, warnings = builder.build_filter(user, post_filter=True)
+
+        assert "acl_groups" not in filter_str
+        assert warnings == []
+
+        def chunk(**acl):
+            return RetrievedChunk(
+                id="c", doc_id="d", chunk_id="c", chunk_type="text", content="",
+                content_md=None, heading=None, section_path=[], page_start=None,
+                page_end=None, reading_order=0, table_headers=None, figure_ref=None,
+                source_uri="", doc_title=None, **acl,
+            )
+
+        # group-450 would have been truncated by the OData filter
+        assert builder.allows(user, chunk(acl_groups=["other", "group-450"]))
+        assert builder.allows(user, chunk(acl_users=["user@company.com"]))
+        assert builder.allows(user, chunk(sensitivity="public"))
+        assert not builder.allows(user, chunk(acl_groups=["other"]))
+
 
 class TestRetrievedChunk:
     """Tests for RetrievedChunk dataclass."""
@@ -0,0 +1,140 @@
+"""
+Unit tests for the identity cache subsystem
+
+Tests:
+- Single-flight coalescing of concurrent identity lookups
+- Stale-while-revalidate and LRU eviction
+- Async token cache with proactive refresh
+- Memoized per-identity ACL filter
+"""
+
+import asyncio
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.security.identity_cache import AsyncTokenCache, IdentityCache
+from src.security.acl_trimming import (
+    ACLFilterBuilder,
+    GroupMembershipResolver,
+    SensitivityLevel,
+    UserIdentity,
+)
+
+
+@pytest.fixture
+def resolver():
+    credential = MagicMock()
+    credential.get_token.return_value = MagicMock(token="mock-token")
+    return GroupMembershipResolver(credential=credential)
+
+
+class TestIdentityCache:
+    """Tests for IdentityCache."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_share_one_load(self, resolver):
+        async def slow_groups(user_id):
+            await asyncio.sleep(0.01)
+            return ["g1", "g2"]
+
+        with patch.object(resolver, "_fetch_profile", AsyncMock(return_value={"mail": "a@b.com"})) as profile, \
+                patch.object(resolver, "_fetch_groups", side_effect=slow_groups) as groups:
+            identities = await asyncio.gather(*[
+                resolver.resolve_user_identity("user-1", "tenant-1") for _ in range(20)
+            ])
+
+        assert profile.await_count == 1
+        assert groups.call_count == 1
+        assert all(i is identities[0] for i in identities)
+        assert resolver.get_cache_stats()["identities"]["loads"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_value_served_while_revalidating(self):
+        cache = IdentityCache(ttl_s=10, stale_ttl_s=60)
+        cache.put("k", "old", stored_at=time.monotonic() - 30)
+        loader = AsyncMock(return_value="new")
+
+        assert await cache.get_or_load("k", loader) == "old"
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert loader.await_count == 1
+        assert cache.get("k") == ("new", "fresh")
+
+    @pytest.mark.asyncio
+    async def test_failed_refresh_keeps_stale_value(self):
+        cache = IdentityCache(ttl_s=10, stale_ttl_s=60)
+        cache.put("k", "old", stored_at=time.monotonic() - 30)
+
+        assert await cache.get_or_load("k", AsyncMock(side_effect=RuntimeError("graph down"))) == "old"
+        await asyncio.sleep(0)
+
+        assert cache.get("k")[0] == "old"
+
+    def test_lru_eviction(self):
+        cache = IdentityCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert "a" in cache and "c" in cache
+        assert "b" not in cache
+        assert cache.get_stats()["evictions"] == 1
+
+
+class TestAsyncTokenCache:
+    """Tests for AsyncTokenCache."""
+
+    @pytest.mark.asyncio
+    async def test_token_reused_until_refresh_margin(self):
+        credential = MagicMock()
+        credential.get_token.return_value = MagicMock(token="t1", expires_on=time.time() + 3600)
+        tokens = AsyncTokenCache(credential, "scope")
+
+        results = await asyncio.gather(*[tokens.get_token() for _ in range(10)])
+
+        assert results == ["t1"] * 10
+        assert credential.get_token.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_proactive_refresh_returns_current_token(self):
+        credential = MagicMock()
+        credential.get_token.return_value = MagicMock(token="t1", expires_on=time.time() + 60)
+        tokens = AsyncTokenCache(credential, "scope", refresh_margin_s=300)
+        await tokens.get_token()
+
+        credential.get_token.return_value = MagicMock(token="t2", expires_on=time.time() + 3600)
+        assert await tokens.get_token() == "t1"
+        for _ in range(50):
+            if tokens._token == "t2":
+                break
+            await asyncio.sleep(0.01)
+
+        assert await tokens.get_token() == "t2"
+
+
+class TestMemoizedACLFilter:
+    """The base ACL filter is built once per cached identity."""
+
+    @pytest.mark.asyncio
+    async def test_second_build_is_cache_hit(self, resolver):
+        builder = ACLFilterBuilder(resolver)
+        identity = UserIdentity(
+            user_id="user-1",
+            tenant_id="tenant-1",
+            email="u@corp.com",
+            groups=[f"group-{i}" for i in range(200)],
+            roles=[],
+            clearance_level=SensitivityLevel.INTERNAL,
+        )
+
+        first = await builder.build_filter(identity)
+        second = await builder.build_filter(identity, {"department": "eng"})
+
+        assert first.cache_hit is False
+        assert second.cache_hit is True
+        assert second.filter_string == first.filter_string + " and department eq 'eng'"
+        assert second.strategy_used == "chunked"
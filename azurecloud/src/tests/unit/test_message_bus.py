@@ -0,0 +1,172 @@
+"""
+Unit tests for the multi-agent MessageBus
+
+Tests:
+- Bounded inbox backpressure
+- Request/reply futures and timeouts
+- Concurrent broadcast
+- Ring-buffer log with correlation index
+- Cross-bus routing through LocalTransport
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from unittest.mock import MagicMock
+
+from src.agents.multi_agent_orchestrator import (
+    AgentMessage,
+    AgentType,
+    BaseAgent,
+    LocalTransport,
+    MessageBus,
+    MessageDeliveryError,
+    MessageType,
+)
+
+
+class EchoAgent(BaseAgent):
+    """Minimal agent used to exercise the bus."""
+
+    def __init__(self, agent_id: str, inbox_size: int | None = None):
+        if inbox_size is not None:
+            self.MAX_INBOX_SIZE = inbox_size
+        super().__init__(agent_id, AgentType.RETRIEVER, MagicMock())
+
+    async def process_task(self, task):
+        return {}
+
+    def can_handle(self, task_type: str) -> bool:
+        return False
+
+
+def _message(sender: str, recipient: str, correlation_id: str = "corr-1", msg_id: str = None):
+    return AgentMessage(
+        id=msg_id or f"{sender}-{recipient}-{datetime.utcnow().timestamp()}",
+        sender=sender,
+        recipient=recipient,
+        message_type=MessageType.QUERY,
+        content={"q": "hello"},
+        timestamp=datetime.utcnow(),
+        correlation_id=correlation_id,
+    )
+
+
+async def _serve(bus: MessageBus, agent: BaseAgent, count: int = 1):
+    """Answer `count` requests from the agent's inbox."""
+    for _ in range(count):
+        message = await agent.next_message(timeout=1.0)
+        await bus.reply(message, {"echo": message.content["q"]})
+
+
+class TestMessageBus:
+    """Tests for MessageBus."""
+
+    @pytest.mark.asyncio
+    async def test_request_reply(self):
+        bus = MessageBus()
+        responder = EchoAgent("responder")
+        bus.register(responder)
+
+        server = asyncio.create_task(_serve(bus, responder))
+        reply = await bus.request(_message("caller", "responder"), timeout=1.0)
+        await server
+
+        assert reply.content == {"echo": "hello"}
+        assert bus.get_stats()["pending_requests"] == 0
+
+    @pytest.mark.asyncio
+    async def test_request_timeout(self):
+        bus = MessageBus()
+        bus.register(EchoAgent("silent"))
+
+        with pytest.raises(asyncio.TimeoutError):
+            await bus.request(_message("caller", "silent"), timeout=0.05)
+
+        assert bus.get_stats()["request_timeouts"] == 1
+        assert bus.get_stats()["pending_requests"] == 0
+
+    @pytest.mark.asyncio
+    async def test_backpressure_on_full_inbox(self):
+        bus = MessageBus(send_timeout=0.05)
+        bus.register(EchoAgent("slow", inbox_size=2))
+
+        await bus.send(_message("a", "slow", msg_id="1"))
+        await bus.send(_message("a", "slow", msg_id="2"))
+        with pytest.raises(MessageDeliveryError):
+            await bus.send(_message("a", "slow", msg_id="3"))
+
+        assert bus.get_stats()["dropped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_recipient(self):
+        bus = MessageBus()
+        with pytest.raises(MessageDeliveryError):
+            await bus.send(_message("a", "nobody"))
+
+    @pytest.mark.asyncio
+    async def test_broadcast_reaches_all_but_sender(self):
+        bus = MessageBus()
+        agents = [EchoAgent(f"agent-{i}") for i in range(4)]
+        for agent in agents:
+            bus.register(agent)
+
+        await bus.broadcast("agent-0", MessageType.CHECKPOINT, {"x": 1}, "corr-b")
+
+        assert agents[0]._message_queue.qsize() == 0
+        assert all(a._message_queue.qsize() == 1 for a in agents[1:])
+        assert len(bus.get_message_log("corr-b")) == 3
+
+    @pytest.mark.asyncio
+    async def test_ring_buffer_log_index(self):
+        bus = MessageBus(log_capacity=3)
+        bus.register(EchoAgent("sink"))
+
+        for i, corr in enumerate(["a", "b", "a", "c", "a"]):
+            await bus.send(_message("src", "sink", correlation_id=corr, msg_id=str(i)))
+
+        assert [m.id for m in bus.get_message_log()] == ["2", "3", "4"]
+        assert [m.id for m in bus.get_message_log("a")] == ["2", "4"]
+        assert bus.get_message_log("b") == []
+
+
+class TestLocalTransport:
+    """Tests for cross-bus routing."""
+
+    @pytest.mark.asyncio
+    async def test_request_reply_across_buses(self):
+        transport = LocalTransport()
+        bus_a = MessageBus(transport=transport)
+        bus_b = MessageBus(transport=transport)
+        await bus_a.connect()
+        await bus_b.connect()
+
+        caller = EchoAgent("caller")
+        remote = EchoAgent("remote")
+        bus_a.register(caller)
+        bus_b.register(remote)
+
+        server = asyncio.create_task(_serve(bus_b, remote))
+        reply = await bus_a.request(_message("caller", "remote"), timeout=1.0)
+        await server
+
+        assert reply.content == {"echo": "hello"}
+        assert bus_a.get_stats()["remote"] == 1
+
+    @pytest.mark.asyncio
+    async def test_broadcast_includes_remote_agents(self):
+        transport = LocalTransport()
+        bus_a = MessageBus(transport=transport)
+        bus_b = MessageBus(transport=transport)
+        await bus_a.connect()
+        await bus_b.connect()
+
+        local, remote = EchoAgent("local"), EchoAgent("remote")
+        bus_a.register(local)
+        bus_b.register(remote)
+
+        await bus_a.broadcast("coordinator", MessageType.CHECKPOINT, {}, "corr-x")
+
+        assert local._message_queue.qsize() == 1
+        assert remote._message_queue.qsize() == 1
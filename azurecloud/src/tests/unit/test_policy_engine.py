@@ -0,0 +1,133 @@
+"""
+Unit tests for the compiled Policy Engine
+
+Tests:
+- Compiled conditions match the parsed evaluator
+- Scope index invalidation on add/disable
+- Batch evaluation over many contexts
+"""
+
+import pytest
+
+from src.governance.policy_engine import (
+    ConditionEvaluator,
+    PolicyAction,
+    PolicyContext,
+    PolicyEngine,
+    PolicyRule,
+    PolicyScope,
+    PolicySeverity,
+    PolicyStore,
+)
+
+
+def _context(data: dict, scope: PolicyScope = PolicyScope.RETRIEVAL) -> PolicyContext:
+    return PolicyContext(
+        scope=scope, tenant_id="t1", user_id="u1", request_id="r1", data=data
+    )
+
+
+def _rule(rule_id: str, condition: str, action=PolicyAction.DENY) -> PolicyRule:
+    return PolicyRule(
+        rule_id=rule_id,
+        name=rule_id,
+        description=rule_id,
+        scope=PolicyScope.RETRIEVAL,
+        condition=condition,
+        action=action,
+        severity=PolicySeverity.ERROR,
+        owner_group="Security",
+    )
+
+
+class TestCompiledConditions:
+    """Compiled predicates must agree with the parsed evaluator."""
+
+    CONDITIONS = [
+        "chunk.contains_pii == true",
+        "chunk.tenant_id != user.tenant_id",
+        "chunk.sensitivity not in user.allowed_sensitivities",
+        "chunk.sensitivity in ['public', 'internal']",
+        "response.citation_count < 1",
+        "response.groundedness_score >= 0.8",
+        "cost.tokens_used > 50000",
+        "chunk.title contains 'draft'",
+        "chunk.source matches '^https://contoso'",
+        "chunk.source matches '(['",
+        "tool.category == write",
+        "no operator here",
+    ]
+
+    CONTEXT_DATA = [
+        {},
+        {"chunk": {"contains_pii": True, "tenant_id": "a", "sensitivity": "restricted",
+                   "title": "draft plan", "source": "https://contoso.com/x"},
+         "user": {"tenant_id": "b", "allowed_sensitivities": ["public"]}},
+        {"chunk": {"contains_pii": False, "tenant_id": "a", "sensitivity": "public",
+                   "title": 42, "source": None},
+         "user": {"tenant_id": "a", "allowed_sensitivities": ["public"]},
+         "response": {"citation_count": 0, "groundedness_score": 0.9},
+         "cost": {"tokens_used": "many"}},
+        {"chunk": "not-a-dict", "response": {"citation_count": None}},
+    ]
+
+    @pytest.mark.parametrize("condition", CONDITIONS)
+    def test_parity_with_parsed_evaluator(self, condition):
+        evaluator = ConditionEvaluator()
+        for data in self.CONTEXT_DATA:
+            context = _context(data)
+            assert evaluator.evaluate(condition, context) == \
+                evaluator.evaluate_uncompiled(condition, context)
+
+    def test_compile_is_cached(self):
+        evaluator = ConditionEvaluator()
+        assert evaluator.compile("a.b == 1") is evaluator.compile("a.b == 1")
+
+
+class TestPolicyStoreIndex:
+    """Scope index is rebuilt after add/disable."""
+
+    def test_add_and_disable_invalidate_index(self):
+        store = PolicyStore()
+        before = {p.rule_id for p in store.get_policies_for_scope(PolicyScope.RETRIEVAL)}
+
+        store.add_policy(_rule("new_rule", "chunk.flag == true"))
+        after_add = {p.rule_id for p in store.get_policies_for_scope(PolicyScope.RETRIEVAL)}
+        assert after_add == before | {"new_rule"}
+
+        store.disable_policy("new_rule")
+        after_disable = {p.rule_id for p in store.get_policies_for_scope(PolicyScope.RETRIEVAL)}
+        assert after_disable == before
+
+    def test_updated_condition_is_recompiled(self):
+        store = PolicyStore()
+        store.add_policy(_rule("flag_rule", "chunk.flag == true"))
+        store.get_compiled_for_scope(PolicyScope.RETRIEVAL)
+        store.add_policy(_rule("flag_rule", "chunk.flag == false"))
+
+        compiled = {
+            p.rule_id: predicate
+            for p, predicate in store.get_compiled_for_scope(PolicyScope.RETRIEVAL)
+        }
+        assert compiled["flag_rule"]({"chunk": {"flag": False}}) is True
+
+
+class TestBatchEvaluation:
+    """evaluate_batch matches per-context evaluation."""
+
+    @pytest.mark.asyncio
+    async def test_batch_matches_single(self):
+        engine = PolicyEngine(PolicyStore())
+        contexts = [
+            _context({"chunk": {"tenant_id": "t1", "sensitivity": "public"},
+                      "user": {"tenant_id": "t1", "allowed_sensitivities": ["public"]}}),
+            _context({"chunk": {"tenant_id": "t2", "sensitivity": "public"},
+                      "user": {"tenant_id": "t1", "allowed_sensitivities": ["public"]}}),
+            _context({"response": {"citation_count": 0}}, scope=PolicyScope.ANSWER_GENERATION),
+        ]
+
+        batch = await engine.evaluate_batch(contexts)
+        single = [await engine.evaluate(c) for c in contexts]
+
+        assert [r.blocked for r in batch] == [r.blocked for r in single] == [False, True, True]
+        assert [r.overall_action for r in batch] == [r.overall_action for r in single]
@@ -0,0 +1,170 @@
+"""
+Unit tests for the streaming quantile sketch and shadow comparisons
+
+Tests:
+- DDSketch quantiles within relative accuracy of exact values
+- Merging sketches equals sketching the combined data
+- Bounded bucket count and serialization round trip
+- ShadowEvaluator running paired calls concurrently within its bound
+"""
+
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from src.governance.model_lifecycle import ShadowComparison, ShadowEvaluator
+from src.shared.quantile_sketch import DDSketch
+
+
+QUANTILES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 0.999]
+
+
+def _exact(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def _datasets() -> dict[str, list[float]]:
+    rng = random.Random(7)
+    return {
+        "lognormal": [rng.lognormvariate(6, 1.2) for _ in range(50_000)],
+        "pareto": [rng.paretovariate(1.5) * 100 for _ in range(50_000)],
+        "bimodal": [rng.gauss(80, 5) if rng.random() < 0.9 else rng.gauss(4000, 300) for _ in range(50_000)],
+        "uniform": [rng.uniform(0, 10_000) for _ in range(50_000)],
+    }
+
+
+class TestDDSketch:
+    """Tests for DDSketch."""
+
+    @pytest.mark.parametrize("name", ["lognormal", "pareto", "bimodal", "uniform"])
+    def test_quantiles_within_relative_accuracy(self, name):
+        values = [abs(v) for v in _datasets()[name]]
+        sketch = DDSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        for q in QUANTILES:
+            exact = _exact(values, q)
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.01), q
+        assert sketch.count == len(values)
+        assert sketch.mean == pytest.approx(sum(values) / len(values))
+
+    def test_merge_matches_single_sketch(self):
+        values = _datasets()["lognormal"]
+        whole = DDSketch()
+        parts = [DDSketch() for _ in range(4)]
+        for i, value in enumerate(values):
+            whole.add(value)
+            parts[i % 4].add(value)
+
+        merged = DDSketch()
+        for part in parts:
+            merged.merge(part)
+
+        assert merged.buckets == whole.buckets
+        assert merged.count == whole.count
+        assert (merged.min, merged.max) == (whole.min, whole.max)
+        for q in QUANTILES:
+            assert merged.quantile(q) == whole.quantile(q)
+
+    def test_memory_does_not_grow_with_count(self):
+        rng = random.Random(1)
+        sketch = DDSketch()
+        sizes = []
+        for _ in range(5):
+            for _ in range(20_000):
+                sketch.add(rng.lognormvariate(6, 1))
+            sizes.append(len(sketch.buckets))
+
+        # Five times the data, a few more tail buckets, never past the cap
+        assert sizes[-1] < 1.2 * sizes[0]
+        assert max(sizes) <= sketch.max_buckets
+
+    def test_collapses_lowest_buckets_beyond_limit(self):
+        sketch = DDSketch(max_buckets=100)
+        for i in range(1, 10_001):
+            sketch.add(float(i))
+
+        assert len(sketch.buckets) == 100
+        # The upper quantiles keep their accuracy
+        assert sketch.quantile(0.99) == pytest.approx(9900, rel=0.01)
+
+    def test_edge_cases_and_round_trip(self):
+        sketch = DDSketch()
+        assert sketch.quantile(0.5) is None
+
+        for value in [0.0, 0.0, 5.0, 10.0]:
+            sketch.add(value)
+        assert sketch.quantile(0.25) == 0.0
+        assert sketch.quantile(1) == 10.0
+
+        restored = DDSketch.from_dict(sketch.to_dict())
+        assert restored.quantile(0.75) == sketch.quantile(0.75)
+        with pytest.raises(ValueError):
+            sketch.merge(DDSketch(relative_accuracy=0.05))
+        with pytest.raises(ValueError):
+            sketch.add(-1)
+
+
+class FakeCompletions:
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+
+    async def create(self, model, messages, temperature, max_tokens):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency_s)
+        self.in_flight -= 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"answer from {model}"))],
+            usage=SimpleNamespace(total_tokens=42),
+        )
+
+
+class FakeRegistry:
+    async def get_model(self, model_id, version):
+        return SimpleNamespace(deployment_name=f"{model_id}-{version}")
+
+
+class TestShadowEvaluator:
+    """Tests for ShadowEvaluator comparisons."""
+
+    @pytest.mark.asyncio
+    async def test_pairs_run_concurrently_within_bound(self):
+        completions = FakeCompletions(latency_s=0.02)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        evaluator = ShadowEvaluator(client, FakeRegistry(), None, "db", max_concurrency=4)
+        queries = [{"query": f"q{i}"} for i in range(40)]
+
+        comparison = await evaluator._run_comparison("m:2", "m:1", queries)
+        metrics = comparison.aggregate()
+
+        assert completions.calls == 80
+        # 4 pairs, each with both calls in flight
+        assert completions.max_in_flight == 8
+        assert metrics["relevance_score"] == pytest.approx(0.8)
+        assert metrics["tokens_used_candidate"] == 42
+        assert metrics["latency_ms_candidate"] == pytest.approx(20, rel=0.5)
+        assert comparison.sketches["baseline"]["latency_ms"].count == 40
+
+    def test_aggregate_keys(self):
+        comparison = ShadowComparison()
+        for i in range(1, 201):
+            comparison.add("candidate", {"latency_ms": float(i), "relevance_score": 0.9, "error": 0})
+            comparison.add("baseline", {"latency_ms": float(i * 2), "relevance_score": 0.7, "error": i % 2})
+
+        metrics = comparison.aggregate()
+
+        assert metrics["latency_ms_candidate"] == pytest.approx(100, rel=0.01)
+        assert metrics["latency_ms_p99_candidate"] == pytest.approx(198, rel=0.01)
+        assert metrics["latency_ms_baseline"] == pytest.approx(200, rel=0.01)
+        assert metrics["error_baseline"] == 0.5
+        assert metrics["relevance_delta"] == pytest.approx(0.2)
+        assert set(comparison.sketches_to_dict()) == {"candidate:latency_ms", "baseline:latency_ms"}
@@ -7,12 +7,16 @@ Tests:
 - Overflow handling
 - Sensitivity filtering
 - Audit logging
+- Group bitmap index bounds
 """
 
+import time
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
-from datetime import datetime, timedelta
+from datetime import datetime
 
+from src.security.acl_filter_cache import GroupBitmapIndex
 from src.security.acl_trimming import (
     GroupMembershipResolver,
     ACLFilterBuilder,
@@ -76,7 +80,7 @@ class TestGroupMembershipResolver:
 
     def test_cache_initialization(self, resolver):
         """Test cache is properly initialized."""
-        assert resolver._cache == {}
+        assert len(resolver._cache) == 0
 
     @pytest.mark.asyncio
     async def test_cache_hit(self, resolver):
@@ -84,7 +88,7 @@ class TestGroupMembershipResolver:
         # Pre-populate cache
         cache_key = "tenant-123:user-456"
         cached_groups = ["group-1", "group-2"]
-        resolver._cache[cache_key] = (cached_groups, datetime.utcnow())
+        resolver._cache.put(cache_key, cached_groups)
 
         groups = await resolver.resolve_groups("user-456", "tenant-123")
 
@@ -95,24 +99,15 @@ class TestGroupMembershipResolver:
         """Test cache expiry triggers refresh."""
         cache_key = "tenant-123:user-456"
         old_groups = ["old-group"]
-        # Set cache to expired time
-        expired_time = datetime.utcnow() - timedelta(minutes=20)
-        resolver._cache[cache_key] = (old_groups, expired_time)
-
-        # Mock aiohttp response
-        with patch('aiohttp.ClientSession') as mock_session:
-            mock_response = AsyncMock()
-            mock_response.status = 200
-            mock_response.json = AsyncMock(return_value={
-                "value": [
-                    {"@odata.type": "#microsoft.graph.group", "id": "new-group"}
-                ]
-            })
+        # Set cache to expired time (past TTL and the stale window)
+        expired_time = time.monotonic() - 25 * 60
+        resolver._cache.put(cache_key, old_groups, stored_at=expired_time)
 
-            mock_session.return_value.__aenter__.return_value.get.return_value.__aenter__.return_value = mock_response
+        with patch.object(resolver, "_fetch_groups", AsyncMock(return_value=["new-group"])):
+            groups = await resolver.resolve_groups("user-456", "tenant-123")
 
-            # This should trigger a refresh due to expired cache
-            # Note: In real test, we'd need to properly mock the async context managers
+        # Expired cache triggers a blocking refresh
+        assert groups == ["new-group"]
 
     def test_determine_clearance_default(self, resolver):
         """Test default clearance determination."""
@@ -121,8 +116,8 @@ class TestGroupMembershipResolver:
 
     def test_clear_cache_single_user(self, resolver):
         """Test clearing cache for specific user."""
-        resolver._cache["tenant-1:user-1"] = (["g1"], datetime.utcnow())
-        resolver._cache["tenant-1:user-2"] = (["g2"], datetime.utcnow())
+        resolver._cache.put("tenant-1:user-1", ["g1"])
+        resolver._cache.put("tenant-1:user-2", ["g2"])
 
         resolver.clear_cache(user_id="user-1", tenant_id="tenant-1")
 
@@ -131,12 +126,12 @@ class TestGroupMembershipResolver:
 
     def test_clear_cache_all(self, resolver):
         """Test clearing entire cache."""
-        resolver._cache["tenant-1:user-1"] = (["g1"], datetime.utcnow())
-        resolver._cache["tenant-1:user-2"] = (["g2"], datetime.utcnow())
+        resolver._cache.put("tenant-1:user-1", ["g1"])
+        resolver._cache.put("tenant-1:user-2", ["g2"])
 
         resolver.clear_cache()
 
-        assert resolver._cache == {}
+        assert len(resolver._cache) == 0
 
 
 class TestACLFilterBuilder:
@@ -329,6 +324,7 @@ class TestSecurityAuditLogger:
         )
 
         await logger.log(entry)
+        await logger.flush()
 
         # Verify upsert was called
         logger.container.upsert_item.assert_called_once()
@@ -491,3 +487,21 @@ class TestEdgeCases:
         # Verify ordering is as expected
         assert levels[0].value == "public"
         assert levels[3].value == "restricted"
+
+
+class TestGroupBitmapIndex:
+    """Tests for GroupBitmapIndex."""
+
+    def test_group_ids_are_bounded(self):
+        """Test that ids of groups no longer seen are dropped past max_groups."""
+        index = GroupBitmapIndex(max_groups=10)
+
+        for user in range(20):
+            groups = [f"u{user}-g{i}" for i in range(3)]
+            mask = index.user_mask(f"v{user}", groups)
+            assert index.allows(mask, [groups[1], "other"])
+            assert not index.allows(mask, ["u0-g0" if user else "u1-g0"])
+            assert len(index) <= 10 + 5
+
+        mask = index.user_mask("v19", ["u19-g0"])
+        assert index.allows(mask, ["u19-g2"])
@@ -0,0 +1,275 @@
+"""
+Unit tests for delta-driven SharePoint sync
+
+Tests:
+- First sync enumerates through delta and persists a token per drive
+- Steady-state sync reads and downloads only the changes
+- Bounded parallel downloads streamed to disk
+- Permissions fetched through $batch with per-request throttling retried
+- Failed downloads and expired tokens
+- Expired token resync reports the live item ids for reconciliation
+"""
+
+import asyncio
+import re
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from src.connectors.sharepoint_connector import DeltaResync, DeltaTokenStore, SharePointConnector
+
+
+class FakeGraph:
+    """Local Microsoft Graph drives/delta/content/$batch API with a change log."""
+
+    PAGE_SIZE = 50
+
+    def __init__(self, drives: dict[str, int], latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.seq = 0
+        # {drive_id: {item_id: (seq, item)}}
+        self.items: dict[str, dict[str, tuple[int, dict]]] = {d: {} for d in drives}
+        self.contents: dict[str, bytes] = {}
+        for drive_id, count in drives.items():
+            for i in range(count):
+                self.put(drive_id, f"{drive_id}-i{i}", f"doc_{i}.pdf", b"x" * (1000 + i))
+        self.requests: list[str] = []
+        self.downloads = 0
+        self.in_flight_downloads = 0
+        self.max_in_flight_downloads = 0
+        self.fail_downloads: set[str] = set()
+        self.throttle_once: set[str] = set()
+        self.expired_tokens: set[str] = set()
+        self.base = ""
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/sites/{site}/drives", self.drives),
+            web.get("/sites/{site}/drives/{drive}/root/delta", self.delta),
+            web.get("/sites/{site}/drives/{drive}/items/{item}/content", self.content),
+            web.post("/$batch", self.batch),
+        ])
+
+    def put(self, drive_id: str, item_id: str, name: str, content: bytes):
+        self.seq += 1
+        item = {
+            "id": item_id, "name": name, "size": len(content), "file": {"mimeType": "application/pdf"},
+            "createdDateTime": "2024-01-01T00:00:00Z", "lastModifiedDateTime": "2024-01-02T00:00:00Z",
+            "eTag": f"v{self.seq}", "webUrl": f"https://contoso/{name}",
+        }
+        self.items[drive_id][item_id] = (self.seq, item)
+        self.contents[item_id] = content
+
+    def delete(self, drive_id: str, item_id: str):
+        self.seq += 1
+        self.items[drive_id][item_id] = (self.seq, {"id": item_id, "deleted": {"state": "deleted"}})
+
+    async def _enter(self, request):
+        self.requests.append(request.path)
+        await asyncio.sleep(self.latency_s)
+
+    async def drives(self, request):
+        await self._enter(request)
+        return web.json_response({"value": [{"id": d} for d in self.items]})
+
+    async def delta(self, request):
+        await self._enter(request)
+        drive_id = request.match_info["drive"]
+        token = request.query.get("token")
+        if token in self.expired_tokens:
+            raise web.HTTPGone()
+        since = int(token) if token else 0
+        changed = sorted(
+            (seq, item) for seq, item in self.items[drive_id].values()
+            if seq > since and (token or "deleted" not in item)
+        )
+        skip = int(request.query.get("skip", 0))
+        page = [item for _, item in changed[skip:skip + self.PAGE_SIZE]]
+        path = f"{self.base}/sites/{request.match_info['site']}/drives/{drive_id}/root/delta"
+        body = {"value": page}
+        if skip + self.PAGE_SIZE < len(changed):
+            body["@odata.nextLink"] = f"{path}?skip={skip + self.PAGE_SIZE}" + (f"&token={token}" if token else "")
+        else:
+            body["@odata.deltaLink"] = f"{path}?token={self.seq}"
+        return web.json_response(body)
+
+    async def content(self, request):
+        await self._enter(request)
+        item_id = request.match_info["item"]
+        if item_id in self.fail_downloads:
+            raise web.HTTPServiceUnavailable()
+        self.downloads += 1
+        self.in_flight_downloads += 1
+        self.max_in_flight_downloads = max(self.max_in_flight_downloads, self.in_flight_downloads)
+        try:
+            await asyncio.sleep(0.005)
+            return web.Response(body=self.contents[item_id])
+        finally:
+            self.in_flight_downloads -= 1
+
+    async def batch(self, request):
+        await self._enter(request)
+        body = await request.json()
+        assert len(body["requests"]) <= 20
+        responses = []
+        for sub in body["requests"]:
+            item_id = re.search(r"/items/([^/]+)/permissions", sub["url"]).group(1)
+            if item_id in self.throttle_once:
+                self.throttle_once.discard(item_id)
+                responses.append({"id": sub["id"], "status": 429, "headers": {"Retry-After": "0"}})
+                continue
+            responses.append({"id": sub["id"], "status": 200, "body": {"value": [
+                {"grantedToV2": {"group": {"id": f"group-{item_id}"}}},
+            ]}})
+        return web.json_response({"responses": responses})
+
+
+class GraphFixture:
+    def __init__(self, fake: FakeGraph):
+        self.fake = fake
+        self.runner = None
+        self.connector = None
+
+    async def __aenter__(self):
+        self.runner = web.AppRunner(self.fake.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.fake.base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        self.connector = SharePointConnector(download_concurrency=4)
+        self.connector.GRAPH_BASE_URL = self.fake.base
+        self.connector.session = aiohttp.ClientSession()
+        return self.connector
+
+    async def __aexit__(self, *exc):
+        await self.connector.session.close()
+        await self.runner.cleanup()
+
+
+async def _sync(connector, store, tmp_path, **kwargs) -> list[tuple]:
+    return [(doc, action) async for doc, action in connector.sync_site(
+        "site", store, download_dir=str(tmp_path), **kwargs
+    )]
+
+
+class TestSharePointSync:
+    """Tests for SharePointConnector.sync_site."""
+
+    @pytest.mark.asyncio
+    async def test_first_sync_streams_all_files_and_stores_tokens(self, tmp_path):
+        fake = FakeGraph({"d1": 120, "d2": 30})
+        store = DeltaTokenStore(str(tmp_path / "tokens.json"))
+
+        async with GraphFixture(fake) as connector:
+            results = await _sync(connector, store, tmp_path)
+
+        assert len(results) == 150
+        assert all(action == "upsert" for _, action in results)
+        doc = next(d for d, _ in results if d.id == "d1-i7")
+        assert doc.content is None
+        with open(doc.local_path, "rb") as f:
+            assert f.read() == b"x" * 1007
+        assert 1 < fake.max_in_flight_downloads <= 4
+        assert DeltaTokenStore(store.path).get("site", "d1") == str(fake.seq)
+
+    @pytest.mark.asyncio
+    async def test_steady_state_cost_tracks_changes(self, tmp_path):
+        fake = FakeGraph({"d1": 500})
+        store = DeltaTokenStore()
+
+        async with GraphFixture(fake) as connector:
+            await _sync(connector, store, tmp_path)
+            fake.requests.clear()
+            fake.downloads = 0
+
+            fake.put("d1", "d1-i3", "doc_3.pdf", b"edited")
+            fake.put("d1", "d1-new", "new.docx", b"new")
+            fake.delete("d1", "d1-i9")
+            results = await _sync(connector, store, tmp_path)
+
+            fake.requests.clear()
+            unchanged = await _sync(connector, store, tmp_path)
+
+        assert sorted((d.id, a) for d, a in results) == [
+            ("d1-i3", "upsert"), ("d1-i9", "delete"), ("d1-new", "upsert"),
+        ]
+        assert fake.downloads == 2
+        assert unchanged == []
+        # Drive listing and one delta page; nothing proportional to the 500 items
+        assert len(fake.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_permissions_in_batches_with_throttled_retry(self, tmp_path):
+        fake = FakeGraph({"d1": 45})
+        fake.throttle_once = {"d1-i4", "d1-i30"}
+
+        async with GraphFixture(fake) as connector:
+            results = await _sync(connector, DeltaTokenStore(), tmp_path, include_content=False, include_permissions=True)
+
+        assert all(d.metadata["permissions"] == [f"group-{d.id}"] for d, _ in results)
+        # Pages of 50 items -> 3 batches of <= 20, plus one retry each for two throttled batches
+        assert fake.requests.count("/$batch") == 5
+        assert fake.downloads == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_download_keeps_token(self, tmp_path):
+        fake = FakeGraph({"d1": 10})
+        store = DeltaTokenStore()
+        fake.fail_downloads = {"d1-i5"}
+
+        async with GraphFixture(fake) as connector:
+            first = await _sync(connector, store, tmp_path)
+            assert len(first) == 9
+            assert store.get("site", "d1") is None
+            assert not list(tmp_path.glob("*i5*"))
+
+            fake.fail_downloads = set()
+            second = await _sync(connector, store, tmp_path)
+
+        assert len(second) == 10
+        assert store.get("site", "d1") == str(fake.seq)
+
+    @pytest.mark.asyncio
+    async def test_expired_token_resyncs(self, tmp_path):
+        fake = FakeGraph({"d1": 5})
+        store = DeltaTokenStore()
+        store.put("site", "d1", "stale")
+        fake.expired_tokens = {"stale"}
+        # Deleted while the token was expired: the full enumeration omits it
+        fake.delete("d1", "d1-i2")
+        fake.fail_downloads = {"d1-i4"}
+
+        async with GraphFixture(fake) as connector:
+            results = await _sync(connector, store, tmp_path)
+            assert connector.stats["resyncs"] == 1
+
+        assert sorted(d.id for d, a in results if a == "upsert") == ["d1-i0", "d1-i1", "d1-i3"]
+        assert not [d for d, a in results if a == "delete"]
+        marker, action = results[-1]
+        assert action == "resync"
+        assert isinstance(marker, DeltaResync)
+        assert marker.drive_id == "d1"
+        # Failed downloads still count as live; d1-i2 is left to reconcile
+        assert marker.item_ids == {"d1-i0", "d1-i1", "d1-i3", "d1-i4"}
+
+    @pytest.mark.asyncio
+    async def test_no_resync_marker_without_expiry(self, tmp_path):
+        fake = FakeGraph({"d1": 5})
+        store = DeltaTokenStore()
+
+        async with GraphFixture(fake) as connector:
+            await _sync(connector, store, tmp_path, include_content=False)
+            fake.put("d1", "d1-i1", "doc_1.pdf", b"edited")
+            results = await _sync(connector, store, tmp_path, include_content=False)
+
+        assert [(d.id, a) for d, a in results] == [("d1-i1", "upsert")]
+
+    @pytest.mark.asyncio
+    async def test_get_delta_collects_all_pages(self):
+        fake = FakeGraph({"d1": 120})
+
+        async with GraphFixture(fake) as connector:
+            changes, token = await connector.get_delta("site", "d1")
+
+        assert len(changes) == 120
+        assert token == str(fake.seq)
@@ -0,0 +1,212 @@
+"""
+Unit tests for paged, batched tombstoning
+
+Tests:
+- Keyset paging over a document's chunk keys
+- Index-sized batches with bounded concurrency
+- Retry of per-document indexing failures
+- Checkpointing and resumption after a crash mid-run
+- Index check rejects an id field that is not filterable/sortable
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+import pytest
+
+from src.ingestion.tombstoning import (
+    ChunkTombstoner,
+    TombstoneCheckpoint,
+    TombstoneError,
+    chunk_page_filter,
+)
+
+
+@dataclass
+class IndexingResult:
+    key: str
+    succeeded: bool
+    status_code: int
+
+
+class FakeSearchIndex:
+    """In-memory search index supporting keyset queries and merges."""
+
+    def __init__(self, docs: dict[str, int], latency_s: float = 0.0):
+        # {doc_id: chunk count}
+        self.chunks = {
+            f"{doc_id}_c{i:06d}": {"id": f"{doc_id}_c{i:06d}", "doc_id": doc_id, "is_active": True}
+            for doc_id, count in docs.items() for i in range(count)
+        }
+        self.latency_s = latency_s
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.merge_sizes: list[int] = []
+        self.queries = 0
+        # Keys whose next merge fails transiently
+        self.fail_once: set[str] = set()
+        # Raise after this many merge requests (simulated crash)
+        self.crash_after: int | None = None
+
+    def search(self, search_text, filter, select, order_by, top):
+        self.queries += 1
+        assert order_by == ["id asc"]
+        doc_id = re.search(r"doc_id eq '([^']*)'", filter).group(1)
+        after = re.search(r"id gt '([^']*)'", filter)
+        keys = sorted(k for k, c in self.chunks.items() if c["doc_id"] == doc_id)
+        if after:
+            keys = [k for k in keys if k > after.group(1)]
+        return iter([{"id": k} for k in keys[:top]])
+
+    def merge_documents(self, documents):
+        with self.lock:
+            if self.crash_after is not None and len(self.merge_sizes) >= self.crash_after:
+                raise RuntimeError("worker recycled")
+            self.merge_sizes.append(len(documents))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency_s)
+        results = []
+        with self.lock:
+            for doc in documents:
+                if doc["id"] in self.fail_once:
+                    self.fail_once.discard(doc["id"])
+                    results.append(IndexingResult(doc["id"], False, 503))
+                elif doc["id"] not in self.chunks:
+                    results.append(IndexingResult(doc["id"], False, 404))
+                else:
+                    self.chunks[doc["id"]].update(doc)
+                    results.append(IndexingResult(doc["id"], True, 200))
+            self.in_flight -= 1
+        return results
+
+    def active(self, doc_id: str) -> int:
+        return sum(1 for c in self.chunks.values() if c["doc_id"] == doc_id and c["is_active"])
+
+
+class TestChunkTombstoner:
+    """Tests for ChunkTombstoner."""
+
+    def test_filter_escapes_keys(self):
+        assert chunk_page_filter("d'1", "k'9") == "doc_id eq 'd''1' and id gt 'k''9'"
+        assert chunk_page_filter("d1", None) == "doc_id eq 'd1'"
+
+    def test_tombstones_only_the_document(self):
+        index = FakeSearchIndex({"doc-a": 2500, "doc-b": 30})
+        tombstoner = ChunkTombstoner(index, page_size=1000, batch_size=250)
+
+        checkpoint = tombstoner.run("doc-a")
+
+        assert checkpoint.completed
+        assert checkpoint.tombstoned == 2500
+        assert checkpoint.pages == 3
+        assert index.active("doc-a") == 0
+        assert index.active("doc-b") == 30
+        assert max(index.merge_sizes) == 250
+
+    def test_batches_run_concurrently_within_bound(self):
+        index = FakeSearchIndex({"doc-a": 4000}, latency_s=0.02)
+        tombstoner = ChunkTombstoner(index, page_size=4000, batch_size=500, max_concurrency=4)
+
+        start = time.perf_counter()
+        tombstoner.run("doc-a")
+        elapsed = time.perf_counter() - start
+
+        assert index.max_in_flight == 4
+        # 8 batches of 20 ms, 4 at a time
+        assert elapsed < 8 * 0.02
+        assert index.active("doc-a") == 0
+
+    def test_batch_size_capped_at_index_limit(self):
+        assert ChunkTombstoner(FakeSearchIndex({}), batch_size=5000).batch_size == 1000
+
+    def test_failed_documents_are_retried(self):
+        index = FakeSearchIndex({"doc-a": 100})
+        index.fail_once = {"doc-a_c000003", "doc-a_c000050"}
+
+        ChunkTombstoner(index, batch_size=40).run("doc-a")
+
+        assert index.active("doc-a") == 0
+
+    def test_persistent_failures_raise(self):
+        index = FakeSearchIndex({"doc-a": 10})
+        tombstoner = ChunkTombstoner(index, max_retries=0)
+        index.fail_once = {"doc-a_c000001"}
+
+        with pytest.raises(TombstoneError):
+            tombstoner.run("doc-a")
+
+    def test_resumes_from_checkpoint_after_crash(self):
+        index = FakeSearchIndex({"doc-a": 10_000})
+        saved: list[dict] = []
+        tombstoner = ChunkTombstoner(index, page_size=1000, batch_size=500, max_concurrency=1)
+        index.crash_after = 9
+
+        with pytest.raises(RuntimeError):
+            tombstoner.run("doc-a", on_checkpoint=lambda cp: saved.append(cp.to_dict()))
+
+        # Four full pages checkpointed before the crash in the fifth
+        last = TombstoneCheckpoint.from_dict(saved[-1])
+        assert last.pages == 4 and not last.completed
+        merges_before = len(index.merge_sizes)
+
+        index.crash_after = None
+        resumed = tombstoner.run("doc-a", last)
+
+        assert resumed.completed
+        assert resumed.tombstoned == 10_000
+        assert index.active("doc-a") == 0
+        # Only the interrupted page is merged again
+        assert len(index.merge_sizes) - merges_before == 12
+
+    def test_max_pages_bounds_one_call(self):
+        index = FakeSearchIndex({"doc-a": 3500})
+        tombstoner = ChunkTombstoner(index, page_size=1000)
+
+        checkpoint = tombstoner.run("doc-a", max_pages=2)
+        assert not checkpoint.completed
+        assert checkpoint.tombstoned == 2000
+
+        while not checkpoint.completed:
+            checkpoint = tombstoner.run("doc-a", TombstoneCheckpoint.from_dict(checkpoint.to_dict()), max_pages=2)
+
+        assert checkpoint.tombstoned == 3500
+        assert index.active("doc-a") == 0
+
+
+class SearchRequestError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class TestCheckIndex:
+    """Tests for ChunkTombstoner.check_index."""
+
+    def test_accepts_sortable_key(self):
+        assert ChunkTombstoner(FakeSearchIndex({"doc": 3})).check_index() is True
+
+    def test_rejects_legacy_index_with_rebuild_hint(self):
+        index = FakeSearchIndex({"doc": 3})
+
+        def search(**kwargs):
+            raise SearchRequestError(400)
+
+        index.search = search
+
+        with pytest.raises(TombstoneError, match="rebuilt"):
+            ChunkTombstoner(index).check_index()
+
+    def test_other_errors_propagate(self):
+        index = FakeSearchIndex({"doc": 3})
+
+        def search(**kwargs):
+            raise SearchRequestError(503)
+
+        index.search = search
+
+        with pytest.raises(SearchRequestError):
+            ChunkTombstoner(index).check_index()
@@ -0,0 +1,119 @@
+"""
+Unit tests for canary traffic routing
+
+Tests:
+- One registry refresh per expiry under concurrent requests
+- Stale routing served while the refresh runs
+- Stable, evenly spread request buckets
+"""
+
+import asyncio
+import time
+import uuid
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from src.governance.model_lifecycle import TrafficRouter, routing_bucket
+
+
+class FakeRegistry:
+    """Registry with one production and one canary version and slow reads."""
+
+    def __init__(self, latency_s: float = 0.02):
+        self.latency_s = latency_s
+        self.reads = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.production = SimpleNamespace(full_id="m:1")
+        self.canary = SimpleNamespace(full_id="m:2")
+
+    async def get_default_model(self, model_id):
+        self.reads += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency_s)
+        self.in_flight -= 1
+        return self.production
+
+    async def get_models_by_stage(self, model_id, stage):
+        await asyncio.sleep(self.latency_s)
+        return [self.canary]
+
+
+def _deployer(traffic: float) -> SimpleNamespace:
+    return SimpleNamespace(_active_canaries={
+        "dep-1": {"model_id": "m", "status": "running", "current_traffic": traffic}
+    })
+
+
+class TestTrafficRouter:
+    """Tests for TrafficRouter."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_refresh(self):
+        registry = FakeRegistry()
+        router = TrafficRouter(registry, _deployer(10))
+
+        await asyncio.gather(*[
+            router.get_model_for_request("m", "t1", str(i)) for i in range(500)
+        ])
+
+        assert registry.reads == 1
+
+    @pytest.mark.asyncio
+    async def test_one_refresh_per_expiry_without_blocking(self):
+        registry = FakeRegistry(latency_s=0.05)
+        router = TrafficRouter(registry, _deployer(10), cache_ttl_seconds=0.1)
+        await router.get_model_for_request("m", "t1", "warmup")
+
+        deadline = time.monotonic() + 0.55
+        while time.monotonic() < deadline:
+            await asyncio.gather(*[
+                router.get_model_for_request("m", "t1", str(i)) for i in range(50)
+            ])
+            await asyncio.sleep(0.005)
+
+        stats = router.get_stats()
+        # Each expiry triggers one refresh (~100 ms of registry reads),
+        # never overlapping ones, however many requests see it expired
+        assert registry.max_in_flight == 1
+        assert registry.reads >= 3
+        assert stats["loads"] == registry.reads
+        # Only the warm-up waited for the registry; expired snapshots were
+        # served stale while refreshing
+        assert stats["misses"] == 1
+        assert stats["stale_hits"] > registry.reads
+
+    @pytest.mark.asyncio
+    async def test_refresh_picks_up_traffic_change(self):
+        registry = FakeRegistry(latency_s=0)
+        deployer = _deployer(0)
+        router = TrafficRouter(registry, deployer, cache_ttl_seconds=0.01)
+        ids = [str(uuid.UUID(int=i)) for i in range(200)]
+
+        first = [await router.get_model_for_request("m", "t1", i) for i in ids]
+        deployer._active_canaries["dep-1"]["current_traffic"] = 100
+        await asyncio.sleep(0.02)
+        await router.get_model_for_request("m", "t1", "trigger")
+        await asyncio.sleep(0.01)
+        second = [await router.get_model_for_request("m", "t1", i) for i in ids]
+
+        assert all(m is registry.production for m in first)
+        assert all(m is registry.canary for m in second)
+
+
+class TestRoutingBucket:
+    """Tests for routing_bucket."""
+
+    def test_stable_and_in_range(self):
+        assert routing_bucket("req-123") == routing_bucket("req-123")
+        assert all(0 <= routing_bucket(str(i)) < 100 for i in range(1000))
+
+    def test_spread_is_even(self):
+        counts = Counter(routing_bucket(str(uuid.UUID(int=i * 7919))) for i in range(100_000))
+
+        assert len(counts) == 100
+        assert max(counts.values()) < 1.15 * 1000
+        assert min(counts.values()) > 0.85 * 1000
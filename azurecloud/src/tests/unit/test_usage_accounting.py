@@ -0,0 +1,146 @@
+"""
+Unit tests for Usage Accounting
+
+Tests:
+- Token capture from chat and embedding responses
+- Scope attribution across concurrent calls
+- Pass-through when no meter is active
+- Executor surfaces per-step and per-request usage
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.shared.usage_accounting import (
+    UsageMeter,
+    tracked_chat,
+    tracked_embedding,
+    usage_scope,
+)
+from src.agents.workflow_orchestrator import (
+    Executor,
+    ExecutionPlan,
+    Guardrails,
+    PlanStep,
+    ToolRegistry,
+    UserContext,
+)
+
+
+def _chat_response(prompt_tokens: int, completion_tokens: int, content: str = "ok"):
+    return MagicMock(
+        choices=[MagicMock(message=MagicMock(content=content))],
+        usage=MagicMock(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens),
+        model="gpt-4o",
+    )
+
+
+@pytest.fixture
+def mock_client():
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=_chat_response(100, 20))
+    client.embeddings.create = AsyncMock(return_value=MagicMock(
+        data=[MagicMock(embedding=[0.1] * 8)],
+        usage=MagicMock(prompt_tokens=12, completion_tokens=None),
+        model="text-embedding-3-large",
+    ))
+    return client
+
+
+class TestUsageMeter:
+    """Tests for UsageMeter aggregation."""
+
+    @pytest.mark.asyncio
+    async def test_passthrough_without_meter(self, mock_client):
+        """Tracked calls work and record nothing when no meter is active."""
+        response = await tracked_chat(mock_client, model="gpt-4o", messages=[])
+        assert response.choices[0].message.content == "ok"
+        assert UsageMeter.current() is None
+
+    @pytest.mark.asyncio
+    async def test_captures_tokens_and_cost(self, mock_client):
+        """Chat and embedding usage is read from the responses."""
+        meter = UsageMeter(request_id="req-1")
+        with meter.activate():
+            await tracked_chat(mock_client, model="gpt-4o", messages=[])
+            await tracked_embedding(mock_client, model="text-embedding-3-large", input="x")
+
+        totals = meter.totals()
+        assert totals.calls == 2
+        assert totals.prompt_tokens == 112
+        assert totals.completion_tokens == 20
+        assert totals.cost_usd > 0
+        assert meter.records[1].operation == "embedding"
+
+    @pytest.mark.asyncio
+    async def test_scopes_survive_gather(self, mock_client):
+        """Concurrent calls keep the scope of the task that made them."""
+        meter = UsageMeter()
+
+        async def step(name: str, calls: int):
+            with usage_scope(name):
+                for _ in range(calls):
+                    await tracked_chat(mock_client, model="gpt-4o", messages=[])
+
+        with meter.activate(), usage_scope("request"):
+            await asyncio.gather(step("step:a", 1), step("step:b", 3))
+
+        by_scope = meter.by_scope()
+        assert by_scope["step:a"].calls == 1
+        assert by_scope["step:b"].calls == 3
+        assert by_scope["request"].calls == 4
+
+    @pytest.mark.asyncio
+    async def test_queue_time_with_concurrency_limit(self, mock_client):
+        """Calls waiting on the concurrency gate report queue time."""
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.02)
+            return _chat_response(1, 1)
+
+        mock_client.chat.completions.create = slow_create
+        meter = UsageMeter(max_concurrency=1)
+        with meter.activate():
+            await asyncio.gather(*[
+                tracked_chat(mock_client, model="gpt-4o", messages=[]) for _ in range(3)
+            ])
+
+        assert max(r.queue_time_ms for r in meter.records) >= 30
+
+    @pytest.mark.asyncio
+    async def test_errors_are_recorded(self, mock_client):
+        """Failed calls are counted and re-raised."""
+        mock_client.chat.completions.create = AsyncMock(side_effect=RuntimeError("429"))
+        meter = UsageMeter()
+        with meter.activate(), pytest.raises(RuntimeError):
+            await tracked_chat(mock_client, model="gpt-4o", messages=[])
+
+        assert meter.totals().errors == 1
+
+
+class TestExecutorUsage:
+    """Usage surfaces in ExecutionResult."""
+
+    @pytest.mark.asyncio
+    async def test_execution_result_usage(self, mock_client):
+        registry = ToolRegistry()
+        executor = Executor(mock_client, registry, Guardrails(registry))
+        plan = ExecutionPlan(
+            plan_id="plan-1",
+            goal="answer",
+            steps=[
+                PlanStep(step_id="analyze", action="analyze"),
+                PlanStep(step_id="respond", action="respond", depends_on=["analyze"]),
+            ],
+        )
+
+        result = await executor.execute(
+            plan, UserContext(user_id="u", tenant_id="t")
+        )
+
+        assert result.answer == "ok"
+        assert result.usage["total"]["calls"] == 2
+        assert result.usage["by_scope"]["step:respond"]["prompt_tokens"] == 100
+        assert plan.steps[0].usage["calls"] == 1
+        assert result.cost_estimate_usd == pytest.approx(result.usage["total"]["cost_usd"])
@@ -0,0 +1,141 @@
+"""
+Unit tests for the worker-scoped resource registry
+
+Tests:
+- Clients built once per worker across many activity invocations
+- Concurrent first use builds once
+- Broken connections rebuild the client and retry once
+- Rebuild after fork
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.ingestion import worker_resources as worker_resources_module
+from src.ingestion.worker_resources import ResourceRegistry
+
+
+class StubClient:
+    """Stands in for an SDK client; counts constructions."""
+
+    built = 0
+
+    def __init__(self, fail_times: int = 0):
+        type(self).built += 1
+        self.fail_times = fail_times
+        self.calls = 0
+        self.closed = False
+
+    def upload(self, batch):
+        self.calls += 1
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError("connection reset by peer")
+        return len(batch)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def reset_counter():
+    StubClient.built = 0
+
+
+class TestResourceRegistry:
+    """Tests for ResourceRegistry."""
+
+    @pytest.mark.asyncio
+    async def test_built_once_per_worker_not_per_document(self):
+        registry = ResourceRegistry()
+
+        async def index_activity(doc: int) -> int:
+            # What each activity invocation does: fetch the shared client, use it
+            return registry.run("search", StubClient, lambda c: c.upload([doc] * 3))
+
+        results = await asyncio.gather(*(index_activity(doc) for doc in range(200)))
+
+        assert results == [3] * 200
+        assert StubClient.built == 1
+        assert registry.get_stats()["builds"] == {"search": 1}
+        assert registry.get_stats()["hits"] == 199
+
+    def test_concurrent_first_use_builds_once(self):
+        registry = ResourceRegistry()
+
+        def slow_factory():
+            time.sleep(0.05)
+            return StubClient()
+
+        seen = []
+        threads = [
+            threading.Thread(target=lambda: seen.append(registry.get("openai", slow_factory)))
+            for _ in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert StubClient.built == 1
+        assert all(client is seen[0] for client in seen)
+
+    def test_independent_resources(self):
+        registry = ResourceRegistry()
+
+        search = registry.get("search", StubClient)
+        cosmos = registry.get("cosmos", StubClient)
+
+        assert search is not cosmos
+        assert "search" in registry and "cosmos" in registry
+
+    def test_broken_connection_rebuilds_and_retries(self):
+        registry = ResourceRegistry()
+        broken = registry.get("search", lambda: StubClient(fail_times=1))
+
+        assert registry.run("search", StubClient, lambda c: c.upload([1])) == 1
+
+        healthy = registry.get("search", StubClient)
+        assert healthy is not broken
+        assert StubClient.built == 2
+        assert registry.get_stats()["rebuilds"] == 1
+
+    def test_other_errors_propagate_without_rebuild(self):
+        registry = ResourceRegistry()
+        client = registry.get("search", StubClient)
+
+        with pytest.raises(KeyError):
+            registry.run("search", StubClient, lambda c: {}["missing"])
+
+        assert registry.get("search", StubClient) is client
+
+    def test_stale_invalidate_is_ignored(self):
+        registry = ResourceRegistry()
+        old = registry.get("search", StubClient)
+        registry.invalidate("search", old)
+        new = registry.get("search", StubClient)
+
+        # A second caller recovering from the same failure keeps the new client
+        assert registry.invalidate("search", old) is False
+        assert registry.get("search", StubClient) is new
+
+    def test_rebuilds_after_fork(self, monkeypatch):
+        registry = ResourceRegistry()
+        parent = registry.get("cosmos", StubClient)
+
+        monkeypatch.setattr(worker_resources_module.os, "getpid", lambda: -1)
+
+        assert registry.get("cosmos", StubClient) is not parent
+        assert StubClient.built == 2
+
+    def test_clear_closes_resources(self):
+        registry = ResourceRegistry()
+        client = registry.get("search", StubClient)
+
+        registry.clear()
+
+        assert client.closed
+        assert "search" not in registry